@@ -1,4 +1,5 @@
 import os
+import threading
 import streamlit as st
 from dotenv import load_dotenv
 
@@ -11,8 +12,11 @@ load_dotenv()
 from src.config import get_secret, is_streamlit_cloud
 from src.constants import ASSESSMENT_AREAS, DIFFICULTY_LEVELS, QUESTION_TYPES
 from src.services.edge_client import EdgeDBClient
+from src.services.resilient_client import ResilientDBClient
 from src.services.ai_generator import AIQuestionGenerator
 from src.services.hitl import HITLManager
+from src.services.job_runner import get_job_runner
+from src.services.prompt_cache import get_prompt_cache
 
 from src.ui.tabs.tab_overview import render as render_overview
 from src.ui.tabs.tab_create import render as render_create
@@ -51,9 +55,10 @@ def init_state():
     }
 
     try:
-        st.session_state.db = EdgeDBClient(base_url=edge_url, token=edge_token, supabase_anon=supabase_key) \
-                             if (edge_url and edge_token) else None
-        st.session_state["_edge_init_ok"] = st.session_state.db is not None
+        # Edge 연결 실패 시에도 로컬 복제본(읽기) + outbox(쓰기)로 계속 동작
+        connect = lambda: EdgeDBClient(base_url=edge_url, token=edge_token, supabase_anon=supabase_key)
+        st.session_state.db = ResilientDBClient(connect) if (edge_url and edge_token) else None
+        st.session_state["_edge_init_ok"] = st.session_state.db is not None and st.session_state.db.online
     except Exception:
         st.session_state.db = None
         st.session_state["_edge_init_ok"] = False
@@ -66,11 +71,20 @@ def init_state():
 
     st.session_state.hitl = HITLManager(st.session_state.db)
 
+    # 프롬프트 캐시 미리 채우기 (첫 문제 생성이 프롬프트 조회를 기다리지 않도록 백그라운드에서)
+    if st.session_state.db is not None:
+        threading.Thread(target=get_prompt_cache().warm, args=(st.session_state.db,), daemon=True).start()
+
+    # 백그라운드 작업 실행기 시작 (재시작 전에 끝나지 않은 자동생성 작업은 이어서 실행)
+    try:
+        get_job_runner().attach(st.session_state.db)
+    except Exception:
+        pass
+
     # 기타 selectbox 방어용 상태
-    st.session_state.setdefault("auto_generate_running", False)
-    st.session_state.setdefault("auto_generate_stop_requested", False)
-    st.session_state.setdefault("auto_generated_questions", [])
+    st.session_state.setdefault("auto_generate_job_id", None)
     st.session_state.setdefault("auto_generate_total_count", 5)
+    st.session_state.setdefault("auto_generate_concurrency", 4)
 
     st.session_state["initialized"] = True
 
@@ -81,6 +95,13 @@ header = st.container()
 with header:
     st.title("🤖 AI 활용능력평가 문제생성 에이전트 v2.0")
     st.caption("QLearn 문제 출제 에이젼트-내부용")
+    # Edge 장애 시 오프라인 모드 안내 (읽기는 로컬 복제본, 쓰기는 outbox 보관 후 복구 시 재전송)
+    if st.session_state.db is not None and not st.session_state.db.online:
+        db_status = st.session_state.db.status()
+        st.warning(
+            f"⚠️ 오프라인 모드: Edge Function에 연결할 수 없어 로컬 데이터로 동작 중입니다. "
+            f"(전송 대기 중인 저장: {db_status['pending_writes']}건)"
+        )
 
 # 디버그 정보는 프로덕션에서 숨김
 # with st.sidebar:
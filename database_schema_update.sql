@@ -56,6 +56,14 @@ ON public.questions_multiple_choice USING btree (difficulty) TABLESPACE pg_defau
 CREATE INDEX IF NOT EXISTS idx_questions_multiple_choice_created_at 
 ON public.questions_multiple_choice USING btree (created_at DESC) TABLESPACE pg_default;
 
+-- 키셋 페이지네이션 (created_at, id) 커서용 인덱스
+CREATE INDEX IF NOT EXISTS idx_questions_multiple_choice_created_at_id 
+ON public.questions_multiple_choice USING btree (created_at DESC, id DESC) TABLESPACE pg_default;
+
+-- 데이터 버전 조회 / changed_since delta 동기화용
+CREATE INDEX IF NOT EXISTS idx_questions_multiple_choice_updated_at 
+ON public.questions_multiple_choice USING btree (updated_at DESC) TABLESPACE pg_default;
+
 -- 텍스트 검색을 위한 인덱스 (pg_trgm 확장이 필요한 경우)
 -- CREATE INDEX IF NOT EXISTS idx_questions_multiple_choice_title_trgm 
 -- ON public.questions_multiple_choice USING gin (problem_title gin_trgm_ops) TABLESPACE pg_default;
@@ -121,6 +129,14 @@ ON public.questions_subjective USING btree (difficulty) TABLESPACE pg_default;
 CREATE INDEX IF NOT EXISTS questions_subjective_created_at_idx 
 ON public.questions_subjective USING btree (created_at DESC) TABLESPACE pg_default;
 
+-- 키셋 페이지네이션 (created_at, id) 커서용 인덱스
+CREATE INDEX IF NOT EXISTS questions_subjective_created_at_id_idx 
+ON public.questions_subjective USING btree (created_at DESC, id DESC) TABLESPACE pg_default;
+
+-- 데이터 버전 조회 / changed_since delta 동기화용
+CREATE INDEX IF NOT EXISTS questions_subjective_updated_at_idx 
+ON public.questions_subjective USING btree (updated_at DESC) TABLESPACE pg_default;
+
 -- review_done은 question_status 테이블에 있으므로 제거
 -- CREATE INDEX IF NOT EXISTS questions_subjective_review_done_idx 
 -- ON public.questions_subjective USING btree (review_done) TABLESPACE pg_default;
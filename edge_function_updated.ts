@@ -47,92 +47,12 @@ serve(async (req) => {
       Deno.env.get('SUPABASE_ANON_KEY') ?? ''
     );
 
-    switch (action) {
-      case 'save_question':
-        return await saveQuestion(supabaseClient, params);
-      case 'get_questions':
-        return await getQuestions(supabaseClient, params);
-      case 'save_multiple_choice_question':
-        return await saveMultipleChoiceQuestion(supabaseClient, params);
-      case 'save_subjective_question':
-        return await saveSubjectiveQuestion(supabaseClient, params);
-      case 'get_multiple_choice_questions':
-        return await getMultipleChoiceQuestions(supabaseClient, params);
-      case 'get_subjective_questions':
-        return await getSubjectiveQuestions(supabaseClient, params);
-      case 'update_multiple_choice_question':
-        return await updateMultipleChoiceQuestion(supabaseClient, params);
-      case 'update_subjective_question':
-        return await updateSubjectiveQuestion(supabaseClient, params);
-      case 'get_question_status':
-        return await getQuestionStatus(supabaseClient, params);
-      case 'update_question_status':
-        return await updateQuestionStatus(supabaseClient, params);
-      case 'get_prompts':
-        return await getPrompts(supabaseClient, params);
-      case 'save_feedback':
-        return await saveFeedback(supabaseClient, params);
-      case 'get_feedback':
-        return await getFeedback(supabaseClient, params);
-      case 'get_feedback_stats':
-        return await getFeedbackStats(supabaseClient, params);
-      case 'adjust_difficulty':
-        return await adjustDifficulty(supabaseClient, params);
-      case 'count_feedback':
-        return await countFeedback(supabaseClient);
-      case 'count_adjustments':
-        return await countAdjustments(supabaseClient);
-      case 'reset_database':
-        return await resetDatabase(supabaseClient);
-      case 'get_prompt_by_id':
-        return await getPromptById(supabaseClient, params);
-      // 새로 추가된 액션들
-      case 'save_qlearn_problem':
-        return await saveQlearnProblem(supabaseClient, params);
-      case 'get_qlearn_problems':
-        return await getQlearnProblems(supabaseClient, params);
-      case 'update_qlearn_problem':
-        return await updateQlearnProblem(supabaseClient, params);
-      case 'update_question_review_done':
-        return await updateQuestionReviewDone(supabaseClient, params);
-      // 번역 관련 액션들 (함수 정의 필요)
-      // case 'save_qlearn_problem_en':
-      //   return await saveQlearnProblemEn(supabaseClient, params);
-      // case 'get_qlearn_problems_en':
-      //   return await getQlearnProblemsEn(supabaseClient, params);
-      // is_en 필드가 제거되어 해당 액션 제거
-      // case 'update_qlearn_problem_is_en':
-      //   return await updateQlearnProblemIsEn(supabaseClient, params);
-      case 'get_multiple_choice_question_by_id':
-        return await getMultipleChoiceQuestionById(supabaseClient, params);
-      case 'get_questions_data_version':
-        return await getQuestionsDataVersion(supabaseClient);
-      // 번역 관련 액션들
-      case 'get_problems_for_translation':
-        return await getProblemsForTranslation(supabaseClient, params);
-      case 'save_i18n_problem':
-        return await saveI18nProblem(supabaseClient, params);
-      case 'get_i18n_problems':
-        return await getI18nProblems(supabaseClient, params);
-      // qlearn_problems_multiple 테이블 관련 액션들
-      case 'save_qlearn_problem_multiple':
-        return await saveQlearnProblemMultiple(supabaseClient, params);
-      case 'get_qlearn_problems_multiple':
-        return await getQlearnProblemsMultiple(supabaseClient, params);
-      case 'update_qlearn_problem_multiple':
-        return await updateQlearnProblemMultiple(supabaseClient, params);
-      default:
-        return new Response(JSON.stringify({
-          ok: false,
-          error: 'Unknown action'
-        }), {
-          status: 400,
-          headers: {
-            ...corsHeaders,
-            'Content-Type': 'application/json'
-          }
-        });
+    // 여러 액션을 한 번의 요청으로 처리
+    if (action === 'batch') {
+      return await executeBatch(supabaseClient, params);
     }
+
+    return await dispatchAction(supabaseClient, action, params);
   } catch (error) {
     console.error('Edge Function Error:', error);
     return new Response(JSON.stringify({
@@ -148,6 +68,198 @@ serve(async (req) => {
   }
 });
 
+// 액션 이름으로 처리 함수 호출 (단건 요청과 batch 요청이 공유)
+async function dispatchAction(supabaseClient, action, params) {
+  switch (action) {
+    case 'save_question':
+      return await saveQuestion(supabaseClient, params);
+    case 'get_questions':
+      return await getQuestions(supabaseClient, params);
+    case 'save_multiple_choice_question':
+      return await saveMultipleChoiceQuestion(supabaseClient, params);
+    case 'save_subjective_question':
+      return await saveSubjectiveQuestion(supabaseClient, params);
+    case 'get_multiple_choice_questions':
+      return await getMultipleChoiceQuestions(supabaseClient, params);
+    case 'get_subjective_questions':
+      return await getSubjectiveQuestions(supabaseClient, params);
+    case 'update_multiple_choice_question':
+      return await updateMultipleChoiceQuestion(supabaseClient, params);
+    case 'update_subjective_question':
+      return await updateSubjectiveQuestion(supabaseClient, params);
+    case 'get_question_status':
+      return await getQuestionStatus(supabaseClient, params);
+    case 'update_question_status':
+      return await updateQuestionStatus(supabaseClient, params);
+    case 'get_prompts':
+      return await getPrompts(supabaseClient, params);
+    case 'save_feedback':
+      return await saveFeedback(supabaseClient, params);
+    case 'get_feedback':
+      return await getFeedback(supabaseClient, params);
+    case 'get_feedback_stats':
+      return await getFeedbackStats(supabaseClient, params);
+    case 'adjust_difficulty':
+      return await adjustDifficulty(supabaseClient, params);
+    case 'count_feedback':
+      return await countFeedback(supabaseClient);
+    case 'count_adjustments':
+      return await countAdjustments(supabaseClient);
+    case 'reset_database':
+      return await resetDatabase(supabaseClient);
+    case 'get_prompt_by_id':
+      return await getPromptById(supabaseClient, params);
+    // 새로 추가된 액션들
+    case 'save_qlearn_problem':
+      return await saveQlearnProblem(supabaseClient, params);
+    case 'get_qlearn_problems':
+      return await getQlearnProblems(supabaseClient, params);
+    case 'update_qlearn_problem':
+      return await updateQlearnProblem(supabaseClient, params);
+    case 'update_question_review_done':
+      return await updateQuestionReviewDone(supabaseClient, params);
+    // 번역 관련 액션들 (함수 정의 필요)
+    // case 'save_qlearn_problem_en':
+    //   return await saveQlearnProblemEn(supabaseClient, params);
+    // case 'get_qlearn_problems_en':
+    //   return await getQlearnProblemsEn(supabaseClient, params);
+    // is_en 필드가 제거되어 해당 액션 제거
+    // case 'update_qlearn_problem_is_en':
+    //   return await updateQlearnProblemIsEn(supabaseClient, params);
+    case 'get_multiple_choice_question_by_id':
+      return await getMultipleChoiceQuestionById(supabaseClient, params);
+    case 'get_questions_data_version':
+      return await getQuestionsDataVersion(supabaseClient);
+    // 번역 관련 액션들
+    case 'get_problems_for_translation':
+      return await getProblemsForTranslation(supabaseClient, params);
+    case 'save_i18n_problem':
+      return await saveI18nProblem(supabaseClient, params);
+    case 'get_i18n_problems':
+      return await getI18nProblems(supabaseClient, params);
+    // qlearn_problems_multiple 테이블 관련 액션들
+    case 'save_qlearn_problem_multiple':
+      return await saveQlearnProblemMultiple(supabaseClient, params);
+    case 'get_qlearn_problems_multiple':
+      return await getQlearnProblemsMultiple(supabaseClient, params);
+    case 'update_qlearn_problem_multiple':
+      return await updateQlearnProblemMultiple(supabaseClient, params);
+    default:
+      return new Response(JSON.stringify({
+        ok: false,
+        error: 'Unknown action'
+      }), {
+        status: 400,
+        headers: {
+          ...corsHeaders,
+          'Content-Type': 'application/json'
+        }
+      });
+  }
+}
+
+// batch 액션: { actions: [{ action, params }], parallel?: boolean }
+// 항목별 결과(ok/data/error)를 요청 순서대로 반환
+const MAX_BATCH_SIZE = 100;
+
+async function executeBatch(supabaseClient, params) {
+  try {
+    const actions = Array.isArray(params?.actions) ? params.actions : null;
+
+    if (!actions) {
+      return new Response(JSON.stringify({
+        ok: false,
+        error: "actions array is required"
+      }), {
+        status: 400,
+        headers: {
+          ...corsHeaders,
+          'Content-Type': 'application/json'
+        }
+      });
+    }
+
+    if (actions.length > MAX_BATCH_SIZE) {
+      return new Response(JSON.stringify({
+        ok: false,
+        error: `batch size exceeds ${MAX_BATCH_SIZE}`
+      }), {
+        status: 400,
+        headers: {
+          ...corsHeaders,
+          'Content-Type': 'application/json'
+        }
+      });
+    }
+
+    const runItem = async (item, index) => {
+      const itemAction = item?.action;
+      if (!itemAction || itemAction === 'batch') {
+        return {
+          index,
+          action: itemAction ?? null,
+          status: 400,
+          ok: false,
+          data: null,
+          error: itemAction ? 'nested batch is not allowed' : 'action is required'
+        };
+      }
+      try {
+        const response = await dispatchAction(supabaseClient, itemAction, item.params ?? {});
+        const body = await response.json();
+        return {
+          index,
+          action: itemAction,
+          status: response.status,
+          ...body,
+          ok: response.ok && body.ok === true
+        };
+      } catch (error) {
+        return {
+          index,
+          action: itemAction,
+          status: 500,
+          ok: false,
+          data: null,
+          error: error.message
+        };
+      }
+    };
+
+    // 기본은 순차 실행 (쓰기 순서 보장), parallel=true면 동시 실행
+    let results = [];
+    if (params.parallel === true) {
+      results = await Promise.all(actions.map((item, index) => runItem(item, index)));
+    } else {
+      for (let i = 0; i < actions.length; i++) {
+        results.push(await runItem(actions[i], i));
+      }
+    }
+
+    return new Response(JSON.stringify({
+      ok: true,
+      data: results
+    }), {
+      headers: {
+        ...corsHeaders,
+        'Content-Type': 'application/json'
+      }
+    });
+  } catch (error) {
+    console.error('Batch error:', error);
+    return new Response(JSON.stringify({
+      ok: false,
+      error: error.message
+    }), {
+      status: 500,
+      headers: {
+        ...corsHeaders,
+        'Content-Type': 'application/json'
+      }
+    });
+  }
+}
+
 // 새로 추가된 함수들
 
 // qlearn_problems 테이블에 문제 저장
@@ -954,12 +1066,85 @@ async function saveSubjectiveQuestion(supabaseClient, params) {
   }
 }
 
+// 키셋 페이지네이션 헬퍼 (created_at DESC, id DESC 정렬 기준)
+// filters.limit이 있으면 한 페이지만 조회하고 next_cursor({ created_at, id })를 함께 반환
+const MAX_PAGE_SIZE = 1000;
+
+function parsePageLimit(limit) {
+  const n = Number(limit);
+  if (!Number.isFinite(n) || n <= 0) {
+    return null;
+  }
+  return Math.min(Math.floor(n), MAX_PAGE_SIZE);
+}
+
+function applyKeysetPage(query, filters, pageLimit) {
+  const cursor = filters.cursor;
+  if (pageLimit && cursor && cursor.created_at && cursor.id) {
+    const createdAt = `"${cursor.created_at}"`;
+    const id = `"${cursor.id}"`;
+    query = query.or(`created_at.lt.${createdAt},and(created_at.eq.${createdAt},id.lt.${id})`);
+  }
+  query = query.order('created_at', { ascending: false }).order('id', { ascending: false });
+  if (pageLimit) {
+    // 다음 페이지 존재 여부 확인을 위해 1건 더 조회
+    query = query.limit(pageLimit + 1);
+  }
+  return query;
+}
+
+function splitKeysetPage(rows, pageLimit) {
+  const list = rows || [];
+  if (!pageLimit || list.length <= pageLimit) {
+    return { rows: list, next_cursor: null };
+  }
+  const pageRows = list.slice(0, pageLimit);
+  const last = pageRows[pageRows.length - 1];
+  return { rows: pageRows, next_cursor: { created_at: last.created_at, id: last.id } };
+}
+
+// 목록 조회 컬럼 프로젝션 (filters.fields)
+// 목록 화면은 요약 컬럼만 받고, 문제를 선택했을 때 전체 레코드를 조회
+const MULTIPLE_CHOICE_COLUMNS = [
+  'id', 'lang', 'category', 'problem_title', 'difficulty', 'estimated_time', 'scenario', 'steps',
+  'created_by', 'created_at', 'updated_at', 'image_url', 'active', 'topic_summary'
+];
+const SUBJECTIVE_COLUMNS = [
+  'id', 'lang', 'category', 'topic', 'difficulty', 'time_limit', 'topic_summary', 'title', 'scenario',
+  'goal', 'first_question', 'requirements', 'constraints', 'guide', 'evaluation', 'task',
+  'created_by', 'created_at', 'updated_at', 'reference', 'active'
+];
+
+function parseFields(fields, allowedColumns) {
+  if (!Array.isArray(fields) || fields.length === 0) {
+    return null;
+  }
+  const columns = fields.filter((f) => allowedColumns.includes(f));
+  // 키셋 커서와 question_status 병합에 필요한 컬럼은 항상 포함
+  for (const required of ['id', 'created_at']) {
+    if (!columns.includes(required)) columns.push(required);
+  }
+  return columns;
+}
+
+function pickFields(item, columns) {
+  if (!columns) {
+    return item;
+  }
+  const picked = { question_status: item.question_status };
+  for (const column of columns) {
+    picked[column] = item[column];
+  }
+  return picked;
+}
+
 // 객관식 문제 조회
 async function getMultipleChoiceQuestions(supabaseClient, filters = {}) {
   try {
     console.log('Getting multiple choice questions with filters:', filters);
     
-    let query = supabaseClient.from('questions_multiple_choice').select('*');
+    const columns = parseFields(filters.fields, MULTIPLE_CHOICE_COLUMNS);
+    let query = supabaseClient.from('questions_multiple_choice').select(columns ? columns.join(',') : '*');
     
     // 필터 적용
     if (filters.id) query = query.eq('id', filters.id);
@@ -967,17 +1152,22 @@ async function getMultipleChoiceQuestions(supabaseClient, filters = {}) {
     if (filters.difficulty) query = query.eq('difficulty', filters.difficulty);
     if (filters.lang) query = query.eq('lang', filters.lang);
     if (filters.active !== undefined) query = query.eq('active', filters.active);
+    // delta 동기화: 이후 변경된 행만 조회 (소프트 삭제 반영을 위해 active 필터와 별개로 동작)
+    if (filters.changed_since) query = query.gt('updated_at', filters.changed_since);
     // review_done, translation_done, ai_generated 필터는 question_status 테이블에서 별도로 처리
 
-    const { data, error } = await query.order('created_at', {
-      ascending: false
-    });
+    const pageLimit = parsePageLimit(filters.limit);
+    query = applyKeysetPage(query, filters, pageLimit);
+
+    const { data: rawData, error } = await query;
 
     if (error) {
       console.error('Supabase select error:', error);
       throw error;
     }
 
+    const { rows: data, next_cursor } = splitKeysetPage(rawData, pageLimit);
+
     // question_status 정보를 별도로 조회하여 병합
     let statusMap = {};
     if (data && data.length > 0) {
@@ -1032,11 +1222,13 @@ async function getMultipleChoiceQuestions(supabaseClient, filters = {}) {
           return statusMap[item.id] !== undefined;
         }
         return true;
-      });
+      })
+      .map((item) => pickFields(item, columns));
 
     return new Response(JSON.stringify({
       ok: true,
-      data: transformedData
+      data: transformedData,
+      next_cursor
     }), {
       headers: {
         ...corsHeaders,
@@ -1063,7 +1255,8 @@ async function getSubjectiveQuestions(supabaseClient, filters = {}) {
   try {
     console.log('Getting subjective questions with filters:', filters);
     
-    let query = supabaseClient.from('questions_subjective').select('*');
+    const columns = parseFields(filters.fields, SUBJECTIVE_COLUMNS);
+    let query = supabaseClient.from('questions_subjective').select(columns ? columns.join(',') : '*');
     
     // 필터 적용
     if (filters.id) query = query.eq('id', filters.id);
@@ -1072,6 +1265,8 @@ async function getSubjectiveQuestions(supabaseClient, filters = {}) {
     if (filters.topic) query = query.eq('topic', filters.topic);
     if (filters.lang) query = query.eq('lang', filters.lang);
     if (filters.active !== undefined) query = query.eq('active', filters.active);
+    // delta 동기화: 이후 변경된 행만 조회 (소프트 삭제 반영을 위해 active 필터와 별개로 동작)
+    if (filters.changed_since) query = query.gt('updated_at', filters.changed_since);
     // review_done, translation_done, ai_generated 필터는 question_status 테이블에서 별도로 처리
     // is_en 필드가 제거되어 필터링 로직 제거
     // if (filters.is_en !== undefined) {
@@ -1084,15 +1279,18 @@ async function getSubjectiveQuestions(supabaseClient, filters = {}) {
     //   }
     // }
 
-    const { data, error } = await query.order('created_at', {
-      ascending: false
-    });
+    const pageLimit = parsePageLimit(filters.limit);
+    query = applyKeysetPage(query, filters, pageLimit);
+
+    const { data: rawData, error } = await query;
 
     if (error) {
       console.error('Supabase select error:', error);
       throw error;
     }
 
+    const { rows: data, next_cursor } = splitKeysetPage(rawData, pageLimit);
+
     // question_status 정보를 별도로 조회하여 병합
     let statusMap = {};
     if (data && data.length > 0) {
@@ -1154,11 +1352,13 @@ async function getSubjectiveQuestions(supabaseClient, filters = {}) {
           return statusMap[item.id] !== undefined;
         }
         return true;
-      });
+      })
+      .map((item) => pickFields(item, columns));
 
     return new Response(JSON.stringify({
       ok: true,
-      data: transformedData
+      data: transformedData,
+      next_cursor
     }), {
       headers: {
         ...corsHeaders,
@@ -0,0 +1,320 @@
+"""
+헤드리스 CLI (브라우저 없이 대량 생성/교정/번역)
+
+사용 예)
+    python -m src.cli generate  --specs specs.json --output generated.jsonl --concurrency 4 --save
+    python -m src.cli correct   --specs ids.jsonl  --output corrected.jsonl --concurrency 3 --save
+    python -m src.cli translate --specs ids.jsonl  --output translated.jsonl --concurrency 3 --save
+    python -m src.cli batch     correction-1a2b3c4d5e6f7a8b --format csv --output ledger.csv
+
+specs 파일은 JSON 배열 또는 JSONL (한 줄에 객체 하나)
+- generate : {"area": "life"|"랜덤", "difficulty": "normal"|"랜덤", "question_type": "subjective"|"랜덤",
+              "count": 10, "additional_requirements": "..."}  (count 만큼 생성)
+- correct  : {"id": "...", "question_type": "subjective"|"multiple_choice"} 또는 문제 레코드 전체
+- translate: {"id": "..."} 또는 문제 레코드 전체 (get_problems_for_translation 결과 등)
+
+결과는 완료되는 순서대로 --output JSONL에 한 줄씩 기록하고, 진행 상황은 stderr에 출력합니다.
+--save를 주지 않으면 DB에는 쓰지 않습니다 (프롬프트/문제 조회에만 DB 사용).
+
+correct / translate는 배치 체크포인트에 문제별 결과를 기록합니다. 같은 spec 파일(또는 같은 --batch-id)로
+다시 실행하면 이미 성공한 문제는 건너뛰고 실패/미처리 문제만 처리합니다 (--no-checkpoint로 끌 수 있음).
+같은 spec 파일의 배치가 이미 모두 끝났다면 새 배치로 처음부터 다시 처리합니다.
+batch 명령은 배치 처리 내역(ledger)을 CSV/JSONL로 내보내고, 배치 id를 생략하면 최근 배치 목록을 출력합니다.
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+import threading
+import time
+
+from src.config import get_secret
+from src.services.service_context import ServiceContext
+
+
+def _quiet_streamlit():
+    # st.secrets 조회 등 스크립트 컨텍스트 없이 streamlit을 쓰는 곳에서 나오는 경고 로그를 끔
+    import streamlit.runtime.scriptrunner  # noqa: F401 (관련 로거 생성)
+    for name in list(logging.root.manager.loggerDict):
+        if name.startswith("streamlit"):
+            logging.getLogger(name).setLevel(logging.ERROR)
+
+
+def load_specs(path: str) -> list[dict]:
+    """JSON 배열 또는 JSONL 파일을 읽어 객체 목록으로 반환"""
+    with open(path, encoding="utf-8") as f:
+        text = f.read().strip()
+    if not text:
+        return []
+    if text.startswith("["):
+        return json.loads(text)
+    return [json.loads(line) for line in text.splitlines() if line.strip()]
+
+
+def connect_db():
+    """환경변수/시크릿으로 EdgeDBClient 생성 (설정이 없으면 None)"""
+    from src.services.edge_client import EdgeDBClient
+    edge_url = get_secret("EDGE_FUNCTION_URL") or os.getenv("EDGE_FUNCTION_URL")
+    edge_token = get_secret("EDGE_SHARED_TOKEN") or os.getenv("EDGE_SHARED_TOKEN")
+    supabase_key = get_secret("SUPABASE_ANON_KEY") or os.getenv("SUPABASE_ANON_KEY")
+    if not (edge_url and edge_token):
+        return None
+    return EdgeDBClient(base_url=edge_url, token=edge_token, supabase_anon=supabase_key)
+
+
+class JsonlWriter:
+    """여러 워커 스레드에서 결과를 한 줄씩 기록 (stdout 또는 파일)"""
+
+    def __init__(self, path: str | None):
+        self._file = open(path, "a", encoding="utf-8") if path and path != "-" else sys.stdout
+        self._lock = threading.Lock()
+        self.ok = 0
+        self.failed = 0
+
+    def write(self, record: dict):
+        with self._lock:
+            if record.get("ok"):
+                self.ok += 1
+            else:
+                self.failed += 1
+            self._file.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+            self._file.flush()
+
+    def close(self):
+        if self._file is not sys.stdout:
+            self._file.close()
+
+
+# 이 키들만 있는 spec은 문제 레코드가 아닌 조회 요청으로 간주
+ID_ONLY_KEYS = {"id", "question_type", "type"}
+
+
+def _fetch_question(db, item: dict, default_type: str) -> dict:
+    """id만 있는 항목이면 DB에서 전체 레코드를 조회"""
+    if db is None or not set(item) <= ID_ONLY_KEYS:
+        return item
+    question_type = item.get("question_type") or item.get("type") or default_type
+    question = db.get_question_by_id(item["id"], question_type)
+    if not question:
+        raise RuntimeError(f"문제를 찾을 수 없습니다: {item['id']}")
+    question.setdefault("question_type", question_type)
+    return question
+
+
+def cmd_generate(args, db) -> int:
+    from src.services.ai_generator import AIQuestionGenerator
+    from src.services.job_runner import resolve_generation_spec
+
+    specs = []
+    for entry in load_specs(args.specs):
+        for _ in range(int(entry.get("count", 1))):
+            specs.append(resolve_generation_spec(entry.get("area", "랜덤"), entry.get("difficulty", "랜덤"),
+                                                 entry.get("question_type", "랜덤"),
+                                                 entry.get("additional_requirements", "")))
+    if args.cache_tag:
+        # 같은 태그로 다시 실행하면 이미 받은 응답을 재사용 (API 호출 없음)
+        for index, spec in enumerate(specs):
+            spec["cache_variant"] = f"cli:{args.cache_tag}:{index}"
+    if not specs:
+        print("생성할 spec이 없습니다.", file=sys.stderr)
+        return 1
+
+    generator = AIQuestionGenerator()
+    writer = JsonlWriter(args.output)
+    started = time.monotonic()
+    try:
+        context = ServiceContext(model=args.model, db=db, tags={"tab": "cli"})
+        for done, item in enumerate(generator.generate_batch(specs, concurrency=args.concurrency, context=context), 1):
+            record = {"index": item["index"], "spec": item["spec"], "ok": bool(item["question"])}
+            if item["question"]:
+                question = item["question"]
+                if args.save and db is not None:
+                    # 저장 하나가 실패해도 이미 생성된 나머지 결과는 계속 기록 (실패로 집계)
+                    try:
+                        if question.get("type") == "multiple_choice":
+                            record["saved"] = bool(db.save_multiple_choice_question(question))
+                        else:
+                            record["saved"] = bool(db.save_subjective_question(question))
+                    except Exception as e:
+                        record["saved"] = False
+                        record["save_error"] = str(e) or type(e).__name__
+                    if not record["saved"]:
+                        record["ok"] = False
+                        record["error"] = f"[save] {record.get('save_error', '저장 실패 (응답 없음)')}"
+                record["question"] = question
+            else:
+                record["error"] = item["error"]
+            writer.write(record)
+            print(f"[generate] {done}/{len(specs)} {'✅' if record['ok'] else '❌ ' + str(record['error'])}",
+                  file=sys.stderr)
+    finally:
+        writer.close()
+    print(f"[generate] 완료: 성공 {writer.ok}, 실패 {writer.failed}, 소요 {time.monotonic() - started:.1f}초",
+          file=sys.stderr)
+    return 0 if writer.failed == 0 else 2
+
+
+def cmd_correct(args, db) -> int:
+    from src.services.batch_checkpoint import get_checkpoint_store
+    from src.services.correction_pipeline import RESULT_CANCELLED, RESULT_FAILED, RESULT_SKIPPED, BatchCorrector
+    from src.services.problem_correction_service import ProblemCorrectionService
+
+    context = ServiceContext(tags={"tab": "cli"})
+    service = ProblemCorrectionService(context)
+    if not service.is_available():
+        print(f"교정 서비스를 사용할 수 없습니다: {service.initialization_error}", file=sys.stderr)
+        return 1
+
+    writer = JsonlWriter(args.output)
+    specs = load_specs(args.specs)
+    total = len(specs)
+
+    def _write(detail, item):
+        if detail["status"] == RESULT_SKIPPED:
+            return
+        ok = detail["status"] not in (RESULT_FAILED, RESULT_CANCELLED)
+        record = {"index": detail["index"], "ok": ok, "id": detail["question_id"], "elapsed": detail["elapsed"]}
+        if ok:
+            record["corrected"] = item.mapped
+            if args.save and db is not None:
+                record["saved"] = True
+                record["status_updated"] = detail["status"] == "success"
+        else:
+            record["error"] = f"[{detail['stage']}] {detail['message']}"
+        writer.write(record)
+        status = "✅" if ok else f"❌ {record['error']}"
+        print(f"[correct] {writer.ok + writer.failed}/{total} {status}", file=sys.stderr)
+
+    corrector = BatchCorrector(
+        service, db, concurrency=args.concurrency, save=args.save, context=context,
+        fetch=lambda item: _fetch_question(db, item, "subjective"), on_result=_write,
+        checkpoint=None if args.no_checkpoint else get_checkpoint_store(), batch_id=args.batch_id,
+    )
+    try:
+        report = corrector.run(specs)
+    finally:
+        writer.close()
+    stages = ", ".join(f"{name} {stats['busy']}초" for name, stats in report["stages"].items())
+    print(f"[correct] 완료: 성공 {writer.ok}, 실패 {writer.failed}, 건너뜀 {report['skipped']}, 재시도 {report['retries']}회, "
+          f"소요 {report['elapsed']}초 (단계별 처리 시간: {stages})", file=sys.stderr)
+    if report["batch_id"]:
+        print(f"[correct] 배치 id: {report['batch_id']}", file=sys.stderr)
+    return 0 if writer.failed == 0 else 2
+
+
+def cmd_translate(args, db) -> int:
+    from src.services.batch_checkpoint import BATCH_TRANSLATION, get_checkpoint_store
+    from src.services.gemini_client import GeminiClient
+    from src.services.translation_service import RESULT_SKIPPED, RESULT_SUCCESS, TranslationService
+
+    service = TranslationService(GeminiClient(), db, context=ServiceContext(tags={"tab": "cli"}))
+    specs = load_specs(args.specs)
+    checkpoint = None if args.no_checkpoint else get_checkpoint_store()
+    batch_id = args.batch_id or (checkpoint.resolve_batch_id(BATCH_TRANSLATION, [str(item.get("id")) for item in specs])
+                                 if checkpoint is not None else None)
+    save = args.save and db is not None
+
+    # 번역(동시 args.concurrency개)과 저장이 겹쳐서 진행되고, 끝나는 순서대로 기록
+    writer = JsonlWriter(args.output)
+    started = time.monotonic()
+    skipped = 0
+    try:
+        for result in service.translate_batch(specs, concurrency=args.concurrency, save=save,
+                                              fetch=lambda item: _fetch_question(db, item, "subjective"),
+                                              checkpoint=checkpoint, batch_id=batch_id):
+            if result["status"] == RESULT_SKIPPED:
+                skipped += 1
+                continue
+            ok = result["status"] == RESULT_SUCCESS
+            record = {"index": result["index"], "ok": ok, "id": result["problem_id"], "elapsed": result["elapsed"]}
+            if ok:
+                record["translated"] = result["translated_problem"]
+                if save:
+                    record["saved"] = True
+            else:
+                record["error"] = f"[{result['stage']}] {result['error']}"
+            writer.write(record)
+            status = "✅" if ok else f"❌ {record['error']}"
+            print(f"[translate] {writer.ok + writer.failed}/{len(specs) - skipped} {status}", file=sys.stderr)
+    finally:
+        writer.close()
+    print(f"[translate] 완료: 성공 {writer.ok}, 실패 {writer.failed}, 건너뜀 {skipped}, "
+          f"소요 {time.monotonic() - started:.1f}초", file=sys.stderr)
+    if batch_id:
+        print(f"[translate] 배치 id: {batch_id}", file=sys.stderr)
+    return 0 if writer.failed == 0 else 2
+
+
+def cmd_batch(args, db) -> int:
+    from src.services.batch_checkpoint import get_checkpoint_store
+
+    store = get_checkpoint_store()
+    if not args.batch_id:
+        for batch in store.list_batches(limit=args.limit):
+            print(f"{batch['id']}\t{batch['kind']}\t{batch['status']}\t"
+                  f"성공 {batch['success']}/{batch['total']}, 실패 {batch['failed']}\t{batch['updated_at'][:19]}")
+        return 0
+    if store.get_batch(args.batch_id) is None:
+        raise RuntimeError(f"배치를 찾을 수 없습니다: {args.batch_id}")
+    ledger = store.export(args.batch_id, args.format)
+    if args.output and args.output != "-":
+        with open(args.output, "w", encoding="utf-8", newline="") as f:
+            f.write(ledger)
+    else:
+        sys.stdout.write(ledger)
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m src.cli", description="AI 활용능력평가 문제 대량 생성/교정/번역")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    for name, help_text in (("generate", "문제 생성 (OpenAI)"), ("correct", "문제 교정 (Gemini)"),
+                            ("translate", "문제 영문 번역 (Gemini)")):
+        sub = subparsers.add_parser(name, help=help_text)
+        sub.add_argument("--specs", required=True, help="spec 파일 (JSON 배열 또는 JSONL)")
+        sub.add_argument("--output", "-o", default="-", help="결과 JSONL 경로 (기본: stdout, 기존 파일에는 이어서 기록)")
+        sub.add_argument("--concurrency", "-c", type=int, default=4, help="동시 API 호출 수 (기본 4)")
+        sub.add_argument("--save", action="store_true", help="결과를 DB에 저장")
+        if name in ("correct", "translate"):
+            sub.add_argument("--batch-id", help="체크포인트 배치 id (기본: 종류 + spec의 문제 id 목록으로 결정, 같은 배치는 성공한 문제를 건너뜀)")
+            sub.add_argument("--no-checkpoint", action="store_true", help="체크포인트 없이 모든 문제를 처리")
+        if name == "generate":
+            sub.add_argument("--model", default=os.getenv("OPENAI_MODEL", "gpt-5"), help="OpenAI 모델 (기본 gpt-5)")
+            sub.add_argument("--cache-tag", help="응답 캐시 태그 (같은 태그 + 같은 spec이면 저장된 응답 재사용, LLM_CACHE_MODE=replay와 함께 사용 가능)")
+
+    batch = subparsers.add_parser("batch", help="교정/번역 배치 처리 내역 내보내기")
+    batch.add_argument("batch_id", nargs="?", help="배치 id (생략하면 최근 배치 목록 출력)")
+    batch.add_argument("--format", choices=("csv", "jsonl"), default="csv", help="내보내기 형식 (기본 csv)")
+    batch.add_argument("--output", "-o", default="-", help="저장 경로 (기본: stdout)")
+    batch.add_argument("--limit", type=int, default=20, help="목록 출력 개수 (기본 20)")
+    return parser
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    _quiet_streamlit()
+
+    commands = {"generate": cmd_generate, "correct": cmd_correct, "translate": cmd_translate, "batch": cmd_batch}
+    if args.command == "batch":
+        # 로컬 체크포인트만 읽으므로 DB 연결 불필요
+        return commands[args.command](args, None)
+
+    try:
+        db = connect_db()
+    except Exception as e:
+        print(f"Edge Function 연결 실패: {e}", file=sys.stderr)
+        db = None
+    if db is None:
+        print("⚠️ DB 연결 없이 실행합니다 (기본 프롬프트 사용, 저장 안 함).", file=sys.stderr)
+
+    try:
+        return commands[args.command](args, db)
+    except RuntimeError as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
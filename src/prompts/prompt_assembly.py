@@ -0,0 +1,148 @@
+"""
+문제 생성 프롬프트 조립
+- 난이도 기준/시간 제한/스텝 규칙 블록과 (area, difficulty, question_type)별 user 프롬프트 템플릿은
+  처음 한 번만 만들어 두고(memoize), 호출마다 사용자 추가 요구사항만 끼워 넣음
+- DB 프롬프트가 있으면 DB 프롬프트 + 난이도 기준 블록, 없으면 기본 프롬프트로 조립
+- prompt_stats(): 조립된 프롬프트 크기와 대략적인 토큰 수 (비용 확인용)
+"""
+import math
+from functools import lru_cache
+
+from src.constants import ASSESSMENT_AREAS, DIFFICULTY_LEVELS, QUESTION_TYPES
+from src.prompts.default_prompts import DEFAULT_SYSTEM_PROMPT, DEFAULT_DIFFICULTY_GUIDES, DIFFICULTY_TIME_MAPPING
+from src.prompts.multiple_choice_template import get_multiple_choice_prompt
+from src.prompts.subjective_template import get_subjective_prompt
+
+# topic을 구체적인 직무/상황으로 설정하는 평가 영역
+DYNAMIC_TOPIC_AREAS = ("work_application", "daily_problem_solving", "pharma_distribution", "learning_concept")
+
+DIFFICULTY_RULES_MARKER = "난이도별 평가 기준:"
+
+# 템플릿에서 사용자 추가 요구사항이 들어갈 자리 (조립 시 실제 값으로 교체)
+_CONTEXT_SLOT = "\x00context\x00"
+
+
+@lru_cache(maxsize=1)
+def difficulty_rules() -> str:
+    """시스템 프롬프트 뒤에 붙는 난이도 기준/시간 제한/스텝 규칙 (DIFFICULTY_RULES_MARKER 다음 부분)"""
+    difficulty_guides = "\n"
+    for key, guide in DEFAULT_DIFFICULTY_GUIDES.items():
+        difficulty_guides += f"- {key}: {guide}\n"
+
+    time_mapping = "\n난이도별 시간 제한:\n"
+    for key, time_limit in DIFFICULTY_TIME_MAPPING.items():
+        time_mapping += f"- {key}: {time_limit}\n"
+
+    step_rules = "\n스텝 구성 규칙:\n"
+    step_rules += "- very easy: 1~2 스텝\n"
+    step_rules += "- easy: 2~3 스텝\n"
+    step_rules += "- normal: 3~5 스텝\n"
+    step_rules += "- hard: 5~7 스텝\n"
+    step_rules += "- very hard: 7~9 스텝"
+
+    return difficulty_guides + time_mapping + step_rules
+
+
+@lru_cache(maxsize=1)
+def default_system_prompt() -> str:
+    """기본 시스템 프롬프트 (기본 지침 + 난이도 기준)"""
+    return DEFAULT_SYSTEM_PROMPT + "\n\n" + DIFFICULTY_RULES_MARKER + difficulty_rules()
+
+
+@lru_cache(maxsize=None)
+def _user_template(area: str, difficulty: str, question_type: str) -> tuple[str, str]:
+    """user 프롬프트를 사용자 추가 요구사항 자리 앞/뒤로 나눈 템플릿"""
+    assessment_area = ASSESSMENT_AREAS[area]
+    if area in DYNAMIC_TOPIC_AREAS:
+        topic_instruction = f"topic 필드에는 {assessment_area}와 관련된 구체적인 직무나 상황을 설정해주세요 (예: '마케팅 담당자', '고객 서비스', '일상 업무 효율화', '제약회사 영업팀', '유통업체 물류팀', '학습자', '교육과정' 등)"
+        area_display = f"{assessment_area} (구체적인 직무/상황으로 설정)"
+        task_template = "나는 현재 [구체적인 직무/상황] 상황에 있다. 다음 상황에서..."
+    else:
+        topic_instruction = f"topic 필드에는 '{assessment_area}'를 그대로 사용해주세요"
+        area_display = assessment_area
+        task_template = f"나는 현재 {assessment_area} 상황에 있다. 다음 상황에서..."
+
+    arguments = {
+        "area_display": area_display,
+        "difficulty_display": DIFFICULTY_LEVELS[difficulty],
+        "guide": DEFAULT_DIFFICULTY_GUIDES[difficulty],
+        "time_limit": DIFFICULTY_TIME_MAPPING[difficulty],
+        "context": _CONTEXT_SLOT,
+        "assessment_area": assessment_area,
+        "topic_instruction": topic_instruction,
+        "difficulty": difficulty,
+    }
+    if question_type == "multiple_choice":
+        prompt = get_multiple_choice_prompt(**arguments)
+    else:  # subjective
+        prompt = get_subjective_prompt(**arguments, task_template=task_template)
+    head, _, tail = prompt.partition(_CONTEXT_SLOT)
+    return head, tail
+
+
+def build_user_prompt(area: str, difficulty: str, question_type: str, context: str = "") -> str:
+    """기본 user 프롬프트 (사용자 추가 요구사항이 없으면 '없음')"""
+    head, tail = _user_template(area, difficulty, question_type)
+    return head + (context if context else "없음") + tail
+
+
+def precompile() -> int:
+    """모든 (area, difficulty, question_type) 조합의 템플릿을 미리 생성, 조합 수 반환"""
+    default_system_prompt()
+    count = 0
+    for area in ASSESSMENT_AREAS:
+        for difficulty in DIFFICULTY_LEVELS:
+            for question_type in QUESTION_TYPES:
+                _user_template(area, difficulty, question_type)
+                count += 1
+    return count
+
+
+def assemble_generation_prompt(area: str, difficulty: str, question_type: str,
+                               db_system_prompt: str | None = None, db_user_prompt: str | None = None,
+                               user_prompt_extra: str = "", system_prompt_extra: str = "") -> tuple[str, str]:
+    """
+    문제 생성에 보낼 (system, user) 프롬프트 조립
+
+    Args:
+        db_system_prompt / db_user_prompt: DB 프롬프트 (둘 다 있을 때만 사용, 없으면 기본 프롬프트)
+        user_prompt_extra: user 프롬프트 끝에 붙는 사용자 추가 요구사항
+        system_prompt_extra: 시스템 프롬프트 끝에 붙고, user 프롬프트에도 요구사항으로 들어가는 내용
+    """
+    if db_system_prompt and db_user_prompt:
+        # 데이터베이스 시스템 프롬프트에 난이도 기준 추가
+        system_prompt = db_system_prompt + "\n\n" + difficulty_rules()
+        if system_prompt_extra.strip():
+            user_prompt = db_user_prompt + f"\n\n사용자 추가 요구사항: {system_prompt_extra}"
+        else:
+            user_prompt = db_user_prompt
+    else:
+        system_prompt = default_system_prompt()
+        user_prompt = build_user_prompt(area, difficulty, question_type, system_prompt_extra)
+
+    if system_prompt_extra.strip():
+        system_prompt += "\n\n[사용자 추가 시스템 요구사항]\n" + system_prompt_extra
+    if user_prompt_extra.strip():
+        user_prompt += "\n\n[사용자 추가 요구사항]\n" + user_prompt_extra
+    return system_prompt, user_prompt
+
+
+def estimate_tokens(text: str) -> int:
+    """대략적인 토큰 수 (영문/기호는 4자당 1토큰, 한글 등은 1자당 약 0.7토큰)"""
+    if not text:
+        return 0
+    ascii_chars = sum(1 for ch in text if ord(ch) < 128)
+    return math.ceil(ascii_chars / 4 + (len(text) - ascii_chars) * 0.7)
+
+
+def prompt_stats(system_prompt: str, user_prompt: str) -> dict:
+    """조립된 프롬프트 크기 요약"""
+    system_tokens = estimate_tokens(system_prompt)
+    user_tokens = estimate_tokens(user_prompt)
+    return {
+        "system_chars": len(system_prompt),
+        "user_chars": len(user_prompt),
+        "system_tokens": system_tokens,
+        "user_tokens": user_tokens,
+        "estimated_tokens": system_tokens + user_tokens,
+    }
@@ -0,0 +1,173 @@
+"""
+파일 기반 프롬프트 레지스트리
+- 프롬프트 템플릿 모듈의 문자열 상수를 한 번만 읽어 모든 세션/워커 스레드가 같은 PromptEntry를 공유
+- 호출마다 importlib.reload 하지 않고, 아래 경우에만 한 스레드가 잠금 안에서 다시 읽음 (다른 스레드는 새 프롬프트를 받을 때까지 대기)
+  1) 템플릿 파일 mtime이 바뀐 경우 (PROMPT_RELOAD_INTERVAL초마다 확인, 0이면 확인 안 함)
+  2) PROMPT_VERSION 설정 값이 바뀐 경우
+  3) reload()를 직접 호출한 경우
+- 다시 읽을 때는 모듈을 재import하지 않고 파일을 새 네임스페이스에서 실행하므로, 이미 import한 코드에는 영향이 없음
+- PromptEntry.hash: 프롬프트 본문 SHA-256 앞 12자리 (교정 결과마다 어떤 프롬프트로 교정했는지 기록)
+"""
+import hashlib
+import importlib
+import importlib.util
+import os
+import threading
+import time
+from datetime import datetime
+
+# 등록된 프롬프트 이름
+CORRECTION_PROMPT = "problem_correction"
+
+# 이름: (모듈, 상수 이름)
+DEFAULT_SOURCES = {
+    CORRECTION_PROMPT: ("src.prompts.problem_correction_template", "DEFAULT_PROBLEM_CORRECTION_PROMPT"),
+}
+
+DEFAULT_RELOAD_INTERVAL = 5.0
+
+
+def prompt_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:12]
+
+
+class PromptEntry:
+    """레지스트리에 올라간 프롬프트 하나 (읽기 전용으로 공유)"""
+
+    __slots__ = ("name", "text", "hash", "version", "path", "mtime", "loaded_at")
+
+    def __init__(self, name: str, text: str, version: int, path: str | None, mtime: float):
+        self.name = name
+        self.text = text
+        self.hash = prompt_hash(text)
+        self.version = version
+        self.path = path
+        self.mtime = mtime
+        self.loaded_at = datetime.now().isoformat()
+
+    def info(self) -> dict:
+        """교정 결과/디버깅에 기록할 요약"""
+        return {"name": self.name, "version": self.version, "hash": self.hash, "length": len(self.text)}
+
+
+def _module_path(module: str) -> str | None:
+    spec = importlib.util.find_spec(module)
+    return spec.origin if spec is not None and spec.origin and spec.origin.endswith(".py") else None
+
+
+def _mtime(path: str | None) -> float:
+    try:
+        return os.path.getmtime(path) if path else 0.0
+    except OSError:
+        return 0.0
+
+
+class PromptRegistry:
+    """
+    프롬프트 레지스트리
+
+    사용 예)
+        entry = get_prompt_registry().get(CORRECTION_PROMPT)
+        entry.text, entry.hash, entry.version
+        get_prompt_registry().reload()     # 템플릿을 고친 뒤 즉시 반영
+    """
+
+    def __init__(self, sources: dict | None = None, reload_interval: float | None = None):
+        self.sources = dict(sources or DEFAULT_SOURCES)
+        self.reload_interval = reload_interval if reload_interval is not None else \
+            float(os.getenv("PROMPT_RELOAD_INTERVAL", DEFAULT_RELOAD_INTERVAL))
+        self._entries: dict[str, PromptEntry] = {}
+        self._checked: dict[str, float] = {}
+        self._dirty: set[str] = set()    # 설정 버전이 바뀌어 다시 읽어야 하는 프롬프트
+        self._settings_version = os.getenv("PROMPT_VERSION", "")
+        self._lock = threading.Lock()
+        self.loads = 0
+
+    def register(self, name: str, module: str, attribute: str):
+        """파일 기반 프롬프트 추가 등록"""
+        with self._lock:
+            self.sources[name] = (module, attribute)
+            self._entries.pop(name, None)
+
+    def _read(self, name: str, fresh: bool) -> tuple[str, str | None]:
+        """(본문, 파일 경로) - fresh면 파일을 새 네임스페이스에서 실행해서 읽음"""
+        module, attribute = self.sources[name]
+        path = _module_path(module)
+        if fresh and path:
+            with open(path, encoding="utf-8") as f:
+                source = f.read()
+            namespace = {"__name__": f"{module}.__registry__", "__file__": path}
+            exec(compile(source, path, "exec"), namespace)
+            text = namespace[attribute]
+        else:
+            text = getattr(importlib.import_module(module), attribute)
+        if not isinstance(text, str) or not text.strip():
+            raise RuntimeError(f"프롬프트가 비어 있습니다: {module}.{attribute}")
+        return text, path
+
+    def _load(self, name: str, fresh: bool) -> PromptEntry:
+        # self._lock 안에서 호출
+        previous = self._entries.get(name)
+        text, path = self._read(name, fresh)
+        mtime = _mtime(path)
+        if previous is not None and previous.text == text:
+            version = previous.version
+        else:
+            version = (previous.version + 1) if previous is not None else 1
+        entry = PromptEntry(name, text, version, path, mtime)
+        self._entries[name] = entry
+        self._checked[name] = time.monotonic()
+        self._dirty.discard(name)
+        self.loads += 1
+        return entry
+
+    def _stale(self, name: str, entry: PromptEntry) -> bool:
+        if self.reload_interval <= 0 or time.monotonic() - self._checked.get(name, 0.0) < self.reload_interval:
+            return False
+        self._checked[name] = time.monotonic()
+        return _mtime(entry.path) != entry.mtime
+
+    def get(self, name: str) -> PromptEntry:
+        """프롬프트 (처음 한 번 읽고, 파일/설정이 바뀐 경우에만 다시 읽음)"""
+        with self._lock:
+            settings_version = os.getenv("PROMPT_VERSION", "")
+            if settings_version != self._settings_version:
+                self._settings_version = settings_version
+                self._dirty.update(self._entries)
+            entry = self._entries.get(name)
+            if entry is None:
+                return self._load(name, fresh=False)
+            if name in self._dirty or self._stale(name, entry):
+                try:
+                    return self._load(name, fresh=True)
+                except Exception:
+                    # 수정 중인 파일을 읽지 못하면 이전 프롬프트를 계속 사용
+                    return entry
+            return entry
+
+    def text(self, name: str) -> str:
+        return self.get(name).text
+
+    def reload(self, name: str | None = None) -> list[PromptEntry]:
+        """지정한(없으면 전체) 프롬프트를 파일에서 다시 읽음"""
+        with self._lock:
+            names = [name] if name else list(self.sources)
+            return [self._load(item, fresh=True) for item in names]
+
+    def status(self) -> list[dict]:
+        with self._lock:
+            entries = list(self._entries.values())
+        return [{**entry.info(), "path": entry.path, "loaded_at": entry.loaded_at} for entry in entries]
+
+
+_PROMPT_REGISTRY: PromptRegistry | None = None
+_PROMPT_REGISTRY_LOCK = threading.Lock()
+
+
+def get_prompt_registry() -> PromptRegistry:
+    """프로세스 단위로 공유하는 프롬프트 레지스트리"""
+    global _PROMPT_REGISTRY
+    with _PROMPT_REGISTRY_LOCK:
+        if _PROMPT_REGISTRY is None:
+            _PROMPT_REGISTRY = PromptRegistry()
+        return _PROMPT_REGISTRY
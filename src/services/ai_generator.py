@@ -1,19 +1,55 @@
-import json, random, re
+import json, os, random, re, time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
-import streamlit as st
-from openai import OpenAI
+from openai import BadRequestError, OpenAI
 from src.config import get_secret
+from src.services.llm_cache import cache_seed, get_llm_cache
+from src.services.prompt_cache import get_prompt_cache
+from src.services.question_schema import parse_structured_question, response_format
+from src.services.rate_limiter import call_with_limits
+from src.services.service_context import EVENT_ERROR, ServiceContext, ensure_context
+from src.services.usage_ledger import openai_usage, record_usage
 from src.constants import ASSESSMENT_AREAS, DIFFICULTY_LEVELS
 from src.prompts.default_prompts import DEFAULT_SYSTEM_PROMPT, DEFAULT_DIFFICULTY_GUIDES, DIFFICULTY_TIME_MAPPING
-from src.prompts.multiple_choice_template import get_multiple_choice_prompt
-from src.prompts.subjective_template import get_subjective_prompt
+from src.prompts.prompt_assembly import (
+    assemble_generation_prompt, build_user_prompt, default_system_prompt, precompile, prompt_stats,
+)
+
+def is_schema_unsupported(error: Exception) -> bool:
+    """BadRequestError가 response_format(json_schema) 미지원 때문인지 (오류 param/code/메시지로 판단)"""
+    param = str(getattr(error, "param", "") or "")
+    code = str(getattr(error, "code", "") or "")
+    if param.startswith("response_format") or "json_schema" in code or "response_format" in code:
+        return True
+    message = str(getattr(error, "message", "") or error).lower()
+    return "response_format" in message or "json_schema" in message
+
+
+def is_parseable_question(content: str, question_type: str) -> bool:
+    """응답에서 필수 필드가 있는 문제 JSON을 꺼낼 수 있는지 (LLM 캐시 저장 여부 판단용)"""
+    try:
+        parse_structured_question(content, question_type)
+        return True
+    except Exception:
+        pass
+    start, end = content.find('{'), content.rfind('}')
+    if start == -1 or end <= start:
+        return False
+    try:
+        qdata = json.loads(re.sub(r',(\s*[}\]])', r'\1', content[start:end + 1]))
+    except json.JSONDecodeError:
+        return False
+    required_fields = ['problemTitle', 'steps'] if question_type == "multiple_choice" else ['title', 'task']
+    return isinstance(qdata, dict) and all(field in qdata for field in required_fields)
+
 
 class AIQuestionGenerator:
     def __init__(self):
         api_key = get_secret("OPENAI_API_KEY")
         if not api_key:
             raise RuntimeError("OPENAI_API_KEY is missing")
-        self.client = OpenAI(api_key=api_key)
+        # 재시도는 rate_limiter가 Retry-After를 따라 처리
+        self.client = OpenAI(api_key=api_key, max_retries=0)
         self.assessment_areas = ASSESSMENT_AREAS
         self.difficulty_levels = DIFFICULTY_LEVELS
         
@@ -21,18 +57,27 @@ class AIQuestionGenerator:
         self.default_system_prompt = DEFAULT_SYSTEM_PROMPT
         self.default_difficulty_guides = DEFAULT_DIFFICULTY_GUIDES
         self.difficulty_time_mapping = DIFFICULTY_TIME_MAPPING
+        # 모든 (area, difficulty, question_type) 조합의 프롬프트 템플릿을 미리 생성
+        precompile()
+        # OpenAI JSON 스키마 모드 사용 여부와 지원하지 않는 것으로 확인된 모델
+        self.structured_output = os.getenv("OPENAI_STRUCTURED_OUTPUT", "true").lower() != "false"
+        self._unstructured_models = set()
+        # LLM 응답 캐시 (cache_variant를 준 호출만 사용)
+        self.response_cache = get_llm_cache()
 
-    def _get_prompts_from_db(self, area: str, difficulty: str, question_type: str):
+    def _get_prompts_from_db(self, area: str, difficulty: str, question_type: str, context: ServiceContext | None = None):
         """데이터베이스에서 프롬프트 조회"""
+        context = ensure_context(context)
         try:
-            db = st.session_state.get("db")
+            db = context.db
             if not db:
                 return None, None
             
-            # 평가 영역별 프롬프트 조회
-            area_prompts = db.get_prompts(category=f"area_{area}")
-            difficulty_prompts = db.get_prompts(category=f"difficulty_{difficulty}")
-            type_prompts = db.get_prompts(category=f"type_{question_type}")
+            # 평가 영역별 프롬프트 조회 (프롬프트 캐시에서 조회, 만료 시에만 DB 호출)
+            prompt_cache = get_prompt_cache()
+            area_prompts = prompt_cache.get_prompts(db, category=f"area_{area}")
+            difficulty_prompts = prompt_cache.get_prompts(db, category=f"difficulty_{difficulty}")
+            type_prompts = prompt_cache.get_prompts(db, category=f"type_{question_type}")
             
             # system 프롬프트 조합
             system_prompt = self.default_system_prompt
@@ -42,16 +87,16 @@ class AIQuestionGenerator:
                 try:
                     # subjective 문제 유형일 때는 특정 프롬프트 ID 사용
                     if question_type == "subjective":
-                        pharma_prompt = db.get_prompt_by_id("1b89bce9-1916-4677-b520-87c7ec532524")
+                        pharma_prompt = prompt_cache.get_prompt_by_id(db, "1b89bce9-1916-4677-b520-87c7ec532524")
                     else:
-                        pharma_prompt = db.get_prompt_by_id("2731d7c8-32d5-45d2-bef9-52ad68510bb8")
+                        pharma_prompt = prompt_cache.get_prompt_by_id(db, "2731d7c8-32d5-45d2-bef9-52ad68510bb8")
                     
                     if pharma_prompt:
                         system_prompt = pharma_prompt  # 기본 프롬프트 대신 특정 프롬프트 사용
                     else:
-                        st.warning("태전제약유통 전용 프롬프트를 찾을 수 없습니다. 기본 프롬프트를 사용합니다.")
+                        context.warning("태전제약유통 전용 프롬프트를 찾을 수 없습니다. 기본 프롬프트를 사용합니다.")
                 except Exception as e:
-                    st.warning(f"태전제약유통 전용 프롬프트 조회 실패: {e}. 기본 프롬프트를 사용합니다.")
+                    context.warning(f"태전제약유통 전용 프롬프트 조회 실패: {e}. 기본 프롬프트를 사용합니다.")
             elif area_prompts:
                 system_prompt += f"\n\n평가 영역 특화 지침:\n{area_prompts[0]['prompt_text']}"
             
@@ -65,144 +110,115 @@ class AIQuestionGenerator:
             return system_prompt, user_prompt
             
         except Exception as e:
-            st.warning(f"프롬프트 조회 실패, 기본 프롬프트 사용: {e}")
+            context.warning(f"프롬프트 조회 실패, 기본 프롬프트 사용: {e}")
             return None, None
 
     def _build_system_prompt(self):
-        """시스템 프롬프트를 동적으로 구성"""
-        base_prompt = self.default_system_prompt
-        
-        # 난이도별 평가 기준 추가
-        difficulty_guides = "\n\n난이도별 평가 기준:\n"
-        for key, guide in self.default_difficulty_guides.items():
-            difficulty_guides += f"- {key}: {guide}\n"
-        
-        # 난이도별 시간 제한 추가
-        time_mapping = "\n난이도별 시간 제한:\n"
-        for key, time_limit in self.difficulty_time_mapping.items():
-            time_mapping += f"- {key}: {time_limit}\n"
-        
-        # 스텝 구성 규칙 추가
-        step_rules = "\n스텝 구성 규칙:\n"
-        step_rules += "- very easy: 1~2 스텝\n"
-        step_rules += "- easy: 2~3 스텝\n"
-        step_rules += "- normal: 3~5 스텝\n"
-        step_rules += "- hard: 5~7 스텝\n"
-        step_rules += "- very hard: 7~9 스텝"
-        
-        return base_prompt + difficulty_guides + time_mapping + step_rules
+        """기본 시스템 프롬프트 (미리 조립해 둔 값)"""
+        return default_system_prompt()
 
     def _build_user_prompt(self, area: str, difficulty: str, question_type: str, context: str = ""):
-        """기본 user 프롬프트 구성 - 새로운 JSON 포맷 지원"""
-        guide = self.default_difficulty_guides[difficulty]
-        time_limit = self.difficulty_time_mapping[difficulty]
-        
-        if question_type == "multiple_choice":
-            return self._build_multiple_choice_prompt(area, difficulty, guide, time_limit, context)
-        else:  # subjective
-            return self._build_subjective_prompt(area, difficulty, guide, time_limit, context)
-    
-    def _build_multiple_choice_prompt(self, area: str, difficulty: str, guide: str, time_limit: str, context: str):
-        """Multiple choice problem generation prompt"""
-        # work_application, daily_problem_solving, pharma_distribution, learning_concept의 경우 topic을 동적으로 설정
-        if area in ["work_application", "daily_problem_solving", "pharma_distribution", "learning_concept"]:
-            topic_instruction = f"topic 필드에는 {self.assessment_areas[area]}와 관련된 구체적인 직무나 상황을 설정해주세요 (예: '마케팅 담당자', '고객 서비스', '일상 업무 효율화', '제약회사 영업팀', '유통업체 물류팀', '학습자', '교육과정' 등)"
-            area_display = f"{self.assessment_areas[area]} (구체적인 직무/상황으로 설정)"
-        else:
-            topic_instruction = f"topic 필드에는 '{self.assessment_areas[area]}'를 그대로 사용해주세요"
-            area_display = self.assessment_areas[area]
-        
-        return get_multiple_choice_prompt(
-            area_display=area_display,
-            difficulty_display=self.difficulty_levels[difficulty],
-            guide=guide,
-            time_limit=time_limit,
-            context=context,
-            assessment_area=self.assessment_areas[area],
-            topic_instruction=topic_instruction,
-            difficulty=difficulty
-        )
+        """기본 user 프롬프트 구성 - (area, difficulty, question_type)별 템플릿에 context만 채움"""
+        return build_user_prompt(area, difficulty, question_type, context)
 
-    def _build_subjective_prompt(self, area: str, difficulty: str, guide: str, time_limit: str, context: str):
-        """Subjective problem generation prompt"""
-        # work_application, daily_problem_solving, pharma_distribution, learning_concept의 경우 topic을 동적으로 설정
-        if area in ["work_application", "daily_problem_solving", "pharma_distribution", "learning_concept"]:
-            topic_instruction = f"topic 필드에는 {self.assessment_areas[area]}와 관련된 구체적인 직무나 상황을 설정해주세요 (예: '마케팅 담당자', '고객 서비스', '일상 업무 효율화', '제약회사 영업팀', '유통업체 물류팀', '학습자', '교육과정' 등)"
-            area_display = f"{self.assessment_areas[area]} (구체적인 직무/상황으로 설정)"
-            task_template = "나는 현재 [구체적인 직무/상황] 상황에 있다. 다음 상황에서..."
-        else:
-            topic_instruction = f"topic 필드에는 '{self.assessment_areas[area]}'를 그대로 사용해주세요"
-            area_display = self.assessment_areas[area]
-            task_template = f"나는 현재 {self.assessment_areas[area]} 상황에 있다. 다음 상황에서..."
+    def generate_with_ai(self, area: str, difficulty: str, question_type: str, user_prompt_extra: str = "", system_prompt_extra: str = "",
+                         context: ServiceContext | None = None, cache_variant: str | None = None):
+        # 모델/DB 설정은 context에서 읽고, 진행 상황은 context 이벤트로 알림 (Streamlit 세션에 의존하지 않음)
+        context = ensure_context(context)
         
-        return get_subjective_prompt(
-            area_display=area_display,
-            difficulty_display=self.difficulty_levels[difficulty],
-            guide=guide,
-            time_limit=time_limit,
-            context=context,
-            assessment_area=self.assessment_areas[area],
-            topic_instruction=topic_instruction,
-            task_template=task_template,
-            difficulty=difficulty
-        )
-
-    def generate_with_ai(self, area: str, difficulty: str, question_type: str, user_prompt_extra: str = "", system_prompt_extra: str = ""):
         # 데이터베이스에서 프롬프트 조회 시도
-        db_system_prompt, db_user_prompt = self._get_prompts_from_db(area, difficulty, question_type)
-        
-        # 기본 시스템 프롬프트 구성
-        if db_system_prompt and db_user_prompt:
-            # 데이터베이스 시스템 프롬프트에 난이도 기준 추가
-            base_system_prompt = db_system_prompt + "\n\n" + self._build_system_prompt().split("난이도별 평가 기준:")[1]
-            # 데이터베이스 user 프롬프트에 사용자 시스템 프롬프트를 context로 추가
-            if system_prompt_extra.strip():
-                base_user_prompt = db_user_prompt + f"\n\n사용자 추가 요구사항: {system_prompt_extra}"
-            else:
-                base_user_prompt = db_user_prompt
-        else:
-            # 기본 프롬프트 사용 - 사용자 시스템 프롬프트를 context로 전달
-            base_system_prompt = self._build_system_prompt()
-            base_user_prompt = self._build_user_prompt(area, difficulty, question_type, system_prompt_extra)
+        db_system_prompt, db_user_prompt = self._get_prompts_from_db(area, difficulty, question_type, context)
         
-        # 시스템 프롬프트 구성: 기본 프롬프트 + 사용자 프롬프트 (사용자 프롬프트가 있으면)
-        if system_prompt_extra.strip():
-            system_prompt = base_system_prompt + "\n\n[사용자 추가 시스템 요구사항]\n" + system_prompt_extra
-        else:
-            system_prompt = base_system_prompt
-        
-        # User 프롬프트 구성: 기본 프롬프트 + 사용자 프롬프트 (사용자 프롬프트가 있으면)
-        if user_prompt_extra.strip():
-            user_prompt = base_user_prompt + "\n\n[사용자 추가 요구사항]\n" + user_prompt_extra
-        else:
-            user_prompt = base_user_prompt
+        # 프롬프트 조립 (정적인 부분은 미리 만들어 둔 템플릿 사용, 사용자 추가 요구사항만 채움)
+        system_prompt, user_prompt = assemble_generation_prompt(
+            area, difficulty, question_type, db_system_prompt, db_user_prompt,
+            user_prompt_extra=user_prompt_extra, system_prompt_extra=system_prompt_extra,
+        )
+        stats = prompt_stats(system_prompt, user_prompt)
+        context.publish("last_prompt_stats", stats)
             
         try:
-            # 세션 상태에서 선택된 모델 가져오기 (기본값: gpt-5)
-            model = st.session_state.get("selected_model", "gpt-5")
+            # 선택된 모델 (기본값: gpt-5)
+            model = context.model or "gpt-5"
+            
+            # 디버깅 정보 출력 (배치 생성에서는 생략)
+            context.debug("🔍 API 호출 정보", expanded=True,
+                          **{"모델": model, "평가 영역": area, "난이도": difficulty, "문제 유형": question_type,
+                             "프롬프트 크기": f"{stats['system_chars'] + stats['user_chars']:,}자 "
+                                             f"(약 {stats['estimated_tokens']:,} 토큰)"})
+            
+            request = {
+                "model": model,
+                "messages": [{"role":"system","content":system_prompt},
+                             {"role":"user","content":user_prompt}],
+            }
+            # 스키마 모드: 모델이 JSON 스키마에 맞는 응답만 생성 (지원하지 않는 모델이면 기존 방식)
+            if self.structured_output and model not in self._unstructured_models:
+                request["response_format"] = response_format(question_type)
+            seed = cache_seed()
+            if seed is not None:
+                request["seed"] = seed
+            
+            estimated_tokens = stats["estimated_tokens"]
             
-            # 디버깅 정보 출력
-            st.info(f"🔍 API 호출 정보:")
-            st.info(f"  모델: {model}")
-            st.info(f"  평가 영역: {area}")
-            st.info(f"  난이도: {difficulty}")
-            st.info(f"  문제 유형: {question_type}")
+            usage_tags = {**context.tags, "area": area, "difficulty": difficulty}
             
-            resp = self.client.chat.completions.create(
-                model=model,
-                messages=[{"role":"system","content":system_prompt},
-                          {"role":"user","content":user_prompt}]
-            )
-            content = resp.choices[0].message.content
+            def _create():
+                # 모델별 RPM/TPM/동시 호출 제한 + 일시적 오류 재시도
+                started = time.monotonic()
+                resp = call_with_limits(
+                    "openai", model, lambda: self.client.chat.completions.create(**request), estimated_tokens,
+                    on_retry=lambda attempt, wait, e: context.warning(
+                        f"⚠️ OpenAI 호출 제한/오류로 {wait:.1f}초 후 재시도합니다 ({attempt}회): {e}"),
+                )
+                record_usage("openai", getattr(resp, "model", None) or model, openai_usage(resp),
+                             time.monotonic() - started, "generate_with_ai", usage_tags)
+                return resp
+            
+            def _call():
+                try:
+                    resp = _create()
+                except BadRequestError as e:
+                    # 스키마 모드 미지원 오류만 기존 방식으로 전환 (컨텍스트 길이/정책 위반 등 다른 400은 그대로 실패)
+                    if "response_format" not in request or not is_schema_unsupported(e):
+                        raise
+                    self._unstructured_models.add(model)
+                    request.pop("response_format")
+                    context.warning(f"{model} 모델은 JSON 스키마 모드를 지원하지 않아 기존 방식으로 생성합니다.")
+                    resp = _create()
+                message = resp.choices[0].message
+                if getattr(message, "refusal", None):
+                    raise RuntimeError(f"모델이 문제 생성을 거부했습니다: {message.refusal}")
+                return message.content
+            
+            # 같은 문제를 매번 새로 만들어야 하므로 cache_variant가 있을 때만 응답 캐시 사용
+            # (작업 id + 순번 등: 같은 작업을 다시 실행하면 이미 받은 응답을 재사용)
+            if cache_variant is not None and self.response_cache is not None:
+                config = {key: value for key, value in request.items() if key not in ("model", "messages")}
+                config["variant"] = cache_variant
+                # 문제 JSON을 꺼낼 수 없는 응답은 저장하지 않음 (다시 실행하면 새로 호출)
+                content = self.response_cache.fetch("openai", model, system_prompt, user_prompt, config, _call,
+                                                    validate=lambda text: is_parseable_question(text, question_type))
+            else:
+                content = _call()
             
-            # JSON 파싱 - 단순화된 접근
             qdata = None
             
+            # 스키마 모드 응답은 한 번에 파싱 + 검증
+            if "response_format" in request:
+                try:
+                    qdata = parse_structured_question(content, question_type)
+                except ValueError as e:
+                    context.warning(f"스키마 검증 실패, 기존 방식으로 파싱합니다: {e}")
+                    qdata = None
+            
+            # JSON 파싱 - 단순화된 접근 (스키마 모드가 아니거나 검증에 실패한 경우)
             # 방법 1: 전체 내용을 JSON으로 파싱 시도 (가장 안전)
-            try:
-                qdata = json.loads(content or "{}")
-            except json.JSONDecodeError:
-                qdata = None
+            if qdata is None:
+                try:
+                    qdata = json.loads(content or "{}")
+                except json.JSONDecodeError:
+                    qdata = None
             
             # 방법 2: 코드 블록에서 JSON 추출 시도
             if qdata is None:
@@ -318,12 +334,12 @@ class AIQuestionGenerator:
                         "time_limit": estimated_time
                     }
                 except Exception as e:
-                    st.error(f"JSON 파싱 실패: {e}")
+                    context.error(f"JSON 파싱 실패: {e}")
                     qdata = {"title": content or ""}
             
             # 방법 5: 실패 시 기본값
             if qdata is None:
-                st.error("JSON 파싱 실패 - 기본값 사용")
+                context.error("JSON 파싱 실패 - 기본값 사용")
                 qdata = {"title": content or ""}
             
             ts = datetime.now().strftime("%Y%m%d_%H%M%S")
@@ -374,8 +390,49 @@ class AIQuestionGenerator:
                     "created_by": None,  # Edge Function에서 처리
                     "active": True
                 }
-            st.session_state.last_raw_content = content
+            context.publish("last_raw_content", content)
             return q
         except Exception as e:
-            st.error(f"AI 문제 생성 실패: {e}")
+            context.error(f"AI 문제 생성 실패: {e}")
             return None
+
+    def generate_batch(self, specs: list, concurrency: int = 4, context: ServiceContext | None = None):
+        """
+        여러 문제를 스레드 풀에서 동시에 생성하고, 완료되는 순서대로 결과를 내보내는 제너레이터
+
+        Args:
+            specs: generate_with_ai 인자 딕셔너리 목록
+                   예) [{"area": "life", "difficulty": "normal", "question_type": "subjective"}, ...]
+            concurrency: 동시에 실행할 OpenAI 호출 수
+            context: 모델/DB 설정과 이벤트 리스너 (워커에서는 debug 이벤트 생략)
+
+        Yields:
+            dict: {"index": specs 내 위치, "spec": 요청, "question": 생성 결과 또는 None, "error": 오류 메시지 또는 None}
+        """
+        specs = list(specs)
+        if not specs:
+            return
+        worker_context = ensure_context(context).derive(verbose=False)
+
+        def _generate(spec):
+            # 항목별로 마지막 오류 이벤트를 잡아서 결과에 담음
+            errors = []
+            item_context = worker_context.derive()
+            item_context.subscribe(lambda event: errors.append(event.message) if event.kind == EVENT_ERROR else None)
+            question = self.generate_with_ai(**spec, context=item_context)
+            return question, (errors[-1] if errors else "문제 생성 실패")
+
+        pool = ThreadPoolExecutor(max_workers=max(1, min(concurrency, len(specs))), thread_name_prefix="ai-generate")
+        try:
+            futures = {pool.submit(_generate, spec): index for index, spec in enumerate(specs)}
+            for future in as_completed(futures):
+                index = futures[future]
+                try:
+                    question, error = future.result()
+                    error = None if question else error
+                except Exception as e:
+                    question, error = None, str(e)
+                yield {"index": index, "spec": specs[index], "question": question, "error": error}
+        finally:
+            # 소비 측이 중간에 멈추면 아직 시작하지 않은 호출은 취소
+            pool.shutdown(wait=False, cancel_futures=True)
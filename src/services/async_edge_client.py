@@ -0,0 +1,98 @@
+"""
+Edge Function 비동기 클라이언트
+- EdgeDBClient와 같은 {"action", "params"} 프로토콜을 사용
+- 서로 독립적인 액션을 동시에 호출하여 페이지 로드 시간을 "합계"가 아닌 "가장 느린 호출" 수준으로 줄임
+"""
+import asyncio
+import threading
+
+class AsyncEdgeDBClient:
+    """EdgeDBClient를 감싸는 asyncio 클라이언트 (공유 커넥션 풀을 그대로 사용)"""
+
+    def __init__(self, db, max_concurrency: int = 8):
+        self.db = db
+        self.max_concurrency = max(1, max_concurrency)
+
+    async def _run(self, func, *args, **kwargs):
+        # requests 기반 동기 호출을 워커 스레드에서 실행 (커넥션 풀은 스레드 간 공유)
+        return await asyncio.to_thread(func, *args, **kwargs)
+
+    async def call(self, action: str, params: dict | None = None, **kwargs) -> dict:
+        """원시 액션 호출 (EdgeDBClient._call과 동일하게 전체 응답 객체 반환)"""
+        return await self._run(self.db._call, action, params, **kwargs)
+
+    async def invoke(self, method: str, *args, **kwargs):
+        """EdgeDBClient 메서드를 이름으로 호출 (결과 가공/예외 처리는 동기 메서드와 동일)"""
+        return await self._run(getattr(self.db, method), *args, **kwargs)
+
+    def __getattr__(self, name: str):
+        # adb.get_subjective_questions({}) 처럼 동기 클라이언트의 공개 메서드를 코루틴으로 노출
+        if name.startswith("_"):
+            raise AttributeError(name)
+        attr = getattr(self.db, name)
+        if not callable(attr):
+            raise AttributeError(name)
+
+        async def _method(*args, **kwargs):
+            return await self._run(attr, *args, **kwargs)
+        return _method
+
+    async def gather(self, calls: dict) -> dict:
+        """
+        독립적인 메서드 호출들을 동시에 실행
+
+        Args:
+            calls: {이름: (메서드명, *인자)} 형태의 딕셔너리
+
+        Returns:
+            dict: {이름: 결과} (실패한 호출은 예외 객체가 값으로 들어감)
+        """
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def _limited(spec):
+            method, *args = spec
+            async with semaphore:
+                return await self.invoke(method, *args)
+
+        names = list(calls.keys())
+        results = await asyncio.gather(*(_limited(calls[name]) for name in names), return_exceptions=True)
+        return dict(zip(names, results))
+
+
+def run_sync(coro):
+    """동기 코드(Streamlit 스크립트 등)에서 코루틴을 실행하고 결과를 반환"""
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coro)
+
+    # 이미 이벤트 루프가 실행 중인 스레드라면 별도 스레드에서 새 루프로 실행
+    outcome = {}
+
+    def _runner():
+        try:
+            outcome["value"] = asyncio.run(coro)
+        except BaseException as e:
+            outcome["error"] = e
+
+    thread = threading.Thread(target=_runner, daemon=True)
+    thread.start()
+    thread.join()
+    if "error" in outcome:
+        raise outcome["error"]
+    return outcome.get("value")
+
+
+def fetch_concurrently(db, calls: dict, max_concurrency: int = 8) -> dict:
+    """
+    동기 facade: 독립적인 EdgeDBClient 메서드들을 동시에 호출
+
+    예)
+        results = fetch_concurrently(db, {
+            "multiple_choice": ("get_multiple_choice_questions", {}),
+            "subjective": ("get_subjective_questions", {}),
+        })
+
+    실패한 호출은 예외 객체가 값으로 반환되므로 호출 측에서 isinstance(..., Exception)로 확인합니다.
+    """
+    return run_sync(AsyncEdgeDBClient(db, max_concurrency=max_concurrency).gather(calls))
@@ -0,0 +1,194 @@
+"""
+문제 은행 클라이언트 캐시
+- 처음 한 번만 전체 문제를 내려받고, 이후에는 updated_at 기준 변경분(delta)만 조회하여 병합
+- active=False 로 바뀐 문제는 소프트 삭제로 간주하여 캐시에서 제거
+- get_shared_bank(): 모든 탭/모든 사용자 세션이 함께 읽는 프로세스 단위 저장소 (st.cache_resource)
+"""
+import copy
+import json
+import os
+import threading
+import time
+from types import MappingProxyType
+
+import streamlit as st
+
+def _parse_json_list(value):
+    """JSON 문자열로 저장된 steps 등을 리스트로 변환 (실패 시 빈 리스트)"""
+    if isinstance(value, list):
+        return value
+    if isinstance(value, str) and value.strip() not in ("", "null", "NULL"):
+        try:
+            parsed = json.loads(value)
+            return parsed if isinstance(parsed, list) else []
+        except json.JSONDecodeError:
+            return []
+    return []
+
+
+def normalize_question(q: dict, question_type: str) -> dict:
+    """문제 은행 표시용으로 문제 레코드를 정규화 (type / question_type / title 통일)"""
+    q['type'] = question_type  # 타입 명시
+    if question_type == 'multiple_choice':
+        q['question_type'] = '객관식'  # 한국어 타입명
+        # title 필드 통일 (problem_title -> title)
+        if 'problem_title' in q:
+            q['title'] = q['problem_title']
+        # steps 정규화 (JSON 문자열 -> 리스트 변환, 요약 레코드는 steps가 없음)
+        if 'steps' in q:
+            q['steps'] = _parse_json_list(q.get('steps'))
+    else:
+        q['question_type'] = '주관식'  # 한국어 타입명
+    # area 필드가 있다면 제거 (새로운 구조에서는 사용하지 않음)
+    q.pop('area', None)
+    return q
+
+
+def editable_copy(q) -> dict:
+    """공유 저장소의 읽기 전용 뷰를 세션에서 수정할 수 있는 깊은 복사본으로 변환 (steps/options/meta 포함)"""
+    return copy.deepcopy(dict(q))
+
+
+class QuestionBankCache:
+    """
+    객관식 + 주관식 문제를 id 기준으로 보관하는 캐시
+
+    사용 예)
+        cache = QuestionBankCache()
+        cache.refresh(db)          # 최초 1회 전체 조회, 이후에는 변경분만 조회
+        questions = cache.questions()
+    """
+
+    def __init__(self):
+        self._questions: dict[str, dict] = {}
+        self.version: str | None = None
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self._questions)
+
+    @property
+    def loaded(self) -> bool:
+        return self.version is not None
+
+    def questions(self) -> list[dict]:
+        """캐시된 문제 목록 (최신 생성 순)"""
+        with self._lock:
+            items = list(self._questions.values())
+        return sorted(items, key=lambda q: q.get('created_at') or '', reverse=True)
+
+    def get(self, question_id: str) -> dict | None:
+        with self._lock:
+            return self._questions.get(question_id)
+
+    def _merge(self, rows: list, question_type: str) -> int:
+        """변경된 레코드를 병합 (active=False 는 삭제), 반영된 건수 반환"""
+        changed = 0
+        for row in rows or []:
+            question_id = row.get('id')
+            if not question_id:
+                continue
+            if row.get('active') is False:
+                if self._questions.pop(question_id, None) is not None:
+                    changed += 1
+                continue
+            self._questions[question_id] = normalize_question(row, question_type)
+            changed += 1
+        return changed
+
+    def load_full(self, db) -> int:
+        """전체 문제를 다시 조회하여 캐시를 교체"""
+        # 버전을 먼저 읽어야 조회 도중 수정된 문제가 다음 delta 에서 다시 내려옴
+        version = db.get_questions_data_version()
+        changes = db.get_questions_changed_since(None)
+        with self._lock:
+            self._questions = {}
+            self._merge(changes['multiple_choice'], 'multiple_choice')
+            self._merge(changes['subjective'], 'subjective')
+            self.version = version
+            return len(self._questions)
+
+    def refresh(self, db) -> int:
+        """
+        데이터 버전이 바뀌었으면 변경분만 조회하여 병합
+
+        Returns:
+            int: 반영된(추가/수정/삭제) 문제 수 (최초 로드 시 전체 건수)
+        """
+        if not self.loaded:
+            return self.load_full(db)
+
+        version = db.get_questions_data_version()
+        with self._lock:
+            if version == self.version:
+                return 0
+            since = self.version
+
+        changes = db.get_questions_changed_since(since)
+        with self._lock:
+            changed = self._merge(changes['multiple_choice'], 'multiple_choice')
+            changed += self._merge(changes['subjective'], 'subjective')
+            self.version = version
+            return changed
+
+    def invalidate(self):
+        """다음 refresh 에서 전체를 다시 조회하도록 초기화"""
+        with self._lock:
+            self._questions = {}
+            self.version = None
+
+
+class SharedQuestionBank(QuestionBankCache):
+    """
+    프로세스 전체에서 공유하는 문제 은행 저장소
+
+    - 버전 확인은 check_interval 초에 한 번만 수행하고, 갱신은 버전이 바뀔 때 한 번만 일어남
+      (동시에 들어온 세션들은 갱신 락에서 기다렸다가 결과를 그대로 사용)
+    - questions()는 MappingProxyType 읽기 전용 뷰의 튜플을 반환하므로 세션별 복사본이 생기지 않음
+      뷰는 최상위만 읽기 전용이고 steps/options/meta 등 중첩 값은 공유 객체이므로,
+      수정이 필요한 호출 측은 반드시 editable_copy(q)로 깊은 복사본을 만들어 사용
+    """
+
+    def __init__(self, check_interval: float = 30.0):
+        super().__init__()
+        self.check_interval = check_interval
+        self._refresh_lock = threading.Lock()
+        self._checked_at = 0.0
+        self._views: tuple = ()
+
+    def refresh(self, db, force: bool = False) -> int:
+        with self._refresh_lock:
+            if not force and self.loaded and time.monotonic() - self._checked_at < self.check_interval:
+                return 0
+            changed = super().refresh(db)
+            self._checked_at = time.monotonic()
+            if changed or not self._views:
+                self._views = tuple(MappingProxyType(q) for q in super().questions())
+            return changed
+
+    def questions(self) -> tuple:
+        """읽기 전용 문제 뷰 (최신 생성 순)"""
+        return self._views
+
+    def get(self, question_id: str):
+        q = super().get(question_id)
+        return MappingProxyType(q) if q is not None else None
+
+    def invalidate(self):
+        with self._refresh_lock:
+            super().invalidate()
+            self._views = ()
+            self._checked_at = 0.0
+
+
+@st.cache_resource
+def get_shared_bank() -> SharedQuestionBank:
+    """프로세스 단위 문제 은행 저장소 (모든 세션이 같은 인스턴스를 사용)"""
+    return SharedQuestionBank(check_interval=float(os.getenv("BANK_VERSION_CHECK_INTERVAL", "30")))
+
+
+def get_bank_questions(db, force: bool = False) -> tuple:
+    """공유 저장소를 (필요할 때만) 갱신하고 읽기 전용 문제 목록을 반환"""
+    bank = get_shared_bank()
+    bank.refresh(db, force=force)
+    return bank.questions()
@@ -0,0 +1,291 @@
+"""
+교정/번역 배치 체크포인트 (SQLite)
+- 배치 id + 문제 id 단위로 처리 상태(성공/실패/시도 횟수/오류/결과)를 기록
+- 같은 배치를 다시 실행하면 이미 성공한 문제는 건너뛰고 실패/미처리 문제만 다시 처리 (Gemini 호출 중복 없음)
+  저장 후 상태 업데이트만 실패한 문제(partial_success)는 상태 업데이트만 다시 시도
+- 배치 id를 지정하지 않으면 종류 + 문제 id 목록으로 정해지므로, 새로고침 후 같은 문제를 다시 선택해도 이어서 실행됨
+  단, 그 배치가 이미 끝났으면(done) 새 배치 id로 처음부터 다시 실행 (완료된 문제를 다시 교정/번역할 수 있도록)
+- export(): 배치 처리 내역(ledger)을 CSV / JSONL로 내보내기
+"""
+import csv
+import hashlib
+import io
+import json
+import os
+import sqlite3
+import threading
+from datetime import datetime
+
+DEFAULT_CHECKPOINT_DB_PATH = "ai_assessment_checkpoints.db"
+
+# 배치 종류
+BATCH_CORRECTION = "correction"
+BATCH_TRANSLATION = "translation"
+
+# 항목 상태
+ITEM_PENDING = "pending"
+ITEM_SUCCESS = "success"
+ITEM_PARTIAL = "partial_success"
+ITEM_FAILED = "failed"
+ITEM_CANCELLED = "cancelled"
+
+# 배치 상태
+BATCH_RUNNING = "running"
+BATCH_DONE = "done"          # 모든 항목 성공
+BATCH_INCOMPLETE = "incomplete"   # 실패/미처리 항목이 남음 (이어서 실행 가능)
+
+EXPORT_COLUMNS = ("batch_id", "item_id", "item_index", "status", "attempts", "stage", "error", "prompt_hash", "updated_at")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS batches (
+    id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    label TEXT,
+    status TEXT NOT NULL,
+    total INTEGER NOT NULL,
+    runs INTEGER NOT NULL DEFAULT 0,
+    created_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL,
+    finished_at TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_batches_kind_updated ON batches (kind, updated_at);
+CREATE TABLE IF NOT EXISTS batch_items (
+    batch_id TEXT NOT NULL,
+    item_id TEXT NOT NULL,
+    item_index INTEGER NOT NULL,
+    spec TEXT NOT NULL,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    stage TEXT,
+    error TEXT,
+    result TEXT,
+    updated_at TEXT NOT NULL,
+    PRIMARY KEY (batch_id, item_id)
+);
+"""
+
+
+def batch_id_for(kind: str, item_ids: list) -> str:
+    """종류 + 문제 id 목록(순서 무관)으로 정해지는 배치 id"""
+    digest = hashlib.sha256("\n".join(sorted(str(item_id) for item_id in item_ids)).encode("utf-8")).hexdigest()
+    return f"{kind}-{digest[:16]}"
+
+
+def _new_batch_id(base: str) -> str:
+    """같은 문제 목록을 다시 실행할 때 쓰는 새 배치 id (기본 id + 시각)"""
+    return f"{base}-{datetime.now().strftime('%Y%m%d%H%M%S%f')}"
+
+
+class CheckpointStore:
+    """
+    배치 처리 상태 저장소 (스레드 간 공유)
+
+    사용 예)
+        store = get_checkpoint_store()
+        batch_id = store.open_batch(BATCH_CORRECTION, {q["id"]: {"id": q["id"], "question_type": t} for q in questions})
+        todo = [q for q in questions if q["id"] not in store.completed_ids(batch_id)]
+        store.mark(batch_id, question_id, ITEM_SUCCESS)
+    """
+
+    def __init__(self, path: str | None = None):
+        self.path = path or os.getenv("CHECKPOINT_DB_PATH", DEFAULT_CHECKPOINT_DB_PATH)
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def resolve_batch_id(self, kind: str, item_ids: list) -> str:
+        """
+        배치 id를 지정하지 않았을 때 사용할 id
+        - 같은 문제 목록의 가장 최근 배치가 끝나지 않았으면 그 배치를 이어서 실행
+        - 처음 실행하면 batch_id_for(kind, 문제 id 목록), 이미 끝난 배치뿐이면 새 id (처음부터 다시 실행)
+        """
+        base = batch_id_for(kind, item_ids)
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT id, status FROM batches WHERE id = ? OR id LIKE ? ORDER BY created_at DESC, id DESC LIMIT 1",
+                (base, f"{base}-%"),
+            ).fetchone()
+        if row is None:
+            return base
+        if row["status"] != BATCH_DONE:
+            return row["id"]
+        return _new_batch_id(base)
+
+    def open_batch(self, kind: str, specs: dict, batch_id: str | None = None, label: str = "") -> str:
+        """
+        배치 생성 또는 기존 배치 이어서 실행 (배치 id 반환)
+
+        Args:
+            specs: {문제 id: 다시 실행할 때 필요한 항목 정보} (순서대로 item_index 부여)
+            batch_id: 이어서 실행할 배치 id (없으면 resolve_batch_id(kind, 문제 id 목록))
+        이미 있는 항목의 상태는 그대로 두고, 새 문제만 추가합니다.
+        """
+        batch_id = batch_id or self.resolve_batch_id(kind, list(specs))
+        now = datetime.now().isoformat()
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.execute(
+                    "INSERT OR IGNORE INTO batches (id, kind, label, status, total, created_at, updated_at) "
+                    "VALUES (?, ?, ?, ?, 0, ?, ?)",
+                    (batch_id, kind, label, BATCH_RUNNING, now, now),
+                )
+                start = self._conn.execute("SELECT COUNT(*) FROM batch_items WHERE batch_id = ?", (batch_id,)).fetchone()[0]
+                self._conn.executemany(
+                    "INSERT OR IGNORE INTO batch_items (batch_id, item_id, item_index, spec, status, updated_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    [(batch_id, str(item_id), start + index, json.dumps(spec, ensure_ascii=False, default=str),
+                      ITEM_PENDING, now) for index, (item_id, spec) in enumerate(specs.items())],
+                )
+                total = self._conn.execute("SELECT COUNT(*) FROM batch_items WHERE batch_id = ?", (batch_id,)).fetchone()[0]
+                self._conn.execute(
+                    "UPDATE batches SET status = ?, total = ?, runs = runs + 1, updated_at = ?, finished_at = NULL "
+                    "WHERE id = ?",
+                    (BATCH_RUNNING, total, now, batch_id),
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return batch_id
+
+    def completed_ids(self, batch_id: str) -> set:
+        """이미 성공한 문제 id (다시 실행하지 않음)"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT item_id FROM batch_items WHERE batch_id = ? AND status = ?", (batch_id, ITEM_SUCCESS)
+            ).fetchall()
+        return {row["item_id"] for row in rows}
+
+    def partial_ids(self, batch_id: str) -> set:
+        """저장은 됐지만 상태 업데이트에 실패한 문제 id (이어서 실행할 때 상태 업데이트만 다시 시도)"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT item_id FROM batch_items WHERE batch_id = ? AND status = ?", (batch_id, ITEM_PARTIAL)
+            ).fetchall()
+        return {row["item_id"] for row in rows}
+
+    def pending_specs(self, batch_id: str) -> list[dict]:
+        """아직 성공하지 못한 항목 정보 (item_index 순서)"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT spec FROM batch_items WHERE batch_id = ? AND status != ? ORDER BY item_index",
+                (batch_id, ITEM_SUCCESS),
+            ).fetchall()
+        return [json.loads(row["spec"]) for row in rows]
+
+    def mark(self, batch_id: str, item_id, status: str, stage: str | None = None, error: str | None = None,
+             result: dict | None = None):
+        """항목 처리 결과 기록 (시도 횟수 증가)"""
+        now = datetime.now().isoformat()
+        with self._lock:
+            self._conn.execute(
+                "UPDATE batch_items SET status = ?, attempts = attempts + ?, stage = ?, error = ?, "
+                "result = COALESCE(?, result), updated_at = ? WHERE batch_id = ? AND item_id = ?",
+                (status, 0 if status == ITEM_CANCELLED else 1, stage, error,
+                 json.dumps(result, ensure_ascii=False, default=str) if result is not None else None,
+                 now, batch_id, str(item_id)),
+            )
+            self._conn.execute("UPDATE batches SET updated_at = ? WHERE id = ?", (now, batch_id))
+
+    def finish(self, batch_id: str) -> str:
+        """실행이 끝난 배치 상태 갱신 (남은 항목이 없으면 done, 있으면 incomplete)"""
+        counts = self.counts(batch_id)
+        status = BATCH_DONE if counts.get(ITEM_SUCCESS, 0) == sum(counts.values()) else BATCH_INCOMPLETE
+        now = datetime.now().isoformat()
+        with self._lock:
+            self._conn.execute("UPDATE batches SET status = ?, updated_at = ?, finished_at = ? WHERE id = ?",
+                               (status, now, now, batch_id))
+        return status
+
+    def counts(self, batch_id: str) -> dict:
+        with self._lock:
+            return dict(self._conn.execute(
+                "SELECT status, COUNT(*) FROM batch_items WHERE batch_id = ? GROUP BY status", (batch_id,)
+            ).fetchall())
+
+    def get_batch(self, batch_id: str) -> dict | None:
+        """배치 정보 + 상태별 항목 수"""
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM batches WHERE id = ?", (batch_id,)).fetchone()
+        if row is None:
+            return None
+        batch = dict(row)
+        counts = self.counts(batch_id)
+        batch["success"] = counts.get(ITEM_SUCCESS, 0)
+        batch["failed"] = counts.get(ITEM_FAILED, 0) + counts.get(ITEM_PARTIAL, 0)
+        batch["remaining"] = batch["total"] - batch["success"]
+        return batch
+
+    def list_batches(self, kind: str | None = None, limit: int = 20) -> list[dict]:
+        """최근 배치 목록 (최근 실행 순)"""
+        with self._lock:
+            if kind:
+                rows = self._conn.execute("SELECT id FROM batches WHERE kind = ? ORDER BY updated_at DESC LIMIT ?",
+                                          (kind, int(limit))).fetchall()
+            else:
+                rows = self._conn.execute("SELECT id FROM batches ORDER BY updated_at DESC LIMIT ?",
+                                          (int(limit),)).fetchall()
+        return [self.get_batch(row["id"]) for row in rows]
+
+    def unfinished_batch(self, kind: str) -> dict | None:
+        """가장 최근의 끝나지 않은 배치 (중단되었거나 실패 항목이 남은 배치)"""
+        for batch in self.list_batches(kind, limit=1):
+            if batch["status"] != BATCH_DONE and batch["remaining"] > 0:
+                return batch
+        return None
+
+    def items(self, batch_id: str, status: str | None = None) -> list[dict]:
+        """항목 처리 내역 (item_index 순서, spec/result는 dict로 변환)"""
+        query = "SELECT * FROM batch_items WHERE batch_id = ?"
+        args = [batch_id]
+        if status:
+            query += " AND status = ?"
+            args.append(status)
+        with self._lock:
+            rows = self._conn.execute(query + " ORDER BY item_index", args).fetchall()
+        items = []
+        for row in rows:
+            item = dict(row)
+            item["spec"] = json.loads(item["spec"])
+            item["result"] = json.loads(item["result"]) if item["result"] else None
+            items.append(item)
+        return items
+
+    def export(self, batch_id: str, fmt: str = "csv") -> str:
+        """배치 처리 내역 내보내기 (csv: 요약 컬럼, jsonl: 항목 정보/결과 포함)"""
+        items = self.items(batch_id)
+        if fmt == "jsonl":
+            return "".join(json.dumps(item, ensure_ascii=False, default=str) + "\n" for item in items)
+        if fmt != "csv":
+            raise RuntimeError(f"지원하지 않는 내보내기 형식입니다: {fmt} (csv, jsonl)")
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=EXPORT_COLUMNS, extrasaction="ignore")
+        writer.writeheader()
+        # result의 요약 값(교정 프롬프트 해시 등)은 컬럼으로 펼침
+        writer.writerows({**(item["result"] or {}), **item} for item in items)
+        return buffer.getvalue()
+
+    def delete_batch(self, batch_id: str):
+        with self._lock:
+            self._conn.execute("DELETE FROM batch_items WHERE batch_id = ?", (batch_id,))
+            self._conn.execute("DELETE FROM batches WHERE id = ?", (batch_id,))
+
+
+_CHECKPOINT_STORE: CheckpointStore | None = None
+_CHECKPOINT_STORE_LOCK = threading.Lock()
+
+
+def get_checkpoint_store(path: str | None = None) -> CheckpointStore:
+    """프로세스 단위로 공유하는 체크포인트 저장소"""
+    global _CHECKPOINT_STORE
+    with _CHECKPOINT_STORE_LOCK:
+        if _CHECKPOINT_STORE is None:
+            _CHECKPOINT_STORE = CheckpointStore(path)
+        return _CHECKPOINT_STORE
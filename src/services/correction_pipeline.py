@@ -0,0 +1,773 @@
+"""
+문제 교정 배치 파이프라인
+- 단계: 조회(fetch) → 직렬화(serialize) → Gemini 교정(correct, N개 동시) → JSON 추출/검증(extract)
+        → next_qlearn_problems 형식 매핑(map) → 저장(save) → question_status 업데이트(status)
+- 단계 사이는 크기 제한 큐로 연결되어, 교정 응답을 기다리는 동안 앞 문제의 조회와 뒤 문제의 저장이 함께 진행됨
+- 문제별로 단계 실패 시 재시도하고(JSON 추출/매핑 오류는 재시도하지 않음), 끝나면 결과 보고서를 반환
+- question_status 업데이트는 STATUS_UPDATE_BATCH_SIZE개씩 batch 요청 한 번으로 반영
+- checkpoint를 넘기면 문제별 결과를 배치 체크포인트에 기록하고, 같은 배치에서 이미 성공한 문제는 건너뜀
+  (저장 후 상태 업데이트만 실패했던 문제는 상태 업데이트 단계만 다시 실행)
+
+사용 예)
+    corrector = BatchCorrector(ProblemCorrectionService(ctx), db, concurrency=4, context=ctx)
+    report = corrector.run(questions)          # 블로킹
+    corrector.start(questions); corrector.snapshot()   # 백그라운드 실행 + 진행 상황 조회 (화면)
+"""
+import json
+import os
+import queue
+import re
+import threading
+import time
+from datetime import datetime
+
+from src.constants import DEFAULT_DIFFICULTY, DEFAULT_DOMAIN
+from src.services.batch_checkpoint import BATCH_CORRECTION
+from src.services.rate_limiter import backoff_delay
+from src.services.service_context import ServiceContext, ensure_context
+
+# 저장 전에 반드시 있어야 하는 레이어/필드
+REQUIRED_LAYERS = ("meta_layer", "user_view_layer")
+REQUIRED_STRUCTURED_FIELDS = ("lang", "category", "difficulty", "target_template_code")
+
+# question_status 업데이트를 한 번에 보낼 개수 / 모자라도 보내기 전 최대 대기 시간(초)
+STATUS_UPDATE_BATCH_SIZE = 10
+STATUS_FLUSH_INTERVAL = 2.0
+
+DEFAULT_CORRECTION_CONCURRENCY = 4
+DEFAULT_CORRECTION_MAX_RETRIES = 2
+
+STRUCTURED_TABLE = "next_qlearn_problems"
+
+# 결과 상태
+RESULT_SUCCESS = "success"
+RESULT_PARTIAL = "partial_success"   # 저장은 됐지만 상태 업데이트 실패
+RESULT_FAILED = "failed"
+RESULT_CANCELLED = "cancelled"
+RESULT_SKIPPED = "skipped"           # 같은 배치의 이전 실행에서 이미 성공
+
+_END = object()   # 단계 종료 표시
+
+# 이 프로세스에서 실행 중인 배치 (새로고침 후 화면이 진행 상황을 다시 연결할 때 사용)
+_ACTIVE_CORRECTORS = {}
+_ACTIVE_CORRECTORS_LOCK = threading.Lock()
+
+
+def extract_json_from_text(text: str) -> dict:
+    """
+    텍스트에서 JSON 부분을 추출합니다.
+    """
+    if not text:
+        return {}
+    
+    # 1. 먼저 전체 텍스트가 JSON인지 확인
+    try:
+        result = json.loads(text.strip())
+        return result
+    except json.JSONDecodeError:
+        pass
+    
+    # 2. 코드 블록(```json ... ```) 내부의 JSON 추출
+    code_block_pattern = r'```(?:json)?\s*\n?(\{.*?\})\s*\n?```'
+    code_matches = re.findall(code_block_pattern, text, re.DOTALL)
+    
+    for match in code_matches:
+        try:
+            cleaned_match = match.strip()
+            result = json.loads(cleaned_match)
+            return result
+        except json.JSONDecodeError:
+            continue
+    
+    # 3. 더 간단한 코드 블록 패턴도 시도
+    simple_code_pattern = r'```json\s*(\{.*?\})\s*```'
+    simple_matches = re.findall(simple_code_pattern, text, re.DOTALL)
+    for match in simple_matches:
+        try:
+            cleaned_match = match.strip()
+            return json.loads(cleaned_match)
+        except json.JSONDecodeError:
+            continue
+    
+    # 4. 첫 번째 중괄호부터 마지막 중괄호까지 추출
+    first_brace = text.find('{')
+    last_brace = text.rfind('}')
+    
+    if first_brace != -1 and last_brace != -1 and last_brace > first_brace:
+        json_candidate = text[first_brace:last_brace + 1]
+        try:
+            result = json.loads(json_candidate)
+            return result
+        except json.JSONDecodeError:
+            pass
+    
+    # 5. 여러 JSON 객체가 있는 경우 가장 긴 것 선택
+    json_pattern = r'\{[^{}]*(?:\{[^{}]*\}[^{}]*)*\}'
+    matches = re.findall(json_pattern, text, re.DOTALL)
+    
+    # 가장 긴 JSON 후보를 선택
+    longest_match = ""
+    for match in matches:
+        if len(match) > len(longest_match):
+            longest_match = match
+    
+    if longest_match:
+        try:
+            return json.loads(longest_match)
+        except json.JSONDecodeError:
+            pass
+    
+    # 6. 중괄호 개수를 맞춰서 JSON 추출 시도
+    brace_count = 0
+    start_idx = -1
+    
+    for i, char in enumerate(text):
+        if char == '{':
+            if brace_count == 0:
+                start_idx = i
+            brace_count += 1
+        elif char == '}':
+            brace_count -= 1
+            if brace_count == 0 and start_idx != -1:
+                json_candidate = text[start_idx:i + 1]
+                try:
+                    return json.loads(json_candidate)
+                except json.JSONDecodeError:
+                    continue
+    
+    # 7. 플레이스홀더가 있는 JSON 처리 (예: {time_limit})
+    if '{' in text and '}' in text:
+        # 플레이스홀더를 기본값으로 대체하여 JSON 파싱 시도
+        placeholder_replacements = {
+            '{time_limit}': '"5분"',
+            '{difficulty}': f'"{DEFAULT_DIFFICULTY}"',
+            '{category}': f'"{DEFAULT_DOMAIN}"',
+            '{lang}': '"kr"'
+        }
+        
+        # 첫 번째 중괄호부터 마지막 중괄호까지 추출
+        first_brace = text.find('{')
+        last_brace = text.rfind('}')
+        
+        if first_brace != -1 and last_brace != -1 and last_brace > first_brace:
+            json_candidate = text[first_brace:last_brace + 1]
+            
+            # 플레이스홀더 대체
+            for placeholder, replacement in placeholder_replacements.items():
+                json_candidate = json_candidate.replace(placeholder, replacement)
+            
+            try:
+                result = json.loads(json_candidate)
+                return result
+            except json.JSONDecodeError:
+                pass
+    
+    # 8. 주관식 문제의 특수한 경우 처리
+    # 주관식 문제는 때때로 여러 줄에 걸쳐 JSON이 작성될 수 있음
+    lines = text.split('\n')
+    json_lines = []
+    in_json = False
+    brace_count = 0
+    
+    for line in lines:
+        line = line.strip()
+        if line.startswith('{'):
+            in_json = True
+            json_lines = [line]
+            brace_count = line.count('{') - line.count('}')
+        elif in_json:
+            json_lines.append(line)
+            brace_count += line.count('{') - line.count('}')
+            if brace_count == 0:
+                # 중괄호가 균형을 이룰 때까지 수집
+                json_candidate = '\n'.join(json_lines)
+                try:
+                    result = json.loads(json_candidate)
+                    return result
+                except json.JSONDecodeError:
+                    continue
+    
+    # 9. 마지막 시도: 텍스트에서 모든 중괄호 쌍을 찾아서 가장 완전한 JSON 추출
+    if '{' in text and '}' in text:
+        # 중괄호의 위치를 찾아서 가장 완전한 JSON 구조 추출
+        start_pos = text.find('{')
+        if start_pos != -1:
+            # 시작 중괄호부터 끝까지 스캔하여 완전한 JSON 구조 찾기
+            brace_count = 0
+            end_pos = -1
+            
+            for i in range(start_pos, len(text)):
+                if text[i] == '{':
+                    brace_count += 1
+                elif text[i] == '}':
+                    brace_count -= 1
+                    if brace_count == 0:
+                        end_pos = i
+                        break
+            
+            if end_pos != -1:
+                json_candidate = text[start_pos:end_pos + 1]
+                try:
+                    result = json.loads(json_candidate)
+                    return result
+                except json.JSONDecodeError:
+                    pass
+    
+    # 10. 주관식 문제의 특수한 경우: 텍스트에서 JSON 구조를 더 유연하게 추출
+    # 예: "다음은 문제입니다: { ... } 이것이 문제입니다" 같은 형태
+    if '{' in text and '}' in text:
+        # 텍스트를 줄 단위로 분할하여 JSON 구조 찾기
+        lines = text.split('\n')
+        json_candidates = []
+        
+        for i, line in enumerate(lines):
+            if '{' in line:
+                # 이 줄부터 시작하여 JSON 구조 완성 시도
+                json_lines = []
+                brace_count = 0
+                
+                for j in range(i, len(lines)):
+                    current_line = lines[j]
+                    json_lines.append(current_line)
+                    
+                    # 중괄호 개수 계산
+                    brace_count += current_line.count('{') - current_line.count('}')
+                    
+                    if brace_count == 0:
+                        # 중괄호가 균형을 이룰 때까지 수집
+                        json_candidate = '\n'.join(json_lines)
+                        json_candidates.append(json_candidate)
+                        break
+        
+        # 가장 긴 JSON 후보를 선택하여 파싱 시도
+        if json_candidates:
+            longest_candidate = max(json_candidates, key=len)
+            try:
+                result = json.loads(longest_candidate)
+                return result
+            except json.JSONDecodeError:
+                pass
+    
+    # 11. 마지막 시도: 주관식 문제의 특수한 경우 처리
+    # 예: "문제: { ... } 답안: { ... }" 같은 형태에서 첫 번째 JSON만 추출
+    if '{' in text and '}' in text:
+        # 첫 번째 완전한 JSON 구조만 추출
+        start_pos = text.find('{')
+        if start_pos != -1:
+            brace_count = 0
+            end_pos = -1
+            
+            for i in range(start_pos, len(text)):
+                if text[i] == '{':
+                    brace_count += 1
+                elif text[i] == '}':
+                    brace_count -= 1
+                    if brace_count == 0:
+                        end_pos = i
+                        break
+            
+            if end_pos != -1:
+                json_candidate = text[start_pos:end_pos + 1]
+                try:
+                    result = json.loads(json_candidate)
+                    return result
+                except json.JSONDecodeError:
+                    pass
+    
+    return {}
+
+
+def map_to_structured_problem_format(corrected_data: dict) -> dict:
+    """교정된 데이터를 next_qlearn_problems 테이블 형식으로 매핑"""
+    
+    # 교정된 데이터는 4개 레이어 구조로 반환됨
+    meta_layer = corrected_data.get("meta_layer", {})
+    user_view_layer = corrected_data.get("user_view_layer", {})
+    system_view_layer = corrected_data.get("system_view_layer", {})
+    evaluation_layer = corrected_data.get("evaluation_layer", {})
+    
+    # 현재 시간
+    now = datetime.now()
+    
+    # 날짜 형식 변환 함수
+    def format_timestamp(date_value):
+        """날짜 문자열을 ISO 형식으로 변환"""
+        if not date_value:
+            return now.isoformat()
+        
+        if isinstance(date_value, str):
+            # PostgreSQL timestamp 형식 (예: "2025-10-23 08:50:14.242741+00")을 ISO로 변환
+            if ' ' in date_value and 'T' not in date_value:
+                # 공백이 있고 T가 없으면 PostgreSQL 형식으로 간주
+                try:
+                    # 공백을 T로 변환
+                    iso_string = date_value.replace(' ', 'T')
+                    
+                    # 시간대 형식 정리 (+00 -> +00:00, -00 -> -00:00)
+                    import re
+                    # 끝에 있는 +HH 또는 -HH 형식을 찾아서 +HH:00 또는 -HH:00로 변환
+                    tz_pattern = r'([+-])(\d{2})$'
+                    match = re.search(tz_pattern, iso_string)
+                    if match:
+                        sign = match.group(1)
+                        hours = match.group(2)
+                        iso_string = re.sub(tz_pattern, f'{sign}{hours}:00', iso_string)
+                    elif not ('+' in iso_string or '-' in iso_string[-6:] or iso_string.endswith('Z')):
+                        # 시간대가 없으면 UTC로 가정
+                        iso_string += '+00:00'
+                    
+                    # datetime.fromisoformat으로 파싱 (Python 3.7+)
+                    try:
+                        from datetime import datetime
+                        parsed_date = datetime.fromisoformat(iso_string.replace('Z', '+00:00'))
+                        return parsed_date.isoformat()
+                    except ValueError:
+                        # fromisoformat 실패 시 기본값 사용
+                        return now.isoformat()
+                except Exception as e:
+                    # 파싱 실패 시 기본값 사용
+                    return now.isoformat()
+            else:
+                # 이미 ISO 형식이면 그대로 사용 (파싱 시도)
+                try:
+                    from datetime import datetime
+                    # Z를 +00:00로 변환 후 파싱
+                    iso_value = date_value.replace('Z', '+00:00')
+                    parsed_date = datetime.fromisoformat(iso_value)
+                    return parsed_date.isoformat()
+                except (ValueError, AttributeError):
+                    return now.isoformat()
+        
+        return now.isoformat()
+    
+    # meta_layer에서 필드 추출
+    # meta_layer에 id와 idx가 있으면 제거 (테이블에서 자동 생성)
+    meta_layer_clean = {k: v for k, v in meta_layer.items() if k not in ['id', 'idx']}
+    
+    mapped_data = {
+        # idx는 자동 증가 컬럼이므로 제외
+        "lang": meta_layer_clean.get("lang", "kr"),
+        "category": meta_layer_clean.get("category", ""),
+        "topic": meta_layer_clean.get("topic", []),  # text[] 배열
+        "difficulty": meta_layer_clean.get("difficulty", "normal"),
+        "time_limit": meta_layer_clean.get("time_limit", ""),
+        "target_template_code": meta_layer_clean.get("target_template_code", ""),
+        "training_focus": meta_layer_clean.get("training_focus", []),  # text[] 배열
+        "created_by": meta_layer_clean.get("created_by"),
+        "created_at": format_timestamp(meta_layer_clean.get("created_at")),
+        "updated_at": format_timestamp(meta_layer_clean.get("updated_at")),
+        "active": meta_layer_clean.get("active", True),
+        # JSONB 필드들
+        "user_view_layer": user_view_layer,
+        "system_view_layer": system_view_layer,
+        "evaluation_layer": evaluation_layer,
+    }
+    
+    return mapped_data
+
+
+def load_full_question(db, question):
+    """요약 레코드라면 교정에 필요한 전체 레코드를 조회"""
+    if not question.get("summary_only"):
+        return question
+    full = db.get_question_by_id(question["id"], question.get("question_type", "subjective"))
+    if not full:
+        raise RuntimeError(f"문제 상세 조회 실패: {question['id']}")
+    full["question_type"] = question.get("question_type", "subjective")
+    full.setdefault("question_status", question.get("question_status"))
+    return full
+
+
+def validate_corrected(corrected_data) -> dict:
+    """교정 결과가 레이어 구조인지 검증 (아니면 ValueError)"""
+    if not corrected_data:
+        raise ValueError("JSON 추출 실패")
+    if not isinstance(corrected_data, dict):
+        raise ValueError(f"데이터 타입 오류: {type(corrected_data).__name__}")
+    missing_layers = [layer for layer in REQUIRED_LAYERS if layer not in corrected_data]
+    if missing_layers:
+        raise ValueError(f"레이어 구조 불일치: 누락된 레이어 {missing_layers}")
+    return corrected_data
+
+
+class CorrectionItem:
+    """파이프라인을 지나가는 문제 하나 (단계마다 결과를 채움)"""
+
+    __slots__ = ("index", "question", "payload", "prompt_hash", "response", "corrected", "mapped", "retries", "attempt",
+                 "started")
+
+    def __init__(self, index: int, question: dict):
+        self.index = index
+        self.question = question
+        self.payload = None     # 교정 요청용 JSON 문자열
+        self.prompt_hash = None # 교정에 사용한 프롬프트 해시
+        self.response = None    # 교정 응답 원문
+        self.corrected = None   # 추출된 레이어 구조
+        self.mapped = None      # 저장할 next_qlearn_problems 레코드
+        self.retries = 0
+        self.attempt = 0        # 현재 단계의 시도 순번 (0 = 첫 시도)
+        self.started = time.monotonic()
+
+    @property
+    def question_id(self):
+        return self.question.get("id")
+
+    @property
+    def question_type(self) -> str:
+        return self.question.get("question_type", "subjective")
+
+
+class _Stage:
+    """단계 하나 (워커 수, 재시도 여부, 처리 통계)"""
+
+    __slots__ = ("name", "func", "workers", "retry", "running", "processed", "failed", "busy")
+
+    def __init__(self, name: str, func, workers: int = 1, retry: bool = True):
+        self.name = name
+        self.func = func
+        self.workers = max(1, workers)
+        self.retry = retry
+        self.running = 0
+        self.processed = 0
+        self.failed = 0
+        self.busy = 0.0     # 워커가 처리에 쓴 누적 시간(초)
+
+
+class BatchCorrector:
+    """
+    여러 문제를 단계별 워커 스레드로 동시에 교정/저장
+
+    Args:
+        service: ProblemCorrectionService (모든 문제가 같은 인스턴스와 Gemini 클라이언트를 공유)
+        db: 조회/저장에 사용할 DB 클라이언트 (없으면 교정 + 매핑까지만)
+        concurrency: 동시 교정 요청 수 (기본 CORRECTION_CONCURRENCY 또는 4)
+        max_retries: 단계별 재시도 횟수 (기본 CORRECTION_MAX_RETRIES 또는 2)
+        save: False면 저장/상태 업데이트 단계를 건너뜀
+        context: 교정/저장 호출에 넘길 컨텍스트 (진행률은 progress 이벤트로 내보냄)
+        fetch: fetch(question) -> 전체 레코드 (기본 load_full_question)
+        on_result: on_result(detail, item) - 문제 하나가 끝날 때마다 호출 (워커 스레드에서 호출됨)
+        keep_results: True면 보고서 details에 교정 응답과 매핑 결과를 포함
+        checkpoint: CheckpointStore (없으면 체크포인트 없이 실행)
+        batch_id: 이어서 실행할 배치 id (없으면 같은 문제 목록의 끝나지 않은 배치, 끝난 배치뿐이면 새 배치)
+    """
+
+    def __init__(self, service, db=None, concurrency: int | None = None, max_retries: int | None = None,
+                 save: bool = True, context: ServiceContext | None = None, fetch=None, on_result=None,
+                 keep_results: bool = False, checkpoint=None, batch_id: str | None = None):
+        self.service = service
+        self.db = db
+        self.concurrency = max(1, concurrency or int(os.getenv("CORRECTION_CONCURRENCY", DEFAULT_CORRECTION_CONCURRENCY)))
+        self.max_retries = max_retries if max_retries is not None else \
+            int(os.getenv("CORRECTION_MAX_RETRIES", DEFAULT_CORRECTION_MAX_RETRIES))
+        self.save = save and db is not None
+        self.context = ensure_context(context)
+        self.fetch = fetch or (lambda question: load_full_question(self.db, question))
+        self.on_result = on_result
+        self.keep_results = keep_results
+        self.checkpoint = checkpoint
+        self.batch_id = batch_id
+        self.total = 0
+        self.details = []
+        self.started_at = None
+        self.finished_at = None
+        self._started = None
+        self._elapsed = 0.0
+        self._cancel = threading.Event()
+        self._lock = threading.Lock()
+        self._thread = None
+
+        io_workers = min(4, self.concurrency)
+        self.stages = [
+            _Stage("fetch", self._fetch, io_workers),
+            _Stage("serialize", self._serialize),
+            _Stage("correct", self._correct, self.concurrency),
+            _Stage("extract", self._extract, retry=False),
+            _Stage("map", self._map, retry=False),
+        ]
+        if self.save:
+            self.stages.append(_Stage("save", self._save, io_workers))
+            self.stages.append(_Stage("status", None))
+
+    # ---- 단계별 처리 ----
+
+    def _fetch(self, item: CorrectionItem):
+        item.question = self.fetch(item.question)
+
+    def _serialize(self, item: CorrectionItem):
+        item.payload = json.dumps(item.question, ensure_ascii=False, indent=2)
+
+    def _correct(self, item: CorrectionItem):
+        # 레지스트리에서 공유하는 프롬프트 (호출마다 다시 읽지 않음), 어떤 버전으로 교정했는지 결과에 기록
+        prompt = self.service.correction_prompt()
+        item.prompt_hash = prompt.hash
+        # 재시도에서는 응답 캐시를 건너뛰고 다시 호출 (같은 실패 응답을 반복하지 않도록)
+        response = self.service.correct_problem(item.payload, item.question_type, context=self.context, prompt=prompt,
+                                                refresh=item.attempt > 0)
+        # correct_problem은 실패해도 예외 대신 "❌ ..." 메시지를 반환
+        if not response or not isinstance(response, str) or response.startswith("❌"):
+            raise RuntimeError(str(response or "교정 응답이 비어 있습니다")[:500])
+        item.response = response
+
+    def _extract(self, item: CorrectionItem):
+        item.corrected = validate_corrected(extract_json_from_text(item.response))
+
+    def _map(self, item: CorrectionItem):
+        mapped = map_to_structured_problem_format(item.corrected)
+        missing_fields = [field for field in REQUIRED_STRUCTURED_FIELDS if not mapped.get(field)]
+        if missing_fields:
+            raise ValueError(f"필수 필드 누락: {missing_fields}")
+        item.mapped = mapped
+
+    def _save(self, item: CorrectionItem):
+        if not self.db.save_structured_problem(item.mapped, context=self.context):
+            raise RuntimeError("저장 실패 (응답 없음)")
+
+    def _update_statuses(self, items: list):
+        """저장된 문제들의 review_done을 batch 요청 한 번으로 반영"""
+        updates = {item.question_id: {"review_done": True} for item in items}
+        outcomes, error = {}, None
+        for attempt in range(self.max_retries + 1):
+            try:
+                if hasattr(self.db, "update_question_statuses"):
+                    outcomes = self.db.update_question_statuses(updates)
+                else:
+                    outcomes = {qid: self.db.update_question_status(qid, values) for qid, values in updates.items()}
+                error = None
+                break
+            except Exception as e:
+                error = str(e)
+                if attempt < self.max_retries:
+                    time.sleep(backoff_delay(attempt, base=1.0, cap=15.0))
+        for item in items:
+            if outcomes.get(item.question_id):
+                self._finish(item, RESULT_SUCCESS, message=f"교정 및 {STRUCTURED_TABLE} 테이블 저장 완료, 상태 업데이트 완료")
+            else:
+                message = f"교정 및 {STRUCTURED_TABLE} 테이블 저장 완료, 상태 업데이트 {'오류: ' + error if error else '실패'}"
+                self._finish(item, RESULT_PARTIAL, "status", message)
+
+    # ---- 실행 ----
+
+    def _run_stage(self, stage: _Stage, item: CorrectionItem):
+        attempts = self.max_retries + 1 if stage.retry else 1
+        for attempt in range(attempts):
+            item.attempt = attempt
+            try:
+                stage.func(item)
+                return
+            except Exception:
+                if attempt + 1 >= attempts or self._cancel.is_set():
+                    raise
+                item.retries += 1
+                time.sleep(backoff_delay(attempt, base=1.0, cap=15.0))
+
+    def _worker(self, stage: _Stage, inbox: queue.Queue, outbox: queue.Queue | None):
+        while True:
+            item = inbox.get()
+            if item is _END:
+                inbox.put(_END)   # 같은 단계의 다른 워커도 종료하도록 되돌려 놓음
+                break
+            if self._cancel.is_set():
+                self._finish(item, RESULT_CANCELLED, stage.name, "취소됨")
+                continue
+            started = time.monotonic()
+            try:
+                self._run_stage(stage, item)
+                error = None
+            except Exception as e:
+                error = str(e) or type(e).__name__
+            with self._lock:
+                stage.busy += time.monotonic() - started
+                stage.processed += 1
+                if error is not None:
+                    stage.failed += 1
+            if error is not None:
+                self._finish(item, RESULT_FAILED, stage.name, error)
+            elif outbox is None:
+                self._finish(item, RESULT_SUCCESS, message="교정 완료")
+            else:
+                outbox.put(item)
+        with self._lock:
+            stage.running -= 1
+            last = stage.running == 0
+        if last and outbox is not None:
+            outbox.put(_END)
+
+    def _status_worker(self, stage: _Stage, inbox: queue.Queue):
+        pending = []
+        while True:
+            try:
+                item = inbox.get(timeout=STATUS_FLUSH_INTERVAL if pending else None)
+            except queue.Empty:
+                item = None
+            if item is not None and item is not _END:
+                pending.append(item)
+                if len(pending) < STATUS_UPDATE_BATCH_SIZE:
+                    continue
+            if pending:
+                started = time.monotonic()
+                self._update_statuses(pending)
+                with self._lock:
+                    stage.busy += time.monotonic() - started
+                    stage.processed += len(pending)
+                pending = []
+            if item is _END:
+                break
+
+    def _finish(self, item: CorrectionItem, status: str, stage: str | None = None, message: str = ""):
+        detail = {
+            "index": item.index,
+            "question_id": item.question_id,
+            "question_title": item.question.get("problem_title", item.question.get("title", "")),
+            "status": status,
+            "stage": stage,
+            "message": message,
+            "retries": item.retries,
+            "elapsed": round(time.monotonic() - item.started, 2),
+            "prompt_hash": item.prompt_hash,
+        }
+        if status == RESULT_FAILED and stage in ("extract", "map") and item.response:
+            detail["ai_response"] = item.response[:2000]
+        if self.keep_results:
+            detail["corrected_result"] = item.response
+            detail["mapped"] = item.mapped
+        if self.checkpoint is not None and status != RESULT_SKIPPED:
+            try:
+                self.checkpoint.mark(self.batch_id, item.question_id, status, stage,
+                                     None if status == RESULT_SUCCESS else message,
+                                     {"prompt_hash": item.prompt_hash} if item.prompt_hash else None)
+            except Exception:
+                pass
+        with self._lock:
+            self.details.append(detail)
+            done = len(self.details)
+        self.context.progress(done, self.total, f"{item.question_id}: {message}")
+        if self.on_result is not None:
+            try:
+                self.on_result(detail, item)
+            except Exception:
+                pass
+
+    def run(self, questions: list) -> dict:
+        """questions를 모두 처리하고 결과 보고서 반환"""
+        self.total = len(questions)
+        self.details = []
+        self.started_at = datetime.now()
+        self._started = time.monotonic()
+        completed_ids, partial_ids = set(), set()
+        if self.checkpoint is not None:
+            self.batch_id = self.checkpoint.open_batch(
+                BATCH_CORRECTION, {str(question.get("id")): self._checkpoint_spec(question) for question in questions},
+                self.batch_id,
+            )
+            completed_ids = self.checkpoint.completed_ids(self.batch_id)
+            # 이미 저장된 문제는 다시 교정/저장하지 않고 상태 업데이트 단계로 바로 보냄 (중복 저장 방지)
+            if self.save:
+                partial_ids = self.checkpoint.partial_ids(self.batch_id)
+            with _ACTIVE_CORRECTORS_LOCK:
+                _ACTIVE_CORRECTORS[self.batch_id] = self
+        queue_size = self.concurrency * 2
+        inboxes = [queue.Queue(maxsize=queue_size) for _ in self.stages]
+        threads = []
+        for position, stage in enumerate(self.stages):
+            outbox = inboxes[position + 1] if position + 1 < len(self.stages) else None
+            stage.running = stage.workers
+            for number in range(stage.workers):
+                if stage.func is None:
+                    target, args = self._status_worker, (stage, inboxes[position])
+                else:
+                    target, args = self._worker, (stage, inboxes[position], outbox)
+                thread = threading.Thread(target=target, args=args, daemon=True,
+                                          name=f"correct-{stage.name}-{number}")
+                thread.start()
+                threads.append(thread)
+
+        for index, question in enumerate(questions):
+            item = CorrectionItem(index, question)
+            if str(question.get("id")) in completed_ids:
+                self._finish(item, RESULT_SKIPPED, message="이전 실행에서 완료됨 (건너뜀)")
+            elif str(question.get("id")) in partial_ids and not self._cancel.is_set():
+                inboxes[-1].put(item)
+            elif self._cancel.is_set():
+                self._finish(item, RESULT_CANCELLED, "fetch", "취소됨")
+            else:
+                inboxes[0].put(item)
+        inboxes[0].put(_END)
+        for thread in threads:
+            thread.join()
+
+        if self.checkpoint is not None:
+            self.checkpoint.finish(self.batch_id)
+            with _ACTIVE_CORRECTORS_LOCK:
+                _ACTIVE_CORRECTORS.pop(self.batch_id, None)
+        self._elapsed = time.monotonic() - self._started
+        self.finished_at = datetime.now()
+        return self.report()
+
+    def _checkpoint_spec(self, question: dict) -> dict:
+        """이어서 실행할 때 필요한 항목 정보 (DB가 있으면 요약만 남기고 교정 직전에 다시 조회)"""
+        if self.db is None:
+            return question
+        return {
+            "id": question.get("id"),
+            "question_type": question.get("question_type", "subjective"),
+            "problem_title": question.get("problem_title", question.get("title", "")),
+            "summary_only": True,
+        }
+
+    def start(self, questions: list) -> "BatchCorrector":
+        """백그라운드 스레드에서 run() 실행 (진행 상황은 snapshot()으로 조회)"""
+        self.total = len(questions)
+        self.started_at = datetime.now()
+        self._thread = threading.Thread(target=self.run, args=(list(questions),), daemon=True, name="correct-batch")
+        self._thread.start()
+        return self
+
+    def cancel(self):
+        """남은 문제 처리를 중지 (진행 중인 교정 요청은 끝까지 기다림)"""
+        self._cancel.set()
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    @property
+    def finished(self) -> bool:
+        return self.finished_at is not None
+
+    def report(self) -> dict:
+        """결과 보고서 (진행 중에도 호출 가능)"""
+        with self._lock:
+            details = sorted(self.details, key=lambda detail: detail["index"])
+            stages = {
+                stage.name: {"workers": stage.workers, "processed": stage.processed, "failed": stage.failed,
+                             "busy": round(stage.busy, 1)}
+                for stage in self.stages
+            }
+        counts = {status: 0 for status in (RESULT_SUCCESS, RESULT_PARTIAL, RESULT_FAILED, RESULT_CANCELLED, RESULT_SKIPPED)}
+        for detail in details:
+            counts[detail["status"]] += 1
+        if self.finished_at is not None:
+            elapsed = self._elapsed
+        else:
+            elapsed = time.monotonic() - self._started if self._started is not None else 0.0
+        return {
+            "total": self.total,
+            "completed": len(details),
+            "success": counts[RESULT_SUCCESS],
+            "partial_success": counts[RESULT_PARTIAL],
+            "failed": counts[RESULT_FAILED],
+            "cancelled": counts[RESULT_CANCELLED],
+            "skipped": counts[RESULT_SKIPPED],
+            "batch_id": self.batch_id,
+            "retries": sum(detail["retries"] for detail in details),
+            "elapsed": round(elapsed, 1),
+            "finished": self.finished_at is not None,
+            "stages": stages,
+            "details": details,
+        }
+
+
+def get_active_corrector(batch_id: str) -> BatchCorrector | None:
+    """이 프로세스에서 아직 실행 중인 배치 (없으면 None)"""
+    with _ACTIVE_CORRECTORS_LOCK:
+        return _ACTIVE_CORRECTORS.get(batch_id)
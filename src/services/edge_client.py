@@ -1,8 +1,115 @@
 import os
+import threading
+import time
+import traceback
+from collections import defaultdict, deque
 import requests
+from requests.adapters import HTTPAdapter
+
+from src.services.service_context import ServiceContext, ensure_context
+
+# 프로세스 전역 HTTP 세션 (모든 Streamlit 세션이 keep-alive 커넥션 풀을 공유)
+_SHARED_SESSIONS: dict[tuple, requests.Session] = {}
+_SHARED_SESSIONS_LOCK = threading.Lock()
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name, default))
+    except (TypeError, ValueError):
+        return default
+
+def _env_bool(name: str, default: bool) -> bool:
+    val = os.getenv(name)
+    if val is None or val.strip() == "":
+        return default
+    return val.strip().lower() in ("1", "true", "yes", "on")
+
+def get_shared_session(pool_connections: int | None = None, pool_maxsize: int | None = None,
+                       pool_block: bool | None = None, keep_alive: bool | None = None) -> requests.Session:
+    """
+    Edge Function 호출용 커넥션 풀 세션을 반환 (프로세스 전역 공유)
+    - pool_connections: 호스트별 커넥션 풀 개수 (EDGE_HTTP_POOL_CONNECTIONS, 기본 4)
+    - pool_maxsize: 호스트당 최대 커넥션 수 (EDGE_HTTP_POOL_MAXSIZE, 기본 16)
+    - pool_block: 호스트당 커넥션이 모두 사용 중이면 대기할지 여부 (EDGE_HTTP_POOL_BLOCK, 기본 False)
+    - keep_alive: 커넥션 재사용 여부 (EDGE_HTTP_KEEP_ALIVE, 기본 True)
+    같은 설정이면 같은 세션을 재사용하므로 TCP+TLS 핸드셰이크는 커넥션당 한 번만 발생합니다.
+    """
+    pool_connections = pool_connections if pool_connections is not None else _env_int("EDGE_HTTP_POOL_CONNECTIONS", 4)
+    pool_maxsize = pool_maxsize if pool_maxsize is not None else _env_int("EDGE_HTTP_POOL_MAXSIZE", 16)
+    pool_block = pool_block if pool_block is not None else _env_bool("EDGE_HTTP_POOL_BLOCK", False)
+    keep_alive = keep_alive if keep_alive is not None else _env_bool("EDGE_HTTP_KEEP_ALIVE", True)
+
+    key = (pool_connections, pool_maxsize, pool_block, keep_alive)
+    with _SHARED_SESSIONS_LOCK:
+        session = _SHARED_SESSIONS.get(key)
+        if session is None:
+            session = requests.Session()
+            # 재시도는 _call에서 직접 처리하므로 어댑터 레벨 재시도는 끔
+            adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize,
+                                  pool_block=pool_block, max_retries=0)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            session.headers["Connection"] = "keep-alive" if keep_alive else "close"
+            _SHARED_SESSIONS[key] = session
+        return session
+
+# 목록 화면용 요약 컬럼 (선택 박스 구성에 필요한 최소 필드)
+MULTIPLE_CHOICE_SUMMARY_FIELDS = ("id", "problem_title", "difficulty", "category", "created_at")
+SUBJECTIVE_SUMMARY_FIELDS = ("id", "title", "difficulty", "category", "created_at")
+
+class EdgeBatch:
+    """
+    여러 Edge 액션을 모아 batch 액션 한 번으로 전송
+    
+    사용 예)
+        with db.batch() as batch:
+            for qid in question_ids:
+                batch.queue("update_question_status", {"question_id": qid, "updates": {...}})
+        results = batch.results  # [{"ok", "data", "error", "action", "index", ...}, ...]
+    """
+    MAX_SIZE = 100  # Edge Function의 MAX_BATCH_SIZE와 일치
+    
+    def __init__(self, client: "EdgeDBClient", max_size: int = MAX_SIZE, parallel: bool = False, timeout: int = 60):
+        self.client = client
+        self.max_size = max(1, min(max_size, self.MAX_SIZE))
+        self.parallel = parallel
+        self.timeout = timeout
+        self._pending: list[dict] = []
+        self.results: list[dict] = []
+    
+    def __len__(self) -> int:
+        return len(self._pending)
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.flush()
+        return False
+    
+    def queue(self, action: str, params: dict | None = None) -> int:
+        """액션을 대기열에 추가하고, flush 후 results에서 찾을 수 있는 인덱스를 반환"""
+        self._pending.append({"action": action, "params": params or {}})
+        return len(self.results) + len(self._pending) - 1
+    
+    def flush(self) -> list[dict]:
+        """대기 중인 액션을 max_size 단위로 전송하고 이번 flush의 항목별 결과를 반환"""
+        pending, self._pending = self._pending, []
+        flushed = []
+        for start in range(0, len(pending), self.max_size):
+            chunk = pending[start:start + self.max_size]
+            result = self.client._call("batch", {"actions": chunk, "parallel": self.parallel}, timeout=self.timeout)
+            items = result.get("data") if isinstance(result, dict) else None
+            if not isinstance(items, list) or len(items) != len(chunk):
+                raise RuntimeError(f"Edge batch 응답 형식 오류: {str(result)[:200]}")
+            flushed.extend(items)
+        self.results.extend(flushed)
+        return flushed
 
 class EdgeDBClient:
-    def __init__(self, base_url: str | None, token: str | None, supabase_anon: str | None):
+    def __init__(self, base_url: str | None, token: str | None, supabase_anon: str | None,
+                 session: requests.Session | None = None):
         self.base_url = base_url or os.getenv("EDGE_FUNCTION_URL")
         self.token = token or os.getenv("EDGE_SHARED_TOKEN")
         self.supabase_anon = supabase_anon or os.getenv("SUPABASE_ANON_KEY")
@@ -14,6 +121,15 @@ class EdgeDBClient:
         if not self.token:
             raise RuntimeError("EDGE_SHARED_TOKEN not set")
         
+        # 공유 커넥션 풀 세션 (요청마다 새 연결을 만들지 않음)
+        self.session = session or get_shared_session()
+        # 액션별 최근 응답 시간 (p50/p95 측정용)
+        self._latencies = defaultdict(lambda: deque(maxlen=200))
+        # 연속 네트워크 실패 횟수 (성공 시 0으로 초기화, 오프라인 전환 판단용)
+        self.network_failures = 0
+        # 스레드별 호출 상태 (동시 호출 간 네트워크 실패 판단이 섞이지 않도록)
+        self._call_state = threading.local()
+        
         # 연결 테스트
         self._test_connection()
     
@@ -21,16 +137,10 @@ class EdgeDBClient:
         """Edge Function 연결 테스트"""
         try:
             # 간단한 연결 테스트 (get_questions 액션 사용)
-            headers = {
-                "content-type": "application/json",
-                "x-edge-token": self.token,
-            }
-            if self.supabase_anon:
-                headers["authorization"] = f"Bearer {self.supabase_anon}"
-            
+            headers = self._headers()
             payload = {"action": "get_questions", "params": {}}
             
-            resp = requests.post(
+            resp = self.session.post(
                 self.base_url, 
                 headers=headers, 
                 json=payload,
@@ -48,26 +158,59 @@ class EdgeDBClient:
             # 연결 테스트가 실패해도 다른 액션은 시도해볼 수 있도록 경고만 출력
             pass
 
-    def _call(self, action: str, params: dict | None = None, timeout: int = 30, max_retries: int = 3):
+    def _headers(self) -> dict:
         headers = {
             "content-type": "application/json",
             "x-edge-token": self.token,
         }
         if self.supabase_anon:
             headers["authorization"] = f"Bearer {self.supabase_anon}"
+        return headers
+
+    def _record_latency(self, action: str, started: float):
+        self._latencies[action].append(time.perf_counter() - started)
+
+    def get_latency_stats(self) -> dict:
+        """액션별 응답 시간 통계 (ms 단위 p50/p95, 최근 200건 기준)"""
+        stats = {}
+        for action, samples in list(self._latencies.items()):
+            ordered = sorted(samples)
+            if not ordered:
+                continue
+            p50 = ordered[int((len(ordered) - 1) * 0.5)]
+            p95 = ordered[int((len(ordered) - 1) * 0.95)]
+            stats[action] = {"count": len(ordered), "p50_ms": round(p50 * 1000, 1), "p95_ms": round(p95 * 1000, 1)}
+        return stats
+
+    def reset_network_flag(self):
+        """현재 스레드의 네트워크 실패 표시 초기화 (호출 단위 판단 시작 전에 사용)"""
+        self._call_state.network_failed = False
+
+    def network_failed(self) -> bool:
+        """마지막 reset_network_flag 이후 현재 스레드의 호출이 네트워크 오류로 실패했는지 여부"""
+        return getattr(self._call_state, "network_failed", False)
+
+    def _call(self, action: str, params: dict | None = None, timeout: int = 30, max_retries: int = 3):
+        headers = self._headers()
 
         payload = {"action": action, "params": params or {}}
         
         # 재시도 로직
         for attempt in range(max_retries):
             try:
-                resp = requests.post(
+                started = time.perf_counter()
+                resp = self.session.post(
                     self.base_url, 
                     headers=headers, 
                     json=payload,
                     timeout=timeout,
                     stream=False  # 스트리밍 비활성화로 연결 안정성 향상
                 )
+                self._record_latency(action, started)
+                
+                # 게이트웨이 오류는 네트워크 장애와 동일하게 재시도
+                if resp.status_code in (502, 503, 504):
+                    raise requests.exceptions.ConnectionError(f"Edge gateway error {resp.status_code}")
                 
                 if resp.status_code >= 400:
                     raise RuntimeError(f"Edge error {resp.status_code}: {resp.text}")
@@ -80,6 +223,7 @@ class EdgeDBClient:
                     response_preview = resp.text[:500] + "..." if len(resp.text) > 500 else resp.text
                     raise RuntimeError(f"Edge JSON parse error: {e}, Response preview: {response_preview}")
                 
+                self.network_failures = 0
                 if not data.get("ok"):
                     raise RuntimeError(f"Edge failure: {data.get('error')}")
                 
@@ -89,15 +233,45 @@ class EdgeDBClient:
                     requests.exceptions.ConnectionError,
                     requests.exceptions.Timeout) as e:
                 if attempt < max_retries - 1:
-                    import time
                     time.sleep(2 ** attempt)  # 지수 백오프
                     continue
                 else:
+                    self.network_failures += 1
+                    self._call_state.network_failed = True
                     raise RuntimeError(f"네트워크 오류로 인한 요청 실패 (최대 재시도 횟수 초과): {e}")
             except Exception as e:
                 raise RuntimeError(f"예상치 못한 오류: {e}")
     
 
+    # batch 모드 (여러 액션을 한 번의 왕복으로 처리)
+    def batch(self, max_size: int = EdgeBatch.MAX_SIZE, parallel: bool = False) -> EdgeBatch:
+        """액션을 모았다가 flush 시 한 번에 전송하는 EdgeBatch 생성"""
+        return EdgeBatch(self, max_size=max_size, parallel=parallel)
+
+    def call_many(self, calls: list, parallel: bool = False) -> list[dict]:
+        """[(action, params), ...]를 batch로 전송하고 항목별 결과를 같은 순서로 반환"""
+        batch = self.batch(parallel=parallel)
+        for action, params in calls:
+            batch.queue(action, params)
+        return batch.flush()
+
+    def get_feedback_stats_many(self, question_ids: list) -> dict:
+        """여러 문제의 피드백 통계를 한 번에 조회 ({question_id: stats 또는 None})"""
+        if not question_ids:
+            return {}
+        results = self.call_many([("get_feedback_stats", {"question_id": qid}) for qid in question_ids], parallel=True)
+        return {qid: (item.get("data") if item.get("ok") else None) for qid, item in zip(question_ids, results)}
+
+    def update_question_statuses(self, updates: dict) -> dict:
+        """여러 문제 상태를 한 번에 업데이트 ({question_id: updates} -> {question_id: 성공 여부})"""
+        if not updates:
+            return {}
+        question_ids = list(updates.keys())
+        results = self.call_many([
+            ("update_question_status", {"question_id": qid, "updates": updates[qid]}) for qid in question_ids
+        ])
+        return {qid: bool(item.get("ok")) for qid, item in zip(question_ids, results)}
+
     # API
     def save_question(self, q: dict) -> bool:
         try:
@@ -132,26 +306,76 @@ class EdgeDBClient:
         except Exception as e:
             raise e
 
-    def get_multiple_choice_questions(self, filters: dict | None = None):
-        """객관식 문제 조회"""
+    @staticmethod
+    def _with_fields(filters: dict | None, fields: list | None) -> dict:
+        """조회 필터에 컬럼 프로젝션(fields)을 추가"""
+        params = dict(filters or {})
+        if fields:
+            params["fields"] = list(fields)
+        return params
+
+    def get_multiple_choice_questions(self, filters: dict | None = None, fields: list | None = None):
+        """객관식 문제 조회 (fields 지정 시 해당 컬럼만 조회)"""
         try:
-            result = self._call("get_multiple_choice_questions", filters or {})
+            result = self._call("get_multiple_choice_questions", self._with_fields(filters, fields))
             if isinstance(result, dict) and result.get("ok") and "data" in result:
                 return result["data"]
             return []
         except Exception as e:
             return []
 
-    def get_subjective_questions(self, filters: dict | None = None):
-        """주관식 문제 조회"""
+    def get_subjective_questions(self, filters: dict | None = None, fields: list | None = None):
+        """주관식 문제 조회 (fields 지정 시 해당 컬럼만 조회)"""
         try:
-            result = self._call("get_subjective_questions", filters or {})
+            result = self._call("get_subjective_questions", self._with_fields(filters, fields))
             if isinstance(result, dict) and result.get("ok") and "data" in result:
                 return result["data"]
             return []
         except Exception as e:
             return []
 
+    # 키셋 페이지네이션 (created_at, id 내림차순 커서)
+    def _get_page(self, action: str, filters: dict | None, limit: int, cursor: dict | None,
+                  fields: list | None = None) -> tuple[list, dict | None]:
+        params = self._with_fields(filters, fields)
+        params["limit"] = limit
+        if cursor:
+            params["cursor"] = cursor
+        result = self._call(action, params)
+        if isinstance(result, dict) and result.get("ok") and "data" in result:
+            return result["data"], result.get("next_cursor")
+        return [], None
+
+    def _iter_pages(self, action: str, filters: dict | None, page_size: int, fields: list | None = None):
+        cursor = None
+        while True:
+            rows, cursor = self._get_page(action, filters, page_size, cursor, fields)
+            # 상태 필터로 비어 있는 페이지는 건너뜀
+            if rows:
+                yield rows
+            if not cursor:
+                break
+
+    def get_multiple_choice_questions_page(self, filters: dict | None = None, limit: int = 200,
+                                           cursor: dict | None = None, fields: list | None = None):
+        """객관식 문제 한 페이지 조회 -> (rows, next_cursor)"""
+        return self._get_page("get_multiple_choice_questions", filters, limit, cursor, fields)
+
+    def get_subjective_questions_page(self, filters: dict | None = None, limit: int = 200,
+                                      cursor: dict | None = None, fields: list | None = None):
+        """주관식 문제 한 페이지 조회 -> (rows, next_cursor)"""
+        return self._get_page("get_subjective_questions", filters, limit, cursor, fields)
+
+    def iter_multiple_choice_question_pages(self, filters: dict | None = None, page_size: int = 200,
+                                            fields: list | None = None):
+        """객관식 문제를 페이지 단위로 지연 조회하는 제너레이터"""
+        return self._iter_pages("get_multiple_choice_questions", filters, page_size, fields)
+
+    def iter_subjective_question_pages(self, filters: dict | None = None, page_size: int = 200,
+                                       fields: list | None = None):
+        """주관식 문제를 페이지 단위로 지연 조회하는 제너레이터"""
+        return self._iter_pages("get_subjective_questions", filters, page_size, fields)
+
     def update_multiple_choice_question(self, question_id: str, updates: dict) -> bool:
         """객관식 문제 업데이트"""
         self._call("update_multiple_choice_question", {"question_id": question_id, "updates": updates})
@@ -262,10 +486,44 @@ class EdgeDBClient:
         """ID로 객관식 문제 단건 조회 (캐시 우회용)"""
         return self._call("get_multiple_choice_question_by_id", {"question_id": question_id})
 
+    def get_question_by_id(self, question_id: str, question_type: str) -> dict | None:
+        """ID로 문제 전체 레코드 단건 조회 (요약 목록에서 선택한 문제 상세 로드용)"""
+        if question_type == "multiple_choice":
+            result = self._call("get_multiple_choice_question_by_id", {"question_id": question_id})
+            if isinstance(result, dict) and result.get("ok"):
+                return result.get("data")
+            return None
+        rows = self.get_subjective_questions({"id": question_id})
+        return rows[0] if rows else None
+
     def get_questions_data_version(self) -> str:
         """문제 데이터 버전 토큰 조회 (캐시 무효화용)"""
         result = self._call("get_questions_data_version", {})
-        return result.get("version", "1970-01-01T00:00:00Z") if result else "1970-01-01T00:00:00Z"
+        data = result.get("data") if isinstance(result, dict) else None
+        return (data or {}).get("version", "1970-01-01T00:00:00Z")
+
+    def get_questions_changed_since(self, since: str | None = None) -> dict:
+        """
+        updated_at > since 인 객관식/주관식 문제를 한 번의 batch 호출로 조회 (delta 동기화용)
+
+        비활성(active=False) 문제도 포함되므로 호출 측에서 소프트 삭제로 처리합니다.
+        since가 None이면 전체 문제를 반환합니다.
+
+        Returns:
+            dict: {"multiple_choice": [...], "subjective": [...]}
+        """
+        params = {"changed_since": since} if since else {}
+        question_types = ("multiple_choice", "subjective")
+        results = self.call_many(
+            [(f"get_{question_type}_questions", dict(params)) for question_type in question_types],
+            parallel=True,
+        )
+        changes = {}
+        for question_type, item in zip(question_types, results):
+            if not item.get("ok"):
+                raise RuntimeError(f"{question_type} 변경분 조회 실패: {item.get('error')}")
+            changes[question_type] = item.get("data") or []
+        return changes
 
     def get_feedback(self, question_id: str = None):
         try:
@@ -277,10 +535,12 @@ class EdgeDBClient:
             return []
 
     def count_feedback(self) -> int:
-        return int(self._call("count_feedback") or 0)
+        result = self._call("count_feedback")
+        return int(result.get("data") or 0) if isinstance(result, dict) else 0
 
     def count_adjustments(self) -> int:
-        return int(self._call("count_adjustments") or 0)
+        result = self._call("count_adjustments")
+        return int(result.get("data") or 0) if isinstance(result, dict) else 0
 
     def reset_database(self):
         self._call("reset_database")
@@ -337,58 +597,54 @@ class EdgeDBClient:
         return True
     
     # next_qlearn_problems 테이블 관련 메서드들 (별도 Edge Function 사용)
-    def _call_structured_problems(self, action: str, params: dict | None = None, timeout: int = 30, max_retries: int = 3):
-        """next_qlearn_problems 전용 Edge Function 호출"""
-        import streamlit as st
+    def _call_structured_problems(self, action: str, params: dict | None = None, timeout: int = 30, max_retries: int = 3,
+                                  context: ServiceContext | None = None):
+        """next_qlearn_problems 전용 Edge Function 호출 (요청/응답 상세는 context 이벤트로 알림)"""
+        context = ensure_context(context)
         
         if not self.structured_problems_url:
             error_msg = "STRUCTURED_PROBLEMS_EDGE_FUNCTION_URL not set"
-            if hasattr(st, 'write'):
-                st.error(f"❌ {error_msg}")
+            context.error(f"❌ {error_msg}")
             raise RuntimeError(error_msg)
         
-        headers = {
-            "content-type": "application/json",
-            "x-edge-token": self.token,
-        }
-        if self.supabase_anon:
-            headers["authorization"] = f"Bearer {self.supabase_anon}"
+        headers = self._headers()
 
         payload = {"action": action, "params": params or {}}
         
         # 디버깅: 요청 정보
-        if hasattr(st, 'write'):
-            with st.expander("🌐 HTTP 요청 상세", expanded=False):
-                st.write(f"**URL**: {self.structured_problems_url}")
-                st.write(f"**Method**: POST")
-                st.write(f"**Headers**: {list(headers.keys())}")
-                st.write(f"**Payload Size**: {len(str(payload))} bytes")
+        context.debug("🌐 HTTP 요청 상세", **{
+            "URL": self.structured_problems_url,
+            "Method": "POST",
+            "Headers": list(headers.keys()),
+            "Payload Size": f"{len(str(payload))} bytes",
+        })
         
         # 재시도 로직
         for attempt in range(max_retries):
             try:
-                if hasattr(st, 'write') and attempt > 0:
-                    st.info(f"🔄 재시도 {attempt + 1}/{max_retries}")
+                if attempt > 0:
+                    context.info(f"🔄 재시도 {attempt + 1}/{max_retries}")
                 
-                resp = requests.post(
+                started = time.perf_counter()
+                resp = self.session.post(
                     self.structured_problems_url, 
                     headers=headers, 
                     json=payload,
                     timeout=timeout,
                     stream=False
                 )
+                self._record_latency(action, started)
                 
                 # 디버깅: 응답 상태
-                if hasattr(st, 'write'):
-                    with st.expander("📡 HTTP 응답 상세", expanded=False):
-                        st.write(f"**Status Code**: {resp.status_code}")
-                        st.write(f"**Response Headers**: {dict(resp.headers)}")
-                        st.write(f"**Response Text (처음 500자)**: {resp.text[:500]}")
+                context.debug("📡 HTTP 응답 상세", **{
+                    "Status Code": resp.status_code,
+                    "Response Headers": dict(resp.headers),
+                    "Response Text (처음 500자)": resp.text[:500],
+                })
                 
                 if resp.status_code >= 400:
                     error_msg = f"Edge error {resp.status_code}: {resp.text}"
-                    if hasattr(st, 'write'):
-                        st.error(f"❌ {error_msg}")
+                    context.error(f"❌ {error_msg}")
                     raise RuntimeError(error_msg)
                 
                 try:
@@ -396,15 +652,13 @@ class EdgeDBClient:
                 except ValueError as e:
                     response_preview = resp.text[:500] + "..." if len(resp.text) > 500 else resp.text
                     error_msg = f"Edge JSON parse error: {e}, Response preview: {response_preview}"
-                    if hasattr(st, 'write'):
-                        st.error(f"❌ {error_msg}")
+                    context.error(f"❌ {error_msg}")
                     raise RuntimeError(error_msg)
                 
                 if not data.get("ok"):
                     error_msg = f"Edge failure: {data.get('error')}"
-                    if hasattr(st, 'write'):
-                        st.error(f"❌ {error_msg}")
-                        st.json(data)
+                    context.error(f"❌ {error_msg}")
+                    context.debug("Edge 응답", expanded=True, json=data)
                     raise RuntimeError(error_msg)
                 
                 return data
@@ -413,69 +667,53 @@ class EdgeDBClient:
                     requests.exceptions.ConnectionError,
                     requests.exceptions.Timeout) as e:
                 if attempt < max_retries - 1:
-                    import time
-                    if hasattr(st, 'write'):
-                        st.warning(f"⚠️ 네트워크 오류 (재시도 대기 중...): {str(e)}")
+                    context.warning(f"⚠️ 네트워크 오류 (재시도 대기 중...): {str(e)}")
                     time.sleep(2 ** attempt)
                     continue
                 else:
                     error_msg = f"네트워크 오류로 인한 요청 실패 (최대 재시도 횟수 초과): {e}"
-                    if hasattr(st, 'write'):
-                        st.error(f"❌ {error_msg}")
+                    context.error(f"❌ {error_msg}")
                     raise RuntimeError(error_msg)
             except Exception as e:
                 error_msg = f"예상치 못한 오류: {e}"
-                if hasattr(st, 'write'):
-                    st.error(f"❌ {error_msg}")
-                    import traceback
-                    with st.expander("🔍 상세 오류 정보", expanded=False):
-                        st.code(traceback.format_exc())
+                context.error(f"❌ {error_msg}")
+                context.debug("🔍 상세 오류 정보", code=traceback.format_exc())
                 raise RuntimeError(error_msg)
     
-    def save_structured_problem(self, problem: dict) -> bool:
+    def save_structured_problem(self, problem: dict, context: ServiceContext | None = None) -> bool:
         """next_qlearn_problems 테이블에 문제 저장"""
-        import json
-        import streamlit as st
+        context = ensure_context(context)
         
         try:
             # 디버깅: 요청 데이터 로깅
-            if hasattr(st, 'write'):
-                with st.expander("🔍 Edge Function 호출 정보", expanded=False):
-                    st.write(f"**URL**: {self.structured_problems_url}")
-                    st.write(f"**Action**: save_structured_problem")
-                    st.write("**요청 데이터**:")
-                    st.json(problem)
+            context.debug("🔍 Edge Function 호출 정보", json=problem, **{
+                "URL": self.structured_problems_url,
+                "Action": "save_structured_problem",
+                "요청 데이터": "",
+            })
             
-            result = self._call_structured_problems("save_structured_problem", problem)
+            result = self._call_structured_problems("save_structured_problem", problem, context=context)
             
             # 디버깅: 응답 데이터 로깅
-            if hasattr(st, 'write'):
-                with st.expander("📥 Edge Function 응답", expanded=False):
-                    st.json(result)
+            context.debug("📥 Edge Function 응답", json=result)
             
             # 응답 확인
             if isinstance(result, dict):
                 if result.get("ok"):
-                    if hasattr(st, 'write'):
-                        st.success(f"✅ Edge Function 응답 성공: {len(result.get('data', []))}개 레코드 저장됨")
+                    context.success(f"✅ Edge Function 응답 성공: {len(result.get('data', []))}개 레코드 저장됨")
                     return True
                 else:
                     error_msg = result.get('error', '알 수 없는 오류')
-                    if hasattr(st, 'write'):
-                        st.error(f"❌ Edge Function 오류: {error_msg}")
+                    context.error(f"❌ Edge Function 오류: {error_msg}")
                     raise RuntimeError(f"Edge Function 오류: {error_msg}")
             else:
-                if hasattr(st, 'write'):
-                    st.warning(f"⚠️ 예상치 못한 응답 형식: {type(result)}")
+                context.warning(f"⚠️ 예상치 못한 응답 형식: {type(result)}")
                 return bool(result)
                 
         except Exception as e:
             error_msg = f"저장 중 오류: {str(e)}"
-            if hasattr(st, 'write'):
-                st.error(f"❌ {error_msg}")
-                import traceback
-                with st.expander("🔍 상세 오류 정보", expanded=False):
-                    st.code(traceback.format_exc())
+            context.error(f"❌ {error_msg}")
+            context.debug("🔍 상세 오류 정보", code=traceback.format_exc())
             raise RuntimeError(error_msg)
     
     def get_structured_problems(self, filters: dict | None = None):
@@ -3,10 +3,16 @@
 """
 import os
 import json
+import threading
 import time
 from datetime import datetime
+from functools import lru_cache
 import google.generativeai as genai
 from src.config import get_secret
+from src.services.llm_cache import cache_seed, get_llm_cache
+from src.services.rate_limiter import call_with_limits, estimate_prompt_tokens
+from src.services.service_context import ServiceContext, ensure_context
+from src.services.usage_ledger import gemini_usage, record_usage
 
 # 문제 교정용 새로운 패키지 (google-genai)
 try:
@@ -35,58 +41,259 @@ try:
 except ImportError:
     pass
 
+# 문제 교정(correct_problem) 모델과 응답 스키마 버전 (스키마를 바꾸면 버전을 올려서 응답 캐시를 구분)
+CORRECTION_MODEL = "gemini-3-pro-preview"
+CORRECTION_SCHEMA_VERSION = "layers_v1"
+
+_GENAI_CLIENTS = {}
+_GENAI_CLIENTS_LOCK = threading.Lock()
+
+
+def get_genai_client(api_key: str):
+    """API 키별로 하나만 만들어 모든 스레드가 함께 쓰는 google-genai 클라이언트"""
+    with _GENAI_CLIENTS_LOCK:
+        client = _GENAI_CLIENTS.get(api_key)
+        if client is None:
+            client = new_genai.Client(api_key=api_key)
+            _GENAI_CLIENTS[api_key] = client
+        return client
+
+
+@lru_cache(maxsize=1)
+def correction_response_schema():
+    """문제 교정 응답 JSON 스키마 (4개 레이어, CORRECTION_SCHEMA_VERSION)"""
+    return types.Schema(
+        type=types.Type.OBJECT,
+        required=["meta_layer", "user_view_layer", "system_view_layer", "evaluation_layer"],
+        properties={
+            "meta_layer": types.Schema(
+                type=types.Type.OBJECT,
+                required=["id", "category", "difficulty", "target_template_code", "time_limit", "training_focus"],
+                properties={
+                    "id": types.Schema(
+                        type=types.Type.STRING,
+                    ),
+                    "category": types.Schema(
+                        type=types.Type.STRING,
+                    ),
+                    "topic": types.Schema(
+                        type=types.Type.ARRAY,
+                        items=types.Schema(
+                            type=types.Type.STRING,
+                        ),
+                    ),
+                    "difficulty": types.Schema(
+                        type=types.Type.STRING,
+                    ),
+                    "target_template_code": types.Schema(
+                        type=types.Type.STRING,
+                    ),
+                    "time_limit": types.Schema(
+                        type=types.Type.STRING,
+                    ),
+                    "training_focus": types.Schema(
+                        type=types.Type.ARRAY,
+                        description="이 문제를 통해 훈련하고자 하는 핵심 역량 코드 목록 (예: [\"Data_Literacy\", \"Problem_Structuring\"])",
+                        items=types.Schema(
+                            type=types.Type.STRING,
+                        ),
+                    ),
+                },
+            ),
+            "user_view_layer": types.Schema(
+                type=types.Type.OBJECT,
+                required=["title", "summary", "scenario_public", "goals", "task_instruction", "constraints_public", "opening_line", "starter_guide"],
+                properties={
+                    "title": types.Schema(
+                        type=types.Type.STRING,
+                    ),
+                    "summary": types.Schema(
+                        type=types.Type.STRING,
+                    ),
+                    "scenario_public": types.Schema(
+                        type=types.Type.STRING,
+                    ),
+                    "goals": types.Schema(
+                        type=types.Type.ARRAY,
+                        items=types.Schema(
+                            type=types.Type.STRING,
+                        ),
+                    ),
+                    "task_instruction": types.Schema(
+                        type=types.Type.STRING,
+                    ),
+                    "constraints_public": types.Schema(
+                        type=types.Type.ARRAY,
+                        items=types.Schema(
+                            type=types.Type.STRING,
+                        ),
+                    ),
+                    "opening_line": types.Schema(
+                        type=types.Type.STRING,
+                    ),
+                    "starter_guide": types.Schema(
+                        type=types.Type.STRING,
+                    ),
+                    "attachments": types.Schema(
+                        type=types.Type.ARRAY,
+                        items=types.Schema(
+                            type=types.Type.STRING,
+                        ),
+                    ),
+                },
+            ),
+            "system_view_layer": types.Schema(
+                type=types.Type.OBJECT,
+                required=["data_facts", "hidden_constraints", "reveal_rules", "knowledge_base_ref"],
+                properties={
+                    "data_facts": types.Schema(
+                        type=types.Type.ARRAY,
+                        items=types.Schema(
+                            type=types.Type.OBJECT,
+                            required=["key", "value"],
+                            properties={
+                                "key": types.Schema(
+                                    type=types.Type.STRING,
+                                ),
+                                "value": types.Schema(
+                                    type=types.Type.STRING,
+                                ),
+                            },
+                        ),
+                    ),
+                    "hidden_constraints": types.Schema(
+                        type=types.Type.ARRAY,
+                        items=types.Schema(
+                            type=types.Type.STRING,
+                        ),
+                    ),
+                    "reveal_rules": types.Schema(
+                        type=types.Type.ARRAY,
+                        items=types.Schema(
+                            type=types.Type.STRING,
+                        ),
+                    ),
+                    "knowledge_base_ref": types.Schema(
+                        type=types.Type.ARRAY,
+                        items=types.Schema(
+                            type=types.Type.STRING,
+                        ),
+                    ),
+                },
+            ),
+            "evaluation_layer": types.Schema(
+                type=types.Type.OBJECT,
+                required=["process_criteria", "result_criteria", "scoring_weights", "model_answer", "critical_fail_rules"],
+                properties={
+                    "process_criteria": types.Schema(
+                        type=types.Type.ARRAY,
+                        items=types.Schema(
+                            type=types.Type.STRING,
+                        ),
+                    ),
+                    "result_criteria": types.Schema(
+                        type=types.Type.ARRAY,
+                        items=types.Schema(
+                            type=types.Type.STRING,
+                        ),
+                    ),
+                    "scoring_weights": types.Schema(
+                        type=types.Type.OBJECT,
+                        required=["process", "result"],
+                        properties={
+                            "process": types.Schema(
+                                type=types.Type.NUMBER,
+                            ),
+                            "result": types.Schema(
+                                type=types.Type.NUMBER,
+                            ),
+                        },
+                    ),
+                    "model_answer": types.Schema(
+                        type=types.Type.STRING,
+                    ),
+                    "critical_fail_rules": types.Schema(
+                        type=types.Type.ARRAY,
+                        items=types.Schema(
+                            type=types.Type.STRING,
+                        ),
+                    ),
+                },
+            ),
+        },
+    )
+
+
+@lru_cache(maxsize=32)
+def correction_config(system_prompt: str, temperature: float, thinking_level: str, media_resolution: str,
+                      response_mime_type: str, seed: int | None = None):
+    """문제 교정용 GenerateContentConfig (같은 system 프롬프트/파라미터면 같은 객체를 재사용)"""
+    # System instruction 구성 (GenerateContentConfig에 포함)
+    system_instruction = [
+        types.Part.from_text(text=system_prompt),
+    ]
+    seed_config = {"seed": seed} if seed is not None else {}
+    return types.GenerateContentConfig(
+        temperature=temperature,
+        thinking_config=types.ThinkingConfig(
+            thinking_level=thinking_level,
+        ),
+        media_resolution=media_resolution,
+        response_mime_type=response_mime_type,
+        response_schema=correction_response_schema(),
+        system_instruction=system_instruction,
+        **seed_config,
+    )
+
+
 class GeminiClient:
-    _instance = None
-    _initialized = False
+    """
+    제미나이 API 클라이언트 (모델/temperature 설정별로 하나씩 공유)
+
+    설정은 생성자 인자 또는 ServiceContext로 받고 Streamlit 세션은 읽지 않으므로
+    워커 스레드/CLI에서도 사용할 수 있습니다.
+    """
+    _instances = {}
+    _instances_lock = threading.Lock()
     
-    def __new__(cls):
-        if cls._instance is None:
-            cls._instance = super(GeminiClient, cls).__new__(cls)
-        return cls._instance
+    def __new__(cls, model_name: str | None = None, temperature: float | None = None):
+        key = cls._resolve_settings(model_name, temperature)
+        with cls._instances_lock:
+            instance = cls._instances.get(key)
+            if instance is None:
+                instance = super(GeminiClient, cls).__new__(cls)
+                instance._initialized = False
+                cls._instances[key] = instance
+        return instance
     
-    def __init__(self):
+    @classmethod
+    def from_context(cls, context: ServiceContext | None = None) -> "GeminiClient":
+        """ServiceContext의 Gemini 설정으로 클라이언트 반환"""
+        context = ensure_context(context)
+        return cls(context.gemini_model, context.gemini_temperature)
+    
+    @staticmethod
+    def _resolve_settings(model_name: str | None, temperature: float | None) -> tuple:
+        model_name = model_name or get_secret("GEMINI_MODEL") or os.getenv("GEMINI_MODEL", "gemini-2.5-pro")
+        temperature = 0.3 if temperature is None else float(temperature)
+        return model_name, temperature
+    
+    def __init__(self, model_name: str | None = None, temperature: float | None = None):
         # 이미 초기화된 경우 중복 초기화 방지
-        if GeminiClient._initialized:
+        if self._initialized:
             return
             
-        # Streamlit Cloud에서는 st.secrets 사용, 로컬에서는 환경변수 사용
-        api_key = None
-        
-        # 1순위: st.secrets 직접 접근
-        try:
-            import streamlit as st
-            api_key = st.secrets["GEMINI_API_KEY"]
-        except Exception:
-            pass
-        
-        # 2순위: st.secrets.get() 방식
-        if not api_key:
-            try:
-                import streamlit as st
-                api_key = st.secrets.get("GEMINI_API_KEY")
-            except Exception:
-                pass
-        
-        # 3순위: get_secret 방식
-        if not api_key:
-            api_key = get_secret("GEMINI_API_KEY")
-        
-        # 4순위: 환경변수 fallback
-        if not api_key:
-            api_key = os.getenv("GEMINI_API_KEY")
+        # st.secrets > 환경변수 순서로 조회 (get_secret)
+        api_key = get_secret("GEMINI_API_KEY")
         
         if not api_key:
             raise RuntimeError("GEMINI_API_KEY가 설정되지 않았습니다")
         
         genai.configure(api_key=api_key)
+        self._api_key = api_key
         
-        # 제미나이 모델 설정
-        # 세션 상태에서 모델 선택, 없으면 기본값 사용
-        import streamlit as st
-        model_name = st.session_state.get("selected_gemini_model") or get_secret("GEMINI_MODEL") or os.getenv("GEMINI_MODEL", "gemini-2.5-pro")
-        
-        # 세션 상태에서 temperature 선택, 없으면 기본값 사용
-        temperature = st.session_state.get("gemini_temperature", 0.3)
+        # 제미나이 모델 / temperature 설정
+        model_name, temperature = self._resolve_settings(model_name, temperature)
         
         generation_config = genai.types.GenerationConfig(
             temperature=temperature
@@ -130,62 +337,73 @@ class GeminiClient:
             else:
                 raise RuntimeError(f"모든 제미나이 모델 초기화 실패. 마지막 오류: {e}")
         
+        self.model_name = getattr(self.model, "model_name", model_name)
+        self.temperature = temperature
+        # LLM 응답 캐시 (같은 프롬프트/설정이면 저장된 응답 재사용)
+        self.response_cache = get_llm_cache()
+        
         # 초기화 완료 표시
-        GeminiClient._initialized = True
+        self._initialized = True
 
-    def review_content(self, system_prompt: str, user_prompt: str) -> str:
-        """내용 검토를 위한 제미나이 API 호출"""
+    def review_content(self, system_prompt: str, user_prompt: str, context: ServiceContext | None = None,
+                       validate=None, refresh: bool = False) -> str:
+        """
+        내용 검토를 위한 제미나이 API 호출
+
+        validate(응답) -> bool: 통과한 응답만 캐시에 저장 / refresh: 캐시를 읽지 않고 다시 호출 (재시도용)
+        """
+        context = ensure_context(context)
         try:
-            # 디버깅 정보를 세션 상태에 저장
-            import streamlit as st
-            if hasattr(st, 'session_state'):
-                if "gemini_api_debug" not in st.session_state:
-                    st.session_state.gemini_api_debug = []
-                
-                from datetime import datetime
-                # 모델 이름 추출
-                model_name = "unknown"
-                if hasattr(self, 'model') and self.model:
-                    if hasattr(self.model, 'model_name'):
-                        model_name = self.model.model_name
-                    elif hasattr(self.model, 'name'):
-                        model_name = self.model.name
-                    elif isinstance(self.model, str):
-                        model_name = self.model
-                
-                api_debug_info = {
-                    "timestamp": datetime.now().isoformat(),
-                    "method": "review_content",
-                    "model": model_name,
-                    "parameters": {
-                        "temperature": "기본값 (미설정)",
-                        "thinking_level": "미지원",
-                        "media_resolution": "미지원",
-                        "response_mime_type": "text/plain (기본값)",
-                        "response_schema": "미지원 (일반 텍스트 응답)"
-                    },
-                    "prompts": {
-                        "system_prompt": system_prompt,
-                        "system_prompt_length": len(system_prompt),
-                        "user_prompt": user_prompt,
-                        "user_prompt_length": len(user_prompt),
-                        "combined_prompt": f"{system_prompt}\n\n{user_prompt}",
-                        "combined_prompt_length": len(system_prompt) + len(user_prompt) + 2
-                    }
-                }
-                st.session_state.gemini_api_debug.append(api_debug_info)
-            
-            # 최신 Google Generative AI 라이브러리에서는 contents 배열을 사용
-            contents = [
-                {"role": "user", "parts": [{"text": f"{system_prompt}\n\n{user_prompt}"}]}
-            ]
-            response = self.model.generate_content(contents)
+            # 디버깅 정보 기록 (화면에서는 gemini_api_debug 세션 목록에 누적)
+            # 모델 이름 추출
+            model_name = "unknown"
+            if hasattr(self, 'model') and self.model:
+                if hasattr(self.model, 'model_name'):
+                    model_name = self.model.model_name
+                elif hasattr(self.model, 'name'):
+                    model_name = self.model.name
+                elif isinstance(self.model, str):
+                    model_name = self.model
             
+            context.record("gemini_api_debug", {
+                "timestamp": datetime.now().isoformat(),
+                "method": "review_content",
+                "model": model_name,
+                "parameters": {
+                    "temperature": "기본값 (미설정)",
+                    "thinking_level": "미지원",
+                    "media_resolution": "미지원",
+                    "response_mime_type": "text/plain (기본값)",
+                    "response_schema": "미지원 (일반 텍스트 응답)"
+                },
+                "prompts": {
+                    "system_prompt": system_prompt,
+                    "system_prompt_length": len(system_prompt),
+                    "user_prompt": user_prompt,
+                    "user_prompt_length": len(user_prompt),
+                    "combined_prompt": f"{system_prompt}\n\n{user_prompt}",
+                    "combined_prompt_length": len(system_prompt) + len(user_prompt) + 2
+                }
+            })
             
-            # 기본적으로 text 반환
-            if response.text:
-                return response.text
-            else:
+            def _call():
+                # 최신 Google Generative AI 라이브러리에서는 contents 배열을 사용
+                contents = [
+                    {"role": "user", "parts": [{"text": f"{system_prompt}\n\n{user_prompt}"}]}
+                ]
+                started = time.monotonic()
+                response = call_with_limits(
+                    "gemini", model_name, lambda: self.model.generate_content(contents),
+                    estimate_prompt_tokens(system_prompt, user_prompt),
+                    on_retry=lambda attempt, wait, e: context.warning(
+                        f"⚠️ 제미나이 호출 제한/과부하로 {wait:.1f}초 후 재시도합니다 ({attempt}회)"),
+                )
+                record_usage("gemini", model_name, gemini_usage(response), time.monotonic() - started,
+                             "review_content", context.tags)
+                
+                # 기본적으로 text 반환
+                if response.text:
+                    return response.text
                 # text가 없는 경우 candidates에서 추출 시도
                 if hasattr(response, 'candidates') and response.candidates:
                     candidate = response.candidates[0]
@@ -196,8 +414,13 @@ class GeminiClient:
                                 text_parts.append(part.text)
                         if text_parts:
                             return '\n'.join(text_parts)
-                
-                return "❌ 제미나이 응답에서 텍스트를 추출할 수 없습니다."
+                return ""
+            
+            # 빈 응답/검증 실패 응답은 캐시에 저장하지 않음
+            text = self.response_cache.fetch("gemini", model_name, system_prompt, user_prompt,
+                                             {"method": "review_content", "temperature": self.temperature}, _call,
+                                             validate=validate, refresh=refresh)
+            return text or "❌ 제미나이 응답에서 텍스트를 추출할 수 없습니다."
                 
         except Exception as e:
             raise RuntimeError(f"제미나이 API 호출 실패: {str(e)}")
@@ -228,13 +451,17 @@ class GeminiClient:
         except Exception:
             return False
     
-    def correct_problem(self, system_prompt: str, user_prompt: str) -> str:
+    def correct_problem(self, system_prompt: str, user_prompt: str, context: ServiceContext | None = None,
+                        validate=None, refresh: bool = False) -> str:
         """
         문제 교정을 위한 제미나이 API 호출 (새로운 google-genai 패키지 사용)
         
         Args:
             system_prompt: 시스템 프롬프트
             user_prompt: 사용자 프롬프트 (문제 JSON 포함)
+            context: 디버깅/재시도 안내 이벤트를 받을 컨텍스트 (선택)
+            validate: validate(응답) -> bool, 통과한 응답만 캐시에 저장 (선택)
+            refresh: True면 캐시를 읽지 않고 다시 호출 (재시도용)
             
         Returns:
             str: 교정된 문제의 JSON 문자열
@@ -245,41 +472,20 @@ class GeminiClient:
         if not NEW_GENAI_AVAILABLE:
             raise RuntimeError("google-genai 패키지가 설치되지 않았습니다. pip install google-genai를 실행해주세요.")
         
+        context = ensure_context(context)
         try:
-            # API 키 가져오기
-            api_key = None
-            
-            # 1순위: st.secrets 직접 접근
-            try:
-                import streamlit as st
-                api_key = st.secrets["GEMINI_API_KEY"]
-            except Exception:
-                pass
-            
-            # 2순위: st.secrets.get() 방식
-            if not api_key:
-                try:
-                    import streamlit as st
-                    api_key = st.secrets.get("GEMINI_API_KEY")
-                except Exception:
-                    pass
-            
-            # 3순위: get_secret 방식
-            if not api_key:
-                api_key = get_secret("GEMINI_API_KEY")
+            # 프로세스 단위로 공유하는 google-genai 클라이언트 (API 키는 생성자에서 한 번만 조회)
+            client = get_genai_client(self._api_key)
             
-            # 4순위: 환경변수 fallback
-            if not api_key:
-                api_key = os.getenv("GEMINI_API_KEY")
-            
-            if not api_key:
-                raise RuntimeError("GEMINI_API_KEY가 설정되지 않았습니다")
-            
-            # 새로운 클라이언트 생성
-            client = new_genai.Client(api_key=api_key)
+            # 모델 / GenerateContentConfig 설정 (참조 코드와 동일하게)
+            model = CORRECTION_MODEL
+            temperature = 1.3
+            thinking_level = "HIGH"
+            media_resolution = "MEDIA_RESOLUTION_HIGH"
+            response_mime_type = "application/json"
             
-            # 모델 설정
-            model = "gemini-3-pro-preview"
+            # 결정성 제어용 seed (LLM_CACHE_SEED를 지정한 경우에만)
+            seed = cache_seed()
             
             # Contents 구성 (참조 코드와 동일하게 user role만 사용)
             contents = [
@@ -291,276 +497,89 @@ class GeminiClient:
                 ),
             ]
             
-            # System instruction 구성 (GenerateContentConfig에 포함)
-            system_instruction = [
-                types.Part.from_text(text=system_prompt),
-            ]
-            
-            # JSON 스키마 정의 (사용자 제공 스키마 구조 사용)
-            response_schema = types.Schema(
-                type=types.Type.OBJECT,
-                required=["meta_layer", "user_view_layer", "system_view_layer", "evaluation_layer"],
-                properties={
-                    "meta_layer": types.Schema(
-                        type=types.Type.OBJECT,
-                        required=["id", "category", "difficulty", "target_template_code", "time_limit", "training_focus"],
-                        properties={
-                            "id": types.Schema(
-                                type=types.Type.STRING,
-                            ),
-                            "category": types.Schema(
-                                type=types.Type.STRING,
-                            ),
-                            "topic": types.Schema(
-                                type=types.Type.ARRAY,
-                                items=types.Schema(
-                                    type=types.Type.STRING,
-                                ),
-                            ),
-                            "difficulty": types.Schema(
-                                type=types.Type.STRING,
-                            ),
-                            "target_template_code": types.Schema(
-                                type=types.Type.STRING,
-                            ),
-                            "time_limit": types.Schema(
-                                type=types.Type.STRING,
-                            ),
-                            "training_focus": types.Schema(
-                                type=types.Type.ARRAY,
-                                description="이 문제를 통해 훈련하고자 하는 핵심 역량 코드 목록 (예: [\"Data_Literacy\", \"Problem_Structuring\"])",
-                                items=types.Schema(
-                                    type=types.Type.STRING,
-                                ),
-                            ),
-                        },
-                    ),
-                    "user_view_layer": types.Schema(
-                        type=types.Type.OBJECT,
-                        required=["title", "summary", "scenario_public", "goals", "task_instruction", "constraints_public", "opening_line", "starter_guide"],
-                        properties={
-                            "title": types.Schema(
-                                type=types.Type.STRING,
-                            ),
-                            "summary": types.Schema(
-                                type=types.Type.STRING,
-                            ),
-                            "scenario_public": types.Schema(
-                                type=types.Type.STRING,
-                            ),
-                            "goals": types.Schema(
-                                type=types.Type.ARRAY,
-                                items=types.Schema(
-                                    type=types.Type.STRING,
-                                ),
-                            ),
-                            "task_instruction": types.Schema(
-                                type=types.Type.STRING,
-                            ),
-                            "constraints_public": types.Schema(
-                                type=types.Type.ARRAY,
-                                items=types.Schema(
-                                    type=types.Type.STRING,
-                                ),
-                            ),
-                            "opening_line": types.Schema(
-                                type=types.Type.STRING,
-                            ),
-                            "starter_guide": types.Schema(
-                                type=types.Type.STRING,
-                            ),
-                            "attachments": types.Schema(
-                                type=types.Type.ARRAY,
-                                items=types.Schema(
-                                    type=types.Type.STRING,
-                                ),
-                            ),
-                        },
-                    ),
-                    "system_view_layer": types.Schema(
-                        type=types.Type.OBJECT,
-                        required=["data_facts", "hidden_constraints", "reveal_rules", "knowledge_base_ref"],
-                        properties={
-                            "data_facts": types.Schema(
-                                type=types.Type.ARRAY,
-                                items=types.Schema(
-                                    type=types.Type.OBJECT,
-                                    required=["key", "value"],
-                                    properties={
-                                        "key": types.Schema(
-                                            type=types.Type.STRING,
-                                        ),
-                                        "value": types.Schema(
-                                            type=types.Type.STRING,
-                                        ),
-                                    },
-                                ),
-                            ),
-                            "hidden_constraints": types.Schema(
-                                type=types.Type.ARRAY,
-                                items=types.Schema(
-                                    type=types.Type.STRING,
-                                ),
-                            ),
-                            "reveal_rules": types.Schema(
-                                type=types.Type.ARRAY,
-                                items=types.Schema(
-                                    type=types.Type.STRING,
-                                ),
-                            ),
-                            "knowledge_base_ref": types.Schema(
-                                type=types.Type.ARRAY,
-                                items=types.Schema(
-                                    type=types.Type.STRING,
-                                ),
-                            ),
-                        },
-                    ),
-                    "evaluation_layer": types.Schema(
-                        type=types.Type.OBJECT,
-                        required=["process_criteria", "result_criteria", "scoring_weights", "model_answer", "critical_fail_rules"],
-                        properties={
-                            "process_criteria": types.Schema(
-                                type=types.Type.ARRAY,
-                                items=types.Schema(
-                                    type=types.Type.STRING,
-                                ),
-                            ),
-                            "result_criteria": types.Schema(
-                                type=types.Type.ARRAY,
-                                items=types.Schema(
-                                    type=types.Type.STRING,
-                                ),
-                            ),
-                            "scoring_weights": types.Schema(
-                                type=types.Type.OBJECT,
-                                required=["process", "result"],
-                                properties={
-                                    "process": types.Schema(
-                                        type=types.Type.NUMBER,
-                                    ),
-                                    "result": types.Schema(
-                                        type=types.Type.NUMBER,
-                                    ),
-                                },
-                            ),
-                            "model_answer": types.Schema(
-                                type=types.Type.STRING,
-                            ),
-                            "critical_fail_rules": types.Schema(
-                                type=types.Type.ARRAY,
-                                items=types.Schema(
-                                    type=types.Type.STRING,
-                                ),
-                            ),
-                        },
-                    ),
-                },
-            )
-            
-            # GenerateContentConfig 설정 (참조 코드와 동일하게)
-            temperature = 1.3
-            thinking_level = "HIGH"
-            media_resolution = "MEDIA_RESOLUTION_HIGH"
-            response_mime_type = "application/json"
-            
-            # GenerateContentConfig에 system_instruction 포함 (참조 코드와 동일)
-            generate_content_config = types.GenerateContentConfig(
-                temperature=temperature,
-                thinking_config=types.ThinkingConfig(
-                    thinking_level=thinking_level,
-                ),
-                media_resolution=media_resolution,
-                response_mime_type=response_mime_type,
-                response_schema=response_schema,
-                system_instruction=system_instruction,
+            # 스키마/설정은 (모델 파라미터, system 프롬프트)별로 미리 만들어 둔 객체를 재사용
+            generate_content_config = correction_config(
+                system_prompt, temperature, thinking_level, media_resolution, response_mime_type, seed,
             )
             
-            # 디버깅 정보를 세션 상태에 저장
-            import streamlit as st
-            if hasattr(st, 'session_state'):
-                if "gemini_api_debug" not in st.session_state:
-                    st.session_state.gemini_api_debug = []
-                
-                from datetime import datetime
-                api_debug_info = {
-                    "timestamp": datetime.now().isoformat(),
-                    "method": "correct_problem",
-                    "model": model,
-                    "parameters": {
-                        "temperature": temperature,
-                        "thinking_level": thinking_level,
-                        "media_resolution": media_resolution,
-                        "response_mime_type": response_mime_type,
-                        "response_schema": "설정됨 (4개 레이어: meta_layer, user_view_layer, system_view_layer, evaluation_layer)"
-                    },
-                    "prompts": {
-                        "system_prompt": system_prompt,
-                        "system_prompt_length": len(system_prompt),
-                        "user_prompt": user_prompt,
-                        "user_prompt_length": len(user_prompt)
-                    }
+            # 디버깅 정보 기록 (화면에서는 gemini_api_debug 세션 목록에 누적)
+            context.record("gemini_api_debug", {
+                "timestamp": datetime.now().isoformat(),
+                "method": "correct_problem",
+                "model": model,
+                "parameters": {
+                    "temperature": temperature,
+                    "thinking_level": thinking_level,
+                    "media_resolution": media_resolution,
+                    "response_mime_type": response_mime_type,
+                    "response_schema": f"설정됨 ({CORRECTION_SCHEMA_VERSION}, 4개 레이어: meta_layer, user_view_layer, system_view_layer, evaluation_layer)"
+                },
+                "prompts": {
+                    "system_prompt": system_prompt,
+                    "system_prompt_length": len(system_prompt),
+                    "user_prompt": user_prompt,
+                    "user_prompt_length": len(user_prompt)
                 }
-                st.session_state.gemini_api_debug.append(api_debug_info)
+            })
             
             # 디버깅: 설정 확인
-            if hasattr(st, 'write'):
-                with st.expander("🔍 Gemini API 호출 설정", expanded=False):
-                    st.write(f"**모델**: {model}")
-                    st.write(f"**Temperature**: {temperature}")
-                    st.write(f"**Thinking Level**: {thinking_level}")
-                    st.write(f"**Response MIME Type**: {response_mime_type}")
-                    st.write(f"**System Instruction 길이**: {len(system_prompt)} 문자")
-                    st.write(f"**User Prompt 길이**: {len(user_prompt)} 문자")
-                    st.write(f"**Response Schema**: 설정됨 (4개 레이어)")
+            context.debug("🔍 Gemini API 호출 설정", **{
+                "모델": model,
+                "Temperature": temperature,
+                "Thinking Level": thinking_level,
+                "Response MIME Type": response_mime_type,
+                "System Instruction 길이": f"{len(system_prompt)} 문자",
+                "User Prompt 길이": f"{len(user_prompt)} 문자",
+                "Response Schema": "설정됨 (4개 레이어)",
+            })
             
-            # 스트리밍으로 응답 받기 (재시도 로직 포함)
-            max_retries = 3
-            retry_delay = 2  # 초기 대기 시간 (초)
-            response_text = ""
             chunk_count = 0
             
-            for attempt in range(max_retries):
-                try:
-                    response_text = ""
-                    chunk_count = 0
-                    for chunk in client.models.generate_content_stream(
-                        model=model,
-                        contents=contents,
-                        config=generate_content_config,
-                    ):
-                        if hasattr(chunk, 'text') and chunk.text:
-                            response_text += chunk.text
-                            chunk_count += 1
-                    
-                    # 성공적으로 응답을 받았으면 루프 종료
-                    break
-                    
-                except Exception as e:
-                    error_str = str(e)
-                    # 503 에러 또는 과부하 관련 에러인 경우 재시도
-                    if "503" in error_str or "UNAVAILABLE" in error_str or "overloaded" in error_str.lower():
-                        if attempt < max_retries - 1:
-                            wait_time = retry_delay * (2 ** attempt)  # Exponential backoff
-                            import streamlit as st
-                            if hasattr(st, 'write'):
-                                st.warning(f"⚠️ 모델이 과부하 상태입니다. {wait_time}초 후 재시도합니다... (시도 {attempt + 1}/{max_retries})")
-                            time.sleep(wait_time)
-                            continue
-                        else:
-                            # 최대 재시도 횟수 초과
-                            raise RuntimeError(f"모델이 과부하 상태입니다. {max_retries}번 재시도 후에도 실패했습니다. 잠시 후 다시 시도해주세요.")
-                    else:
-                        # 503이 아닌 다른 에러는 즉시 재발생
-                        raise
+            usage = {}
+            
+            def _stream():
+                # 스트리밍으로 응답 받기 (토큰 사용량은 usage_metadata가 있는 마지막 chunk 기준)
+                nonlocal chunk_count, usage
+                response_text = ""
+                chunk_count = 0
+                for chunk in client.models.generate_content_stream(
+                    model=model,
+                    contents=contents,
+                    config=generate_content_config,
+                ):
+                    if hasattr(chunk, 'text') and chunk.text:
+                        response_text += chunk.text
+                        chunk_count += 1
+                    usage = gemini_usage(chunk) or usage
+                return response_text
+            
+            def _call():
+                # 속도 제한/과부하 재시도는 rate_limiter가 처리 (Retry-After 또는 지터 백오프)
+                started = time.monotonic()
+                response_text = call_with_limits(
+                    "gemini", model, _stream, estimate_prompt_tokens(system_prompt, user_prompt),
+                    on_retry=lambda attempt, wait, e: context.warning(
+                        f"⚠️ 모델이 과부하 상태입니다. {wait:.1f}초 후 재시도합니다... (재시도 {attempt}회)"),
+                )
+                record_usage("gemini", model, usage, time.monotonic() - started, "correct_problem", context.tags)
+                return response_text
+            
+            # 같은 프롬프트/설정의 교정 결과는 캐시에서 재사용 (빈 응답/검증 실패 응답은 저장하지 않음)
+            cache_config = {
+                "method": "correct_problem", "temperature": temperature, "thinking_level": thinking_level,
+                "media_resolution": media_resolution, "response_mime_type": response_mime_type,
+                "response_schema": CORRECTION_SCHEMA_VERSION, **({"seed": seed} if seed is not None else {}),
+            }
+            response_text = self.response_cache.fetch("gemini", model, system_prompt, user_prompt, cache_config, _call,
+                                                      validate=validate, refresh=refresh)
             
             # 디버깅: 응답 확인
-            if hasattr(st, 'write'):
-                with st.expander("📥 Gemini API 응답 정보", expanded=False):
-                    st.write(f"**응답 길이**: {len(response_text)} 문자")
-                    st.write(f"**Chunk 개수**: {chunk_count}")
-                    st.write(f"**응답 미리보기 (처음 500자)**:")
-                    st.code(response_text[:500] if response_text else "응답 없음")
+            context.debug("📥 Gemini API 응답 정보", **{
+                "응답 길이": f"{len(response_text)} 문자",
+                "Chunk 개수": chunk_count if chunk_count else "0 (캐시된 응답)",
+                "응답 미리보기 (처음 500자)": "",
+                "code": response_text[:500] if response_text else "응답 없음",
+            })
             
             return response_text
             
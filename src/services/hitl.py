@@ -16,7 +16,11 @@ class HITLManager:
 
         q = self.db.get_questions({"id": question_id})
         if not q: return {"status":"error","message":"문제 없음"}
-        current = q[0]["difficulty"]
+        return self._analyze(stats, q[0]["difficulty"])
+
+    def _analyze(self, stats: dict | None, current: str) -> dict:
+        if not stats or stats.get("feedback_count", 0) < 3:
+            return {"status":"insufficient_data","message":"피드백 최소 3개 필요"}
 
         avg = stats["avg_difficulty"]; votes = stats.get("difficulty_votes") or {}
         most, pct = current, 0
@@ -45,11 +49,23 @@ class HITLManager:
         }
 
     def auto_adjust_difficulties(self) -> list[dict]:
+        # 피드백 통계 조회와 난이도 조정을 각각 batch 한 번으로 처리 (문제 수와 무관하게 왕복 2회)
+        questions = self.db.get_questions()
+        all_stats = self.db.get_feedback_stats_many([q["id"] for q in questions])
+
         out=[]
-        for q in self.db.get_questions():
-            a = self.analyze_difficulty_alignment(q["id"])
+        batch = self.db.batch()
+        for q in questions:
+            a = self._analyze(all_stats.get(q["id"]), q["difficulty"])
             if a.get("status")=="analyzed" and a.get("needs_adjustment"):
                 reason = f"자동 조정: 평균 {a['avg_difficulty_rating']:.1f}, {a['confidence']:.0f}%가 {a['recommended_difficulty']}로 평가"
-                self.db.adjust_difficulty(q["id"], a["recommended_difficulty"], reason, "auto_system")
+                batch.queue("adjust_difficulty", {
+                    "question_id": q["id"], "new_difficulty": a["recommended_difficulty"],
+                    "reason": reason, "adjusted_by": "auto_system"
+                })
                 out.append({"question_id": q["id"], "from": a["current_difficulty"], "to": a["recommended_difficulty"], "reason": reason})
+
+        for item, result in zip(out, batch.flush()):
+            if not result.get("ok"):
+                item["error"] = result.get("error")
         return out
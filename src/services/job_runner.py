@@ -0,0 +1,367 @@
+"""
+백그라운드 작업 실행기 (문제 자동생성)
+- 작업(spec/상태/결과)을 SQLite 작업 테이블에 보관하고, 프로세스 단위 워커 스레드가 실행
+- 브라우저 탭을 닫거나 rerun/재연결이 일어나도 생성은 계속되며, 화면은 진행 상황만 조회(polling)
+- 프로세스가 재시작되면 끝나지 않은 작업을 남은 항목부터 이어서 실행
+"""
+import json
+import os
+import random
+import sqlite3
+import threading
+import uuid
+from datetime import datetime
+
+from src.constants import ASSESSMENT_AREAS, DIFFICULTY_LEVELS, QUESTION_TYPES
+from src.services.service_context import ServiceContext
+
+DEFAULT_JOB_DB_PATH = "ai_assessment_jobs.db"
+
+# 작업 상태
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_DONE = "done"
+JOB_FAILED = "failed"
+JOB_CANCELLED = "cancelled"
+ACTIVE_STATUSES = (JOB_QUEUED, JOB_RUNNING)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    spec TEXT NOT NULL,
+    status TEXT NOT NULL,
+    total INTEGER NOT NULL,
+    cancel_requested INTEGER NOT NULL DEFAULT 0,
+    error TEXT,
+    created_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL,
+    finished_at TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_status_created ON jobs (status, created_at);
+CREATE TABLE IF NOT EXISTS job_items (
+    job_id TEXT NOT NULL,
+    item_index INTEGER NOT NULL,
+    status TEXT NOT NULL,
+    result TEXT,
+    error TEXT,
+    created_at TEXT NOT NULL,
+    PRIMARY KEY (job_id, item_index)
+);
+"""
+
+
+def resolve_generation_spec(area: str, difficulty: str, question_type: str, additional_requirements: str = "") -> dict:
+    """랜덤 옵션을 실제 값으로 바꿔 generate_with_ai 인자 딕셔너리로 반환"""
+    if area == "랜덤":
+        area = random.choice(list(ASSESSMENT_AREAS.keys()))
+    if difficulty == "랜덤":
+        difficulty = random.choice(list(DIFFICULTY_LEVELS.keys()))
+    if question_type == "랜덤":
+        question_type = random.choice(list(QUESTION_TYPES.keys()))
+    return {
+        "area": area,
+        "difficulty": difficulty,
+        "question_type": question_type,
+        "user_prompt_extra": "",
+        "system_prompt_extra": additional_requirements or "",
+    }
+
+
+class JobStore:
+    """작업/항목 결과를 보관하는 SQLite 저장소 (스레드 간 공유)"""
+
+    def __init__(self, path: str | None = None):
+        self.path = path or os.getenv("JOB_DB_PATH", DEFAULT_JOB_DB_PATH)
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    @staticmethod
+    def _job_dict(row) -> dict:
+        job = dict(row)
+        job["spec"] = json.loads(job["spec"])
+        job["cancel_requested"] = bool(job["cancel_requested"])
+        return job
+
+    def create_job(self, kind: str, spec: dict, total: int) -> str:
+        job_id = uuid.uuid4().hex
+        now = datetime.now().isoformat()
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO jobs (id, kind, spec, status, total, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (job_id, kind, json.dumps(spec, ensure_ascii=False), JOB_QUEUED, int(total), now, now),
+            )
+        return job_id
+
+    def get_job(self, job_id: str) -> dict | None:
+        """작업 정보 + 진행 건수(completed/failed)"""
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            if not row:
+                return None
+            counts = dict(self._conn.execute(
+                "SELECT status, COUNT(*) FROM job_items WHERE job_id = ? GROUP BY status", (job_id,)
+            ).fetchall())
+        job = self._job_dict(row)
+        job["completed"] = counts.get(JOB_DONE, 0)
+        job["failed"] = counts.get(JOB_FAILED, 0)
+        return job
+
+    def latest_job(self, kind: str) -> dict | None:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT id FROM jobs WHERE kind = ? ORDER BY created_at DESC LIMIT 1", (kind,)
+            ).fetchone()
+        return self.get_job(row["id"]) if row else None
+
+    def next_active_job(self) -> dict | None:
+        """가장 먼저 등록된 미완료 작업"""
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT id FROM jobs WHERE status IN ({','.join('?' * len(ACTIVE_STATUSES))}) "
+                "ORDER BY created_at LIMIT 1",
+                ACTIVE_STATUSES,
+            ).fetchone()
+        return self.get_job(row["id"]) if row else None
+
+    def set_status(self, job_id: str, status: str, error: str | None = None):
+        now = datetime.now().isoformat()
+        finished_at = None if status in ACTIVE_STATUSES else now
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, error = ?, updated_at = ?, finished_at = ? WHERE id = ?",
+                (status, error, now, finished_at, job_id),
+            )
+
+    def request_cancel(self, job_id: str):
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET cancel_requested = 1, updated_at = ? WHERE id = ?",
+                (datetime.now().isoformat(), job_id),
+            )
+
+    def cancel_requested(self, job_id: str) -> bool:
+        with self._lock:
+            row = self._conn.execute("SELECT cancel_requested FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return bool(row and row["cancel_requested"])
+
+    def requeue(self, job_id: str):
+        """실패/취소된 작업을 다시 대기열로 (완료된 항목은 건너뛰고 실패 항목만 재시도)"""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, cancel_requested = 0, error = NULL, finished_at = NULL, updated_at = ? "
+                "WHERE id = ?",
+                (JOB_QUEUED, datetime.now().isoformat(), job_id),
+            )
+
+    def pending_indexes(self, job_id: str, total: int) -> list[int]:
+        """아직 성공하지 못한 항목 번호 (결과가 없거나 실패한 항목)"""
+        with self._lock:
+            done = {row[0] for row in self._conn.execute(
+                "SELECT item_index FROM job_items WHERE job_id = ? AND status = ?", (job_id, JOB_DONE)
+            )}
+        return [index for index in range(total) if index not in done]
+
+    def record_item(self, job_id: str, index: int, result: dict | None = None, error: str | None = None):
+        status = JOB_DONE if result is not None else JOB_FAILED
+        now = datetime.now().isoformat()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO job_items (job_id, item_index, status, result, error, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (job_id, index, status, json.dumps(result, ensure_ascii=False) if result is not None else None,
+                 error, now),
+            )
+            self._conn.execute("UPDATE jobs SET updated_at = ? WHERE id = ?", (now, job_id))
+
+    def results(self, job_id: str) -> list[dict]:
+        """성공한 항목 결과 (완료된 순서대로)"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT result FROM job_items WHERE job_id = ? AND status = ? ORDER BY created_at",
+                (job_id, JOB_DONE),
+            ).fetchall()
+        return [json.loads(row["result"]) for row in rows]
+
+    def errors(self, job_id: str, limit: int = 20) -> list[str]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT error FROM job_items WHERE job_id = ? AND status = ? ORDER BY created_at DESC LIMIT ?",
+                (job_id, JOB_FAILED, int(limit)),
+            ).fetchall()
+        return [row["error"] for row in rows]
+
+
+class JobRunner:
+    """
+    작업 테이블을 순서대로 실행하는 프로세스 단위 워커
+
+    사용 예)
+        runner = get_job_runner()
+        runner.attach(db)                      # 프롬프트 조회/저장에 사용할 DB 클라이언트 (미완료 작업 재개)
+        job_id = runner.submit_generation({"area": "랜덤", ..., "count": 20, "concurrency": 4})
+        runner.store.get_job(job_id)           # 화면에서는 진행 상황만 조회
+    """
+
+    # 연속으로 이 횟수만큼 실패하면 (API 키/쿼터 문제 등) 작업을 실패로 중단
+    MAX_CONSECUTIVE_FAILURES = 5
+
+    def __init__(self, store: JobStore, generator_factory=None):
+        self.store = store
+        self._generator_factory = generator_factory
+        self._generator = None
+        self._db = None
+        self._wake = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+
+    def attach(self, db):
+        """DB 클라이언트를 지정하고 워커 스레드를 시작 (재시작 직후라면 미완료 작업을 이어서 실행)"""
+        with self._lock:
+            self._db = db
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="job-runner", daemon=True)
+                self._thread.start()
+        self._wake.set()
+
+    def submit_generation(self, spec: dict) -> str:
+        """
+        문제 자동생성 작업 등록
+
+        spec: {"area", "difficulty", "question_type" ("랜덤" 가능), "additional_requirements",
+               "count", "concurrency", "model"}
+
+        "랜덤" 옵션은 등록할 때 항목별로 한 번만 정해서 작업에 저장합니다
+        (이어서 실행해도 같은 영역/난이도/유형으로 요청하므로 이미 받은 응답 캐시를 재사용할 수 있음).
+        """
+        count = int(spec.get("count", 1))
+        spec = {**spec, "items": [
+            resolve_generation_spec(spec.get("area", "랜덤"), spec.get("difficulty", "랜덤"),
+                                    spec.get("question_type", "랜덤"), spec.get("additional_requirements", ""))
+            for _ in range(count)
+        ]}
+        job_id = self.store.create_job("generate", spec, count)
+        self._wake.set()
+        return job_id
+
+    def cancel(self, job_id: str):
+        """진행 중인 호출이 끝나는 대로 작업을 중지 (대기 중이면 바로 취소)"""
+        self.store.request_cancel(job_id)
+        job = self.store.get_job(job_id)
+        if job and job["status"] == JOB_QUEUED:
+            self.store.set_status(job_id, JOB_CANCELLED)
+
+    def resume(self, job_id: str):
+        self.store.requeue(job_id)
+        self._wake.set()
+
+    def _get_generator(self):
+        if self._generator is None:
+            if self._generator_factory is None:
+                from src.services.ai_generator import AIQuestionGenerator
+                self._generator_factory = AIQuestionGenerator
+            self._generator = self._generator_factory()
+        return self._generator
+
+    def _run(self):
+        while True:
+            job = self.store.next_active_job()
+            if job is None:
+                self._wake.wait(5)
+                self._wake.clear()
+                continue
+            try:
+                self.store.set_status(job["id"], JOB_RUNNING)
+                self._run_generation(job)
+            except Exception as e:
+                self.store.set_status(job["id"], JOB_FAILED, str(e))
+
+    def _save_question(self, question: dict):
+        """생성된 문제를 저장하고 저장 여부 반환 (outbox가 있으면 대기열에 넣고 바로 반환)"""
+        db = self._db
+        if db is None:
+            return False
+        if hasattr(db, "save_question_later"):
+            return db.save_question_later(question)
+        if question.get("type") == "multiple_choice":
+            return bool(db.save_multiple_choice_question(question))
+        return bool(db.save_subjective_question(question))
+
+    def _run_generation(self, job: dict):
+        spec = job["spec"]
+        indexes = self.store.pending_indexes(job["id"], job["total"])
+        if not indexes:
+            self.store.set_status(job["id"], JOB_DONE)
+            return
+        generator = self._get_generator()
+        # 등록할 때 정해 둔 항목별 spec 사용 (items가 없는 이전 작업은 이때 정함)
+        items = spec.get("items") or []
+        specs = [
+            dict(items[index]) if index < len(items) else
+            resolve_generation_spec(spec.get("area", "랜덤"), spec.get("difficulty", "랜덤"),
+                                    spec.get("question_type", "랜덤"), spec.get("additional_requirements", ""))
+            for index in indexes
+        ]
+        # 저장 전에 중단된 항목은 이어서 실행할 때 이미 받은 응답을 재사용
+        for index, item_spec in zip(indexes, specs):
+            item_spec["cache_variant"] = f"job:{job['id']}:{index}"
+
+        consecutive_failures = 0
+        context = ServiceContext(model=spec.get("model"), db=self._db, tags={"job_id": job["id"], "tab": "auto_generate"})
+        batch = generator.generate_batch(specs, concurrency=int(spec.get("concurrency", 4)), context=context)
+        try:
+            for item in batch:
+                index = indexes[item["index"]]
+                question = item["question"]
+                if question:
+                    consecutive_failures = 0
+                    try:
+                        saved = self._save_question(question)
+                    except Exception:
+                        saved = False
+                    self.store.record_item(job["id"], index, {
+                        "title": question.get("title") or question.get("question") or "제목 없음",
+                        "task": question.get("task", ""),
+                        "category": item["spec"]["area"],
+                        "difficulty": item["spec"]["difficulty"],
+                        "type": question.get("type", item["spec"]["question_type"]),
+                        "saved_to_db": bool(saved),
+                    })
+                else:
+                    consecutive_failures += 1
+                    self.store.record_item(job["id"], index, error=item["error"])
+                    if consecutive_failures >= self.MAX_CONSECUTIVE_FAILURES:
+                        self.store.set_status(job["id"], JOB_FAILED, f"연속 {consecutive_failures}회 생성 실패: {item['error']}")
+                        return
+                if self.store.cancel_requested(job["id"]):
+                    self.store.set_status(job["id"], JOB_CANCELLED)
+                    return
+        finally:
+            # 중간에 멈추면 아직 시작하지 않은 호출은 취소
+            batch.close()
+
+        remaining = self.store.pending_indexes(job["id"], job["total"])
+        if remaining:
+            self.store.set_status(job["id"], JOB_FAILED, f"{len(remaining)}개 문제 생성 실패")
+        else:
+            self.store.set_status(job["id"], JOB_DONE)
+
+
+_RUNNER: JobRunner | None = None
+_RUNNER_LOCK = threading.Lock()
+
+
+def get_job_runner(path: str | None = None) -> JobRunner:
+    """프로세스 단위로 공유하는 작업 실행기 (스레드는 attach 시 시작)"""
+    global _RUNNER
+    with _RUNNER_LOCK:
+        if _RUNNER is None:
+            _RUNNER = JobRunner(JobStore(path))
+        return _RUNNER
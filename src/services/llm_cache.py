@@ -0,0 +1,198 @@
+"""
+LLM 응답 캐시 (SQLite, content-addressed)
+- 키: provider + 모델 + system 프롬프트 + user 프롬프트 + 생성 설정(키 정렬 JSON)의 SHA-256
+- 같은 요청을 다시 실행하면(실패한 batch 뒷부분 재실행, 벤치마크 반복 등) API를 호출하지 않고 저장된 응답 반환
+- 호출 측이 validate를 넘기면 파싱/검증을 통과한 응답만 저장 (JSON이 없거나 깨진 응답은 재시도 때 다시 호출)
+- 크기(LLM_CACHE_MAX_MB)와 보관 기간(LLM_CACHE_MAX_AGE_DAYS)을 넘으면 오래 쓰지 않은 응답부터 삭제
+
+LLM_CACHE_MODE
+- read_write (기본): 캐시에 있으면 사용, 없으면 호출 후 저장
+- replay          : 캐시에 있는 응답만 사용 (없으면 RuntimeError, API 호출 없음)
+- refresh         : 항상 호출하고 결과로 캐시 갱신
+- off             : 캐시 사용 안 함
+
+LLM_CACHE_SEED를 지정하면 seed를 지원하는 호출(OpenAI, google-genai)에 같은 seed를 넘겨 응답 편차를 줄입니다.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+DEFAULT_LLM_CACHE_PATH = "ai_assessment_llm_cache.db"
+
+MODE_READ_WRITE = "read_write"
+MODE_REPLAY = "replay"
+MODE_REFRESH = "refresh"
+MODE_OFF = "off"
+CACHE_MODES = (MODE_READ_WRITE, MODE_REPLAY, MODE_REFRESH, MODE_OFF)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS llm_responses (
+    key TEXT PRIMARY KEY,
+    provider TEXT NOT NULL,
+    model TEXT NOT NULL,
+    response TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    hits INTEGER NOT NULL DEFAULT 0,
+    created_at REAL NOT NULL,
+    last_used_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_llm_responses_last_used ON llm_responses (last_used_at);
+"""
+
+
+def request_key(provider: str, model: str, system_prompt: str, user_prompt: str, config: dict | None = None) -> str:
+    """요청 내용의 SHA-256 (설정 dict는 키 정렬 JSON으로 직렬화)"""
+    payload = json.dumps({
+        "provider": provider, "model": model, "system": system_prompt, "user": user_prompt, "config": config or {},
+    }, ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def cache_seed() -> int | None:
+    """결정성 제어용 seed (LLM_CACHE_SEED, 없으면 None)"""
+    seed = os.getenv("LLM_CACHE_SEED", "").strip()
+    return int(seed) if seed else None
+
+
+def _passes(validate, response: str) -> bool:
+    """validate 실패(예외 포함)는 저장하지 않음"""
+    try:
+        return bool(validate(response))
+    except Exception:
+        return False
+
+
+class LLMResponseCache:
+    """
+    디스크 LLM 응답 캐시
+
+    사용 예)
+        cache = get_llm_cache()
+        text = cache.fetch("gemini", model, system_prompt, user_prompt, {"temperature": 0.3},
+                           lambda: call_api(...))   # 캐시에 있으면 call_api를 호출하지 않음
+    """
+
+    EVICT_EVERY = 50    # 이 횟수만큼 저장할 때마다 정리
+
+    def __init__(self, path: str | None = None, mode: str | None = None,
+                 max_bytes: int | None = None, max_age: float | None = None):
+        self.path = path or os.getenv("LLM_CACHE_PATH", DEFAULT_LLM_CACHE_PATH)
+        mode = (mode or os.getenv("LLM_CACHE_MODE", MODE_READ_WRITE)).strip().lower()
+        if mode not in CACHE_MODES:
+            raise RuntimeError(f"알 수 없는 LLM_CACHE_MODE입니다: {mode} ({', '.join(CACHE_MODES)})")
+        self.mode = mode
+        self.max_bytes = max_bytes if max_bytes is not None else \
+            int(float(os.getenv("LLM_CACHE_MAX_MB", "200")) * 1024 * 1024)
+        self.max_age = max_age if max_age is not None else \
+            float(os.getenv("LLM_CACHE_MAX_AGE_DAYS", "30")) * 86400
+        self.hits = 0
+        self.misses = 0
+        self._puts = 0
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+        self.evict()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    @property
+    def enabled(self) -> bool:
+        return self.mode != MODE_OFF
+
+    def get(self, key: str) -> str | None:
+        with self._lock:
+            row = self._conn.execute("SELECT response, created_at FROM llm_responses WHERE key = ?", (key,)).fetchone()
+            if row is None or time.time() - row["created_at"] > self.max_age:
+                return None
+            self._conn.execute("UPDATE llm_responses SET hits = hits + 1, last_used_at = ? WHERE key = ?",
+                               (time.time(), key))
+        return row["response"]
+
+    def put(self, key: str, provider: str, model: str, response: str):
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_responses (key, provider, model, response, size, hits, created_at, last_used_at) "
+                "VALUES (?, ?, ?, ?, ?, 0, ?, ?)",
+                (key, provider, model, response, len(response.encode("utf-8")), now, now),
+            )
+            self._puts += 1
+            if self._puts % self.EVICT_EVERY == 0:
+                self.evict()
+
+    def fetch(self, provider: str, model: str, system_prompt: str, user_prompt: str, config: dict | None, call,
+              validate=None, refresh: bool = False) -> str:
+        """
+        캐시된 응답 또는 call() 결과 반환 (모드에 따라 동작)
+
+        call()은 응답 텍스트를 반환해야 하며, 비어 있는 응답은 저장하지 않습니다.
+        validate(응답) -> bool을 넘기면 통과한 응답만 저장하고, 통과하지 못하는 캐시 응답은 쓰지 않고 다시 호출합니다.
+        refresh=True면 캐시를 읽지 않고 호출한 뒤 결과로 덮어씁니다 (재시도 시 같은 실패 응답을 재사용하지 않도록).
+        """
+        if not self.enabled:
+            return call()
+        key = request_key(provider, model, system_prompt, user_prompt, config)
+        if self.mode != MODE_REFRESH and not refresh:
+            cached = self.get(key)
+            if cached is not None and validate is not None and not _passes(validate, cached):
+                cached = None
+            with self._lock:
+                if cached is not None:
+                    self.hits += 1
+                else:
+                    self.misses += 1
+            if cached is not None:
+                return cached
+            if self.mode == MODE_REPLAY:
+                raise RuntimeError(f"재생 모드: 캐시에 없는 요청입니다 ({provider}/{model}, {key[:12]})")
+        response = call()
+        if isinstance(response, str) and response.strip() and (validate is None or _passes(validate, response)):
+            self.put(key, provider, model, response)
+        return response
+
+    def evict(self) -> int:
+        """보관 기간이 지난 응답과 크기 한도를 넘는 응답(오래 쓰지 않은 순) 삭제, 삭제 건수 반환"""
+        with self._lock:
+            removed = self._conn.execute("DELETE FROM llm_responses WHERE created_at < ?",
+                                         (time.time() - self.max_age,)).rowcount
+            total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM llm_responses").fetchone()[0]
+            if total > self.max_bytes:
+                rows = self._conn.execute("SELECT key, size FROM llm_responses ORDER BY last_used_at").fetchall()
+                stale = []
+                for row in rows:
+                    if total <= self.max_bytes:
+                        break
+                    stale.append((row["key"],))
+                    total -= row["size"]
+                self._conn.executemany("DELETE FROM llm_responses WHERE key = ?", stale)
+                removed += len(stale)
+        return removed
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM llm_responses")
+
+    def stats(self) -> dict:
+        with self._lock:
+            row = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM llm_responses").fetchone()
+        return {"mode": self.mode, "entries": row[0], "bytes": row[1], "hits": self.hits, "misses": self.misses}
+
+
+_LLM_CACHE: LLMResponseCache | None = None
+_LLM_CACHE_LOCK = threading.Lock()
+
+
+def get_llm_cache(path: str | None = None) -> LLMResponseCache:
+    """프로세스 단위로 공유하는 LLM 응답 캐시"""
+    global _LLM_CACHE
+    with _LLM_CACHE_LOCK:
+        if _LLM_CACHE is None:
+            _LLM_CACHE = LLMResponseCache(path)
+        return _LLM_CACHE
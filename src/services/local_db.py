@@ -0,0 +1,380 @@
+"""
+로컬 SQLite 읽기 전용 복제본 (문제 은행)
+- Supabase의 객관식/주관식 문제 테이블을 로컬 SQLite(WAL 모드)로 미러링
+- 제목/task/scenario/steps 텍스트에 FTS5 인덱스를 두어 검색을 네트워크 없이 수 ms 내에 처리
+- get_questions_data_version / get_questions_changed_since 로 변경분만 동기화
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+
+DEFAULT_REPLICA_PATH = "ai_assessment_replica.db"
+QUESTION_TYPES = ("multiple_choice", "subjective")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS replica_questions (
+    id TEXT PRIMARY KEY,
+    question_type TEXT NOT NULL,
+    lang TEXT,
+    category TEXT,
+    difficulty TEXT,
+    topic TEXT,
+    title TEXT,
+    active INTEGER,
+    review_done INTEGER,
+    translation_done INTEGER,
+    created_at TEXT,
+    updated_at TEXT,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_replica_questions_type_cat_diff
+    ON replica_questions (question_type, category, difficulty, created_at DESC);
+CREATE TABLE IF NOT EXISTS replica_prompts (
+    id TEXT PRIMARY KEY,
+    lang TEXT,
+    category TEXT,
+    data TEXT NOT NULL,
+    cached_at TEXT
+);
+CREATE TABLE IF NOT EXISTS replica_meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+
+def _steps_text(steps) -> str:
+    """steps에서 검색 가능한 텍스트 추출"""
+    if isinstance(steps, str):
+        try:
+            steps = json.loads(steps)
+        except json.JSONDecodeError:
+            return steps
+    bucket = []
+    for step in steps or []:
+        if not isinstance(step, dict):
+            continue
+        for key in ("title", "question"):
+            if step.get(key):
+                bucket.append(str(step[key]))
+        for opt in step.get("options", []) or []:
+            if isinstance(opt, dict) and opt.get("text"):
+                bucket.append(str(opt["text"]))
+    return " ".join(bucket)
+
+
+def _status_flag(row: dict, key: str):
+    status = row.get("question_status") or {}
+    value = status.get(key) if isinstance(status, dict) else None
+    return None if value is None else int(bool(value))
+
+
+class LocalQuestionReplica:
+    """
+    문제 은행 로컬 복제본
+
+    사용 예)
+        replica = get_local_replica()
+        replica.sync(db)                                   # 버전이 바뀐 경우에만 변경분 반영
+        replica.get_multiple_choice_questions({"category": "life"})
+        replica.search_questions("데이터", {"type": "subjective"})
+    """
+
+    def __init__(self, path: str | None = None):
+        self.path = path or os.getenv("LOCAL_REPLICA_PATH", DEFAULT_REPLICA_PATH)
+        self._lock = threading.RLock()
+        self._synced_at = 0.0
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        self.fts_enabled = self._create_fts()
+        if self._get_meta("fts_key") != "rowid":
+            self._rebuild_fts()
+
+    def _create_fts(self) -> bool:
+        """FTS5 (trigram → unicode61) 인덱스 생성, 사용 불가하면 일반 테이블 + LIKE 검색"""
+        exists = self._conn.execute(
+            "SELECT sql FROM sqlite_master WHERE name = 'replica_questions_fts'"
+        ).fetchone()
+        if exists:
+            return "VIRTUAL TABLE" in (exists["sql"] or "").upper()
+        for tokenizer in ("trigram", "unicode61"):
+            try:
+                self._conn.execute(
+                    "CREATE VIRTUAL TABLE replica_questions_fts USING fts5("
+                    f"id UNINDEXED, title, task, scenario, steps, tokenize='{tokenizer}')"
+                )
+                return True
+            except sqlite3.OperationalError:
+                continue
+        self._conn.execute(
+            "CREATE TABLE replica_questions_fts (id TEXT PRIMARY KEY, title TEXT, task TEXT, scenario TEXT, steps TEXT)"
+        )
+        return False
+
+    def _rebuild_fts(self):
+        """검색 인덱스를 replica_questions의 rowid 기준으로 다시 만듦 (id 기준으로 만든 이전 버전 파일 변환)"""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.execute("DELETE FROM replica_questions_fts")
+                for row in self._conn.execute("SELECT rowid, data FROM replica_questions").fetchall():
+                    self._index(row["rowid"], json.loads(row["data"]))
+                self._set_meta("fts_key", "rowid")
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def _index(self, rowid: int, row: dict):
+        self._conn.execute(
+            "INSERT INTO replica_questions_fts (rowid, id, title, task, scenario, steps) VALUES (?, ?, ?, ?, ?, ?)",
+            (rowid, row["id"], row.get("problem_title") or row.get("title") or "", row.get("task") or "",
+             row.get("scenario") or "", _steps_text(row.get("steps"))),
+        )
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    # 메타 정보
+    def _get_meta(self, key: str) -> str | None:
+        row = self._conn.execute("SELECT value FROM replica_meta WHERE key = ?", (key,)).fetchone()
+        return row["value"] if row else None
+
+    def _set_meta(self, key: str, value: str):
+        self._conn.execute(
+            "INSERT INTO replica_meta (key, value) VALUES (?, ?) "
+            "ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+            (key, value),
+        )
+
+    @property
+    def version(self) -> str | None:
+        """마지막으로 동기화한 데이터 버전 (없으면 None)"""
+        with self._lock:
+            return self._get_meta("data_version")
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM replica_questions").fetchone()[0]
+
+    # 동기화
+    def apply_changes(self, changes: dict, version: str | None = None, replace: bool = False) -> int:
+        """
+        변경된 문제 레코드를 복제본에 반영 (id 기준 upsert)
+
+        Args:
+            changes: {"multiple_choice": [...], "subjective": [...]} (Edge 조회 결과 그대로)
+            version: 반영 후 기록할 데이터 버전
+            replace: True면 기존 데이터를 모두 지우고 교체 (전체 동기화)
+        """
+        applied = 0
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                if replace:
+                    self._conn.execute("DELETE FROM replica_questions")
+                    self._conn.execute("DELETE FROM replica_questions_fts")
+                for question_type in QUESTION_TYPES:
+                    for row in changes.get(question_type) or []:
+                        if row.get("id"):
+                            self._upsert(question_type, row)
+                            applied += 1
+                if version:
+                    self._set_meta("data_version", version)
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return applied
+
+    def _upsert(self, question_type: str, row: dict):
+        title = row.get("problem_title") or row.get("title") or ""
+        active = row.get("active")
+        # 검색 인덱스는 replica_questions의 rowid로 연결 (UPSERT는 rowid를 유지하므로 rowid로 바로 삭제/추가)
+        self._conn.execute(
+            "INSERT INTO replica_questions "
+            "(id, question_type, lang, category, difficulty, topic, title, active, review_done, "
+            " translation_done, created_at, updated_at, data) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT(id) DO UPDATE SET question_type = excluded.question_type, lang = excluded.lang, "
+            "category = excluded.category, difficulty = excluded.difficulty, topic = excluded.topic, "
+            "title = excluded.title, active = excluded.active, review_done = excluded.review_done, "
+            "translation_done = excluded.translation_done, created_at = excluded.created_at, "
+            "updated_at = excluded.updated_at, data = excluded.data",
+            (
+                row["id"], question_type, row.get("lang"), row.get("category"), row.get("difficulty"),
+                row.get("topic"), title, None if active is None else int(bool(active)),
+                _status_flag(row, "review_done"), _status_flag(row, "translation_done"),
+                row.get("created_at"), row.get("updated_at"), json.dumps(row, ensure_ascii=False),
+            ),
+        )
+        rowid = self._conn.execute("SELECT rowid FROM replica_questions WHERE id = ?", (row["id"],)).fetchone()[0]
+        self._conn.execute("DELETE FROM replica_questions_fts WHERE rowid = ?", (rowid,))
+        self._index(rowid, row)
+
+    def sync(self, db, min_interval: float = 0.0, force: bool = False) -> int:
+        """
+        Edge 데이터 버전이 바뀐 경우에만 변경분을 받아 반영
+
+        Args:
+            db: EdgeDBClient
+            min_interval: 마지막 확인 후 이 시간(초)이 지나지 않았으면 버전 확인도 생략
+            force: min_interval을 무시하고 즉시 확인
+
+        Returns:
+            int: 반영된 레코드 수
+        """
+        with self._lock:
+            if not force and self.version and time.monotonic() - self._synced_at < min_interval:
+                return 0
+            remote_version = db.get_questions_data_version()
+            local_version = self.version
+            if local_version == remote_version:
+                self._synced_at = time.monotonic()
+                return 0
+            # 버전을 먼저 읽었으므로 조회 중 수정된 문제는 다음 동기화에서 다시 내려옴
+            changes = db.get_questions_changed_since(local_version)
+            applied = self.apply_changes(changes, remote_version, replace=local_version is None)
+            self._synced_at = time.monotonic()
+            return applied
+
+    # 조회 (EdgeDBClient와 같은 형태의 레코드 반환)
+    def _where(self, question_type: str | None, filters: dict | None) -> tuple[list, list]:
+        filters = filters or {}
+        clauses, args = [], []
+        question_type = question_type or filters.get("type")
+        if question_type:
+            clauses.append("q.question_type = ?")
+            args.append(question_type)
+        for key in ("id", "category", "difficulty", "lang", "topic"):
+            if filters.get(key):
+                clauses.append(f"q.{key} = ?")
+                args.append(filters[key])
+        for key in ("active", "review_done", "translation_done"):
+            if filters.get(key) is not None:
+                clauses.append(f"q.{key} = ?")
+                args.append(int(bool(filters[key])))
+        return clauses, args
+
+    def _select(self, clauses: list, args: list, fields: list | None = None, limit: int | None = None) -> list[dict]:
+        sql = "SELECT q.question_type, q.data FROM replica_questions q"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY q.created_at DESC, q.id DESC"
+        if limit:
+            sql += " LIMIT ?"
+            args = [*args, int(limit)]
+        with self._lock:
+            rows = self._conn.execute(sql, args).fetchall()
+        results = []
+        for row in rows:
+            record = json.loads(row["data"])
+            if fields:
+                keep = set(fields) | {"id", "created_at", "question_status"}
+                record = {k: v for k, v in record.items() if k in keep}
+            record["type"] = row["question_type"]
+            results.append(record)
+        return results
+
+    def get_questions(self, filters: dict | None = None, fields: list | None = None) -> list[dict]:
+        """객관식 + 주관식 통합 조회 (filters["type"]으로 유형 제한 가능)"""
+        clauses, args = self._where(None, filters)
+        return self._select(clauses, args, fields)
+
+    def get_multiple_choice_questions(self, filters: dict | None = None, fields: list | None = None) -> list[dict]:
+        clauses, args = self._where("multiple_choice", filters)
+        return self._select(clauses, args, fields)
+
+    def get_subjective_questions(self, filters: dict | None = None, fields: list | None = None) -> list[dict]:
+        clauses, args = self._where("subjective", filters)
+        return self._select(clauses, args, fields)
+
+    def get_question_by_id(self, question_id: str, question_type: str | None = None) -> dict | None:
+        rows = self.get_questions({"id": question_id, "type": question_type})
+        return rows[0] if rows else None
+
+    def search_questions(self, text: str = "", filters: dict | None = None, limit: int | None = None,
+                         fields: list | None = None) -> list[dict]:
+        """
+        제목/task/scenario/steps 텍스트 검색 + 필터
+
+        trigram FTS는 3글자 이상 부분 문자열을 인덱스로 찾고, 더 짧은 검색어는 LIKE로 처리합니다.
+        """
+        clauses, args = self._where(None, filters)
+        text = (text or "").strip()
+        if not text:
+            return self._select(clauses, args, fields, limit)
+        if self.fts_enabled and len(text) >= 3:
+            clauses.append("q.rowid IN (SELECT rowid FROM replica_questions_fts WHERE replica_questions_fts MATCH ?)")
+            args.append('"' + text.replace('"', '""') + '"')
+        else:
+            pattern = "%" + text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+            clauses.append("q.rowid IN (SELECT rowid FROM replica_questions_fts WHERE " + " OR ".join(
+                f"{column} LIKE ? ESCAPE '\\'" for column in ("title", "task", "scenario", "steps")
+            ) + ")")
+            args.extend([pattern] * 4)
+        return self._select(clauses, args, fields, limit)
+
+
+    # 프롬프트 (Edge 조회 결과를 보관해 두었다가 오프라인일 때 사용)
+    def save_prompts(self, prompts: list):
+        if not prompts:
+            return
+        cached_at = datetime.now().isoformat()
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO replica_prompts (id, lang, category, data, cached_at) VALUES (?, ?, ?, ?, ?)",
+                [
+                    (p["id"], p.get("lang"), p.get("category"), json.dumps(p, ensure_ascii=False), cached_at)
+                    for p in prompts if isinstance(p, dict) and p.get("id")
+                ],
+            )
+
+    def get_prompts(self, category: str = None, lang: str = "kr") -> list[dict]:
+        sql, args = "SELECT data FROM replica_prompts WHERE lang = ?", [lang]
+        if category:
+            sql += " AND category = ?"
+            args.append(category)
+        with self._lock:
+            rows = self._conn.execute(sql, args).fetchall()
+        return [json.loads(row["data"]) for row in rows]
+
+    def save_prompt_text(self, prompt_id: str, prompt_text: str):
+        """get_prompt_by_id 결과(프롬프트 본문)만 보관 (이미 있는 레코드는 본문만 갱신)"""
+        if not prompt_id or prompt_text is None:
+            return
+        with self._lock:
+            row = self._conn.execute("SELECT data FROM replica_prompts WHERE id = ?", (prompt_id,)).fetchone()
+            prompt = json.loads(row["data"]) if row else {"id": prompt_id}
+            prompt["prompt_text"] = prompt_text
+            self._conn.execute(
+                "INSERT OR REPLACE INTO replica_prompts (id, lang, category, data, cached_at) VALUES (?, ?, ?, ?, ?)",
+                (prompt_id, prompt.get("lang"), prompt.get("category"),
+                 json.dumps(prompt, ensure_ascii=False), datetime.now().isoformat()),
+            )
+
+    def get_prompt_by_id(self, prompt_id: str) -> str | None:
+        """프롬프트 본문 조회 (EdgeDBClient.get_prompt_by_id와 같은 형태)"""
+        with self._lock:
+            row = self._conn.execute("SELECT data FROM replica_prompts WHERE id = ?", (prompt_id,)).fetchone()
+        return json.loads(row["data"]).get("prompt_text") if row else None
+
+
+_REPLICA: LocalQuestionReplica | None = None
+_REPLICA_LOCK = threading.Lock()
+
+
+def get_local_replica(path: str | None = None) -> LocalQuestionReplica:
+    """프로세스 단위로 공유하는 로컬 복제본 (모든 세션이 같은 연결을 사용)"""
+    global _REPLICA
+    with _REPLICA_LOCK:
+        if _REPLICA is None:
+            _REPLICA = LocalQuestionReplica(path)
+        return _REPLICA
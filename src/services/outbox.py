@@ -0,0 +1,299 @@
+"""
+쓰기 outbox (SQLite, write-behind)
+- Edge Function 쓰기 액션을 먼저 디스크에 보관하고, 백그라운드 flusher가 batch 액션으로 모아서 전송
+- 프로세스가 재시작되어도 보관된 액션은 유실되지 않음
+- 같은 내용(content hash)의 액션은 한 번만 보관, 전송 실패 시 지수 백오프(+지터, 최대 BACKOFF_MAX)로 재시도
+- 네트워크 장애로 batch 전체가 실패한 경우는 횟수 제한 없이 계속 재시도하고,
+  Edge가 항목을 거부한 경우만 MAX_ATTEMPTS 후 failed로 보관 (같은 내용을 다시 enqueue하거나 requeue_failed로 재시도)
+"""
+import hashlib
+import json
+import os
+import random
+import sqlite3
+import threading
+import time
+from datetime import datetime
+
+DEFAULT_OUTBOX_PATH = "ai_assessment_outbox.db"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS outbox (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    action TEXT NOT NULL,
+    params TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    last_error TEXT,
+    created_at TEXT NOT NULL,
+    sent_at TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_outbox_status_id ON outbox (status, id);
+"""
+
+# 이전 버전 outbox 파일에 없는 컬럼 (열 때 자동 추가)
+_MIGRATIONS = {
+    "content_hash": "ALTER TABLE outbox ADD COLUMN content_hash TEXT",
+    "next_attempt_at": "ALTER TABLE outbox ADD COLUMN next_attempt_at REAL NOT NULL DEFAULT 0",
+}
+
+
+def content_hash(action: str, params: dict | None) -> str:
+    """액션 + 파라미터(키 정렬 JSON)의 SHA-256"""
+    payload = json.dumps({"action": action, "params": params or {}}, ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class WriteOutbox:
+    """
+    Edge 쓰기 액션 대기열
+
+    사용 예)
+        outbox = get_outbox()
+        outbox.enqueue("save_subjective_question", question, dedup_sent=True)
+        ...
+        outbox.flush(edge_client)   # batch 액션으로 전송 (보통은 OutboxFlusher가 호출)
+    """
+
+    BACKOFF_BASE = 2.0      # 첫 재시도 대기(초)
+    BACKOFF_MAX = 300.0     # 최대 재시도 대기(초)
+    MAX_ATTEMPTS = 10       # Edge가 거부한 항목은 이 횟수를 넘으면 failed로 보관 (requeue_failed로 다시 시도 가능)
+
+    def __init__(self, path: str | None = None):
+        self.path = path or os.getenv("OUTBOX_PATH", DEFAULT_OUTBOX_PATH)
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+        columns = {row["name"] for row in self._conn.execute("PRAGMA table_info(outbox)")}
+        for column, ddl in _MIGRATIONS.items():
+            if column not in columns:
+                self._conn.execute(ddl)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_outbox_content_hash ON outbox (content_hash)")
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def enqueue(self, action: str, params: dict | None = None, dedup_sent: bool = False) -> int:
+        """
+        쓰기 액션을 보관하고 outbox id를 반환 (커밋 후 반환되므로 유실되지 않음)
+
+        같은 내용이 이미 대기 중이면 새로 넣지 않고 기존 id를 반환합니다.
+        dedup_sent=True면 이미 전송된 같은 내용도 중복으로 보고 건너뜁니다 (문제 저장 등).
+        같은 내용이 failed로 보관되어 있으면 그 항목을 다시 대기열로 되돌립니다.
+        """
+        digest = content_hash(action, params)
+        statuses = ("pending", "sent") if dedup_sent else ("pending",)
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT id FROM outbox WHERE content_hash = ? AND status IN ({','.join('?' * len(statuses))}) LIMIT 1",
+                (digest, *statuses),
+            ).fetchone()
+            if row:
+                return row["id"]
+            row = self._conn.execute(
+                "SELECT id FROM outbox WHERE content_hash = ? AND status = 'failed' ORDER BY id DESC LIMIT 1", (digest,)
+            ).fetchone()
+            if row:
+                self._conn.execute(
+                    "UPDATE outbox SET status = 'pending', attempts = 0, next_attempt_at = 0 WHERE id = ?", (row["id"],)
+                )
+                return row["id"]
+            cur = self._conn.execute(
+                "INSERT INTO outbox (action, params, content_hash, created_at) VALUES (?, ?, ?, ?)",
+                (action, json.dumps(params or {}, ensure_ascii=False, default=str), digest, datetime.now().isoformat()),
+            )
+            return cur.lastrowid
+
+    def pending(self, limit: int | None = None, due_only: bool = False) -> list[dict]:
+        """전송 대기 중인 액션 목록 (보관 순서대로, due_only면 백오프 대기가 끝난 것만)"""
+        sql = "SELECT id, action, params, attempts FROM outbox WHERE status = 'pending'"
+        args: list = []
+        if due_only:
+            sql += " AND next_attempt_at <= ?"
+            args.append(time.time())
+        sql += " ORDER BY id"
+        if limit:
+            sql += " LIMIT ?"
+            args.append(int(limit))
+        with self._lock:
+            rows = self._conn.execute(sql, args).fetchall()
+        return [
+            {"id": row["id"], "action": row["action"], "params": json.loads(row["params"]), "attempts": row["attempts"]}
+            for row in rows
+        ]
+
+    def count_pending(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM outbox WHERE status = 'pending'").fetchone()[0]
+
+    def count_failed(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM outbox WHERE status = 'failed'").fetchone()[0]
+
+    def mark_sent(self, ids: list[int]):
+        if not ids:
+            return
+        with self._lock:
+            self._conn.executemany(
+                "UPDATE outbox SET status = 'sent', sent_at = ? WHERE id = ?",
+                [(datetime.now().isoformat(), outbox_id) for outbox_id in ids],
+            )
+
+    def mark_failed(self, outbox_id: int, error, attempts: int, park: bool = True):
+        """
+        전송 실패 기록 후 백오프
+
+        park=True(Edge가 항목을 거부한 경우)면 MAX_ATTEMPTS를 넘을 때 failed로 보관하고,
+        park=False(네트워크 장애)면 최대 BACKOFF_MAX 간격으로 계속 재시도합니다.
+        """
+        attempts += 1
+        delay = min(self.BACKOFF_MAX, self.BACKOFF_BASE * (2 ** min(attempts - 1, 16)))
+        delay *= random.uniform(0.5, 1.0)  # 지터: 여러 항목이 동시에 재시도하지 않도록
+        status = "failed" if park and attempts >= self.MAX_ATTEMPTS else "pending"
+        with self._lock:
+            self._conn.execute(
+                "UPDATE outbox SET attempts = ?, last_error = ?, status = ?, next_attempt_at = ? WHERE id = ?",
+                (attempts, str(error)[:1000], status, time.time() + delay, outbox_id),
+            )
+
+    def failed(self, limit: int = 50) -> list[dict]:
+        """failed로 보관된 액션 목록 (화면 표시용, 최근 순)"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, action, attempts, last_error, created_at FROM outbox WHERE status = 'failed' "
+                "ORDER BY id DESC LIMIT ?", (int(limit),)
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def requeue_failed(self) -> int:
+        """failed로 보관된 액션을 다시 대기열로 되돌림"""
+        with self._lock:
+            cur = self._conn.execute(
+                "UPDATE outbox SET status = 'pending', attempts = 0, next_attempt_at = 0 WHERE status = 'failed'"
+            )
+            return cur.rowcount
+
+    def flush(self, edge, batch_size: int = 50) -> dict:
+        """
+        재시도 시간이 된 액션을 batch 액션 한 번으로 전송 (순서 보장을 위해 순차 실행 모드)
+
+        배치 전체가 네트워크 오류로 실패하면 모든 항목을 백오프하고(재시도 횟수 제한 없음),
+        항목별 오류는 해당 항목만 백오프합니다.
+
+        Returns:
+            dict: {"sent": 성공 건수, "failed": 실패 건수, "remaining": 남은 대기 건수}
+        """
+        items = self.pending(batch_size, due_only=True)
+        if not items:
+            return {"sent": 0, "failed": 0, "remaining": self.count_pending()}
+        try:
+            results = edge.call_many([(item["action"], item["params"]) for item in items])
+        except Exception as e:
+            for item in items:
+                self.mark_failed(item["id"], e, item["attempts"], park=False)
+            return {"sent": 0, "failed": len(items), "remaining": self.count_pending()}
+
+        sent_ids, failed = [], 0
+        for item, result in zip(items, results):
+            if result.get("ok"):
+                sent_ids.append(item["id"])
+            else:
+                self.mark_failed(item["id"], result.get("error"), item["attempts"])
+                failed += 1
+        self.mark_sent(sent_ids)
+        return {"sent": len(sent_ids), "failed": failed, "remaining": self.count_pending()}
+
+
+class OutboxFlusher:
+    """
+    outbox를 주기적으로(또는 enqueue 직후 wake로) 비우는 백그라운드 스레드
+
+    client는 EdgeDBClient 또는 ResilientDBClient (오프라인이면 전송을 건너뜀)
+    """
+
+    def __init__(self, outbox: WriteOutbox, interval: float = 2.0, batch_size: int = 50):
+        self.outbox = outbox
+        self.interval = interval
+        self.batch_size = batch_size
+        self.last_result: dict | None = None
+        self._client = None
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+
+    def attach(self, client):
+        """전송에 사용할 DB 클라이언트를 지정하고 스레드를 시작"""
+        with self._lock:
+            self._client = client
+            if self._thread is None or not self._thread.is_alive():
+                self._stop.clear()
+                self._thread = threading.Thread(target=self._run, name="outbox-flusher", daemon=True)
+                self._thread.start()
+        self.wake()
+
+    def wake(self):
+        self._wake.set()
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+
+    def _edge(self):
+        client = self._client
+        if client is None:
+            return None
+        ensure = getattr(client, "_ensure_edge", None)
+        return ensure() if ensure else client
+
+    def flush_once(self) -> dict | None:
+        edge = self._edge()
+        if edge is None:
+            return None
+        result = self.outbox.flush(edge, self.batch_size)
+        self.last_result = result
+        return result
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            try:
+                # 한 번에 batch_size씩, 보낼 것이 남아 있으면 계속 전송
+                while not self._stop.is_set():
+                    result = self.flush_once()
+                    if not result or result["sent"] < self.batch_size:
+                        break
+            except Exception as e:
+                self.last_result = {"error": str(e)}
+
+
+_OUTBOX: WriteOutbox | None = None
+_FLUSHER: OutboxFlusher | None = None
+_OUTBOX_LOCK = threading.Lock()
+
+
+def get_outbox(path: str | None = None) -> WriteOutbox:
+    """프로세스 단위로 공유하는 outbox"""
+    global _OUTBOX
+    with _OUTBOX_LOCK:
+        if _OUTBOX is None:
+            _OUTBOX = WriteOutbox(path)
+        return _OUTBOX
+
+
+def get_outbox_flusher() -> OutboxFlusher:
+    """프로세스 단위로 공유하는 outbox flusher (스레드는 attach 시 시작)"""
+    global _FLUSHER
+    outbox = get_outbox()
+    with _OUTBOX_LOCK:
+        if _FLUSHER is None:
+            _FLUSHER = OutboxFlusher(
+                outbox,
+                interval=float(os.getenv("OUTBOX_FLUSH_INTERVAL", "2")),
+                batch_size=int(os.getenv("OUTBOX_BATCH_SIZE", "50")),
+            )
+        return _FLUSHER
@@ -1,14 +1,12 @@
 """
 문제 교정 서비스
 """
-import streamlit as st
 import json
 from datetime import datetime
 from src.config import get_secret
-from src.prompts.problem_correction_template import (
-    DEFAULT_PROBLEM_CORRECTION_PROMPT, 
-    LEARNING_CONCEPT_PROMPT_ID
-)
+from src.services.service_context import ServiceContext, ensure_context
+from src.prompts.problem_correction_template import LEARNING_CONCEPT_PROMPT_ID
+from src.prompts.prompt_registry import CORRECTION_PROMPT, PromptEntry, get_prompt_registry
 try:
     from src.services.gemini_client import GeminiClient
     GEMINI_AVAILABLE = True
@@ -16,13 +14,25 @@ except ImportError:
     GEMINI_AVAILABLE = False
     GeminiClient = None
 
+def is_valid_correction(response: str) -> bool:
+    """레이어 구조 JSON을 추출할 수 있는 교정 응답인지 (통과한 응답만 LLM 캐시에 저장)"""
+    from src.services.correction_pipeline import extract_json_from_text, validate_corrected
+    try:
+        validate_corrected(extract_json_from_text(response))
+        return True
+    except ValueError:
+        return False
+
+
 class ProblemCorrectionService:
-    def __init__(self):
+    def __init__(self, context: ServiceContext | None = None):
+        # Gemini 설정과 이벤트 리스너는 context로 받음 (Streamlit 세션에 의존하지 않음)
+        self.context = ensure_context(context)
         self.gemini_client = None
         self.initialization_error = None
         if GEMINI_AVAILABLE:
             try:
-                self.gemini_client = GeminiClient()
+                self.gemini_client = GeminiClient.from_context(self.context)
                 # print("✅ ProblemCorrectionService 초기화 성공")
             except Exception as e:
                 self.initialization_error = str(e)
@@ -30,7 +40,14 @@ class ProblemCorrectionService:
         else:
             self.initialization_error = "google-generativeai 패키지가 설치되지 않았습니다"
     
-    def get_correction_prompt(self, question_type: str = "subjective") -> str:
+    def correction_prompt(self) -> PromptEntry:
+        """
+        문제 교정 프롬프트 (DEFAULT_PROBLEM_CORRECTION_PROMPT)
+        프롬프트 레지스트리에서 한 번 읽어 공유하고, 템플릿 파일이 바뀐 경우에만 다시 읽습니다.
+        """
+        return get_prompt_registry().get(CORRECTION_PROMPT)
+    
+    def get_correction_prompt(self, question_type: str = "subjective", context: ServiceContext | None = None) -> str:
         """
         문제 교정 프롬프트를 가져옵니다.
         항상 DEFAULT_PROBLEM_CORRECTION_PROMPT를 사용합니다.
@@ -41,27 +58,31 @@ class ProblemCorrectionService:
         Returns:
             str: 교정 프롬프트 (DEFAULT_PROBLEM_CORRECTION_PROMPT)
         """
-        # 항상 DEFAULT_PROBLEM_CORRECTION_PROMPT 사용
-        # 명시적으로 다시 import하여 최신 버전을 가져옴
-        from src.prompts.problem_correction_template import DEFAULT_PROBLEM_CORRECTION_PROMPT as latest_prompt
-        import streamlit as st
-        if hasattr(st, 'write'):
-            # 디버깅: 프롬프트 확인
-            st.write(f"🔍 [get_correction_prompt] 프롬프트 길이: {len(latest_prompt)} 문자")
-            st.write(f"🔍 [get_correction_prompt] 프롬프트 시작: {latest_prompt[:100]}...")
-        return latest_prompt
+        prompt = self.correction_prompt()
+        # 디버깅: 프롬프트 확인
+        (context or self.context).debug("🔍 [get_correction_prompt] 프롬프트 확인", **{
+            "프롬프트 길이": f"{len(prompt.text)} 문자",
+            "프롬프트 버전": f"v{prompt.version} ({prompt.hash})",
+            "프롬프트 시작": f"{prompt.text[:100]}...",
+        })
+        return prompt.text
     
-    def correct_problem(self, problem_json: str, question_type: str = "subjective") -> str:
+    def correct_problem(self, problem_json: str, question_type: str = "subjective", context: ServiceContext | None = None,
+                        prompt: PromptEntry | None = None, refresh: bool = False) -> str:
         """
         문제 JSON을 교정합니다.
         
         Args:
             problem_json: 교정할 문제의 JSON 문자열
             question_type: 문제 유형 ('multiple_choice' 또는 'subjective')
+            context: 이벤트를 받을 컨텍스트 (없으면 생성 시 받은 컨텍스트)
+            prompt: 사용할 교정 프롬프트 (없으면 correction_prompt(), 배치에서는 호출 측이 정해서 해시를 기록)
+            refresh: True면 응답 캐시를 읽지 않고 다시 호출 (재시도할 때 같은 실패 응답을 재사용하지 않도록)
             
         Returns:
             str: 교정된 문제의 JSON 문자열
         """
+        context = context or self.context
         if not self.gemini_client:
             error_msg = "❌ 제미나이 API를 사용할 수 없습니다."
             if self.initialization_error:
@@ -69,28 +90,18 @@ class ProblemCorrectionService:
             return error_msg
         
         try:
-            # 교정 프롬프트 가져오기 (명시적으로 최신 버전 import)
-            import importlib
-            from src.prompts import problem_correction_template
-            importlib.reload(problem_correction_template)  # 모듈 캐시 무시하고 다시 로드
-            # 직접 DEFAULT_PROBLEM_CORRECTION_PROMPT 사용 (get_correction_prompt 우회)
-            system_prompt = problem_correction_template.DEFAULT_PROBLEM_CORRECTION_PROMPT
+            # 교정 프롬프트 (레지스트리에서 공유, 템플릿 파일이 바뀐 경우에만 다시 읽음)
+            prompt = prompt or self.correction_prompt()
+            system_prompt = prompt.text
             
-            # 디버깅: 프롬프트 확인
-            import streamlit as st
-            if hasattr(st, 'write'):
-                with st.expander("📝 사용된 프롬프트 확인", expanded=True):
-                    # 프롬프트가 DEFAULT_PROBLEM_CORRECTION_PROMPT인지 확인
-                    is_default = system_prompt == problem_correction_template.DEFAULT_PROBLEM_CORRECTION_PROMPT
-                    st.write(f"**프롬프트 소스**: {'✅ 기본 프롬프트 (DEFAULT_PROBLEM_CORRECTION_PROMPT)' if is_default else '❌ DB에서 가져온 프롬프트'}")
-                    st.write(f"**프롬프트 길이**: {len(system_prompt)} 문자")
-                    st.write(f"**프롬프트 시작 부분 (처음 300자)**:")
-                    st.code(system_prompt[:300])
-                    st.write(f"**프롬프트 해시 (처음 100자)**: {hash(system_prompt[:100])}")
-                    if not is_default:
-                        st.error("**⚠️ 주의**: DB에서 가져온 프롬프트를 사용 중입니다. 기본 프롬프트와 다를 수 있습니다.")
-                    else:
-                        st.success("✅ 올바른 기본 프롬프트를 사용 중입니다.")
+            # 어떤 프롬프트로 교정했는지 기록
+            context.record("correction_prompt_used", {**prompt.info(), "timestamp": datetime.now().isoformat()})
+            context.debug("📝 사용된 프롬프트 확인", expanded=True, code=system_prompt[:300], **{
+                "프롬프트 소스": f"✅ 기본 프롬프트 (DEFAULT_PROBLEM_CORRECTION_PROMPT, v{prompt.version})",
+                "프롬프트 길이": f"{len(system_prompt)} 문자",
+                "프롬프트 해시": prompt.hash,
+                "프롬프트 시작 부분 (처음 300자)": "",
+            })
             
             # 사용자 프롬프트 구성
             user_prompt = f"다음 문제 JSON을 교정해주세요:\n\n{problem_json}"
@@ -133,56 +144,53 @@ class ProblemCorrectionService:
                 debug_info_dict["use_new_method"] = False
                 debug_info_dict["error_type"] = type(e).__name__
             
-            # 디버깅: 메서드 선택 정보 (세션 상태에 저장하여 항상 표시)
+            # 디버깅: 메서드 선택 정보 (화면에서는 세션 상태에 저장하여 항상 표시)
             debug_info_dict["사용할_메서드"] = "correct_problem" if use_new_method else "review_content"
-            if "correction_method_debug" not in st.session_state:
-                st.session_state.correction_method_debug = []
-            st.session_state.correction_method_debug.append({
+            context.record("correction_method_debug", {
                 "timestamp": datetime.now().isoformat(),
                 "use_new_method": use_new_method,
                 "debug_info": debug_info_dict
             })
             
             # 화면에 표시
-            with st.expander("🔍 API 메서드 선택 정보", expanded=True):
-                st.write("**사용할 메서드**:", "✅ `correct_problem` (새로운 방식 - 레이어 구조)" if use_new_method else "⚠️ `review_content` (기존 방식 - 일반 텍스트)")
-                st.json(debug_info_dict)
-                if not use_new_method:
-                    st.error("⚠️ **주의**: 기존 `review_content` 메서드가 사용됩니다. 레이어 구조가 아닌 일반 형식으로 응답됩니다.")
-                    st.info("💡 **해결 방법**: `pip install google-genai`를 실행하여 새로운 패키지를 설치하세요.")
+            context.debug("🔍 API 메서드 선택 정보", expanded=True, json=debug_info_dict, **{
+                "사용할 메서드": "✅ `correct_problem` (새로운 방식 - 레이어 구조)" if use_new_method else "⚠️ `review_content` (기존 방식 - 일반 텍스트)",
+            })
+            if not use_new_method:
+                context.error("⚠️ **주의**: 기존 `review_content` 메서드가 사용됩니다. 레이어 구조가 아닌 일반 형식으로 응답됩니다.")
+                context.info("💡 **해결 방법**: `pip install google-genai`를 실행하여 새로운 패키지를 설치하세요.")
             
             # 새로운 메서드 사용 가능하면 시도 (패키지가 없으면 아예 호출하지 않음)
             if use_new_method:
                 try:
-                    st.success("✅ 새로운 `correct_problem` 메서드 사용 중 (레이어 구조)")
-                    # 세션 상태에 메서드 사용 정보 저장
-                    if "correction_method_used" not in st.session_state:
-                        st.session_state.correction_method_used = []
-                    st.session_state.correction_method_used.append({
+                    context.success("✅ 새로운 `correct_problem` 메서드 사용 중 (레이어 구조)")
+                    # 메서드 사용 정보 기록
+                    context.record("correction_method_used", {
                         "method": "correct_problem",
                         "timestamp": datetime.now().isoformat()
                     })
                     
                     corrected_result = self.gemini_client.correct_problem(
                         system_prompt=system_prompt,
-                        user_prompt=user_prompt
+                        user_prompt=user_prompt,
+                        context=context,
+                        validate=is_valid_correction,
+                        refresh=refresh
                     )
-                    st.success("✅ `correct_problem` 메서드 호출 성공")
+                    context.success("✅ `correct_problem` 메서드 호출 성공")
                     return corrected_result
                 except RuntimeError as e:
                     # RuntimeError인 경우 (패키지 미설치 등) 기존 메서드로 fallback
                     error_msg = str(e)
-                    st.error(f"❌ `correct_problem` 메서드 호출 실패: {error_msg}")
+                    context.error(f"❌ `correct_problem` 메서드 호출 실패: {error_msg}")
                     if "google-genai" in error_msg.lower():
-                        st.warning("⚠️ `google-genai` 패키지 관련 오류로 인해 기존 `review_content` 메서드로 전환합니다.")
-                        st.info("💡 **해결 방법**: `pip install google-genai`를 실행하세요.")
+                        context.warning("⚠️ `google-genai` 패키지 관련 오류로 인해 기존 `review_content` 메서드로 전환합니다.")
+                        context.info("💡 **해결 방법**: `pip install google-genai`를 실행하세요.")
                     else:
-                        st.warning("⚠️ 기존 `review_content` 메서드로 전환합니다.")
+                        context.warning("⚠️ 기존 `review_content` 메서드로 전환합니다.")
                     
-                    # 세션 상태에 fallback 정보 저장
-                    if "correction_method_used" not in st.session_state:
-                        st.session_state.correction_method_used = []
-                    st.session_state.correction_method_used.append({
+                    # fallback 정보 기록
+                    context.record("correction_method_used", {
                         "method": "review_content (fallback)",
                         "error": error_msg,
                         "timestamp": datetime.now().isoformat()
@@ -190,19 +198,20 @@ class ProblemCorrectionService:
                     
                     corrected_result = self.gemini_client.review_content(
                         system_prompt=system_prompt,
-                        user_prompt=user_prompt
+                        user_prompt=user_prompt,
+                        context=context,
+                        validate=is_valid_correction,
+                        refresh=refresh
                     )
-                    st.info("✅ `review_content` 메서드로 fallback 완료 (레이어 구조 아님)")
+                    context.info("✅ `review_content` 메서드로 fallback 완료 (레이어 구조 아님)")
                     return corrected_result
                 except Exception as e:
                     # 기타 예외도 fallback
-                    st.error(f"❌ `correct_problem` 메서드 호출 중 예외 발생: {str(e)}")
-                    st.warning("⚠️ 기존 `review_content` 메서드로 전환합니다.")
+                    context.error(f"❌ `correct_problem` 메서드 호출 중 예외 발생: {str(e)}")
+                    context.warning("⚠️ 기존 `review_content` 메서드로 전환합니다.")
                     
-                    # 세션 상태에 fallback 정보 저장
-                    if "correction_method_used" not in st.session_state:
-                        st.session_state.correction_method_used = []
-                    st.session_state.correction_method_used.append({
+                    # fallback 정보 기록
+                    context.record("correction_method_used", {
                         "method": "review_content (fallback)",
                         "error": str(e),
                         "timestamp": datetime.now().isoformat()
@@ -210,19 +219,20 @@ class ProblemCorrectionService:
                     
                     corrected_result = self.gemini_client.review_content(
                         system_prompt=system_prompt,
-                        user_prompt=user_prompt
+                        user_prompt=user_prompt,
+                        context=context,
+                        validate=is_valid_correction,
+                        refresh=refresh
                     )
-                    st.info("✅ `review_content` 메서드로 fallback 완료 (레이어 구조 아님)")
+                    context.info("✅ `review_content` 메서드로 fallback 완료 (레이어 구조 아님)")
                     return corrected_result
             
             # 새로운 메서드를 사용할 수 없는 경우 기존 메서드 사용 (원래 방식)
-            st.warning("⚠️ 기존 `review_content` 메서드 사용 중 (일반 텍스트 응답)")
-            st.info("💡 이 메서드는 레이어 구조가 아닌 일반 형식으로 응답합니다.")
+            context.warning("⚠️ 기존 `review_content` 메서드 사용 중 (일반 텍스트 응답)")
+            context.info("💡 이 메서드는 레이어 구조가 아닌 일반 형식으로 응답합니다.")
             
-            # 세션 상태에 메서드 사용 정보 저장
-            if "correction_method_used" not in st.session_state:
-                st.session_state.correction_method_used = []
-            st.session_state.correction_method_used.append({
+            # 메서드 사용 정보 기록
+            context.record("correction_method_used", {
                 "method": "review_content",
                 "reason": "NEW_GENAI_AVAILABLE이 False이거나 correct_problem 메서드가 없음",
                 "timestamp": datetime.now().isoformat()
@@ -230,9 +240,12 @@ class ProblemCorrectionService:
             
             corrected_result = self.gemini_client.review_content(
                 system_prompt=system_prompt,
-                user_prompt=user_prompt
+                user_prompt=user_prompt,
+                context=context,
+                validate=is_valid_correction,
+                refresh=refresh
             )
-            st.info("✅ `review_content` 메서드 호출 완료")
+            context.info("✅ `review_content` 메서드 호출 완료")
             return corrected_result
             
         except Exception as e:
@@ -242,46 +255,22 @@ class ProblemCorrectionService:
         """문제 교정 서비스 사용 가능 여부 확인"""
         return self.gemini_client is not None and GEMINI_AVAILABLE
     
-    def auto_correct_questions(self, questions: list, question_type: str = "subjective") -> dict:
+    def auto_correct_questions(self, questions: list, question_type: str = "subjective", concurrency: int | None = None,
+                               db=None, save: bool = False) -> dict:
         """
-        여러 문제를 자동으로 교정합니다.
+        여러 문제를 배치 파이프라인으로 동시에 교정합니다.
         
         Args:
             questions: 교정할 문제 리스트
-            question_type: 문제 유형 ('multiple_choice' 또는 'subjective')
+            question_type: question_type이 없는 문제에 적용할 유형 ('multiple_choice' 또는 'subjective')
+            concurrency: 동시 교정 요청 수 (기본 CORRECTION_CONCURRENCY 또는 4)
+            db: 요약 레코드 조회/저장에 사용할 DB 클라이언트
+            save: True면 next_qlearn_problems 저장 + review_done 업데이트까지 진행
             
         Returns:
-            dict: 교정 결과 통계
+            dict: 교정 결과 보고서 (total/success/failed/details 등, details에 corrected_result 포함)
         """
-        results = {
-            "total": len(questions),
-            "success": 0,
-            "failed": 0,
-            "details": []
-        }
-        
-        for question in questions:
-            try:
-                # 문제를 JSON으로 변환
-                question_json = json.dumps(question, ensure_ascii=False, indent=2)
-                
-                # 교정 실행
-                corrected_result = self.correct_problem(question_json, question_type)
-                
-                # 결과 저장
-                results["details"].append({
-                    "question_id": question.get("id"),
-                    "status": "success",
-                    "corrected_result": corrected_result
-                })
-                results["success"] += 1
-                
-            except Exception as e:
-                results["details"].append({
-                    "question_id": question.get("id"),
-                    "status": "failed",
-                    "error": str(e)
-                })
-                results["failed"] += 1
-        
-        return results
\ No newline at end of file
+        from src.services.correction_pipeline import BatchCorrector
+        questions = [{**question, "question_type": question.get("question_type", question_type)} for question in questions]
+        corrector = BatchCorrector(self, db=db, concurrency=concurrency, save=save, context=self.context, keep_results=True)
+        return corrector.run(questions)
@@ -0,0 +1,145 @@
+"""
+프롬프트 캐시
+- 언어(lang)별로 활성 프롬프트 전체를 한 번에 조회(get_prompts)해서 category / id 기준으로 보관
+- TTL(PROMPT_CACHE_TTL, 기본 300초)이 지나면 다시 전체 조회하고, updated_at 최대값(watermark)이 바뀐 경우에만 교체
+- 전체 조회에 없는 id(다른 언어 프롬프트 등)는 get_prompt_by_id로 한 번만 조회해서 같은 TTL로 보관
+- 조회 실패 시에는 이전에 받아 둔 프롬프트를 계속 사용 (EdgeDBClient는 오류 시 빈 목록/None을 반환하므로
+  빈 목록도 조회 실패로 보고, FAILED_RETRY_INTERVAL초 동안은 그대로 사용한 뒤 다시 조회)
+- 없는 id(None)는 캐시하지 않음
+- get_prompt_cache(): 모든 세션/워커 스레드가 함께 쓰는 프로세스 단위 캐시 (앱 시작 시 warm)
+"""
+import os
+import threading
+import time
+
+# 조회에 실패했을 때 다시 조회하기까지의 간격(초, TTL보다 길면 TTL)
+FAILED_RETRY_INTERVAL = 30.0
+
+
+def _watermark(prompts: list) -> str:
+    """프롬프트 목록의 버전 (updated_at 또는 created_at 최대값 + 건수)"""
+    latest = max((p.get("updated_at") or p.get("created_at") or "" for p in prompts), default="")
+    return f"{latest}#{len(prompts)}"
+
+
+class PromptCache:
+    """
+    DB 프롬프트 캐시
+
+    사용 예)
+        cache = get_prompt_cache()
+        cache.get_prompts(db, category="area_life")     # 만료 전에는 네트워크 호출 없음
+        cache.get_prompt_by_id(db, "d98893e6-...")      # 프롬프트 본문 (없으면 None)
+    """
+
+    def __init__(self, ttl: float | None = None):
+        self.ttl = ttl if ttl is not None else float(os.getenv("PROMPT_CACHE_TTL", "300"))
+        self._langs: dict[str, dict] = {}                          # lang -> {"prompts", "version", "loaded_at"}
+        self._texts: dict[str, tuple[str | None, float]] = {}      # id -> (본문, 조회 시각)
+        self._lock = threading.RLock()
+
+    def _expired(self, loaded_at: float) -> bool:
+        return time.monotonic() - loaded_at >= self.ttl
+
+    def _load(self, db, lang: str) -> dict:
+        """lang의 활성 프롬프트 전체 (만료됐으면 다시 조회)"""
+        with self._lock:
+            entry = self._langs.get(lang)
+            if entry is not None and not self._expired(entry["loaded_at"]):
+                return entry
+            try:
+                prompts = [p for p in (db.get_prompts(None, lang) or []) if isinstance(p, dict)]
+            except Exception:
+                if entry is None:
+                    raise
+                prompts = []
+            if not prompts:
+                # 빈 결과는 조회 실패로 처리: 이전 프롬프트를 유지하고 잠시 뒤 다시 조회
+                # (처음이면 빈 목록을 저장해 두어 그 사이의 호출이 매번 DB를 조회하지 않도록)
+                if entry is None:
+                    entry = {"prompts": [], "version": _watermark([]), "loaded_at": 0.0}
+                    self._langs[lang] = entry
+                entry["loaded_at"] = time.monotonic() - self.ttl + min(self.ttl, FAILED_RETRY_INTERVAL)
+                return entry
+            version = _watermark(prompts)
+            if entry is not None and entry["version"] == version:
+                entry["loaded_at"] = time.monotonic()
+                return entry
+            entry = {"prompts": prompts, "version": version, "loaded_at": time.monotonic()}
+            self._langs[lang] = entry
+            # 본문 캐시도 새 버전으로 교체
+            for prompt in prompts:
+                if prompt.get("id"):
+                    self._texts.pop(prompt["id"], None)
+            return entry
+
+    def get_prompts(self, db, category: str | None = None, lang: str = "kr") -> list[dict]:
+        """EdgeDBClient.get_prompts와 같은 결과 (최신 생성 순)"""
+        prompts = self._load(db, lang)["prompts"]
+        if category:
+            return [p for p in prompts if p.get("category") == category]
+        return list(prompts)
+
+    def get_prompt_by_id(self, db, prompt_id: str, lang: str = "kr") -> str | None:
+        """EdgeDBClient.get_prompt_by_id와 같은 결과 (프롬프트 본문)"""
+        with self._lock:
+            try:
+                for prompt in self._load(db, lang)["prompts"]:
+                    if prompt.get("id") == prompt_id:
+                        return prompt.get("prompt_text")
+            except Exception:
+                pass
+            cached = self._texts.get(prompt_id)
+            if cached is not None and not self._expired(cached[1]):
+                return cached[0]
+            try:
+                prompt_text = db.get_prompt_by_id(prompt_id)
+            except Exception:
+                if cached is None:
+                    raise
+                prompt_text = None
+            if prompt_text is None:
+                # 조회 실패/없는 id는 캐시하지 않고, 이전에 받은 본문이 있으면 계속 사용
+                return cached[0] if cached is not None else None
+            self._texts[prompt_id] = (prompt_text, time.monotonic())
+            return prompt_text
+
+    def warm(self, db, langs=("kr",), prompt_ids=()):
+        """앱 시작 시 미리 조회 (실패는 무시, 다음 조회 때 다시 시도)"""
+        for lang in langs:
+            try:
+                self._load(db, lang)
+            except Exception:
+                pass
+        for prompt_id in prompt_ids:
+            try:
+                self.get_prompt_by_id(db, prompt_id)
+            except Exception:
+                pass
+
+    def invalidate(self, lang: str | None = None):
+        """캐시 비우기 (프롬프트를 수정한 직후 등)"""
+        with self._lock:
+            if lang is None:
+                self._langs.clear()
+                self._texts.clear()
+            else:
+                self._langs.pop(lang, None)
+
+    def status(self) -> dict:
+        with self._lock:
+            return {lang: {"count": len(entry["prompts"]), "version": entry["version"]}
+                    for lang, entry in self._langs.items()}
+
+
+_PROMPT_CACHE: PromptCache | None = None
+_PROMPT_CACHE_LOCK = threading.Lock()
+
+
+def get_prompt_cache() -> PromptCache:
+    """프로세스 단위로 공유하는 프롬프트 캐시"""
+    global _PROMPT_CACHE
+    with _PROMPT_CACHE_LOCK:
+        if _PROMPT_CACHE is None:
+            _PROMPT_CACHE = PromptCache()
+        return _PROMPT_CACHE
@@ -0,0 +1,138 @@
+"""
+문제 생성 결과 JSON 스키마 (OpenAI Structured Outputs)
+- response_format(question_type): chat.completions.create(response_format=...)에 넘길 strict JSON 스키마
+- parse_structured_question(): 스키마 모드 응답을 한 번에 파싱 + 검증 (여러 단계 복구 파싱 불필요)
+
+strict 모드는 키가 고정되지 않은 객체를 허용하지 않으므로, 주관식 reference는 JSON 객체 문자열로 받고
+검증 단계에서 dict로 변환합니다 (DB에 저장되는 형태는 기존과 같음).
+"""
+import json
+
+_STRING = {"type": "string"}
+_STRING_LIST = {"type": "array", "items": _STRING}
+_OPTION_IDS = ["A", "B", "C", "D"]
+
+
+def _object(properties: dict) -> dict:
+    # strict 모드: 모든 속성 필수 + 추가 속성 금지
+    return {"type": "object", "properties": properties, "required": list(properties), "additionalProperties": False}
+
+
+MULTIPLE_CHOICE_SCHEMA = _object({
+    "lang": _STRING,
+    "category": _STRING,
+    "problemTitle": _STRING,
+    "topic": _STRING,
+    "difficulty": _STRING,
+    "estimatedTime": _STRING,
+    "scenario": _STRING,
+    "steps": {"type": "array", "items": _object({
+        "step": {"type": "integer"},
+        "title": _STRING,
+        "question": _STRING,
+        "ref_paths": _STRING_LIST,
+        "options": {"type": "array", "items": _object({
+            "id": {"type": "string", "enum": _OPTION_IDS},
+            "text": _STRING,
+            "feedback": _STRING,
+            "weight": {"type": "number"},
+            "ref_paths": _STRING_LIST,
+        })},
+        "answer": {"type": "string", "enum": _OPTION_IDS},
+    })},
+})
+
+SUBJECTIVE_SCHEMA = _object({
+    "lang": _STRING,
+    "category": _STRING,
+    "title": _STRING,
+    "topic": _STRING,
+    "difficulty": _STRING,
+    "time_limit": _STRING,
+    "topic_summary": _STRING,
+    "scenario": _STRING,
+    "goal": _STRING_LIST,
+    "task": _STRING,
+    "reference": {
+        "type": "string",
+        "description": "참고 자료 JSON 객체를 문자열로 작성 (예: metrics, funnel, user_feedback, competitor_strategy)",
+    },
+    "first_question": _STRING_LIST,
+    "requirements": _STRING_LIST,
+    "constraints": _STRING_LIST,
+    "guide": _object({"approach": _STRING, "tools": _STRING, "considerations": _STRING}),
+    "evaluation": _STRING_LIST,
+})
+
+QUESTION_SCHEMAS = {
+    "multiple_choice": MULTIPLE_CHOICE_SCHEMA,
+    "subjective": SUBJECTIVE_SCHEMA,
+}
+
+
+def response_format(question_type: str) -> dict:
+    """OpenAI chat.completions response_format 값"""
+    return {
+        "type": "json_schema",
+        "json_schema": {
+            "name": f"{question_type}_question",
+            "strict": True,
+            "schema": QUESTION_SCHEMAS.get(question_type, SUBJECTIVE_SCHEMA),
+        },
+    }
+
+
+_TYPE_CHECKS = {
+    "object": lambda v: isinstance(v, dict),
+    "array": lambda v: isinstance(v, list),
+    "string": lambda v: isinstance(v, str),
+    "integer": lambda v: isinstance(v, int) and not isinstance(v, bool),
+    "number": lambda v: isinstance(v, (int, float)) and not isinstance(v, bool),
+}
+
+
+def _validate(value, schema: dict, path: str):
+    """스키마 하위 집합(type/properties/required/items/enum) 검증, 첫 오류에서 ValueError"""
+    expected = schema["type"]
+    if not _TYPE_CHECKS[expected](value):
+        raise ValueError(f"{path}: {expected} 타입이 아닙니다 ({type(value).__name__})")
+    if "enum" in schema and value not in schema["enum"]:
+        raise ValueError(f"{path}: 허용되지 않는 값입니다 ({value!r})")
+    if expected == "object":
+        for key in schema["required"]:
+            if key not in value:
+                raise ValueError(f"{path}.{key}: 필수 항목이 없습니다")
+        for key, sub_schema in schema["properties"].items():
+            _validate(value[key], sub_schema, f"{path}.{key}")
+    elif expected == "array":
+        for index, item in enumerate(value):
+            _validate(item, schema["items"], f"{path}[{index}]")
+
+
+def validate_question(data, question_type: str) -> dict:
+    """생성 결과 검증 (문제가 있으면 ValueError), 주관식 reference 문자열은 dict로 변환해서 반환"""
+    _validate(data, QUESTION_SCHEMAS.get(question_type, SUBJECTIVE_SCHEMA), "$")
+    if question_type == "multiple_choice":
+        if not data["steps"]:
+            raise ValueError("$.steps: 스텝이 없습니다")
+        for index, step in enumerate(data["steps"]):
+            if step["answer"] not in {option["id"] for option in step["options"]}:
+                raise ValueError(f"$.steps[{index}].answer: 선택지에 없는 정답입니다 ({step['answer']})")
+    elif isinstance(data.get("reference"), str):
+        reference = data["reference"].strip()
+        try:
+            data["reference"] = json.loads(reference) if reference else {}
+        except json.JSONDecodeError:
+            data["reference"] = {"text": reference}
+    return data
+
+
+def parse_structured_question(content: str | None, question_type: str) -> dict:
+    """스키마 모드 응답 본문을 파싱 + 검증 (실패 시 ValueError)"""
+    if not content:
+        raise ValueError("응답이 비어 있습니다")
+    try:
+        data = json.loads(content)
+    except json.JSONDecodeError as e:
+        raise ValueError(f"JSON 파싱 실패: {e}") from e
+    return validate_question(data, question_type)
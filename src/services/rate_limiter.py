@@ -0,0 +1,215 @@
+"""
+LLM 호출 속도 제한 / 동시 실행 제한
+- provider + 모델별로 분당 요청 수(RPM), 분당 토큰 수(TPM) 토큰 버킷과 동시 호출 세마포어를 공유
+- 429/503/과부하 오류는 Retry-After(또는 오류 메시지의 retry 지연)를 따르고, 없으면 지터를 준 지수 백오프로 재시도
+- 429를 받으면 같은 provider/모델의 다른 호출도 대기 시간 동안 멈춰서 재시도가 한꺼번에 몰리지 않음
+
+한도 설정 (환경변수)
+- {PROVIDER}_RPM / {PROVIDER}_TPM / {PROVIDER}_MAX_CONCURRENCY   예) OPENAI_RPM=500, GEMINI_TPM=1000000
+- LLM_RATE_LIMITS: 모델별 덮어쓰기 JSON   예) {"gemini:gemini-3-pro-preview": {"rpm": 25, "concurrency": 2}}
+- 0 또는 미설정은 제한 없음 (동시 실행 기본값은 8)
+"""
+import email.utils
+import json
+import os
+import random
+import re
+import threading
+import time
+
+from src.prompts.prompt_assembly import estimate_tokens
+
+DEFAULT_MAX_CONCURRENCY = 8
+RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504}
+RETRYABLE_ERRORS = {
+    "RateLimitError", "APIConnectionError", "APITimeoutError", "InternalServerError",
+    "ResourceExhausted", "ServiceUnavailable", "DeadlineExceeded", "TooManyRequests",
+}
+_RETRYABLE_TEXT = ("UNAVAILABLE", "RESOURCE_EXHAUSTED", "overloaded", "rate limit")
+_RETRY_DELAY_PATTERN = re.compile(r"retry(?:[ _-]?delay)?[\"']?\s*(?:in|:|=)?\s*[\"']?(\d+(?:\.\d+)?)\s*s", re.IGNORECASE)
+
+
+class TokenBucket:
+    """분당 rate_per_minute만큼 채워지는 토큰 버킷 (rate가 0이면 제한 없음)"""
+
+    def __init__(self, rate_per_minute: float):
+        self.rate = float(rate_per_minute or 0)
+        self.capacity = self.rate
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self, amount: float) -> float:
+        """amount를 예약하고 기다려야 하는 시간(초) 반환 (한 번에 capacity를 넘는 요청은 capacity로 계산)"""
+        if self.rate <= 0:
+            return 0.0
+        amount = min(float(amount), self.capacity)
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate / 60.0)
+            self._updated = now
+            self._tokens -= amount
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens * 60.0 / self.rate
+
+
+class ProviderLimiter:
+    """provider + 모델 하나의 RPM/TPM 버킷 + 동시 호출 세마포어"""
+
+    def __init__(self, key: str, rpm: float = 0, tpm: float = 0, concurrency: int = DEFAULT_MAX_CONCURRENCY):
+        self.key = key
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+        self.concurrency = max(1, int(concurrency or DEFAULT_MAX_CONCURRENCY))
+        self._semaphore = threading.BoundedSemaphore(self.concurrency)
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+        self.waited = 0.0       # 속도 제한으로 기다린 누적 시간(초)
+        self.retries = 0
+
+    def pause(self, seconds: float):
+        """429 등을 받았을 때 이 limiter를 쓰는 모든 호출을 잠시 멈춤"""
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+    def acquire(self, estimated_tokens: int = 0):
+        self._semaphore.acquire()
+        try:
+            wait = max(self.requests.reserve(1), self.tokens.reserve(estimated_tokens))
+            with self._lock:
+                wait = max(wait, self._paused_until - time.monotonic())
+                if wait > 0:
+                    self.waited += wait
+            if wait > 0:
+                time.sleep(wait)
+        except BaseException:
+            self._semaphore.release()
+            raise
+
+    def release(self):
+        self._semaphore.release()
+
+
+def _provider_limits(provider: str, model: str) -> dict:
+    prefix = provider.upper()
+    limits = {
+        "rpm": float(os.getenv(f"{prefix}_RPM", "0") or 0),
+        "tpm": float(os.getenv(f"{prefix}_TPM", "0") or 0),
+        "concurrency": int(os.getenv(f"{prefix}_MAX_CONCURRENCY", str(DEFAULT_MAX_CONCURRENCY)) or DEFAULT_MAX_CONCURRENCY),
+    }
+    try:
+        overrides = json.loads(os.getenv("LLM_RATE_LIMITS", "") or "{}")
+    except json.JSONDecodeError:
+        overrides = {}
+    limits.update(overrides.get(f"{provider}:{model}", {}))
+    return limits
+
+
+_LIMITERS: dict[str, ProviderLimiter] = {}
+_LIMITERS_LOCK = threading.Lock()
+
+
+def get_limiter(provider: str, model: str) -> ProviderLimiter:
+    """provider + 모델별로 공유하는 limiter"""
+    key = f"{provider}:{model}"
+    with _LIMITERS_LOCK:
+        limiter = _LIMITERS.get(key)
+        if limiter is None:
+            limiter = ProviderLimiter(key, **_provider_limits(provider, model))
+            _LIMITERS[key] = limiter
+        return limiter
+
+
+def is_retryable(error: Exception) -> bool:
+    """일시적인 오류(속도 제한/과부하/연결 문제)인지 여부"""
+    if type(error).__name__ in RETRYABLE_ERRORS:
+        return True
+    status = getattr(error, "status_code", None) or getattr(error, "code", None)
+    if isinstance(status, int) and status in RETRYABLE_STATUS:
+        return True
+    message = str(error)
+    return any(text.lower() in message.lower() for text in _RETRYABLE_TEXT)
+
+
+def retry_after(error: Exception) -> float | None:
+    """오류 응답의 Retry-After 헤더 또는 메시지의 retry 지연(초), 없으면 None"""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None)
+    if headers is not None:
+        try:
+            value = headers.get("retry-after-ms")
+            if value:
+                return float(value) / 1000.0
+            value = headers.get("retry-after")
+            if value:
+                try:
+                    return max(0.0, float(value))
+                except ValueError:
+                    retry_at = email.utils.parsedate_to_datetime(value)
+                    return max(0.0, retry_at.timestamp() - time.time())
+        except (TypeError, ValueError, AttributeError):
+            pass
+    match = _RETRY_DELAY_PATTERN.search(str(error))
+    return float(match.group(1)) if match else None
+
+
+def backoff_delay(attempt: int, base: float = 2.0, cap: float = 60.0) -> float:
+    """지터를 준 지수 백오프 (0 ~ base * 2^attempt, 최대 cap)"""
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+def call_with_limits(provider: str, model: str, func, estimated_tokens: int = 0, max_retries: int | None = None,
+                     on_retry=None):
+    """
+    속도 제한/동시 실행 제한을 지켜 func()를 호출하고, 일시적인 오류는 재시도
+
+    Args:
+        provider: "openai" / "gemini"
+        model: 모델 이름 (limiter 구분 + 모델별 한도)
+        func: 실제 API 호출 (인자 없음)
+        estimated_tokens: TPM 버킷에서 차감할 예상 토큰 수 (estimate_prompt_tokens 참고)
+        max_retries: 재시도 횟수 (기본 LLM_MAX_RETRIES 또는 4)
+        on_retry: on_retry(attempt, wait, error) - 재시도 전에 호출 (화면 안내 등)
+    """
+    limiter = get_limiter(provider, model)
+    if max_retries is None:
+        max_retries = int(os.getenv("LLM_MAX_RETRIES", "4"))
+    attempt = 0
+    while True:
+        limiter.acquire(estimated_tokens)
+        try:
+            return func()
+        except Exception as e:
+            if attempt >= max_retries or not is_retryable(e):
+                raise
+            hinted = retry_after(e)
+            wait = hinted if hinted is not None else backoff_delay(attempt)
+            if hinted is not None or "429" in str(e) or type(e).__name__ in ("RateLimitError", "ResourceExhausted"):
+                # 속도 제한에 걸리면 같은 모델의 다른 호출도 함께 대기
+                limiter.pause(wait)
+            limiter.retries += 1
+            attempt += 1
+            if on_retry is not None:
+                on_retry(attempt, wait, e)
+        finally:
+            limiter.release()
+        time.sleep(wait)
+
+
+def estimate_prompt_tokens(*texts: str) -> int:
+    """TPM 차감용 입력 토큰 추정치"""
+    return sum(estimate_tokens(text or "") for text in texts)
+
+
+def limiter_stats() -> dict:
+    """limiter별 대기 시간/재시도 횟수 (화면 표시용)"""
+    with _LIMITERS_LOCK:
+        limiters = list(_LIMITERS.values())
+    return {
+        limiter.key: {
+            "rpm": limiter.requests.rate, "tpm": limiter.tokens.rate, "concurrency": limiter.concurrency,
+            "waited": round(limiter.waited, 1), "retries": limiter.retries,
+        }
+        for limiter in limiters
+    }
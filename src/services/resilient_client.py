@@ -0,0 +1,274 @@
+"""
+오프라인/장애 대응 DB 클라이언트
+- Edge Function이 느리거나 내려가 있으면 읽기는 로컬 복제본(local_db), 쓰기는 outbox로 처리
+- 오프라인 상태에서는 retry_interval 동안 Edge 호출을 건너뛰어(서킷 브레이커) 화면이 재시도 대기로 멈추지 않음
+- 연결이 복구되면 outbox에 쌓인 쓰기를 백그라운드 flusher가 순서대로 재전송
+- save_question_later(): 문제 저장은 항상 outbox에 먼저 넣고 즉시 반환 (write-behind)
+"""
+import os
+import threading
+import time
+
+from src.services.local_db import get_local_replica
+from src.services.outbox import OutboxFlusher, get_outbox, get_outbox_flusher
+
+
+class ResilientDBClient:
+    """
+    EdgeDBClient 대신 st.session_state.db에 들어가는 장애 대응 래퍼
+
+    사용 예)
+        db = ResilientDBClient(lambda: EdgeDBClient(base_url=url, token=token, supabase_anon=key))
+        db.get_subjective_questions({"category": "life"})   # 오프라인이면 로컬 복제본에서 조회
+        db.save_feedback(feedback)                          # 오프라인이면 outbox에 보관 후 True 반환
+
+    여기서 별도로 다루지 않는 메서드는 Edge로 그대로 위임하며, 오프라인이면 RuntimeError를 발생시킵니다.
+    """
+
+    def __init__(self, connect, replica=None, outbox=None, retry_interval: float | None = None):
+        self._connect = connect
+        self.replica = replica or get_local_replica()
+        self.outbox = outbox or get_outbox()
+        self.flusher = get_outbox_flusher() if outbox is None else OutboxFlusher(self.outbox)
+        self.retry_interval = retry_interval if retry_interval is not None else \
+            float(os.getenv("EDGE_OFFLINE_RETRY_INTERVAL", "30"))
+        self.edge = None
+        self.offline = False
+        self.last_error: str | None = None
+        self._retry_at = 0.0
+        self._probing = False
+        self._lock = threading.RLock()
+
+        try:
+            self.edge = self._connect()
+        except Exception as e:
+            self._go_offline(e)
+        else:
+            self._on_connected()
+        # 오프라인이어도 flusher가 주기적으로 재연결을 시도하고, 복구되면 outbox를 비움
+        self.flusher.attach(self)
+
+    # 연결 상태 관리
+    @property
+    def online(self) -> bool:
+        return self.edge is not None and not self.offline
+
+    def _go_offline(self, error):
+        with self._lock:
+            self.offline = True
+            self.last_error = str(error)
+            self._retry_at = time.monotonic() + self.retry_interval
+
+    def _on_connected(self):
+        # 쌓여 있던 쓰기는 flusher가 전송
+        self.flusher.wake()
+        # 다음 장애에 대비해 로컬 복제본을 백그라운드에서 최신화
+        threading.Thread(target=self._sync_replica, daemon=True).start()
+
+    def _sync_replica(self):
+        try:
+            self.replica.sync(self.edge, min_interval=self.retry_interval)
+        except Exception:
+            pass
+
+    def _ensure_edge(self):
+        """사용 가능한 EdgeDBClient 반환 (오프라인이고 재시도 시간이 안 됐거나 확인 중이면 None)"""
+        with self._lock:
+            if not self.offline:
+                return self.edge
+            if self._probing or time.monotonic() < self._retry_at:
+                return None
+            self._probing = True
+            edge = self.edge
+        # 복구 확인은 락 밖에서 수행 (다른 호출은 기다리지 않고 로컬 데이터로 처리)
+        try:
+            if edge is None:
+                edge = self._connect()
+            else:
+                # 가벼운 액션으로 복구 여부 확인
+                edge.get_questions_data_version()
+        except Exception as e:
+            with self._lock:
+                self._probing = False
+            self._go_offline(e)
+            return None
+        with self._lock:
+            self.edge = edge
+            self.offline = False
+            self.last_error = None
+            self._probing = False
+        self._on_connected()
+        return edge
+
+    def _guarded(self, func, *args, **kwargs):
+        """Edge 호출 중 네트워크 실패가 생기면 오프라인으로 전환 (예외는 그대로 전달)"""
+        edge = self.edge
+        # 호출한 스레드 자신의 실패 여부만 보므로 다른 스레드의 실패에 영향받지 않음
+        edge.reset_network_flag()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            if edge.network_failed():
+                self._go_offline(f"네트워크 오류 ({getattr(func, '__name__', func)})")
+
+    def _read(self, method: str, fallback, *args, **kwargs):
+        """Edge에서 읽고, 오프라인이거나 네트워크 실패 시 fallback() 결과 반환"""
+        edge = self._ensure_edge()
+        if edge is not None:
+            try:
+                result = self._guarded(getattr(edge, method), *args, **kwargs)
+            except Exception:
+                if self.online:
+                    raise
+            else:
+                if self.online:
+                    return result
+        return fallback()
+
+    def _write(self, action: str, method: str, params: dict, *args):
+        """Edge에 쓰고, 오프라인이거나 네트워크 실패 시 outbox에 보관 (유실 없음)"""
+        edge = self._ensure_edge()
+        if edge is not None:
+            try:
+                return self._guarded(getattr(edge, method), *args)
+            except Exception:
+                if self.online:
+                    raise
+        self.outbox.enqueue(action, params)
+        self.flusher.wake()
+        return True
+
+    def status(self) -> dict:
+        """연결 상태 요약 (화면 표시용)"""
+        return {
+            "online": self.online,
+            "last_error": self.last_error,
+            "pending_writes": self.outbox.count_pending(),
+            "failed_writes": self.outbox.count_failed(),
+            "replica_version": self.replica.version,
+        }
+
+    # 읽기 (오프라인이면 로컬 복제본)
+    def get_multiple_choice_questions(self, filters: dict | None = None, fields: list | None = None):
+        return self._read("get_multiple_choice_questions",
+                          lambda: self.replica.get_multiple_choice_questions(filters, fields), filters, fields)
+
+    def get_subjective_questions(self, filters: dict | None = None, fields: list | None = None):
+        return self._read("get_subjective_questions",
+                          lambda: self.replica.get_subjective_questions(filters, fields), filters, fields)
+
+    def _replica_pages(self, question_type: str, filters: dict | None, page_size: int, fields: list | None):
+        rows = self.replica.get_questions({**(filters or {}), "type": question_type}, fields)
+        for start in range(0, len(rows), page_size):
+            yield rows[start:start + page_size]
+
+    def iter_multiple_choice_question_pages(self, filters: dict | None = None, page_size: int = 200,
+                                            fields: list | None = None):
+        edge = self._ensure_edge()
+        if edge is None:
+            return self._replica_pages("multiple_choice", filters, page_size, fields)
+        return edge.iter_multiple_choice_question_pages(filters, page_size, fields)
+
+    def iter_subjective_question_pages(self, filters: dict | None = None, page_size: int = 200,
+                                       fields: list | None = None):
+        edge = self._ensure_edge()
+        if edge is None:
+            return self._replica_pages("subjective", filters, page_size, fields)
+        return edge.iter_subjective_question_pages(filters, page_size, fields)
+
+    def get_question_by_id(self, question_id: str, question_type: str):
+        return self._read("get_question_by_id",
+                          lambda: self.replica.get_question_by_id(question_id, question_type),
+                          question_id, question_type)
+
+    def get_multiple_choice_question_by_id(self, question_id: str):
+        def _fallback():
+            data = self.replica.get_question_by_id(question_id, "multiple_choice")
+            return {"ok": bool(data), "data": data}
+        return self._read("get_multiple_choice_question_by_id", _fallback, question_id)
+
+    def get_questions_data_version(self) -> str:
+        return self._read("get_questions_data_version",
+                          lambda: self.replica.version or "1970-01-01T00:00:00Z")
+
+    def get_prompts(self, category: str = None, lang: str = "kr"):
+        edge = self._ensure_edge()
+        if edge is not None:
+            prompts = self._guarded(edge.get_prompts, category, lang)
+            if self.online:
+                # 오프라인 대비 로컬에 보관
+                self.replica.save_prompts(prompts)
+                return prompts
+        return self.replica.get_prompts(category, lang)
+
+    def get_prompt_by_id(self, prompt_id: str):
+        edge = self._ensure_edge()
+        if edge is not None:
+            prompt_text = self._guarded(edge.get_prompt_by_id, prompt_id)
+            if self.online:
+                self.replica.save_prompt_text(prompt_id, prompt_text)
+                return prompt_text
+        return self.replica.get_prompt_by_id(prompt_id)
+
+    # 쓰기 (오프라인이면 outbox)
+    def save_question_later(self, question: dict) -> int:
+        """
+        문제 저장을 outbox에 넣고 즉시 반환 (DB 응답을 기다리지 않음)
+
+        백그라운드 flusher가 batch로 모아 전송하고, 실패 시 백오프 후 재시도합니다.
+        같은 내용의 문제는 한 번만 저장됩니다.
+
+        Returns:
+            int: outbox id
+        """
+        action = "save_multiple_choice_question" if question.get("type") == "multiple_choice" \
+            else "save_subjective_question"
+        outbox_id = self.outbox.enqueue(action, question, dedup_sent=True)
+        self.flusher.wake()
+        return outbox_id
+
+    def save_multiple_choice_question(self, question: dict) -> bool:
+        return self._write("save_multiple_choice_question", "save_multiple_choice_question", question, question)
+
+    def save_subjective_question(self, question: dict) -> bool:
+        return self._write("save_subjective_question", "save_subjective_question", question, question)
+
+    def save_feedback(self, feedback: dict) -> bool:
+        return self._write("save_feedback", "save_feedback", feedback, feedback)
+
+    def update_question_status(self, question_id: str, updates: dict) -> bool:
+        params = {"question_id": question_id, "updates": updates}
+        return self._write("update_question_status", "update_question_status", params, question_id, updates)
+
+    def update_question_statuses(self, updates: dict) -> dict:
+        edge = self._ensure_edge()
+        if edge is not None:
+            try:
+                return self._guarded(edge.update_question_statuses, updates)
+            except Exception:
+                if self.online:
+                    raise
+        return {qid: self.update_question_status(qid, values) for qid, values in updates.items()}
+
+    # 그 외 메서드/속성은 Edge로 위임
+    def _call(self, action: str, params: dict | None = None, **kwargs):
+        edge = self._ensure_edge()
+        if edge is None:
+            raise RuntimeError(f"Edge Function 오프라인 상태입니다 ({action}): {self.last_error}")
+        return self._guarded(edge._call, action, params, **kwargs)
+
+    def __getattr__(self, name: str):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        edge = self.__dict__.get("edge")
+        attr = getattr(edge, name, None) if edge is not None else None
+        if attr is not None and not callable(attr):
+            return attr
+
+        def _delegate(*args, **kwargs):
+            current = self._ensure_edge()
+            if current is None:
+                raise RuntimeError(f"Edge Function 오프라인 상태입니다 ({name}): {self.last_error}")
+            return self._guarded(getattr(current, name), *args, **kwargs)
+        _delegate.__name__ = name
+        return _delegate
@@ -0,0 +1,125 @@
+"""
+서비스 실행 컨텍스트 / 이벤트
+- 서비스(문제 생성/교정/번역/DB)는 st.session_state를 읽거나 st.info 등을 직접 호출하지 않고,
+  호출 측이 넘겨준 ServiceContext에서 설정(모델 등)을 읽고 진행 상황을 이벤트로 내보냄
+- 컨텍스트가 없으면 기본 설정을 사용하고 이벤트는 버려지므로 워커 스레드/CLI에서도 그대로 동작
+- Streamlit 화면은 src.ui.service_events.streamlit_context()로 세션 설정을 담고 이벤트를 구독해 표시
+"""
+import threading
+from datetime import datetime
+
+# 이벤트 종류
+EVENT_INFO = "info"
+EVENT_SUCCESS = "success"
+EVENT_WARNING = "warning"
+EVENT_ERROR = "error"
+EVENT_DEBUG = "debug"        # 상세 디버깅 정보 (message=제목, data=표시할 항목)
+EVENT_RECORD = "record"      # 디버깅 이력 누적 (message=채널명, data=항목)
+EVENT_STATE = "state"        # 최근 값 보관 (message=키, data={"value": 값})
+EVENT_PROGRESS = "progress"  # 진행률 (data={"done", "total"})
+
+
+class ServiceEvent:
+    """서비스가 내보내는 이벤트 하나"""
+
+    __slots__ = ("kind", "message", "data", "timestamp")
+
+    def __init__(self, kind: str, message: str = "", data: dict | None = None):
+        self.kind = kind
+        self.message = message
+        self.data = data or {}
+        self.timestamp = datetime.now().isoformat()
+
+    def __repr__(self) -> str:
+        return f"ServiceEvent({self.kind!r}, {self.message!r})"
+
+
+class ServiceContext:
+    """
+    서비스 호출 설정 + 이벤트 구독
+
+    사용 예)
+        ctx = ServiceContext(model="gpt-5", db=db, on_event=lambda e: print(e.kind, e.message))
+        generator.generate_with_ai("life", "normal", "subjective", context=ctx)
+
+    리스너는 이벤트를 내보낸 스레드에서 호출되므로, 여러 스레드에서 쓰는 리스너는 스레드 안전해야 합니다.
+    리스너에서 발생한 예외는 서비스 동작에 영향을 주지 않도록 무시합니다.
+    """
+
+    def __init__(self, model: str | None = None, gemini_model: str | None = None,
+                 gemini_temperature: float | None = None, db=None, on_event=None, verbose: bool = True,
+                 tags: dict | None = None):
+        self.model = model                            # OpenAI 모델 (없으면 gpt-5)
+        self.gemini_model = gemini_model              # Gemini 모델 (없으면 GEMINI_MODEL 설정)
+        self.gemini_temperature = gemini_temperature  # Gemini temperature (없으면 0.3)
+        self.db = db                                  # 프롬프트 조회 등에 사용할 DB 클라이언트
+        self.verbose = verbose                        # False면 debug 이벤트를 내보내지 않음
+        self.tags = dict(tags or {})                  # 사용량 집계용 구분값 (job_id, tab, area 등)
+        self._listeners = [on_event] if on_event else []
+        self._lock = threading.Lock()
+
+    def subscribe(self, callback):
+        """이벤트 리스너 추가 (callback(event))"""
+        with self._lock:
+            self._listeners.append(callback)
+        return callback
+
+    def derive(self, **overrides) -> "ServiceContext":
+        """설정 일부만 바꾼 컨텍스트 (현재 리스너를 그대로 이어받음, tags는 기존 값에 합침)"""
+        settings = {
+            "model": self.model, "gemini_model": self.gemini_model,
+            "gemini_temperature": self.gemini_temperature, "db": self.db, "verbose": self.verbose,
+        }
+        tags = overrides.pop("tags", None)
+        settings.update(overrides)
+        settings["tags"] = {**self.tags, **(tags or {})}
+        derived = ServiceContext(**settings)
+        with self._lock:
+            derived._listeners = list(self._listeners)
+        return derived
+
+    def emit(self, kind: str, message: str = "", **data):
+        if kind == EVENT_DEBUG and not self.verbose:
+            return
+        with self._lock:
+            listeners = list(self._listeners)
+        if not listeners:
+            return
+        event = ServiceEvent(kind, message, data)
+        for listener in listeners:
+            try:
+                listener(event)
+            except Exception:
+                pass
+
+    def info(self, message: str, **data):
+        self.emit(EVENT_INFO, message, **data)
+
+    def success(self, message: str, **data):
+        self.emit(EVENT_SUCCESS, message, **data)
+
+    def warning(self, message: str, **data):
+        self.emit(EVENT_WARNING, message, **data)
+
+    def error(self, message: str, **data):
+        self.emit(EVENT_ERROR, message, **data)
+
+    def debug(self, title: str, **data):
+        """상세 정보 (화면에서는 접이식 영역으로 표시, json/code 키는 그대로 렌더링)"""
+        self.emit(EVENT_DEBUG, title, **data)
+
+    def record(self, channel: str, entry: dict):
+        """디버깅 이력에 항목 추가 (화면에서는 같은 이름의 세션 목록에 누적)"""
+        self.emit(EVENT_RECORD, channel, **entry)
+
+    def publish(self, key: str, value):
+        """최근 값 보관 (화면에서는 같은 이름의 세션 값으로 저장)"""
+        self.emit(EVENT_STATE, key, value=value)
+
+    def progress(self, done: int, total: int, message: str = ""):
+        self.emit(EVENT_PROGRESS, message, done=done, total=total)
+
+
+def ensure_context(context: ServiceContext | None) -> ServiceContext:
+    """컨텍스트가 없으면 기본 설정 + 이벤트 없음 컨텍스트 반환"""
+    return context if context is not None else ServiceContext()
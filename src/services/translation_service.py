@@ -1,90 +1,137 @@
 import json
+import os
+import queue
+import threading
+import time
+from datetime import datetime
 from typing import Dict, List, Any
+from src.services.batch_checkpoint import BATCH_TRANSLATION, ITEM_CANCELLED, ITEM_FAILED, ITEM_SUCCESS
 from src.services.gemini_client import GeminiClient
 from src.services.edge_client import EdgeDBClient
+from src.services.prompt_cache import get_prompt_cache
+from src.services.rate_limiter import backoff_delay
+from src.services.service_context import ServiceContext, ensure_context
+
+DEFAULT_TRANSLATION_CONCURRENCY = 4
+DEFAULT_TRANSLATION_MAX_RETRIES = 2
+MAX_SAVE_WORKERS = 2    # save_i18n_problem 동시 호출 수 (번역보다 훨씬 빨라서 많이 필요 없음)
+
+# 일괄 번역 결과 상태 (성공/실패/취소는 체크포인트 항목 상태와 같은 값)
+RESULT_SUCCESS = ITEM_SUCCESS
+RESULT_FAILED = ITEM_FAILED
+RESULT_CANCELLED = ITEM_CANCELLED
+RESULT_SKIPPED = "skipped"   # 같은 배치의 이전 실행에서 이미 성공
+
+_END = object()   # 단계 종료 표시
+
+# 이 프로세스에서 실행 중인 번역 배치 (새로고침 후 화면이 진행 상황을 다시 연결할 때 사용)
+_ACTIVE_TRANSLATIONS = {}
+_ACTIVE_TRANSLATIONS_LOCK = threading.Lock()
+
+
+class _TranslationItem:
+    """일괄 번역 파이프라인을 지나가는 문제 하나"""
+
+    __slots__ = ("index", "problem", "translated", "retries", "started")
+
+    def __init__(self, index: int, problem: dict):
+        self.index = index
+        self.problem = problem
+        self.translated = None
+        self.retries = 0
+        self.started = time.monotonic()
+
+
+def parse_translation(translated) -> dict:
+    """번역 응답의 ```json 블록을 파싱 (응답이 없거나 JSON이 아니면 예외)"""
+    if not translated or not isinstance(translated, str):
+        raise RuntimeError("번역 응답이 비어 있습니다")
+    result = translated.strip()
+    
+    # JSON 형태의 응답만 사용
+    if '```json' not in result:
+        raise RuntimeError("번역 응답에 JSON 블록이 없습니다")
+    
+    # ```json과 ``` 사이의 내용 추출
+    start_idx = result.find('```json') + 7
+    end_idx = result.find('```', start_idx)
+    if end_idx == -1:
+        json_content = result[start_idx:].strip()
+    else:
+        json_content = result[start_idx:end_idx].strip()
+    
+    # JSON 파싱 (실패하면 json.JSONDecodeError)
+    parsed = json.loads(json_content)
+    if not isinstance(parsed, dict):
+        raise RuntimeError("번역 응답 JSON이 객체가 아닙니다")
+    return parsed
+
 
 class TranslationService:
-    def __init__(self, gemini_client: GeminiClient, edge_client: EdgeDBClient):
+    def __init__(self, gemini_client: GeminiClient, edge_client: EdgeDBClient, context: ServiceContext | None = None):
         self.gemini_client = gemini_client
         self.edge_client = edge_client
+        self.context = context  # 디버깅 기록/사용량 집계용 (선택)
         self.TRANSLATION_PROMPT_ID = "335175d3-ea19-4e47-9d47-1edb798a3a72"
 
-    def translate_problem(self, problem: Dict) -> Dict:
+    def translate_problem(self, problem: Dict, fallback: bool = True, refresh: bool = False) -> Dict:
         """
         문제 데이터를 영어로 번역 (전체 JSON을 한 번에 번역)
         
         Args:
             problem: qlearn_problems 테이블의 문제 데이터
+            fallback: False면 번역 실패 시 원본 폴백 대신 RuntimeError (일괄 번역에서 재시도할 때 사용)
+            refresh: True면 응답 캐시를 읽지 않고 다시 호출 (재시도용)
             
         Returns:
             번역된 문제 데이터
         """
         try:
-            
-            # 전체 문제 데이터를 JSON으로 변환
-            problem_json = json.dumps(problem, ensure_ascii=False, indent=2)
-            
-            # 제미나이 API로 전체 JSON 번역
-            system_prompt = self._get_translation_prompt()
-            user_prompt = f"Translate the following Korean problem data to English:\n\n{problem_json}"
-            
-            translated = self.gemini_client.review_content(system_prompt, user_prompt)
-            
-            if translated and isinstance(translated, str):
-                result = translated.strip()
-                
-                # JSON 형태의 응답인 경우 파싱 시도
-                if '```json' in result:
-                    try:
-                        # ```json과 ``` 사이의 내용 추출
-                        start_idx = result.find('```json') + 7
-                        end_idx = result.find('```', start_idx)
-                        if end_idx == -1:
-                            json_content = result[start_idx:].strip()
-                        else:
-                            json_content = result[start_idx:end_idx].strip()
-                        
-                        
-                        # JSON 파싱 시도
-                        parsed = json.loads(json_content)
-                        
-                        # 번역된 데이터를 i18n 형식으로 변환
-                        # subjective 타입으로 고정 (questions_subjective 테이블에서만 가져옴)
-                        source_id = problem.get('id')
-                        
-                        translated_problem = {
-                            'source_problem_id': source_id,
-                            'lang': 'en',
-                            'category': parsed.get('category', problem.get('category', problem.get('domain'))),
-                            'topic': parsed.get('topic', problem.get('topic', '')),
-                            'difficulty': parsed.get('difficulty', problem.get('difficulty')),
-                            'time_limit': parsed.get('time_limit', problem.get('time_limit', '')),
-                            'topic_summary': parsed.get('topic_summary', ''),
-                            'title': parsed.get('title', ''),
-                            'scenario': parsed.get('scenario', ''),
-                            'goal': parsed.get('goal', []),
-                            'first_question': parsed.get('first_question', []),
-                            'requirements': parsed.get('requirements', []),
-                            'constraints': parsed.get('constraints', []),
-                            'guide': parsed.get('guide', {}),
-                            'evaluation': parsed.get('evaluation', []),
-                            'task': parsed.get('task', ''),
-                            'reference': parsed.get('reference', {}),
-                            'active': True
-                        }
-                        
-                        return translated_problem
-                        
-                    except json.JSONDecodeError as e:
-                        return self._create_fallback_translation(problem)
-                else:
-                    return self._create_fallback_translation(problem)
-            else:
-                return self._create_fallback_translation(problem)
-                
+            return self._translate(problem, refresh)
         except Exception as e:
+            if not fallback:
+                raise RuntimeError(f"문제 번역 실패: {str(e)}")
             return self._create_fallback_translation(problem)
     
+    def _translate(self, problem: Dict, refresh: bool = False) -> Dict:
+        """Gemini 번역 응답을 i18n 형식으로 변환 (응답이 없거나 JSON이 아니면 예외)"""
+        # 전체 문제 데이터를 JSON으로 변환
+        problem_json = json.dumps(problem, ensure_ascii=False, indent=2)
+        
+        # 제미나이 API로 전체 JSON 번역
+        system_prompt = self._get_translation_prompt()
+        user_prompt = f"Translate the following Korean problem data to English:\n\n{problem_json}"
+        
+        # JSON 블록을 파싱할 수 있는 응답만 캐시에 저장
+        translated = self.gemini_client.review_content(system_prompt, user_prompt, context=self.context,
+                                                       validate=parse_translation, refresh=refresh)
+        parsed = parse_translation(translated)
+        
+        # 번역된 데이터를 i18n 형식으로 변환
+        # subjective 타입으로 고정 (questions_subjective 테이블에서만 가져옴)
+        source_id = problem.get('id')
+        
+        return {
+            'source_problem_id': source_id,
+            'lang': 'en',
+            'category': parsed.get('category', problem.get('category', problem.get('domain'))),
+            'topic': parsed.get('topic', problem.get('topic', '')),
+            'difficulty': parsed.get('difficulty', problem.get('difficulty')),
+            'time_limit': parsed.get('time_limit', problem.get('time_limit', '')),
+            'topic_summary': parsed.get('topic_summary', ''),
+            'title': parsed.get('title', ''),
+            'scenario': parsed.get('scenario', ''),
+            'goal': parsed.get('goal', []),
+            'first_question': parsed.get('first_question', []),
+            'requirements': parsed.get('requirements', []),
+            'constraints': parsed.get('constraints', []),
+            'guide': parsed.get('guide', {}),
+            'evaluation': parsed.get('evaluation', []),
+            'task': parsed.get('task', ''),
+            'reference': parsed.get('reference', {}),
+            'active': True
+        }
+    
     def _create_fallback_translation(self, problem: dict) -> dict:
         """번역 실패 시 원본 데이터를 사용한 폴백 번역"""
         # subjective 타입으로 고정 (questions_subjective 테이블에서만 가져옴)
@@ -113,7 +160,7 @@ class TranslationService:
     def _get_translation_prompt(self) -> str:
         """번역용 프롬프트를 데이터베이스에서 조회"""
         try:
-            prompt = self.edge_client.get_prompt_by_id(self.TRANSLATION_PROMPT_ID)
+            prompt = get_prompt_cache().get_prompt_by_id(self.edge_client, self.TRANSLATION_PROMPT_ID)
             
             # 응답이 문자열인 경우 (직접 프롬프트 텍스트)
             if prompt and isinstance(prompt, str):
@@ -224,3 +271,251 @@ Return only the translated text without any additional explanations or comments.
             error_msg = f"❌ 번역 및 저장 실패: {str(e)}"
             update_debug(None, error_msg)
             raise RuntimeError(f"문제 번역 및 저장 실패: {str(e)}")
+
+    def translate_batch(self, problems: list, concurrency: int | None = None, save: bool = True,
+                        max_retries: int | None = None, fetch=None, checkpoint=None, batch_id: str | None = None,
+                        cancel: threading.Event | None = None):
+        """
+        여러 문제를 동시에 번역/저장하고, 끝나는 순서대로 결과를 내보내는 제너레이터
+        - Gemini 번역(concurrency개 동시)과 i18n 저장(save_i18n_problem)을 크기 제한 큐로 연결해,
+          번역 응답을 기다리는 동안 앞 문제의 저장이 함께 진행됨
+        - 단계별로 실패하면 재시도하고, 번역은 원본 폴백 없이 실패로 처리 (영문 테이블에 한국어 원본이 저장되지 않도록)
+        - 소비 측이 중간에 멈추거나 cancel이 설정되면 아직 시작하지 않은 문제는 취소
+
+        Args:
+            problems: 번역할 문제 목록 (fetch가 있으면 fetch에 넘길 항목)
+            concurrency: 동시 번역 요청 수 (기본 TRANSLATION_CONCURRENCY 또는 4)
+            save: False면 번역만 하고 저장하지 않음
+            max_retries: 단계별 재시도 횟수 (기본 TRANSLATION_MAX_RETRIES 또는 2)
+            fetch: fetch(problem) -> 번역할 전체 문제 데이터 (번역 워커에서 호출)
+            checkpoint: CheckpointStore (문제별 결과 기록, 같은 배치에서 이미 성공한 문제는 건너뜀)
+            batch_id: 이어서 실행할 배치 id (없으면 같은 문제 목록의 끝나지 않은 배치, 끝난 배치뿐이면 새 배치)
+            cancel: 외부에서 중지할 때 설정하는 Event
+
+        Yields:
+            dict: {"index": problems 내 위치, "problem_id", "title", "status": success/failed/cancelled/skipped,
+                   "stage": 실패 단계(fetch/translate/save), "error", "translated_problem", "retries", "elapsed"}
+        """
+        problems = list(problems)
+        if not problems:
+            return
+        concurrency = max(1, concurrency or int(os.getenv("TRANSLATION_CONCURRENCY", DEFAULT_TRANSLATION_CONCURRENCY)))
+        if max_retries is None:
+            max_retries = int(os.getenv("TRANSLATION_MAX_RETRIES", DEFAULT_TRANSLATION_MAX_RETRIES))
+        cancel = cancel or threading.Event()
+        context = ensure_context(self.context)
+        completed_ids = set()
+        if checkpoint is not None:
+            batch_id = checkpoint.open_batch(BATCH_TRANSLATION, {str(p.get("id")): p for p in problems}, batch_id)
+            completed_ids = checkpoint.completed_ids(batch_id)
+
+        save_workers = min(MAX_SAVE_WORKERS, concurrency) if save else 0
+        translate_inbox = queue.Queue(maxsize=concurrency * 2)
+        save_inbox = queue.Queue(maxsize=concurrency * 2)
+        results = queue.Queue()
+        running = {"translate": concurrency}
+        lock = threading.Lock()
+
+        def _attempt(item, func):
+            # func(refresh): 재시도에서는 refresh=True (응답 캐시의 같은 실패 응답을 재사용하지 않도록)
+            for attempt in range(max_retries + 1):
+                try:
+                    return func(attempt > 0)
+                except Exception:
+                    if attempt >= max_retries or cancel.is_set():
+                        raise
+                    item.retries += 1
+                    time.sleep(backoff_delay(attempt, base=1.0, cap=15.0))
+
+        def _finish(item, status, stage=None, error=None):
+            problem = item.problem or {}
+            result = {
+                "index": item.index,
+                "problem_id": problem.get("id"),
+                "title": problem.get("title", ""),
+                "status": status,
+                "stage": stage,
+                "error": error,
+                "translated_problem": item.translated,
+                "retries": item.retries,
+                "elapsed": round(time.monotonic() - item.started, 2),
+            }
+            if checkpoint is not None and status != RESULT_SKIPPED:
+                try:
+                    summary = {"translated_title": item.translated.get("title", "")} if item.translated else None
+                    checkpoint.mark(batch_id, problem.get("id"), status, stage or ("save" if save else "translate"),
+                                    error, summary)
+                except Exception:
+                    pass
+            results.put(result)
+
+        def _translate_worker():
+            while True:
+                item = translate_inbox.get()
+                if item is _END:
+                    translate_inbox.put(_END)   # 다른 번역 워커도 종료하도록 되돌려 놓음
+                    break
+                if cancel.is_set():
+                    _finish(item, RESULT_CANCELLED, "translate", "취소됨")
+                    continue
+                stage = "translate"
+                try:
+                    if fetch is not None:
+                        stage = "fetch"
+                        item.problem = _attempt(item, lambda refresh: fetch(item.problem))
+                        stage = "translate"
+                    item.translated = _attempt(item, lambda refresh: self.translate_problem(item.problem, fallback=False,
+                                                                                     refresh=refresh))
+                except Exception as e:
+                    _finish(item, RESULT_FAILED, stage, str(e) or type(e).__name__)
+                    continue
+                if save:
+                    save_inbox.put(item)
+                else:
+                    _finish(item, RESULT_SUCCESS)
+            with lock:
+                running["translate"] -= 1
+                last = running["translate"] == 0
+            if last and save:
+                save_inbox.put(_END)
+
+        def _save_worker():
+            while True:
+                item = save_inbox.get()
+                if item is _END:
+                    save_inbox.put(_END)
+                    break
+                if cancel.is_set():
+                    _finish(item, RESULT_CANCELLED, "save", "취소됨")
+                    continue
+                try:
+                    _attempt(item, lambda refresh: self.save_translated_problem(item.translated))
+                except Exception as e:
+                    _finish(item, RESULT_FAILED, "save", str(e) or type(e).__name__)
+                    continue
+                _finish(item, RESULT_SUCCESS)
+
+        def _feed():
+            for index, problem in enumerate(problems):
+                item = _TranslationItem(index, problem)
+                if str(problem.get("id")) in completed_ids:
+                    _finish(item, RESULT_SKIPPED, error=None)
+                elif cancel.is_set():
+                    _finish(item, RESULT_CANCELLED, "translate", "취소됨")
+                else:
+                    translate_inbox.put(item)
+            translate_inbox.put(_END)
+
+        threads = [threading.Thread(target=_feed, daemon=True, name="translate-feed")]
+        threads += [threading.Thread(target=_translate_worker, daemon=True, name=f"translate-{number}")
+                    for number in range(concurrency)]
+        threads += [threading.Thread(target=_save_worker, daemon=True, name=f"translate-save-{number}")
+                    for number in range(save_workers)]
+        for thread in threads:
+            thread.start()
+        try:
+            for done in range(1, len(problems) + 1):
+                result = results.get()
+                context.progress(done, len(problems), f"{result['problem_id']}: {result['status']}")
+                yield result
+        finally:
+            # 소비 측이 중간에 멈추면 남은 문제는 취소 (진행 중인 요청은 끝까지 기다리지 않음)
+            cancel.set()
+            if checkpoint is not None:
+                try:
+                    checkpoint.finish(batch_id)
+                except Exception:
+                    pass
+
+
+class TranslationBatch:
+    """
+    translate_batch를 백그라운드 스레드에서 실행하고 결과를 모아 두는 작업
+    (화면은 rerun마다 번역하지 않고 report()로 진행 상황만 조회)
+
+    사용 예)
+        job = TranslationBatch(service, problems, concurrency=4, checkpoint=get_checkpoint_store()).start()
+        job.report()   # 진행 중에도 호출 가능
+    """
+
+    def __init__(self, service: TranslationService, problems: list, concurrency: int | None = None,
+                 checkpoint=None, batch_id: str | None = None):
+        self.service = service
+        self.problems = list(problems)
+        self.concurrency = max(1, concurrency or int(os.getenv("TRANSLATION_CONCURRENCY", DEFAULT_TRANSLATION_CONCURRENCY)))
+        self.checkpoint = checkpoint
+        self.batch_id = batch_id
+        if checkpoint is not None and not batch_id:
+            self.batch_id = checkpoint.resolve_batch_id(BATCH_TRANSLATION, [str(p.get("id")) for p in self.problems])
+        self.results = []
+        self.started_at = None
+        self.finished_at = None
+        self._started = None
+        self._elapsed = 0.0
+        self._cancel = threading.Event()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def _run(self):
+        try:
+            for result in self.service.translate_batch(self.problems, self.concurrency, checkpoint=self.checkpoint,
+                                                       batch_id=self.batch_id, cancel=self._cancel):
+                with self._lock:
+                    self.results.append(result)
+        finally:
+            if self.batch_id:
+                with _ACTIVE_TRANSLATIONS_LOCK:
+                    _ACTIVE_TRANSLATIONS.pop(self.batch_id, None)
+            self._elapsed = time.monotonic() - self._started
+            self.finished_at = datetime.now()
+
+    def start(self) -> "TranslationBatch":
+        self.started_at = datetime.now()
+        self._started = time.monotonic()
+        if self.batch_id:
+            with _ACTIVE_TRANSLATIONS_LOCK:
+                _ACTIVE_TRANSLATIONS[self.batch_id] = self
+        self._thread = threading.Thread(target=self._run, daemon=True, name="translate-batch")
+        self._thread.start()
+        return self
+
+    def cancel(self):
+        """남은 문제 번역을 중지 (진행 중인 번역 요청은 끝까지 기다림)"""
+        self._cancel.set()
+
+    @property
+    def finished(self) -> bool:
+        return self.finished_at is not None
+
+    def report(self) -> dict:
+        """결과 보고서 (진행 중에도 호출 가능)"""
+        with self._lock:
+            results = sorted(self.results, key=lambda result: result["index"])
+            last = self.results[-1] if self.results else None
+        counts = {status: 0 for status in (RESULT_SUCCESS, RESULT_FAILED, RESULT_CANCELLED, RESULT_SKIPPED)}
+        for result in results:
+            counts[result["status"]] += 1
+        if self.finished_at is not None:
+            elapsed = self._elapsed
+        else:
+            elapsed = time.monotonic() - self._started if self._started is not None else 0.0
+        return {
+            "total": len(self.problems),
+            "completed": len(results),
+            "success": counts[RESULT_SUCCESS],
+            "failed": counts[RESULT_FAILED],
+            "cancelled": counts[RESULT_CANCELLED],
+            "skipped": counts[RESULT_SKIPPED],
+            "batch_id": self.batch_id,
+            "retries": sum(result["retries"] for result in results),
+            "elapsed": round(elapsed, 1),
+            "finished": self.finished_at is not None,
+            "last": last,
+            "results": results,
+        }
+
+
+def get_active_translation(batch_id: str) -> TranslationBatch | None:
+    """이 프로세스에서 아직 실행 중인 번역 배치 (없으면 None)"""
+    with _ACTIVE_TRANSLATIONS_LOCK:
+        return _ACTIVE_TRANSLATIONS.get(batch_id)
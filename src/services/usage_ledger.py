@@ -0,0 +1,194 @@
+"""
+LLM 사용량/비용 기록 (SQLite)
+- 실제 API 호출 1건마다 모델, 입력/출력/thinking 토큰, 지연 시간, 계산된 비용을 기록 (캐시 재사용은 기록하지 않음)
+- 작업(job_id) / 화면(tab) / 평가 영역 / 난이도 / 날짜 / 모델별로 집계해 대시보드에 표시
+- 단가는 MODEL_PRICES (1K 토큰당 USD), LLM_PRICES 환경변수(JSON)로 덮어쓰기 가능
+  예) LLM_PRICES={"gpt-5": [0.03, 0.12], "gemini-3-pro-preview": [0.002, 0.012]}
+"""
+import json
+import os
+import sqlite3
+import threading
+from datetime import datetime, timedelta
+
+DEFAULT_USAGE_DB_PATH = "ai_assessment_usage.db"
+
+# 1K 토큰당 (입력, 출력) USD - OpenAI는 README 표 기준, Gemini는 공개 단가 기준
+MODEL_PRICES = {
+    "gpt-5": (0.03, 0.12),
+    "gpt-5-nano": (0.01, 0.04),
+    "gpt-5-mini": (0.005, 0.02),
+    "gemini-2.5-pro": (0.00125, 0.01),
+    "gemini-2.5-flash": (0.0003, 0.0025),
+    "gemini-3-pro-preview": (0.002, 0.012),
+}
+
+# 집계 가능한 기준 (컬럼명)
+GROUP_BY_COLUMNS = ("day", "job_id", "tab", "area", "difficulty", "model", "provider", "method")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS llm_usage (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    created_at TEXT NOT NULL,
+    day TEXT NOT NULL,
+    provider TEXT NOT NULL,
+    model TEXT NOT NULL,
+    method TEXT,
+    job_id TEXT,
+    tab TEXT,
+    area TEXT,
+    difficulty TEXT,
+    prompt_tokens INTEGER NOT NULL DEFAULT 0,
+    completion_tokens INTEGER NOT NULL DEFAULT 0,
+    thinking_tokens INTEGER NOT NULL DEFAULT 0,
+    latency_ms INTEGER NOT NULL DEFAULT 0,
+    cost_usd REAL NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_llm_usage_day ON llm_usage (day);
+CREATE INDEX IF NOT EXISTS idx_llm_usage_job ON llm_usage (job_id);
+"""
+
+
+def _prices() -> dict:
+    prices = dict(MODEL_PRICES)
+    try:
+        prices.update({model: tuple(value) for model, value in json.loads(os.getenv("LLM_PRICES", "") or "{}").items()})
+    except (json.JSONDecodeError, TypeError, ValueError):
+        pass
+    return prices
+
+
+def model_price(model: str) -> tuple[float, float]:
+    """모델의 1K 토큰당 (입력, 출력) 단가 (모르는 모델은 0)"""
+    prices = _prices()
+    name = (model or "").replace("models/", "")
+    if name in prices:
+        return prices[name]
+    # gpt-5-2025-08-07 처럼 날짜가 붙은 이름은 가장 긴 접두어로 찾음
+    matches = [key for key in prices if name.startswith(key)]
+    return prices[max(matches, key=len)] if matches else (0.0, 0.0)
+
+
+def compute_cost(model: str, prompt_tokens: int, completion_tokens: int, thinking_tokens: int = 0) -> float:
+    """비용(USD) - thinking 토큰은 출력 단가로 계산"""
+    input_price, output_price = model_price(model)
+    return (prompt_tokens * input_price + (completion_tokens + thinking_tokens) * output_price) / 1000.0
+
+
+def openai_usage(response) -> dict:
+    """OpenAI chat.completions 응답의 토큰 사용량 (reasoning 토큰은 completion_tokens에 이미 포함)"""
+    usage = getattr(response, "usage", None)
+    if usage is None:
+        return {}
+    return {
+        "prompt_tokens": getattr(usage, "prompt_tokens", 0) or 0,
+        "completion_tokens": getattr(usage, "completion_tokens", 0) or 0,
+    }
+
+
+def gemini_usage(response) -> dict:
+    """Gemini 응답(또는 스트리밍 마지막 chunk)의 usage_metadata 토큰 사용량"""
+    usage = getattr(response, "usage_metadata", None)
+    if usage is None:
+        return {}
+    return {
+        "prompt_tokens": getattr(usage, "prompt_token_count", 0) or 0,
+        "completion_tokens": getattr(usage, "candidates_token_count", 0) or 0,
+        "thinking_tokens": getattr(usage, "thoughts_token_count", 0) or 0,
+    }
+
+
+class UsageLedger:
+    """
+    LLM 호출 사용량 저장소
+
+    사용 예)
+        get_usage_ledger().record("openai", "gpt-5", openai_usage(resp), latency=1.2,
+                                  method="generate_with_ai", tags={"tab": "create", "area": "life"})
+        get_usage_ledger().summary("area", days=30)
+    """
+
+    def __init__(self, path: str | None = None):
+        self.path = path or os.getenv("USAGE_DB_PATH", DEFAULT_USAGE_DB_PATH)
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def record(self, provider: str, model: str, usage: dict, latency: float = 0.0, method: str | None = None,
+               tags: dict | None = None) -> float:
+        """호출 1건 기록, 계산된 비용(USD) 반환"""
+        tags = tags or {}
+        prompt_tokens = int(usage.get("prompt_tokens", 0) or 0)
+        completion_tokens = int(usage.get("completion_tokens", 0) or 0)
+        thinking_tokens = int(usage.get("thinking_tokens", 0) or 0)
+        cost = compute_cost(model, prompt_tokens, completion_tokens, thinking_tokens)
+        now = datetime.now()
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO llm_usage (created_at, day, provider, model, method, job_id, tab, area, difficulty, "
+                "prompt_tokens, completion_tokens, thinking_tokens, latency_ms, cost_usd) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (now.isoformat(), now.strftime("%Y-%m-%d"), provider, (model or "").replace("models/", ""), method,
+                 tags.get("job_id"), tags.get("tab"), tags.get("area"), tags.get("difficulty"),
+                 prompt_tokens, completion_tokens, thinking_tokens, int(latency * 1000), cost),
+            )
+        return cost
+
+    def summary(self, group_by: str = "day", days: int | None = 30, job_id: str | None = None) -> list[dict]:
+        """group_by 기준 집계 (최근 days일, 비용 큰 순)"""
+        if group_by not in GROUP_BY_COLUMNS:
+            raise RuntimeError(f"지원하지 않는 집계 기준입니다: {group_by}")
+        clauses, args = [], []
+        if days:
+            clauses.append("day >= ?")
+            args.append((datetime.now() - timedelta(days=days - 1)).strftime("%Y-%m-%d"))
+        if job_id:
+            clauses.append("job_id = ?")
+            args.append(job_id)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        order = "key" if group_by == "day" else "cost_usd DESC"
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT COALESCE({group_by}, '(없음)') AS key, COUNT(*) AS calls, "
+                "SUM(prompt_tokens) AS prompt_tokens, SUM(completion_tokens) AS completion_tokens, "
+                "SUM(thinking_tokens) AS thinking_tokens, SUM(cost_usd) AS cost_usd, "
+                f"AVG(latency_ms) AS avg_latency_ms FROM llm_usage {where} GROUP BY key ORDER BY {order}",
+                args,
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def totals(self, days: int | None = 30, job_id: str | None = None) -> dict:
+        rows = self.summary("provider", days, job_id)
+        return {
+            "calls": sum(row["calls"] for row in rows),
+            "tokens": sum(row["prompt_tokens"] + row["completion_tokens"] + row["thinking_tokens"] for row in rows),
+            "cost_usd": sum(row["cost_usd"] for row in rows),
+        }
+
+
+_USAGE_LEDGER: UsageLedger | None = None
+_USAGE_LEDGER_LOCK = threading.Lock()
+
+
+def get_usage_ledger(path: str | None = None) -> UsageLedger:
+    """프로세스 단위로 공유하는 사용량 저장소"""
+    global _USAGE_LEDGER
+    with _USAGE_LEDGER_LOCK:
+        if _USAGE_LEDGER is None:
+            _USAGE_LEDGER = UsageLedger(path)
+        return _USAGE_LEDGER
+
+
+def record_usage(provider: str, model: str, usage: dict, latency: float = 0.0, method: str | None = None,
+                 tags: dict | None = None):
+    """사용량 기록 (기록 실패는 API 호출 결과에 영향을 주지 않도록 무시)"""
+    try:
+        get_usage_ledger().record(provider, model, usage, latency, method, tags)
+    except Exception:
+        pass
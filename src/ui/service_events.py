@@ -0,0 +1,66 @@
+"""
+서비스 이벤트 → Streamlit 화면 연결
+- streamlit_context(st): 세션 설정(모델/DB)을 담은 ServiceContext를 만들고, 서비스 이벤트를 화면에 표시
+- 이벤트가 스크립트 스레드가 아닌 워커 스레드에서 오면 스크립트 컨텍스트를 연결해서 표시
+"""
+import threading
+
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+
+from src.services.service_context import (
+    EVENT_DEBUG, EVENT_ERROR, EVENT_INFO, EVENT_RECORD, EVENT_STATE, EVENT_SUCCESS, EVENT_WARNING,
+    ServiceContext,
+)
+
+
+class StreamlitEventRenderer:
+    """ServiceEvent를 st.info / st.expander 등으로 표시하는 리스너"""
+
+    def __init__(self, st):
+        self.st = st
+        self._script_ctx = get_script_run_ctx(suppress_warning=True)
+
+    def _attach(self) -> bool:
+        if get_script_run_ctx(suppress_warning=True) is not None:
+            return True
+        if self._script_ctx is None:
+            return False
+        add_script_run_ctx(threading.current_thread(), self._script_ctx)
+        return True
+
+    def __call__(self, event):
+        if not self._attach():
+            return
+        st = self.st
+        if event.kind == EVENT_RECORD:
+            st.session_state.setdefault(event.message, []).append(event.data)
+        elif event.kind == EVENT_STATE:
+            st.session_state[event.message] = event.data.get("value")
+        elif event.kind == EVENT_DEBUG:
+            data = dict(event.data)
+            with st.expander(event.message, expanded=data.pop("expanded", False)):
+                json_value = data.pop("json", None)
+                code_value = data.pop("code", None)
+                for key, value in data.items():
+                    st.write(f"**{key}**: {value}")
+                if json_value is not None:
+                    st.json(json_value)
+                if code_value is not None:
+                    st.code(code_value)
+        elif event.kind in (EVENT_INFO, EVENT_SUCCESS, EVENT_WARNING, EVENT_ERROR):
+            getattr(st, event.kind)(event.message)
+
+
+def streamlit_context(st, **overrides) -> ServiceContext:
+    """현재 세션 설정으로 ServiceContext 생성 (이벤트는 화면에 표시)"""
+    session = st.session_state
+    settings = {
+        "model": session.get("selected_model", "gpt-5"),
+        "gemini_model": session.get("selected_gemini_model"),
+        "gemini_temperature": session.get("gemini_temperature"),
+        "db": session.get("db"),
+    }
+    settings.update(overrides)
+    context = ServiceContext(**settings)
+    context.subscribe(StreamlitEventRenderer(st))
+    return context
@@ -2,8 +2,12 @@ import streamlit as st
 from src.constants import DIFFICULTY_LEVELS
 from src.config import get_secret
 from src.prompts.ai_review_template import DEFAULT_AI_REVIEW_PROMPT
+from src.services.prompt_cache import get_prompt_cache
+from src.services.rate_limiter import call_with_limits, estimate_prompt_tokens
+from src.services.usage_ledger import openai_usage, record_usage
 import openai
 import json
+import time
 
 def render(st):
     
@@ -257,7 +261,7 @@ def perform_ai_review(question):
         if not api_key:
             return "❌ OpenAI API 키가 설정되지 않았습니다."
         
-        client = openai.OpenAI(api_key=api_key)
+        client = openai.OpenAI(api_key=api_key, max_retries=0)
         
         # 문제 정보 수집
         question_text = question.get("question") or question.get("question_text", "")
@@ -295,7 +299,7 @@ def perform_ai_review(question):
         # AI 검토 프롬프트를 DB에서 가져오기
         try:
             # Supabase에서 프롬프트 조회 (피드백용 프롬프트 ID 사용)
-            system_prompt = st.session_state.db.get_prompt_by_id("d98893e6-db7b-47f4-8f66-1a33e326a5be")
+            system_prompt = get_prompt_cache().get_prompt_by_id(st.session_state.db, "d98893e6-db7b-47f4-8f66-1a33e326a5be")
             if not system_prompt:
                 # DB에서 가져오지 못한 경우 기본 프롬프트 사용
                 system_prompt = DEFAULT_AI_REVIEW_PROMPT
@@ -305,14 +309,24 @@ def perform_ai_review(question):
         
         user_prompt = f"다음 문제를 검토해주세요:\n\n{problem_content}"
         
-        # AI 호출
-        response = client.chat.completions.create(
-            model=st.session_state.get("selected_model", "gpt-5"),
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_prompt}
-            ],
+        # AI 호출 (모델별 속도/동시 호출 제한 + 일시적 오류 재시도)
+        model = st.session_state.get("selected_model", "gpt-5")
+        started = time.monotonic()
+        response = call_with_limits(
+            "openai", model,
+            lambda: client.chat.completions.create(
+                model=model,
+                messages=[
+                    {"role": "system", "content": system_prompt},
+                    {"role": "user", "content": user_prompt}
+                ],
+            ),
+            estimate_prompt_tokens(system_prompt, user_prompt),
         )
+        record_usage("openai", getattr(response, "model", None) or model, openai_usage(response),
+                     time.monotonic() - started, "perform_ai_review",
+                     {"tab": "feedback", "area": question.get("area") or question.get("category"),
+                      "difficulty": question.get("difficulty")})
         
         return response.choices[0].message.content
         
@@ -1,8 +1,12 @@
+import os
 import streamlit as st
-import time
-import random
 import re
 from src.constants import ASSESSMENT_AREAS, DIFFICULTY_LEVELS, QUESTION_TYPES
+from src.services.job_runner import ACTIVE_STATUSES, JOB_CANCELLED, JOB_DONE, JOB_FAILED, get_job_runner
+from src.services.usage_ledger import get_usage_ledger
+
+# 백그라운드 작업 진행 상황 조회 주기(초)
+JOB_POLL_INTERVAL = float(os.getenv("JOB_POLL_INTERVAL", "2"))
 
 # 임시로 함수들을 직접 정의 (Streamlit Cloud 호환성)
 _KEY_PAT = re.compile(
@@ -214,194 +218,126 @@ def render(st):
             )
             st.session_state.auto_generate_total_count = total_count
             
+            # 동시에 실행할 OpenAI 호출 수
+            concurrency = st.number_input(
+                "동시 생성 수",
+                min_value=1,
+                max_value=10,
+                value=st.session_state.auto_generate_concurrency,
+                key="tab_auto_concurrency",
+                help="여러 문제를 병렬로 생성합니다. API 속도 제한에 걸리면 값을 줄이세요."
+            )
+            st.session_state.auto_generate_concurrency = concurrency
+            
             st.markdown("---")
             
-            # 버튼 영역
+            # 버튼 영역 (생성은 백그라운드 작업으로 실행되고, 화면은 진행 상황만 조회)
+            runner = get_job_runner()
+            job = current_job(st, runner)
+            job_active = job is not None and job["status"] in ACTIVE_STATUSES
+            
             col_btn1, col_btn2 = st.columns([1, 1])
             
             with col_btn1:
-                if st.button("🚀 자동생성 시작", use_container_width=True, type="primary", disabled=st.session_state.auto_generate_running, key="tab_auto_generate_start"):
-                    # 자동생성 시작
-                    st.session_state.auto_generate_running = True
-                    st.session_state.auto_generate_stop_requested = False
-                    st.session_state.auto_generated_questions = []
+                if st.button("🚀 자동생성 시작", use_container_width=True, type="primary", disabled=job_active, key="tab_auto_generate_start"):
+                    # 자동생성 작업 등록
+                    runner.attach(st.session_state.get("db"))
+                    st.session_state.auto_generate_job_id = runner.submit_generation({
+                        "area": selected_area,
+                        "difficulty": selected_difficulty,
+                        "question_type": selected_type,
+                        "additional_requirements": additional_requirements,
+                        "count": total_count,
+                        "concurrency": concurrency,
+                        "model": st.session_state.get("selected_model", "gpt-5"),
+                    })
                     st.rerun()
             
             with col_btn2:
-                if st.button("⏹️ 중지", use_container_width=True, type="secondary", disabled=not st.session_state.auto_generate_running, key="tab_auto_generate_stop"):
-                    # 중지 요청
-                    st.session_state.auto_generate_stop_requested = True
+                if st.button("⏹️ 중지", use_container_width=True, type="secondary", disabled=not job_active, key="tab_auto_generate_stop"):
+                    # 중지 요청 (진행 중인 호출이 끝나는 대로 중지)
+                    runner.cancel(job["id"])
                     st.rerun()
             
-            # 진행 상태 표시
-            if st.session_state.auto_generate_running:
-                progress = len(st.session_state.auto_generated_questions) / st.session_state.auto_generate_total_count
-                st.progress(progress)
-                st.caption(f"진행률: {len(st.session_state.auto_generated_questions)}/{st.session_state.auto_generate_total_count}")
-                
-                if st.session_state.auto_generate_stop_requested:
-                    st.warning("⏹️ 중지 요청됨 - 현재 문제 생성 완료 후 중지됩니다.")
+            if job is not None and job["status"] in (JOB_FAILED, JOB_CANCELLED) and job["completed"] < job["total"]:
+                if st.button("🔁 남은 문제 이어서 생성", use_container_width=True, key="tab_auto_generate_resume"):
+                    runner.attach(st.session_state.get("db"))
+                    runner.resume(job["id"])
+                    st.rerun()
+            
+            # 백그라운드 저장 상태 (outbox)
+            db = st.session_state.get("db")
+            if db is not None and hasattr(db, "status"):
+                db_status = db.status()
+                if db_status["pending_writes"] or db_status["failed_writes"]:
+                    st.caption(f"💾 저장 대기: {db_status['pending_writes']}건 / 재시도 한도 초과: {db_status['failed_writes']}건")
+                if db_status["failed_writes"]:
+                    with st.expander(f"⚠️ 저장 실패 {db_status['failed_writes']}건", expanded=False):
+                        for entry in db.outbox.failed(limit=20):
+                            st.caption(f"#{entry['id']} {entry['action']} · {entry['attempts']}회 시도 · "
+                                       f"{str(entry['last_error'] or '')[:200]}")
+                        if st.button("🔁 실패한 저장 다시 시도", key="tab_auto_generate_requeue_failed"):
+                            db.outbox.requeue_failed()
+                            db.flusher.wake()
+                            st.rerun()
         
         with col_right:
             inject_card_css()           # ✅ 한 번만
             st.markdown("### 📋 생성된 문제 목록")
             
-            # 생성된 문제 개수 표시
-            generated_count = len(st.session_state.auto_generated_questions)
-            total_count = st.session_state.auto_generate_total_count
-            
-            st.caption(f"생성 진행률: {generated_count}/{total_count}")
-            
-            if generated_count > 0:
-                st.markdown("---")
-                for i, q in enumerate(st.session_state.auto_generated_questions, 1):
-                    render_question_card(i, q)   # ✅ 여기 한 줄
-            
-            else:
-                st.info("아직 생성된 문제가 없습니다. 좌측에서 자동생성을 시작해보세요.")
-    
-    # 자동생성 로직 실행 - 한 개씩 생성
-    if st.session_state.auto_generate_running and not st.session_state.auto_generate_stop_requested:
-        if len(st.session_state.auto_generated_questions) < st.session_state.auto_generate_total_count:
-            # 한 개씩 문제 생성
-            current_count = len(st.session_state.auto_generated_questions) + 1
-            
-            with st.spinner(f"문제 생성 중... ({current_count}/{st.session_state.auto_generate_total_count})"):
-                generate_next_question(st, selected_area, selected_difficulty, selected_type, additional_requirements)
-                st.rerun()  # 한 개 생성 후 즉시 rerun
-        else:
-            # 모든 문제 생성 완료
-            st.session_state.auto_generate_running = False
-            st.success("🎉 모든 문제 생성이 완료되었습니다!")
-            st.rerun()
-    
-    elif st.session_state.auto_generate_stop_requested and st.session_state.auto_generate_running:
-        # 중지 처리
-        st.session_state.auto_generate_running = False
-        st.session_state.auto_generate_stop_requested = False
-        st.info("⏹️ 자동생성이 중지되었습니다.")
-        st.rerun()
+            # 작업이 진행 중일 때만 주기적으로 다시 그림 (페이지 전체가 아닌 이 영역만)
+            poll_interval = JOB_POLL_INTERVAL if job_active else None
+            st.fragment(run_every=poll_interval)(render_job_progress)(st, runner, job["id"] if job else None, job_active)
+
 
+def current_job(st, runner):
+    """이 세션에서 시작한 작업 (없으면 가장 최근 자동생성 작업 - 새로고침/재시작 후에도 이어서 표시)"""
+    job_id = st.session_state.get("auto_generate_job_id")
+    job = runner.store.get_job(job_id) if job_id else None
+    if job is None:
+        job = runner.store.latest_job("generate")
+        if job is not None:
+            st.session_state.auto_generate_job_id = job["id"]
+    return job
 
-def generate_next_question(st, selected_area, selected_difficulty, selected_type, additional_requirements):
-    """다음 문제를 생성하는 함수"""
+
+def render_job_progress(st, runner, job_id, was_active):
+    """작업 진행률과 생성된 문제 목록 표시 (fragment로 주기적 갱신)"""
+    job = runner.store.get_job(job_id) if job_id else None
+    if job is None:
+        st.info("아직 생성된 문제가 없습니다. 좌측에서 자동생성을 시작해보세요.")
+        return
     
-    try:
-        # 랜덤 선택 처리
-        area = selected_area
-        if area == "랜덤":
-            area = random.choice(list(ASSESSMENT_AREAS.keys()))
-        
-        difficulty = selected_difficulty
-        if difficulty == "랜덤":
-            difficulty = random.choice(list(DIFFICULTY_LEVELS.keys()))
-        
-        question_type = selected_type
-        if question_type == "랜덤":
-            question_type = random.choice(list(QUESTION_TYPES.keys()))
-        
-        # AI 생성기로 문제 생성
-        generator = st.session_state.get("generator")
-        if not generator:
-            st.error("AI 생성기가 초기화되지 않았습니다. 설정 탭에서 API 키를 확인해주세요.")
-            st.session_state.auto_generate_running = False
-            return
-        
-        # 디버깅: 메서드 존재 여부 확인
-        if not hasattr(generator, 'generate_with_ai'):
-            st.error(f"❌ generate_with_ai 메서드가 없습니다. 사용 가능한 메서드: {[method for method in dir(generator) if not method.startswith('_')]}")
-            st.session_state.auto_generate_running = False
-            return
-        
-        # 문제 생성
-        try:
-            result = generator.generate_with_ai(
-                area=area,
-                difficulty=difficulty,
-                question_type=question_type,
-                user_prompt_extra="",
-                system_prompt_extra=additional_requirements or ""
-            )
-        except Exception as api_error:
-            st.error(f"❌ OpenAI API 호출 실패: {str(api_error)}")
-            st.error(f"에러 타입: {type(api_error).__name__}")
-            if hasattr(api_error, 'response'):
-                st.error(f"응답 상태: {api_error.response.status_code if hasattr(api_error.response, 'status_code') else 'N/A'}")
-                st.error(f"응답 내용: {api_error.response.text if hasattr(api_error.response, 'text') else 'N/A'}")
-            st.session_state.auto_generate_running = False
-            return
-        
-        if result:
-            # 생성된 문제를 DB에 저장 (문제 타입에 따라 적절한 테이블에 저장)
-            try:
-                db = st.session_state.get("db")
-                if db:
-                    question_type = result.get("type", "subjective")
-                    
-                    # 저장 전 상세 로그
-                    st.info("🔍 데이터베이스 저장 전 데이터 검증:")
-                    st.info(f"  문제 유형: {question_type}")
-                    st.info(f"  전체 데이터 키: {list(result.keys())}")
-                    
-                    # 각 필드별 상세 검증
-                    for key, value in result.items():
-                        st.info(f"  {key}: {value} (타입: {type(value)})")
-                        if key == "steps" and isinstance(value, list):
-                            st.info(f"    steps 길이: {len(value)}")
-                            if len(value) > 0:
-                                st.info(f"    첫 번째 step: {value[0]}")
-                    
-                    if question_type == "multiple_choice":
-                        # 객관식 문제는 questions_multiple_choice 테이블에 저장
-                        st.info("📝 객관식 문제 저장 시도 중...")
-                        try:
-                            save_result = db.save_multiple_choice_question(result)
-                            st.info(f"📝 저장 결과: {save_result}")
-                            if save_result:
-                                st.success("✅ 객관식 문제 저장 성공!")
-                            else:
-                                st.error("❌ 객관식 문제 저장 실패!")
-                        except Exception as save_error:
-                            st.error(f"❌ 객관식 문제 저장 중 오류: {save_error}")
-                    else:
-                        # 주관식 문제는 questions_subjective 테이블에 저장
-                        st.info("📝 주관식 문제 저장 시도 중...")
-                        try:
-                            save_result = db.save_subjective_question(result)
-                            st.info(f"📝 저장 결과: {save_result}")
-                            if save_result:
-                                st.success("✅ 주관식 문제 저장 성공!")
-                            else:
-                                st.error("❌ 주관식 문제 저장 실패!")
-                        except Exception as save_error:
-                            st.error(f"❌ 주관식 문제 저장 중 오류: {save_error}")
-                else:
-                    st.warning("⚠️ DB 연결이 없어 문제를 저장할 수 없습니다.")
-            except Exception as e:
-                st.error(f"❌ DB 저장 실패: {str(e)}")
-            
-            # 생성된 문제 정보 정리
-            question_title = result.get("title") or result.get("question") or "제목 없음"
-            clean_title = sanitize_title(question_title)
-            question_info = {
-                "title": clean_title,
-                "task": result.get("task", ""),
-                "category": area,
-                "difficulty": difficulty,
-                "type": question_type,
-                "saved_to_db": True
-            }
-            
-            st.session_state.auto_generated_questions.append(question_info)
-            
-            # 한 개씩 생성하므로 rerun은 메인 로직에서 처리
-            
+    # 작업이 끝나면 버튼 상태를 갱신하기 위해 전체 rerun
+    if was_active and job["status"] not in ACTIVE_STATUSES:
+        st.rerun()
+    
+    completed, total = job["completed"], job["total"]
+    st.progress(min(1.0, completed / total) if total else 0.0)
+    usage = get_usage_ledger().totals(days=None, job_id=job["id"])
+    st.caption(f"생성 진행률: {completed}/{total} (실패 {job['failed']}건) · "
+               f"토큰 {usage['tokens']:,} · 비용 ${usage['cost_usd']:,.4f}")
+    
+    if job["status"] in ACTIVE_STATUSES:
+        if job["cancel_requested"]:
+            st.warning("⏹️ 중지 요청됨 - 진행 중인 문제 생성 완료 후 중지됩니다.")
         else:
-            st.error("문제 생성 실패: 알 수 없는 오류")
-            st.session_state.auto_generate_running = False
+            st.caption(f"⏳ 백그라운드에서 생성 중 (동시 {job['spec'].get('concurrency', 1)}개) - 탭을 닫아도 계속 진행됩니다.")
+    elif job["status"] == JOB_DONE:
+        st.success("🎉 모든 문제 생성이 완료되었습니다!")
+    elif job["status"] == JOB_CANCELLED:
+        st.warning("⏹️ 자동생성이 중지되었습니다.")
+    elif job["status"] == JOB_FAILED:
+        st.error(f"❌ 자동생성 실패: {job['error']}")
     
-    except Exception as e:
-        st.error(f"문제 생성 중 오류 발생: {str(e)}")
-        st.session_state.auto_generate_running = False
-
-
+    errors = runner.store.errors(job["id"])
+    if errors:
+        with st.expander(f"실패한 생성 ({job['failed']}건)"):
+            for error in errors:
+                st.write(f"- {error}")
+    
+    questions = runner.store.results(job["id"])
+    if questions:
+        st.markdown("---")
+        for i, q in enumerate(questions, 1):
+            render_question_card(i, {**q, "title": sanitize_title(q.get("title"))})
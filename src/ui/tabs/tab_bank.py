@@ -1,5 +1,9 @@
 import streamlit as st
 from src.constants import ASSESSMENT_AREAS, DIFFICULTY_LEVELS, QUESTION_TYPES
+from src.services.bank_cache import editable_copy, get_bank_questions, normalize_question
+from src.services.local_db import get_local_replica
+from src.services.edge_client import MULTIPLE_CHOICE_SUMMARY_FIELDS, SUBJECTIVE_SUMMARY_FIELDS
+import os
 import time
 import json
 from functools import lru_cache
@@ -44,50 +48,82 @@ def _steps_text_for_search(steps):
                     bucket.append(str(opt['text']))
     return " ".join(bucket).lower()
 
+# 첫 화면에서 한 번에 불러올 문제 수 (전체 은행을 내려받지 않음)
+BANK_PAGE_SIZE = 20
+
+def iter_bank_pages(db, page_size=BANK_PAGE_SIZE):
+    """객관식 → 주관식 순으로 문제 요약 페이지를 지연 조회하는 제너레이터"""
+    sources = (
+        ('multiple_choice', db.iter_multiple_choice_question_pages({}, page_size, fields=MULTIPLE_CHOICE_SUMMARY_FIELDS)),
+        ('subjective', db.iter_subjective_question_pages({}, page_size, fields=SUBJECTIVE_SUMMARY_FIELDS)),
+    )
+    for question_type, pages in sources:
+        for page in pages:
+            for q in page:
+                q['summary_only'] = True  # 선택 시 전체 레코드를 조회해야 함
+            yield [normalize_question(q, question_type) for q in page]
+
+def load_full_question(q):
+    """요약 레코드라면 전체 레코드를 조회하여 목록의 항목을 교체 (공유 저장소의 뷰는 복사본 반환)"""
+    if not q.get('summary_only'):
+        return editable_copy(q)
+    try:
+        full = st.session_state.db.get_question_by_id(q['id'], q['type'])
+    except Exception as e:
+        st.error(f"문제 상세 조회 실패: {e}")
+        return q
+    if not full:
+        return q
+    full = normalize_question(full, q['type'])
+    st.session_state.filtered_questions = [
+        full if item.get('id') == full.get('id') else item
+        for item in st.session_state.get("filtered_questions", [])
+    ]
+    return full
+
+def load_next_bank_page():
+    """세션의 페이지 제너레이터에서 다음 페이지를 받아 목록에 추가"""
+    pages = st.session_state.get("bank_page_iter")
+    if pages is None:
+        return
+    try:
+        page = next(pages)
+    except StopIteration:
+        page = None
+    except Exception as e:
+        st.error(f"문제 조회 실패: {e}")
+        page = None
+    if page is None:
+        st.session_state.bank_page_iter = None
+        return
+    st.session_state.filtered_questions = st.session_state.get("filtered_questions", []) + page
+
 # 캐시 설정
-@st.cache_data(ttl=300)  # 5분 캐시
-def get_cached_questions(filters_hash, data_version):
-    """캐시된 문제 목록 조회 - 새로운 테이블들에서 통합 조회 (버전 기반 캐시 무효화)"""
+def get_all_bank_questions(force=False):
+    """프로세스 공유 문제 은행에서 전체 문제 목록(읽기 전용 뷰) 조회"""
     try:
-        # 객관식과 주관식 문제를 모두 조회하여 통합
-        multiple_choice_questions = st.session_state.db.get_multiple_choice_questions({})
-        subjective_questions = st.session_state.db.get_subjective_questions({})
-        
-        # 두 리스트를 통합하고 호환성을 위해 기존 형식으로 변환
-        all_questions = []
-        
-        # 객관식 문제 추가
-        for q in multiple_choice_questions:
-            q['type'] = 'multiple_choice'  # 타입 명시
-            q['question_type'] = '객관식'  # 한국어 타입명
-            # title 필드 통일 (problem_title -> title)
-            if 'problem_title' in q:
-                q['title'] = q['problem_title']
-            # ✅ steps 정규화 (JSON 문자열 -> 리스트 변환)
-            q['steps'] = _parse_json_field(q.get('steps'), default_if_empty=[])
-            # area 필드가 있다면 제거 (새로운 구조에서는 사용하지 않음)
-            if 'area' in q:
-                del q['area']
-            all_questions.append(q)
-        
-        # 주관식 문제 추가
-        for q in subjective_questions:
-            q['type'] = 'subjective'  # 타입 명시
-            q['question_type'] = '주관식'  # 한국어 타입명
-            # area 필드가 있다면 제거 (새로운 구조에서는 사용하지 않음)
-            if 'area' in q:
-                del q['area']
-            all_questions.append(q)
-        
-        return all_questions
+        return get_bank_questions(st.session_state.db, force=force)
     except Exception as e:
         st.error(f"문제 조회 실패: {e}")
         # 기존 방식으로 폴백
         return st.session_state.db.get_questions({})
 
-def get_questions_hash(filters):
-    """필터를 해시로 변환하여 캐시 키 생성"""
-    return hash(str(sorted(filters.items())))
+# 로컬 복제본 버전 확인 주기 (공유 문제 은행과 동일)
+REPLICA_SYNC_INTERVAL = float(os.getenv("BANK_VERSION_CHECK_INTERVAL", "30"))
+
+def search_bank_questions(filters, search_text="", force_sync=False):
+    """로컬 SQLite 복제본에서 필터/검색 (데이터 버전이 바뀐 경우에만 변경분 동기화)"""
+    replica = get_local_replica()
+    try:
+        replica.sync(st.session_state.db, min_interval=REPLICA_SYNC_INTERVAL, force=force_sync)
+    except Exception as e:
+        if not replica.version:
+            # 복제본이 비어 있으면 공유 문제 은행 + 클라이언트 필터링으로 폴백
+            return filter_questions_cached(get_all_bank_questions(), filters, search_text)
+        st.warning(f"로컬 복제본 동기화 실패 (마지막 동기화 데이터로 검색합니다): {e}")
+    rows = replica.search_questions(search_text, filters)
+    # 비활성(소프트 삭제) 문제는 제외
+    return [normalize_question(q, q["type"]) for q in rows if q.get("active") is not False]
 
 def filter_questions_cached(questions, filters, search_text=""):
     """클라이언트 측에서 문제 필터링"""
@@ -155,16 +191,12 @@ def render(st):
                 if f_type != "전체": 
                     filters["type"] = f_type
                 
-                # 캐시된 전체 문제 목록 가져오기 (버전 기반 캐시)
+                # 로컬 복제본에서 검색 (버전이 바뀐 경우 변경분만 동기화)
                 with st.spinner("검색 중..."):
-                    # DB 최신 버전 토큰 조회
-                    data_version = st.session_state.db.get_questions_data_version()
-                    all_questions = get_cached_questions(get_questions_hash(filters), data_version)
-                    
-                    # 클라이언트 측에서 필터링 (성능 개선)
-                    questions = filter_questions_cached(all_questions, filters, search_text)
+                    questions = search_bank_questions(filters, search_text)
                 
                 st.session_state.filtered_questions = questions
+                st.session_state.bank_page_iter = None  # 검색 결과는 전체 목록 기준
                 st.session_state.current_filters = filters
                 st.session_state.current_page = 1  # 검색 시 첫 페이지로 리셋
                 st.session_state.selected_question_id = None  # 검색 시 선택 초기화
@@ -173,6 +205,13 @@ def render(st):
         with col_refresh:
             if st.button("🔄", use_container_width=True, key="bank_refresh_v2", help="캐시 새로고침"):
                 st.cache_data.clear()
+                get_all_bank_questions(force=True)  # 공유 저장소는 변경분만 즉시 반영
+                try:
+                    get_local_replica().sync(st.session_state.db, force=True)
+                except Exception as e:
+                    st.warning(f"로컬 복제본 동기화 실패: {e}")
+                st.session_state.filtered_questions = []
+                st.session_state.bank_page_iter = None
                 st.rerun()
     
     # 초기 로드 시 전체 문제 표시 (캐시 활용)
@@ -181,10 +220,11 @@ def render(st):
             st.error("데이터베이스 연결이 초기화되지 않았습니다. Edge Function 설정을 확인하세요.")
             st.session_state.filtered_questions = []
         else:
-            # 캐시된 데이터 사용 (버전 기반 캐시)
+            # 첫 페이지만 먼저 조회 (나머지는 "더 불러오기"로 지연 조회)
             with st.spinner("문제 목록을 불러오는 중..."):
-                data_version = st.session_state.db.get_questions_data_version()
-                st.session_state.filtered_questions = get_cached_questions(get_questions_hash({}), data_version)
+                st.session_state.filtered_questions = []
+                st.session_state.bank_page_iter = iter_bank_pages(st.session_state.db)
+                load_next_bank_page()
 
     # 좌우 분할 레이아웃
     col_left, col_right = st.columns([1, 2])
@@ -201,7 +241,12 @@ def render(st):
             st.session_state.filtered_questions = qs
         
         if qs:
-            st.markdown(f"**총 {len(qs)}개 문제**")
+            has_more = st.session_state.get("bank_page_iter") is not None
+            st.markdown(f"**총 {len(qs)}개 문제**" + (" (더 있음)" if has_more else ""))
+            if has_more and st.button("📥 더 불러오기", use_container_width=True, key="bank_load_more"):
+                with st.spinner("다음 페이지를 불러오는 중..."):
+                    load_next_bank_page()
+                st.rerun()
             
             # 페이지네이션 설정
             items_per_page = 20
@@ -234,9 +279,12 @@ def render(st):
                 difficulty = q.get("difficulty", "N/A")
                 question_type = q.get("question_type", "N/A")
                 
-                # steps 데이터 유무 표시 (보수적 처리)
-                steps = _parse_json_field(q.get("steps"), default_if_empty=[])
-                steps_indicator = "📋" if steps and len(steps) > 0 else "📄"
+                # steps 데이터 유무 표시 (보수적 처리, 요약 레코드는 상세 조회 전이라 표시 생략)
+                if q.get("summary_only"):
+                    steps_indicator = "📝"
+                else:
+                    steps = _parse_json_field(q.get("steps"), default_if_empty=[])
+                    steps_indicator = "📋" if steps and len(steps) > 0 else "📄"
                 
                 display_text = f"{steps_indicator} {title} ({difficulty})-{question_type}"
                 question_options[display_text] = q
@@ -259,7 +307,7 @@ def render(st):
             
             # 선택된 문제를 세션 상태에 저장
             if selected_display and selected_display in question_options:
-                selected_q = question_options[selected_display]
+                selected_q = load_full_question(question_options[selected_display])
                 st.session_state.selected_question_id = selected_q["id"]
                 st.session_state.selected_question = selected_q
         else:
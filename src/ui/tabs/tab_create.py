@@ -2,6 +2,8 @@ import random
 from datetime import datetime
 import streamlit as st
 from src.constants import ASSESSMENT_AREAS, DIFFICULTY_LEVELS, QUESTION_TYPES
+from src.prompts.prompt_assembly import assemble_generation_prompt, prompt_stats
+from src.ui.service_events import streamlit_context
 # 탭 상태 관리 코드 제거
 
 
@@ -32,7 +34,8 @@ def render(st):
                 if st.session_state.db is None:
                     st.error("데이터베이스 연결이 초기화되지 않았습니다. Edge Function 설정을 확인하세요.")
                     return
-                q = st.session_state.generator.generate_with_ai(area, difficulty, qtype, user_prompt, system_prompt)
+                q = st.session_state.generator.generate_with_ai(area, difficulty, qtype, user_prompt, system_prompt,
+                                                                 context=streamlit_context(st, tags={"tab": "create"}))
                 if q:
                     # 문제 타입에 따라 적절한 테이블에 저장
                     question_type = q.get("type", "subjective")
@@ -89,23 +92,28 @@ def render(st):
             db_system_prompt, db_user_prompt = generator._get_prompts_from_db(
                 st.session_state.current_area, 
                 st.session_state.current_difficulty, 
-                st.session_state.current_qtype
+                st.session_state.current_qtype,
+                context=streamlit_context(st),
             )
             
-            if db_system_prompt:
-                # 데이터베이스 시스템 프롬프트에 난이도 기준 추가
-                base_system_prompt = db_system_prompt + "\n\n" + generator._build_system_prompt().split("난이도별 평가 기준:")[1]
+            # 실제 생성과 같은 방식으로 조립
+            full_system_prompt, full_user_prompt = assemble_generation_prompt(
+                st.session_state.current_area,
+                st.session_state.current_difficulty,
+                st.session_state.current_qtype,
+                db_system_prompt, db_user_prompt,
+                user_prompt_extra=st.session_state.current_user_prompt or "",
+                system_prompt_extra=st.session_state.current_system_prompt or "",
+            )
+            if db_system_prompt and db_user_prompt:
                 st.caption("📋 데이터베이스 프롬프트 사용")
             else:
-                base_system_prompt = generator._build_system_prompt()
                 st.caption("📝 기본 프롬프트 사용")
-            
-            # 시스템 프롬프트 구성: 기본 프롬프트 + 사용자 프롬프트 (사용자 프롬프트가 있으면)
             if st.session_state.current_system_prompt:
-                full_system_prompt = base_system_prompt + "\n\n[사용자 추가 시스템 요구사항]\n" + st.session_state.current_system_prompt
                 st.caption("🎯 기본 프롬프트 + 사용자 시스템 프롬프트 적용")
-            else:
-                full_system_prompt = base_system_prompt
+            stats = prompt_stats(full_system_prompt, full_user_prompt)
+            st.caption(f"📏 프롬프트 크기: System {stats['system_chars']:,}자 / User {stats['user_chars']:,}자 "
+                       f"(약 {stats['estimated_tokens']:,} 토큰)")
             
             # 프롬프트 표시용 CSS 추가
             st.markdown("""
@@ -129,26 +137,6 @@ def render(st):
             
             # User 프롬프트 표시
             st.markdown("### 👤 User 프롬프트")
-            if db_user_prompt:
-                # 데이터베이스 user 프롬프트에 사용자 시스템 프롬프트를 context로 추가
-                if st.session_state.current_system_prompt:
-                    base_user_prompt = db_user_prompt + f"\n\n사용자 추가 요구사항: {st.session_state.current_system_prompt}"
-                else:
-                    base_user_prompt = db_user_prompt
-            else:
-                base_user_prompt = generator._build_user_prompt(
-                    st.session_state.current_area, 
-                    st.session_state.current_difficulty, 
-                    st.session_state.current_qtype, 
-                    st.session_state.current_system_prompt
-                )
-            
-            # 사용자 추가 입력이 있으면 붙여서 표시
-            if st.session_state.current_user_prompt:
-                full_user_prompt = base_user_prompt + "\n\n[사용자 추가 요구사항]\n" + st.session_state.current_user_prompt
-            else:
-                full_user_prompt = base_user_prompt
-            
             st.code(full_user_prompt, language="text")
         
         # 일반 문제 미리보기 모드
@@ -3,49 +3,36 @@ import plotly.express as px
 import plotly.graph_objects as go
 import streamlit as st
 from functools import lru_cache
+from src.services.async_edge_client import fetch_concurrently
+from src.services.bank_cache import get_bank_questions
+from src.services.usage_ledger import get_usage_ledger
+
+@st.cache_data(ttl=60)  # 1분 캐시
+def get_cached_dashboard_counts():
+    """피드백/조정 수를 동시에 조회 (실패는 예외 메시지로 전달하여 화면에서 "오류" 표시)"""
+    results = fetch_concurrently(st.session_state.db, {
+        "feedback_count": ("count_feedback",),
+        "adjustments_count": ("count_adjustments",),
+    })
+    return {key: (str(value) if isinstance(value, Exception) else value) for key, value in results.items()}
 
-@st.cache_data(ttl=300)  # 5분 캐시
 def get_cached_dashboard_data():
-    """대시보드 데이터 캐시 - 새로운 테이블들에서 통합 조회"""
+    """대시보드 데이터 - 문제 목록은 프로세스 공유 문제 은행, 카운트는 1분 캐시"""
     try:
-        # 객관식과 주관식 문제를 모두 조회하여 통합
-        multiple_choice_questions = st.session_state.db.get_multiple_choice_questions({})
-        subjective_questions = st.session_state.db.get_subjective_questions({})
-        
-        # 두 리스트를 통합하고 호환성을 위해 기존 형식으로 변환
-        all_questions = []
-        
-        # 객관식 문제 추가
-        for q in multiple_choice_questions:
-            q['type'] = 'multiple_choice'  # 타입 명시
-            all_questions.append(q)
-        
-        # 주관식 문제 추가
-        for q in subjective_questions:
-            q['type'] = 'subjective'  # 타입 명시
-            all_questions.append(q)
-        
-        return all_questions
+        all_questions = get_bank_questions(st.session_state.db)
     except Exception as e:
         st.error(f"문제 조회 실패: {e}")
         # 기존 방식으로 폴백
-        return st.session_state.db.get_questions()
-
-@st.cache_data(ttl=60)  # 1분 캐시
-def get_cached_feedback_count():
-    """피드백 수 캐시"""
-    return st.session_state.db.count_feedback()
-
-@st.cache_data(ttl=60)  # 1분 캐시
-def get_cached_adjustments_count():
-    """조정 수 캐시"""
-    return st.session_state.db.count_adjustments()
+        all_questions = st.session_state.db.get_questions()
+    
+    return {"questions": all_questions, **get_cached_dashboard_counts()}
 
 def render(st):
     try:
         with st.spinner("데이터를 불러오는 중..."):
-            # 캐시된 데이터 사용
-            all_q = get_cached_dashboard_data()
+            # 캐시된 데이터 사용 (문제 목록과 카운트를 한 번에 동시 조회)
+            dashboard_data = get_cached_dashboard_data()
+            all_q = dashboard_data["questions"]
         
         if not all_q:
             st.info("데이터가 없습니다.")
@@ -56,17 +43,19 @@ def render(st):
         with c2: st.metric("AI 생성", sum(1 for q in all_q if q.get("ai_generated", False)))
         
         # 피드백과 조정 수는 캐시된 데이터 사용
-        try:
-            with c3: st.metric("총 피드백", get_cached_feedback_count())
-        except Exception as e:
+        feedback_count = dashboard_data["feedback_count"]
+        if isinstance(feedback_count, int):
+            with c3: st.metric("총 피드백", feedback_count)
+        else:
             with c3: st.metric("총 피드백", "오류")
-            st.caption(f"피드백 조회 오류: {e}")
+            st.caption(f"피드백 조회 오류: {feedback_count}")
             
-        try:
-            with c4: st.metric("난이도 조정", get_cached_adjustments_count())
-        except Exception as e:
+        adjustments_count = dashboard_data["adjustments_count"]
+        if isinstance(adjustments_count, int):
+            with c4: st.metric("난이도 조정", adjustments_count)
+        else:
             with c4: st.metric("난이도 조정", "오류")
-            st.caption(f"조정 수 조회 오류: {e}")
+            st.caption(f"조정 수 조회 오류: {adjustments_count}")
             
     except Exception as e:
         st.error(f"❌ 데이터 로딩 중 오류가 발생했습니다: {str(e)}")
@@ -96,21 +85,23 @@ def render(st):
 
     # 피드백 분석 (샘플 20개만, 캐시 활용)
     @st.cache_data(ttl=300)  # 5분 캐시
-    def get_cached_feedback_analysis(sample_questions):
+    def get_cached_feedback_analysis(sample_ids):
         """피드백 분석 데이터 캐시"""
         rows = []
-        for q in sample_questions:
-            try:
-                s = st.session_state.db.get_feedback_stats(q["id"])
-                if s:
-                    rows.append({
-                        "question_id": q["id"][:10]+"...", 
-                        "difficulty": s["avg_difficulty"], 
-                        "relevance": s["avg_relevance"], 
-                        "clarity": s["avg_clarity"]
-                    })
-            except Exception as e:
-                continue
+        # 샘플 문제들의 통계를 batch 요청 한 번으로 조회
+        try:
+            all_stats = st.session_state.db.get_feedback_stats_many(list(sample_ids))
+        except Exception:
+            return rows
+        for question_id in sample_ids:
+            s = all_stats.get(question_id)
+            if s:
+                rows.append({
+                    "question_id": question_id[:10]+"...", 
+                    "difficulty": s["avg_difficulty"], 
+                    "relevance": s["avg_relevance"], 
+                    "clarity": s["avg_clarity"]
+                })
         return rows
     
     try:
@@ -118,7 +109,7 @@ def render(st):
         sample_questions = all_q[:20]  # 샘플 크기 제한
         
         # 캐시된 피드백 분석 데이터 사용
-        rows = get_cached_feedback_analysis(sample_questions)
+        rows = get_cached_feedback_analysis(tuple(q["id"] for q in sample_questions))
         
         if rows:
             dff = pd.DataFrame(rows)
@@ -133,3 +124,45 @@ def render(st):
             
     except Exception as e:
         st.error(f"피드백 분석 중 오류: {e}")
+
+    render_usage(st)
+
+
+# LLM 사용량 집계 기준 (표시 이름 -> usage_ledger 컬럼)
+USAGE_GROUPS = {"날짜": "day", "작업": "job_id", "화면": "tab", "평가 영역": "area", "난이도": "difficulty", "모델": "model"}
+
+
+def render_usage(st):
+    """LLM 토큰 사용량/비용 (로컬 사용량 기록 기준)"""
+    try:
+        st.markdown("### LLM 사용량 / 비용")
+        c1, c2 = st.columns([1, 1])
+        with c1:
+            days = st.selectbox("기간", options=[1, 7, 30, 90], index=2, format_func=lambda d: f"최근 {d}일",
+                                key="usage_days")
+        with c2:
+            group_label = st.selectbox("집계 기준", options=list(USAGE_GROUPS), key="usage_group_by")
+
+        ledger = get_usage_ledger()
+        totals = ledger.totals(days)
+        m1, m2, m3 = st.columns(3)
+        with m1: st.metric("API 호출", f"{totals['calls']:,}")
+        with m2: st.metric("토큰", f"{totals['tokens']:,}")
+        with m3: st.metric("비용 (USD)", f"${totals['cost_usd']:,.4f}")
+
+        rows = ledger.summary(USAGE_GROUPS[group_label], days)
+        if not rows:
+            st.info("기록된 LLM 사용량이 없습니다.")
+            return
+
+        dfu = pd.DataFrame(rows).rename(columns={
+            "key": group_label, "calls": "호출 수", "prompt_tokens": "입력 토큰", "completion_tokens": "출력 토큰",
+            "thinking_tokens": "thinking 토큰", "cost_usd": "비용 (USD)", "avg_latency_ms": "평균 지연 (ms)",
+        })
+        dfu["평균 지연 (ms)"] = dfu["평균 지연 (ms)"].round(0)
+        dfu["비용 (USD)"] = dfu["비용 (USD)"].round(4)
+        st.plotly_chart(px.bar(dfu, x=group_label, y="비용 (USD)", title=f"{group_label}별 비용"),
+                        use_container_width=True)
+        st.dataframe(dfu, use_container_width=True, hide_index=True)
+    except Exception as e:
+        st.error(f"사용량 집계 중 오류: {e}")
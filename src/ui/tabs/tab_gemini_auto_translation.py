@@ -1,10 +1,17 @@
 """
 제미나이 자동 번역 탭
 """
-from src.services.translation_service import TranslationService
+from src.services.batch_checkpoint import BATCH_TRANSLATION, get_checkpoint_store
+from src.services.service_context import ServiceContext
+from src.services.translation_service import (
+    DEFAULT_TRANSLATION_CONCURRENCY, TranslationBatch, TranslationService, get_active_translation,
+)
 from src.services.gemini_client import GeminiClient
+from src.ui.service_events import streamlit_context
 from src.constants import ASSESSMENT_AREAS
-import time
+
+# 화면에서 번역 진행 상황을 다시 그리는 주기(초)
+TRANSLATION_POLL_INTERVAL = 1.0
 
 def render(st):
     """제미나이 자동 번역 탭 렌더링"""
@@ -16,12 +23,6 @@ def render(st):
         st.session_state.auto_translation_running = False
     if "auto_translation_selected" not in st.session_state:
         st.session_state.auto_translation_selected = []
-    if "auto_translation_results" not in st.session_state:
-        st.session_state.auto_translation_results = []
-    if "auto_translation_errors" not in st.session_state:
-        st.session_state.auto_translation_errors = []
-    if "auto_translation_current" not in st.session_state:
-        st.session_state.auto_translation_current = 0
     
     # 세션 상태에서 DB 클라이언트 가져오기
     db = st.session_state.get("db")
@@ -32,7 +33,7 @@ def render(st):
     
     # 제미나이 API 사용 가능 여부 확인
     try:
-        gemini_client = GeminiClient()
+        gemini_client = GeminiClient.from_context(streamlit_context(st))
         if not gemini_client.is_available():
             st.error("❌ 제미나이 API 키가 설정되지 않았습니다")
             return
@@ -40,13 +41,10 @@ def render(st):
         st.error(f"❌ 제미나이 클라이언트 초기화 실패: {str(e)}")
         return
     
-    # 번역 서비스 초기화
-    try:
-        gemini_client = GeminiClient()
-        translation_service = TranslationService(gemini_client, st.session_state.db)
-    except Exception as e:
-        st.error(f"❌ 번역 서비스 초기화 실패: {str(e)}")
-        return
+    # 새로고침/재시작으로 중단된 번역 배치 이어서 실행
+    checkpoint = get_checkpoint_store()
+    if not st.session_state.auto_translation_running:
+        render_unfinished_batch(st, checkpoint)
     
     # 필터 섹션
     st.markdown("---")
@@ -148,15 +146,16 @@ def render(st):
             st.info(f"📌 {selected_count}개의 문제가 선택되었습니다")
             
             if not st.session_state.auto_translation_running:
+                st.number_input("동시 번역 수", min_value=1, max_value=16, value=DEFAULT_TRANSLATION_CONCURRENCY,
+                                key="auto_translation_concurrency",
+                                help="동시에 보낼 Gemini 번역 요청 수 (저장은 번역과 겹쳐서 진행)")
                 if st.button(
                     f"🚀 선택한 {selected_count}개 문제 번역 시작",
                     key="start_auto_translation",
                     type="primary"
                 ):
+                    st.session_state.pop("auto_translation_job", None)
                     st.session_state.auto_translation_running = True
-                    st.session_state.auto_translation_results = []
-                    st.session_state.auto_translation_errors = []
-                    st.session_state.auto_translation_current = 0
                     st.rerun()
         
         st.markdown("---")
@@ -190,133 +189,24 @@ def render(st):
                     f"({problem.get('difficulty', 'N/A')})"
                 )
         
-        # 번역 진행 중
+        # 번역 진행 중 (번역은 백그라운드 스레드에서 진행, 화면은 진행 상황만 조회)
         if st.session_state.auto_translation_running:
             st.markdown("---")
-            st.subheader("⚙️ 번역 진행 중...")
-            
-            # 진행 상태 표시
-            progress_bar = st.progress(0)
-            status_text = st.empty()
-            
-            # 선택된 문제들 필터링 (유효한 인덱스만)
-            valid_indices = [i for i in st.session_state.auto_translation_selected if i < len(problems)]
-            selected_problems = [problems[i] for i in valid_indices]
-            total_count = len(selected_problems)
-            current_index = st.session_state.get("auto_translation_current", 0)
-            
-            # 진행 상태 정보 표시
-            st.info(f"📊 총 {total_count}개 문제 중 {current_index + 1}번째 번역 중...")
-            
-            # 번역 진행
-            if current_index < total_count:
-                problem = selected_problems[current_index]
-                
-                try:
-                    # 진행 상태 업데이트
-                    progress = (current_index) / total_count
-                    progress_bar.progress(progress)
-                    status_text.markdown(
-                        f"**번역 중: {current_index + 1}/{total_count}** - "
-                        f"{problem.get('title', 'Unknown')[:50]}..."
-                    )
-                    
-                    # 문제 번역 및 저장 (i18n 테이블에 저장하고 상태 업데이트)
-                    try:
-                        # 디버깅 콜백 함수 정의
-                        def debug_callback(debug_info):
-                            # 현재 문제의 디버깅 정보를 상태에 저장
-                            if "auto_translation_debug" not in st.session_state:
-                                st.session_state.auto_translation_debug = {}
-                            st.session_state.auto_translation_debug[problem.get("id")] = debug_info
-                        
-                        translated_problem = translation_service.translate_and_save_problem(problem, debug_callback)
-                        
-                        if translated_problem:
-                            # 성공 결과 저장
-                            st.session_state.auto_translation_results.append({
-                                "problem_id": problem.get("id"),
-                                "title": problem.get("title"),
-                                "translated_title": translated_problem.get("title", ""),
-                                "status": "success"
-                            })
-                        else:
-                            # 번역 실패
-                            st.session_state.auto_translation_errors.append({
-                                "problem_id": problem.get("id"),
-                                "title": problem.get("title"),
-                                "error": "번역 결과가 유효하지 않음"
-                            })
-                    except Exception as e:
-                        # 번역 중 예외 발생
-                        st.session_state.auto_translation_errors.append({
-                            "problem_id": problem.get("id"),
-                            "title": problem.get("title"),
-                            "error": f"번역 중 오류: {str(e)}"
-                        })
-                    
-                    # API 호출 제한을 위한 대기
-                    # time.sleep(1) 제거 - 성능 개선
-                    
-                except Exception as e:
-                    # 실패 결과 저장
-                    st.session_state.auto_translation_errors.append({
-                        "problem_id": problem.get("id"),
-                        "title": problem.get("title"),
-                        "error": str(e)
-                    })
-                
-                # 다음 문제로 진행
-                st.session_state.auto_translation_current = current_index + 1
-                st.rerun()
+            job = st.session_state.get("auto_translation_job")
+            if job is None:
+                # 같은 문제 목록이면 같은 배치 id → 이전에 성공한 문제는 건너뜀
+                selected_problems = [problems[i] for i in st.session_state.auto_translation_selected if i < len(problems)]
+                job = start_translation_batch(st, checkpoint, selected_problems,
+                                              st.session_state.pop("auto_translation_batch_id", None))
+                if job is None:
+                    st.session_state.auto_translation_running = False
+                    return
             
+            if not job.finished:
+                st.subheader("⚙️ 번역 진행 중...")
+                st.fragment(run_every=TRANSLATION_POLL_INTERVAL)(render_translation_progress)(st, job)
             else:
-                # 번역 완료
-                progress_bar.progress(1.0)
-                status_text.markdown("**✅ 번역 완료!**")
-                
-                st.session_state.auto_translation_running = False
-                
-                st.success(
-                    f"✅ 번역이 완료되었습니다! "
-                    f"(성공: {len(st.session_state.auto_translation_results)}개, "
-                    f"실패: {len(st.session_state.auto_translation_errors)}개)"
-                )
-                
-                # 결과 표시
-                if st.session_state.auto_translation_results:
-                    with st.expander("✅ 성공한 번역", expanded=True):
-                        for result in st.session_state.auto_translation_results:
-                            st.markdown(f"- {result['title'][:70]}...")
-                
-                if st.session_state.auto_translation_errors:
-                    with st.expander("❌ 실패한 번역", expanded=True):
-                        for error in st.session_state.auto_translation_errors:
-                            st.markdown(f"- {error['title'][:70]}...")
-                            st.caption(f"  오류: {error['error']}")
-                            
-                            # 디버깅 정보 표시
-                            if "auto_translation_debug" in st.session_state and error['problem_id'] in st.session_state.auto_translation_debug:
-                                debug_info = st.session_state.auto_translation_debug[error['problem_id']]
-                                with st.expander(f"🔍 {error['title'][:30]}... 디버깅 정보", expanded=False):
-                                    if debug_info.get("steps"):
-                                        st.write("**진행 단계:**")
-                                        for step in debug_info["steps"]:
-                                            st.write(f"• {step}")
-                                    if debug_info.get("errors"):
-                                        st.write("**오류:**")
-                                        for err in debug_info["errors"]:
-                                            st.error(f"• {err}")
-                
-                # 초기화 버튼
-                if st.button("🔄 새로운 번역 시작", key="reset_auto_translation"):
-                    st.session_state.auto_translation_selected = []
-                    st.session_state.auto_translation_results = []
-                    st.session_state.auto_translation_errors = []
-                    st.session_state.auto_translation_current = 0
-                    if "auto_translation_debug" in st.session_state:
-                        del st.session_state.auto_translation_debug
-                    st.rerun()
+                render_translation_report(st, job)
         
         else:
             st.warning("⚠️ 번역할 문제를 선택해주세요")
@@ -324,3 +214,130 @@ def render(st):
     else:
         st.info("💡 문제를 검색하여 번역할 문제를 선택해주세요")
 
+
+def start_translation_batch(st, checkpoint, problems, batch_id=None):
+    """일괄 번역 작업 시작 (모든 문제가 하나의 서비스/Gemini 클라이언트를 공유)"""
+    session = st.session_state
+    # 워커 스레드에서 쓰므로 화면 렌더러 없이 만들고, 진행 상황은 polling으로 표시
+    context = ServiceContext(
+        gemini_model=session.get("selected_gemini_model"),
+        gemini_temperature=session.get("gemini_temperature"),
+        db=session.get("db"),
+        verbose=False,
+        tags={"tab": "translation"},
+    )
+    try:
+        translation_service = TranslationService(GeminiClient.from_context(context), session.db, context=context)
+    except Exception as e:
+        st.error(f"❌ 번역 서비스 초기화 실패: {str(e)}")
+        return None
+    job = TranslationBatch(translation_service, problems, concurrency=session.get("auto_translation_concurrency"),
+                           checkpoint=checkpoint, batch_id=batch_id)
+    session.auto_translation_job = job.start()
+    return job
+
+
+def reset_translation_state(st):
+    """일괄 번역 상태 초기화 (진행 중인 번역이 있으면 중지)"""
+    job = st.session_state.pop("auto_translation_job", None)
+    if job is not None:
+        job.cancel()
+    st.session_state.auto_translation_running = False
+    st.session_state.pop("auto_translation_batch_id", None)
+
+
+def render_translation_progress(st, job):
+    """번역 진행률 표시 (fragment로 주기적 갱신, 끝나면 전체 rerun)"""
+    report = job.report()
+    if report["finished"]:
+        st.rerun()
+    
+    total = report["total"] or 1
+    st.progress(min(1.0, report["completed"] / total))
+    st.caption(f"진행률: {report['completed']}/{report['total']} (성공: {report['success']}, 실패: {report['failed']}, "
+               f"건너뜀: {report['skipped']}) - 경과시간: {report['elapsed']}초 · 동시 번역 {job.concurrency}개")
+    
+    last = report["last"]
+    if last:
+        st.info(f"🔄 최근 완료: {str(last.get('title') or last['problem_id'])[:100]}")
+    
+    if st.button("⏹️ 번역 중지", key="auto_translation_cancel"):
+        job.cancel()
+        st.warning("⏹️ 중지 요청됨 - 진행 중인 번역 요청이 끝나면 중지됩니다.")
+
+
+def render_translation_report(st, job):
+    """일괄 번역 결과 표시"""
+    report = job.report()
+    st.subheader("✅ 번역 완료!" if not report["cancelled"] else "⏹️ 번역 중지됨")
+    st.progress(1.0)
+    
+    st.success(
+        f"✅ 번역이 완료되었습니다! "
+        f"(성공: {report['success']}개, 실패: {report['failed']}개, 재시도 {report['retries']}회)"
+    )
+    if report["cancelled"]:
+        st.warning(f"⏹️ 중지되어 번역하지 않은 문제: {report['cancelled']}개")
+    if report["skipped"]:
+        st.info(f"⏭️ 이전 실행에서 이미 번역된 {report['skipped']}개는 건너뛰었습니다.")
+    st.info(f"⏱️ 총 소요시간: {report['elapsed']}초 (동시 번역 {job.concurrency}개)")
+    if report["batch_id"]:
+        st.download_button("📄 처리 내역 내보내기 (CSV)", data=get_checkpoint_store().export(report["batch_id"]),
+                           file_name=f"{report['batch_id']}.csv", mime="text/csv", key="auto_translation_export")
+    
+    # 결과 표시
+    succeeded = [result for result in report["results"] if result["status"] == "success"]
+    failed = [result for result in report["results"] if result["status"] == "failed"]
+    if succeeded:
+        with st.expander("✅ 성공한 번역", expanded=True):
+            for result in succeeded:
+                st.markdown(f"- {str(result['title'])[:70]}...")
+    
+    if failed:
+        with st.expander("❌ 실패한 번역", expanded=True):
+            for result in failed:
+                st.markdown(f"- {str(result['title'])[:70]}...")
+                st.caption(f"  오류 ({result['stage']} 단계, 재시도 {result['retries']}회): {result['error']}")
+    
+    # 초기화 버튼
+    if st.button("🔄 새로운 번역 시작", key="reset_auto_translation"):
+        reset_translation_state(st)
+        st.session_state.auto_translation_selected = []
+        st.rerun()
+
+
+def render_unfinished_batch(st, checkpoint):
+    """끝나지 않은 번역 배치 안내 (진행 중이면 다시 연결, 중단되었으면 성공한 문제는 건너뛰고 이어서 번역)"""
+    batch = checkpoint.unfinished_batch(BATCH_TRANSLATION)
+    if batch is None:
+        return
+    
+    st.markdown("---")
+    st.subheader("⏸️ 끝나지 않은 번역 배치")
+    st.caption(f"배치 {batch['id']} · 전체 {batch['total']}개 중 성공 {batch['success']}개, "
+               f"실패 {batch['failed']}개, 남은 문제 {batch['remaining']}개 · 최근 실행 {batch['updated_at'][:19]}")
+    active = get_active_translation(batch["id"])
+    col1, col2, col3 = st.columns([1, 1, 1])
+    with col1:
+        if active is not None:
+            if st.button("📊 진행 상황 보기", key="auto_translation_attach"):
+                st.session_state.auto_translation_problems = active.problems
+                st.session_state.auto_translation_selected = list(range(len(active.problems)))
+                st.session_state.auto_translation_job = active
+                st.session_state.auto_translation_running = True
+                st.rerun()
+        elif st.button(f"▶️ 남은 {batch['remaining']}개 이어서 번역", type="primary", key="auto_translation_resume"):
+            reset_translation_state(st)
+            problems = checkpoint.pending_specs(batch["id"])
+            st.session_state.auto_translation_problems = problems
+            st.session_state.auto_translation_selected = list(range(len(problems)))
+            st.session_state.auto_translation_batch_id = batch["id"]
+            st.session_state.auto_translation_running = True
+            st.rerun()
+    with col2:
+        st.download_button("📄 처리 내역 내보내기 (CSV)", data=checkpoint.export(batch["id"]),
+                           file_name=f"{batch['id']}.csv", mime="text/csv", key="auto_translation_batch_export")
+    with col3:
+        if active is None and st.button("🗑️ 배치 기록 삭제", key="auto_translation_batch_delete"):
+            checkpoint.delete_batch(batch["id"])
+            st.rerun()
@@ -3,6 +3,7 @@
 """
 from src.services.translation_service import TranslationService
 from src.services.gemini_client import GeminiClient
+from src.ui.service_events import streamlit_context
 from src.constants import ASSESSMENT_AREAS
 
 def render(st):
@@ -27,7 +28,7 @@ def render(st):
     
     # 제미나이 API 사용 가능 여부 확인
     try:
-        gemini_client = GeminiClient()
+        gemini_client = GeminiClient.from_context(streamlit_context(st))
         if not gemini_client.is_available():
             st.error("❌ 제미나이 API 키가 설정되지 않았습니다")
             return
@@ -37,8 +38,9 @@ def render(st):
     
     # 번역 서비스 초기화
     try:
-        gemini_client = GeminiClient()
-        translation_service = TranslationService(gemini_client, st.session_state.db)
+        gemini_client = GeminiClient.from_context(streamlit_context(st))
+        translation_service = TranslationService(gemini_client, st.session_state.db,
+                                                 context=streamlit_context(st, tags={"tab": "translation"}))
     except Exception as e:
         st.error(f"❌ 번역 서비스 초기화 실패: {str(e)}")
         return
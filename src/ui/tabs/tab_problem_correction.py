@@ -3,10 +3,17 @@
 """
 import streamlit as st
 import json
+import os
 import uuid
-import re
 from datetime import datetime
 from src.constants import ASSESSMENT_AREAS, QUESTION_TYPES, VALID_DIFFICULTIES, DEFAULT_DIFFICULTY, DEFAULT_DOMAIN
+from src.prompts.prompt_registry import CORRECTION_PROMPT, get_prompt_registry
+from src.services.batch_checkpoint import BATCH_CORRECTION, get_checkpoint_store
+from src.services.correction_pipeline import (
+    DEFAULT_CORRECTION_CONCURRENCY, STRUCTURED_TABLE, BatchCorrector, get_active_corrector,
+)
+from src.services.edge_client import MULTIPLE_CHOICE_SUMMARY_FIELDS, SUBJECTIVE_SUMMARY_FIELDS
+from src.services.service_context import ServiceContext
 
 def update_selection(question_index):
     """체크박스 선택 상태를 업데이트하는 함수"""
@@ -240,6 +247,8 @@ SUPABASE_ANON_KEY=your-supabase-anon-key
     
     st.markdown("---")
     
+    # 새로고침/재시작으로 중단된 교정 배치 이어서 실행
+    render_unfinished_batch(st)
     
     # 1단계: 문제 가져오기 및 필터링
     st.markdown("### 문제 가져오기 및 필터링")
@@ -293,56 +302,23 @@ SUPABASE_ANON_KEY=your-supabase-anon-key
         elif correction_status == "교정완료":
             review_done_filter = True
         
-        # 문제 유형에 따라 다른 테이블에서 조회
-        if type_filter == "전체":
-            # 객관식과 주관식 모두 조회
-            mc_filters = {}
-            sub_filters = {}
-            
-            if area_filter != "전체":
-                mc_filters["category"] = ASSESSMENT_AREAS[area_filter]
-                sub_filters["category"] = ASSESSMENT_AREAS[area_filter]
-            
-            if review_done_filter is not None:
-                mc_filters["review_done"] = review_done_filter
-                sub_filters["review_done"] = review_done_filter
-            
-            # 객관식 문제 조회
-            mc_questions = st.session_state.db.get_multiple_choice_questions(mc_filters)
-            for q in mc_questions:
-                q["question_type"] = "multiple_choice"
-            questions.extend(mc_questions)
-            
-            # 주관식 문제 조회
-            sub_questions = st.session_state.db.get_subjective_questions(sub_filters)
-            for q in sub_questions:
-                q["question_type"] = "subjective"
-            questions.extend(sub_questions)
-            
-        elif type_filter == "multiple_choice":
-            filters = {}
-            if area_filter != "전체":
-                filters["category"] = ASSESSMENT_AREAS[area_filter]
-            if review_done_filter is not None:
-                filters["review_done"] = review_done_filter
-            
-            questions = st.session_state.db.get_multiple_choice_questions(filters)
-            for q in questions:
-                q["question_type"] = "multiple_choice"
-                
-        elif type_filter == "subjective":
-            filters = {}
-            if area_filter != "전체":
-                filters["category"] = ASSESSMENT_AREAS[area_filter]
-            if review_done_filter is not None:
-                filters["review_done"] = review_done_filter
-            
-            questions = st.session_state.db.get_subjective_questions(filters)
-            for q in questions:
-                q["question_type"] = "subjective"
+        filters = {}
+        if area_filter != "전체":
+            filters["category"] = ASSESSMENT_AREAS[area_filter]
+        if review_done_filter is not None:
+            filters["review_done"] = review_done_filter
         
-        st.session_state.auto_review_questions = questions
-        st.success(f"총 {len(questions)}개의 문제를 찾았습니다.")
+        # 문제 유형에 따라 다른 테이블에서 조회 (첫 페이지만 먼저 조회, 나머지는 "더 불러오기")
+        question_types = ["multiple_choice", "subjective"] if type_filter == "전체" else [type_filter]
+        st.session_state.auto_review_page_iter = iter_correction_pages(
+            st.session_state.db, question_types, filters
+        )
+        st.session_state.auto_review_questions = []
+        load_next_correction_page(st)
+        questions = st.session_state.auto_review_questions
+        
+        more = " (더 있음)" if st.session_state.get("auto_review_page_iter") is not None else ""
+        st.success(f"총 {len(questions)}개의 문제를 찾았습니다.{more}")
         
         # 기존 선택된 문제 정보 초기화
         if "selected_auto_review_question" in st.session_state:
@@ -359,6 +335,13 @@ SUPABASE_ANON_KEY=your-supabase-anon-key
         st.markdown("### 조회된 문제 목록")
         st.info(f"📊 총 {len(questions)}개의 문제가 조회되었습니다. 원하는 문제를 선택하여 교정할 수 있습니다.")
         
+        # 아직 받지 않은 페이지가 있으면 추가 조회 (기존 선택 인덱스는 그대로 유지됨)
+        if st.session_state.get("auto_review_page_iter") is not None:
+            if st.button("📥 더 불러오기", key="auto_review_load_more"):
+                with st.spinner("다음 페이지를 불러오는 중..."):
+                    load_next_correction_page(st)
+                st.rerun()
+        
         # 조회된 문제 목록을 테이블 형태로 표시 (선택 기능 포함)
         with st.expander("조회된 문제 목록", expanded=True):
             # 선택 상태 초기화 및 유효성 검사
@@ -470,6 +453,20 @@ SUPABASE_ANON_KEY=your-supabase-anon-key
             else:
                 st.warning("⚠️ 교정할 문제를 선택해주세요.")
         
+        # 동시에 보낼 교정 요청 수 (Gemini 속도 제한은 GEMINI_RPM / GEMINI_MAX_CONCURRENCY로 별도 적용)
+        st.number_input("동시 교정 수", min_value=1, max_value=16,
+                        value=int(os.getenv("CORRECTION_CONCURRENCY", DEFAULT_CORRECTION_CONCURRENCY)),
+                        key="auto_review_concurrency")
+        
+        # 교정 프롬프트는 레지스트리에서 공유 (템플릿 파일을 고치면 자동 반영, 버튼으로 즉시 반영)
+        prompt_col1, prompt_col2 = st.columns([3, 1])
+        with prompt_col2:
+            if st.button("🔄 교정 프롬프트 다시 읽기", key="auto_review_prompt_reload"):
+                get_prompt_registry().reload(CORRECTION_PROMPT)
+        with prompt_col1:
+            prompt = get_prompt_registry().get(CORRECTION_PROMPT)
+            st.caption(f"교정 프롬프트 v{prompt.version} · 해시 {prompt.hash} · {len(prompt.text):,}자")
+        
         # 자동 처리 시작 버튼
         col1, col2 = st.columns([1, 1])
         
@@ -491,30 +488,16 @@ SUPABASE_ANON_KEY=your-supabase-anon-key
                         if len(valid_indices) != len(st.session_state.selected_questions):
                             st.session_state.selected_questions = valid_indices
                             st.warning(f"유효하지 않은 선택이 제거되었습니다. {len(valid_indices)}개 문제가 선택되었습니다.")
+                    reset_batch_state(st)
                     st.session_state.auto_review_batch_processing = True
-                    st.session_state.auto_review_batch_progress = {
-                        "total": len(selected_questions),
-                        "completed": 0,
-                        "success": 0,
-                        "failed": 0,
-                        "results": [],
-                        "start_time": datetime.now()
-                    }
                     st.session_state.auto_review_questions = selected_questions  # 선택된 문제만 저장
                     st.rerun()
         
         with col2:
             # 모든 문제 처리 (기존 기능 유지)
             if st.button("🚀 모든 문제 교정 시작", key="auto_review_all_start"):
+                reset_batch_state(st)
                 st.session_state.auto_review_batch_processing = True
-                st.session_state.auto_review_batch_progress = {
-                    "total": len(questions),
-                    "completed": 0,
-                    "success": 0,
-                    "failed": 0,
-                    "results": [],
-                    "start_time": datetime.now()
-                }
                 st.rerun()
         
         # 자동 배치 처리 실행
@@ -524,229 +507,6 @@ SUPABASE_ANON_KEY=your-supabase-anon-key
     
 
 
-def extract_json_from_text(text: str) -> dict:
-    """
-    텍스트에서 JSON 부분을 추출합니다.
-    """
-    if not text:
-        return {}
-    
-    # 1. 먼저 전체 텍스트가 JSON인지 확인
-    try:
-        result = json.loads(text.strip())
-        return result
-    except json.JSONDecodeError:
-        pass
-    
-    # 2. 코드 블록(```json ... ```) 내부의 JSON 추출
-    code_block_pattern = r'```(?:json)?\s*\n?(\{.*?\})\s*\n?```'
-    code_matches = re.findall(code_block_pattern, text, re.DOTALL)
-    
-    for match in code_matches:
-        try:
-            cleaned_match = match.strip()
-            result = json.loads(cleaned_match)
-            return result
-        except json.JSONDecodeError:
-            continue
-    
-    # 3. 더 간단한 코드 블록 패턴도 시도
-    simple_code_pattern = r'```json\s*(\{.*?\})\s*```'
-    simple_matches = re.findall(simple_code_pattern, text, re.DOTALL)
-    for match in simple_matches:
-        try:
-            cleaned_match = match.strip()
-            return json.loads(cleaned_match)
-        except json.JSONDecodeError:
-            continue
-    
-    # 4. 첫 번째 중괄호부터 마지막 중괄호까지 추출
-    first_brace = text.find('{')
-    last_brace = text.rfind('}')
-    
-    if first_brace != -1 and last_brace != -1 and last_brace > first_brace:
-        json_candidate = text[first_brace:last_brace + 1]
-        try:
-            result = json.loads(json_candidate)
-            return result
-        except json.JSONDecodeError:
-            pass
-    
-    # 5. 여러 JSON 객체가 있는 경우 가장 긴 것 선택
-    json_pattern = r'\{[^{}]*(?:\{[^{}]*\}[^{}]*)*\}'
-    matches = re.findall(json_pattern, text, re.DOTALL)
-    
-    # 가장 긴 JSON 후보를 선택
-    longest_match = ""
-    for match in matches:
-        if len(match) > len(longest_match):
-            longest_match = match
-    
-    if longest_match:
-        try:
-            return json.loads(longest_match)
-        except json.JSONDecodeError:
-            pass
-    
-    # 6. 중괄호 개수를 맞춰서 JSON 추출 시도
-    brace_count = 0
-    start_idx = -1
-    
-    for i, char in enumerate(text):
-        if char == '{':
-            if brace_count == 0:
-                start_idx = i
-            brace_count += 1
-        elif char == '}':
-            brace_count -= 1
-            if brace_count == 0 and start_idx != -1:
-                json_candidate = text[start_idx:i + 1]
-                try:
-                    return json.loads(json_candidate)
-                except json.JSONDecodeError:
-                    continue
-    
-    # 7. 플레이스홀더가 있는 JSON 처리 (예: {time_limit})
-    if '{' in text and '}' in text:
-        # 플레이스홀더를 기본값으로 대체하여 JSON 파싱 시도
-        placeholder_replacements = {
-            '{time_limit}': '"5분"',
-            '{difficulty}': f'"{DEFAULT_DIFFICULTY}"',
-            '{category}': f'"{DEFAULT_DOMAIN}"',
-            '{lang}': '"kr"'
-        }
-        
-        # 첫 번째 중괄호부터 마지막 중괄호까지 추출
-        first_brace = text.find('{')
-        last_brace = text.rfind('}')
-        
-        if first_brace != -1 and last_brace != -1 and last_brace > first_brace:
-            json_candidate = text[first_brace:last_brace + 1]
-            
-            # 플레이스홀더 대체
-            for placeholder, replacement in placeholder_replacements.items():
-                json_candidate = json_candidate.replace(placeholder, replacement)
-            
-            try:
-                result = json.loads(json_candidate)
-                return result
-            except json.JSONDecodeError:
-                pass
-    
-    # 8. 주관식 문제의 특수한 경우 처리
-    # 주관식 문제는 때때로 여러 줄에 걸쳐 JSON이 작성될 수 있음
-    lines = text.split('\n')
-    json_lines = []
-    in_json = False
-    brace_count = 0
-    
-    for line in lines:
-        line = line.strip()
-        if line.startswith('{'):
-            in_json = True
-            json_lines = [line]
-            brace_count = line.count('{') - line.count('}')
-        elif in_json:
-            json_lines.append(line)
-            brace_count += line.count('{') - line.count('}')
-            if brace_count == 0:
-                # 중괄호가 균형을 이룰 때까지 수집
-                json_candidate = '\n'.join(json_lines)
-                try:
-                    result = json.loads(json_candidate)
-                    return result
-                except json.JSONDecodeError:
-                    continue
-    
-    # 9. 마지막 시도: 텍스트에서 모든 중괄호 쌍을 찾아서 가장 완전한 JSON 추출
-    if '{' in text and '}' in text:
-        # 중괄호의 위치를 찾아서 가장 완전한 JSON 구조 추출
-        start_pos = text.find('{')
-        if start_pos != -1:
-            # 시작 중괄호부터 끝까지 스캔하여 완전한 JSON 구조 찾기
-            brace_count = 0
-            end_pos = -1
-            
-            for i in range(start_pos, len(text)):
-                if text[i] == '{':
-                    brace_count += 1
-                elif text[i] == '}':
-                    brace_count -= 1
-                    if brace_count == 0:
-                        end_pos = i
-                        break
-            
-            if end_pos != -1:
-                json_candidate = text[start_pos:end_pos + 1]
-                try:
-                    result = json.loads(json_candidate)
-                    return result
-                except json.JSONDecodeError:
-                    pass
-    
-    # 10. 주관식 문제의 특수한 경우: 텍스트에서 JSON 구조를 더 유연하게 추출
-    # 예: "다음은 문제입니다: { ... } 이것이 문제입니다" 같은 형태
-    if '{' in text and '}' in text:
-        # 텍스트를 줄 단위로 분할하여 JSON 구조 찾기
-        lines = text.split('\n')
-        json_candidates = []
-        
-        for i, line in enumerate(lines):
-            if '{' in line:
-                # 이 줄부터 시작하여 JSON 구조 완성 시도
-                json_lines = []
-                brace_count = 0
-                
-                for j in range(i, len(lines)):
-                    current_line = lines[j]
-                    json_lines.append(current_line)
-                    
-                    # 중괄호 개수 계산
-                    brace_count += current_line.count('{') - current_line.count('}')
-                    
-                    if brace_count == 0:
-                        # 중괄호가 균형을 이룰 때까지 수집
-                        json_candidate = '\n'.join(json_lines)
-                        json_candidates.append(json_candidate)
-                        break
-        
-        # 가장 긴 JSON 후보를 선택하여 파싱 시도
-        if json_candidates:
-            longest_candidate = max(json_candidates, key=len)
-            try:
-                result = json.loads(longest_candidate)
-                return result
-            except json.JSONDecodeError:
-                pass
-    
-    # 11. 마지막 시도: 주관식 문제의 특수한 경우 처리
-    # 예: "문제: { ... } 답안: { ... }" 같은 형태에서 첫 번째 JSON만 추출
-    if '{' in text and '}' in text:
-        # 첫 번째 완전한 JSON 구조만 추출
-        start_pos = text.find('{')
-        if start_pos != -1:
-            brace_count = 0
-            end_pos = -1
-            
-            for i in range(start_pos, len(text)):
-                if text[i] == '{':
-                    brace_count += 1
-                elif text[i] == '}':
-                    brace_count -= 1
-                    if brace_count == 0:
-                        end_pos = i
-                        break
-            
-            if end_pos != -1:
-                json_candidate = text[start_pos:end_pos + 1]
-                try:
-                    result = json.loads(json_candidate)
-                    return result
-                except json.JSONDecodeError:
-                    pass
-    
-    return {}
-
 def ensure_array_format(data) -> list:
     """데이터를 올바른 배열 형식으로 변환 (JSONB 호환)"""
     if data is None:
@@ -887,94 +647,6 @@ def map_question_to_qlearn_format(question: dict) -> dict:
     
     return mapped_data
 
-def map_to_structured_problem_format(corrected_data: dict) -> dict:
-    """교정된 데이터를 next_qlearn_problems 테이블 형식으로 매핑"""
-    
-    # 교정된 데이터는 4개 레이어 구조로 반환됨
-    meta_layer = corrected_data.get("meta_layer", {})
-    user_view_layer = corrected_data.get("user_view_layer", {})
-    system_view_layer = corrected_data.get("system_view_layer", {})
-    evaluation_layer = corrected_data.get("evaluation_layer", {})
-    
-    # 현재 시간
-    now = datetime.now()
-    
-    # 날짜 형식 변환 함수
-    def format_timestamp(date_value):
-        """날짜 문자열을 ISO 형식으로 변환"""
-        if not date_value:
-            return now.isoformat()
-        
-        if isinstance(date_value, str):
-            # PostgreSQL timestamp 형식 (예: "2025-10-23 08:50:14.242741+00")을 ISO로 변환
-            if ' ' in date_value and 'T' not in date_value:
-                # 공백이 있고 T가 없으면 PostgreSQL 형식으로 간주
-                try:
-                    # 공백을 T로 변환
-                    iso_string = date_value.replace(' ', 'T')
-                    
-                    # 시간대 형식 정리 (+00 -> +00:00, -00 -> -00:00)
-                    import re
-                    # 끝에 있는 +HH 또는 -HH 형식을 찾아서 +HH:00 또는 -HH:00로 변환
-                    tz_pattern = r'([+-])(\d{2})$'
-                    match = re.search(tz_pattern, iso_string)
-                    if match:
-                        sign = match.group(1)
-                        hours = match.group(2)
-                        iso_string = re.sub(tz_pattern, f'{sign}{hours}:00', iso_string)
-                    elif not ('+' in iso_string or '-' in iso_string[-6:] or iso_string.endswith('Z')):
-                        # 시간대가 없으면 UTC로 가정
-                        iso_string += '+00:00'
-                    
-                    # datetime.fromisoformat으로 파싱 (Python 3.7+)
-                    try:
-                        from datetime import datetime
-                        parsed_date = datetime.fromisoformat(iso_string.replace('Z', '+00:00'))
-                        return parsed_date.isoformat()
-                    except ValueError:
-                        # fromisoformat 실패 시 기본값 사용
-                        return now.isoformat()
-                except Exception as e:
-                    # 파싱 실패 시 기본값 사용
-                    return now.isoformat()
-            else:
-                # 이미 ISO 형식이면 그대로 사용 (파싱 시도)
-                try:
-                    from datetime import datetime
-                    # Z를 +00:00로 변환 후 파싱
-                    iso_value = date_value.replace('Z', '+00:00')
-                    parsed_date = datetime.fromisoformat(iso_value)
-                    return parsed_date.isoformat()
-                except (ValueError, AttributeError):
-                    return now.isoformat()
-        
-        return now.isoformat()
-    
-    # meta_layer에서 필드 추출
-    # meta_layer에 id와 idx가 있으면 제거 (테이블에서 자동 생성)
-    meta_layer_clean = {k: v for k, v in meta_layer.items() if k not in ['id', 'idx']}
-    
-    mapped_data = {
-        # idx는 자동 증가 컬럼이므로 제외
-        "lang": meta_layer_clean.get("lang", "kr"),
-        "category": meta_layer_clean.get("category", ""),
-        "topic": meta_layer_clean.get("topic", []),  # text[] 배열
-        "difficulty": meta_layer_clean.get("difficulty", "normal"),
-        "time_limit": meta_layer_clean.get("time_limit", ""),
-        "target_template_code": meta_layer_clean.get("target_template_code", ""),
-        "training_focus": meta_layer_clean.get("training_focus", []),  # text[] 배열
-        "created_by": meta_layer_clean.get("created_by"),
-        "created_at": format_timestamp(meta_layer_clean.get("created_at")),
-        "updated_at": format_timestamp(meta_layer_clean.get("updated_at")),
-        "active": meta_layer_clean.get("active", True),
-        # JSONB 필드들
-        "user_view_layer": user_view_layer,
-        "system_view_layer": system_view_layer,
-        "evaluation_layer": evaluation_layer,
-    }
-    
-    return mapped_data
-
 def map_multiple_choice_to_qlearn_format(question: dict) -> dict:
     """객관식 문제를 qlearn_problems_multiple 형식으로 매핑"""
     
@@ -1044,389 +716,197 @@ def map_multiple_choice_to_qlearn_format(question: dict) -> dict:
     
     return mapped_data
 
+# 문제 조회 시 한 번에 불러올 문제 수 (전체 테이블을 내려받지 않음)
+CORRECTION_PAGE_SIZE = 100
+
+def iter_correction_pages(db, question_types, filters, page_size=CORRECTION_PAGE_SIZE):
+    """선택한 유형 순서대로 문제 페이지를 지연 조회하는 제너레이터"""
+    for question_type in question_types:
+        if question_type == "multiple_choice":
+            pages = db.iter_multiple_choice_question_pages(dict(filters), page_size, fields=MULTIPLE_CHOICE_SUMMARY_FIELDS)
+        else:
+            pages = db.iter_subjective_question_pages(dict(filters), page_size, fields=SUBJECTIVE_SUMMARY_FIELDS)
+        for page in pages:
+            for q in page:
+                q["question_type"] = question_type
+                q["summary_only"] = True  # 교정 직전에 전체 레코드를 조회
+            yield page
+
+def load_next_correction_page(st):
+    """세션의 페이지 제너레이터에서 다음 페이지를 받아 조회 목록에 추가"""
+    pages = st.session_state.get("auto_review_page_iter")
+    if pages is None:
+        return
+    try:
+        page = next(pages)
+    except StopIteration:
+        page = None
+    except Exception as e:
+        st.error(f"문제 조회 실패: {e}")
+        page = None
+    if page is None:
+        st.session_state.auto_review_page_iter = None
+        return
+    st.session_state.auto_review_questions = st.session_state.get("auto_review_questions", []) + page
+
+# 화면에서 배치 교정 진행 상황을 다시 그리는 주기(초)
+CORRECTION_POLL_INTERVAL = 1.0
+
+def build_batch_context(st):
+    """배치 교정용 컨텍스트 (워커 스레드에서 쓰므로 화면 렌더러 없이 만들고, 진행 상황은 polling으로 표시)"""
+    session = st.session_state
+    return ServiceContext(
+        gemini_model=session.get("selected_gemini_model"),
+        gemini_temperature=session.get("gemini_temperature"),
+        db=session.get("db"),
+        verbose=False,
+        tags={"tab": "problem_correction"},
+    )
+
+def reset_batch_state(st):
+    """배치 교정 상태 초기화 (진행 중인 교정이 있으면 중지)"""
+    corrector = st.session_state.pop("auto_review_corrector", None)
+    if corrector is not None:
+        corrector.cancel()
+    for key in ("auto_review_batch_progress", "auto_review_batch_processing", "auto_review_debug_recorded"):
+        st.session_state.pop(key, None)
+
 def auto_process_all_questions(st, questions):
-    """모든 문제를 자동으로 처리하는 함수"""
+    """문제들을 배치 파이프라인으로 교정 (교정은 백그라운드 스레드에서 진행, 화면은 진행 상황만 조회)"""
+    corrector = st.session_state.get("auto_review_corrector")
+    if corrector is None:
+        from src.services.problem_correction_service import ProblemCorrectionService
+        context = build_batch_context(st)
+        # 모든 문제가 하나의 서비스(Gemini 클라이언트)를 공유
+        correction_service = ProblemCorrectionService(context)
+        if not correction_service.is_available():
+            st.error(f"❌ 교정 서비스를 사용할 수 없습니다: {correction_service.initialization_error}")
+            st.session_state.auto_review_batch_processing = False
+            return
+        corrector = BatchCorrector(
+            correction_service, st.session_state.db,
+            concurrency=st.session_state.get("auto_review_concurrency"),
+            context=context,
+            checkpoint=get_checkpoint_store(),
+            batch_id=st.session_state.pop("auto_review_batch_id", None),
+        )
+        st.session_state.auto_review_corrector = corrector.start(list(questions))
     
-    progress = st.session_state.auto_review_batch_progress
+    if not corrector.finished:
+        st.fragment(run_every=CORRECTION_POLL_INTERVAL)(render_batch_progress)(st, corrector)
+        return
+    render_batch_report(st, corrector)
+
+def render_unfinished_batch(st):
+    """끝나지 않은 교정 배치 안내 (진행 중이면 다시 연결, 중단되었으면 성공한 문제를 건너뛰고 이어서 실행)"""
+    if st.session_state.get("auto_review_batch_processing"):
+        return
+    store = get_checkpoint_store()
+    batch = store.unfinished_batch(BATCH_CORRECTION)
+    if batch is None:
+        return
     
-    # 진행률 표시
-    if progress["completed"] < progress["total"]:
-        progress_bar = st.progress(progress["completed"] / progress["total"])
-        elapsed_time = datetime.now() - progress["start_time"]
-        st.caption(f"진행률: {progress['completed']}/{progress['total']} (성공: {progress['success']}, 실패: {progress['failed']}) - 경과시간: {elapsed_time}")
-        
-        # 현재 처리 중인 문제 표시
-        current_question = questions[progress["completed"]]
-        question_title = current_question.get('problem_title', current_question.get('title', '제목 없음'))
-        st.info(f"🔄 현재 처리 중: {question_title[:100]}...")
-        
-        # 배치 처리 실행
-        with st.spinner(f"자동 처리 중... ({progress['completed'] + 1}/{progress['total']})"):
-            try:
-                # 현재 처리할 문제
-                current_question = questions[progress["completed"]]
-                current_index = progress["completed"]
-                question_type = current_question.get("question_type", "subjective")
-                
-                # 1. 문제 교정 (AI를 통한 교정)
-                from src.services.problem_correction_service import ProblemCorrectionService
-                correction_service = ProblemCorrectionService()
-                
-                if correction_service.is_available():
-                    # 문제를 JSON으로 변환
-                    question_json = json.dumps(current_question, ensure_ascii=False, indent=2)
-                    
-                    # 디버깅: 교정 서비스 상태 확인
-                    st.write("🔍 **교정 서비스 상태 확인**")
-                    with st.expander("📊 교정 서비스 정보", expanded=True):
-                        st.write(f"**서비스 사용 가능**: {correction_service.is_available()}")
-                        st.write(f"**Gemini Client 존재**: {correction_service.gemini_client is not None}")
-                        
-                        # NEW_GENAI_AVAILABLE 확인
-                        try:
-                            from src.services.gemini_client import NEW_GENAI_AVAILABLE
-                            st.write(f"**NEW_GENAI_AVAILABLE**: {NEW_GENAI_AVAILABLE}")
-                            st.write(f"**correct_problem 메서드 존재**: {hasattr(correction_service.gemini_client, 'correct_problem') if correction_service.gemini_client else False}")
-                            
-                            if not NEW_GENAI_AVAILABLE:
-                                st.error("❌ `google-genai` 패키지가 설치되지 않았습니다!")
-                                st.info("💡 해결 방법: `pip install google-genai`를 실행하세요.")
-                            elif not hasattr(correction_service.gemini_client, 'correct_problem'):
-                                st.error("❌ `correct_problem` 메서드가 없습니다!")
-                            else:
-                                st.success("✅ 새로운 `correct_problem` 메서드를 사용할 수 있습니다.")
-                        except Exception as e:
-                            st.error(f"❌ 상태 확인 중 오류: {str(e)}")
-                    
-                    # 교정 실행
-                    st.write("🚀 **교정 실행 중...**")
-                    corrected_result = correction_service.correct_problem(question_json, question_type)
-                    
-                    # 디버깅: 어떤 메서드가 사용되었는지 확인
-                    st.write("📋 **교정 결과 요약**")
-                    with st.expander("🔍 교정 메서드 사용 확인", expanded=True):
-                        # 응답이 레이어 구조인지 확인
-                        import json as json_lib
-                        try:
-                            parsed = json_lib.loads(corrected_result) if isinstance(corrected_result, str) else corrected_result
-                            if isinstance(parsed, dict):
-                                has_layers = "meta_layer" in parsed and "user_view_layer" in parsed
-                                st.write(f"**레이어 구조 포함**: {'✅ 예' if has_layers else '❌ 아니오'}")
-                                if has_layers:
-                                    st.success("✅ `correct_problem` 메서드가 사용되었습니다 (레이어 구조)")
-                                else:
-                                    st.warning("⚠️ `review_content` 메서드가 사용되었습니다 (일반 형식)")
-                                    st.write("**응답 키**:", list(parsed.keys())[:10])
-                                    st.error("❌ **문제**: `google-genai` 패키지가 설치되지 않았거나 `correct_problem` 메서드가 호출되지 않았습니다.")
-                                    st.info("💡 **해결 방법**: `pip install google-genai`를 실행하세요.")
-                        except:
-                            st.warning("⚠️ 응답 파싱 실패 - 메서드 확인 불가")
-                    
-                    # 디버깅 정보를 세션 상태에 저장
-                    debug_info = {
-                        "question_id": current_question.get("id", "unknown"),
-                        "question_title": current_question.get("title", current_question.get("problem_title", "제목 없음")),
-                        "original_data": current_question,
-                        "ai_response": corrected_result,
-                        "timestamp": datetime.now().isoformat()
-                    }
-                    
-                    # 교정 결과에서 JSON 추출
-                    corrected_data = extract_json_from_text(corrected_result)
-                    if not corrected_data:
-                        # 교정 실패 시 교정 결과를 UI에 표시
-                        debug_info["status"] = "parsing_failed"
-                        debug_info["corrected_data"] = None
-                        debug_info["parsing_error"] = "JSON 추출 실패"
-                        corrected_data = current_question  # 교정 실패 시 원본 사용
-                        
-                        # 디버깅: JSON 파싱 실패 상세 정보
-                        st.error("❌ JSON 파싱 실패")
-                        with st.expander("🔍 JSON 파싱 실패 상세 정보", expanded=True):
-                            st.write("**AI 응답 원본 (처음 1000자):**")
-                            st.code(corrected_result[:1000] if corrected_result else "응답 없음")
-                            st.write("**AI 응답 전체 길이:**", len(corrected_result) if corrected_result else 0)
-                    else:
-                        # 교정 성공 시 결과를 UI에 표시
-                        debug_info["status"] = "success"
-                        debug_info["corrected_data"] = corrected_data
-                        
-                        # 디버깅: 교정된 데이터 구조 분석
-                        st.write("🔍 **교정 결과 분석**")
-                        with st.expander("📊 교정된 데이터 구조 분석", expanded=True):
-                            # 데이터 타입 확인
-                            st.write(f"**데이터 타입**: {type(corrected_data).__name__}")
-                            
-                            # 모든 키 확인
-                            if isinstance(corrected_data, dict):
-                                all_keys = list(corrected_data.keys())
-                                st.write(f"**전체 키 목록 ({len(all_keys)}개)**: {all_keys}")
-                                
-                                # 레이어 구조 확인
-                                required_layers = ["meta_layer", "user_view_layer", "system_view_layer", "evaluation_layer"]
-                                st.write("**레이어 구조 확인:**")
-                                for layer in required_layers:
-                                    if layer in corrected_data:
-                                        layer_data = corrected_data[layer]
-                                        layer_type = type(layer_data).__name__
-                                        if isinstance(layer_data, dict):
-                                            layer_keys = list(layer_data.keys())
-                                            st.write(f"  ✅ {layer}: {layer_type} (키: {len(layer_keys)}개) - {layer_keys[:10]}")
-                                        else:
-                                            st.write(f"  ✅ {layer}: {layer_type}")
-                                    else:
-                                        st.write(f"  ❌ {layer}: 없음")
-                                
-                                # 예상치 못한 키 확인
-                                unexpected_keys = [k for k in all_keys if k not in required_layers]
-                                if unexpected_keys:
-                                    st.write(f"**예상치 못한 키**: {unexpected_keys}")
-                            else:
-                                st.error(f"❌ 교정된 데이터가 딕셔너리가 아닙니다: {type(corrected_data)}")
-                    
-                    # 디버깅 정보를 세션 상태에 저장
-                    if "correction_debug_info" not in st.session_state:
-                        st.session_state.correction_debug_info = []
-                    st.session_state.correction_debug_info.append(debug_info)
-                else:
-                    st.warning("⚠️ 교정 서비스 사용 불가 - 원본 데이터 사용")
-                    corrected_data = current_question  # 교정 서비스 사용 불가 시 원본 사용
-                
-                # 2. 교정된 데이터를 next_qlearn_problems 테이블에 저장
-                save_success = False
-                target_table = "next_qlearn_problems"
-                mapped_data = None
-                save_error = None
-                
-                # 교정된 데이터가 레이어 구조인지 확인
-                if "meta_layer" in corrected_data and "user_view_layer" in corrected_data:
-                    # 레이어 구조로 교정된 경우
-                    try:
-                        mapped_data = map_to_structured_problem_format(corrected_data)
-                        
-                        # 디버깅: 매핑된 데이터 확인
-                        st.write("🔍 **디버깅 정보**")
-                        with st.expander("📋 매핑된 데이터 미리보기", expanded=False):
-                            st.json(mapped_data)
-                        
-                        # 필수 필드 확인
-                        required_fields = ["lang", "category", "difficulty", "target_template_code"]
-                        missing_fields = [field for field in required_fields if not mapped_data.get(field)]
-                        if missing_fields:
-                            st.error(f"❌ 필수 필드 누락: {missing_fields}")
-                            save_error = f"필수 필드 누락: {missing_fields}"
-                        else:
-                            # 저장 시도
-                            try:
-                                st.write(f"💾 저장 시도 중... (Edge Function: {st.session_state.db.structured_problems_url})")
-                                save_success = st.session_state.db.save_structured_problem(mapped_data)
-                                if save_success:
-                                    st.success("✅ 저장 성공!")
-                                else:
-                                    st.error("❌ 저장 실패 (응답 없음)")
-                                    save_error = "저장 실패 (응답 없음)"
-                            except Exception as save_ex:
-                                st.error(f"❌ 저장 중 오류 발생: {str(save_ex)}")
-                                save_error = str(save_ex)
-                                save_success = False
-                    except Exception as map_ex:
-                        st.error(f"❌ 데이터 매핑 중 오류: {str(map_ex)}")
-                        save_error = f"매핑 오류: {str(map_ex)}"
-                        save_success = False
-                else:
-                    # 교정 실패 또는 레이어 구조가 아닌 경우
-                    st.error("❌ **레이어 구조 검증 실패**")
-                    
-                    # 상세 분석
-                    with st.expander("🔍 레이어 구조 검증 상세 분석", expanded=True):
-                        # 데이터 타입 확인
-                        st.write(f"**교정된 데이터 타입**: {type(corrected_data).__name__}")
-                        
-                        if isinstance(corrected_data, dict):
-                            # 모든 키 확인
-                            all_keys = list(corrected_data.keys())
-                            st.write(f"**전체 키 목록 ({len(all_keys)}개)**:")
-                            for key in all_keys:
-                                value = corrected_data[key]
-                                value_type = type(value).__name__
-                                if isinstance(value, dict):
-                                    value_keys = list(value.keys())[:5]
-                                    st.write(f"  - `{key}`: {value_type} (키: {list(value.keys())[:10]})")
-                                elif isinstance(value, (list, str)):
-                                    preview = str(value)[:100] + "..." if len(str(value)) > 100 else str(value)
-                                    st.write(f"  - `{key}`: {value_type} (미리보기: {preview})")
-                                else:
-                                    st.write(f"  - `{key}`: {value_type} = {value}")
-                            
-                            # 레이어 구조 확인
-                            required_layers = {
-                                "meta_layer": "필수",
-                                "user_view_layer": "필수",
-                                "system_view_layer": "선택",
-                                "evaluation_layer": "선택"
-                            }
-                            
-                            st.write("**레이어 구조 검증 결과:**")
-                            missing_layers = []
-                            present_layers = []
-                            
-                            for layer, required in required_layers.items():
-                                if layer in corrected_data:
-                                    present_layers.append(layer)
-                                    layer_data = corrected_data[layer]
-                                    if isinstance(layer_data, dict):
-                                        layer_keys = list(layer_data.keys())
-                                        st.write(f"  ✅ {layer} ({required}): 있음 - 키 {len(layer_keys)}개")
-                                        if len(layer_keys) > 0:
-                                            st.write(f"     키 목록: {layer_keys[:15]}")
-                                    else:
-                                        st.write(f"  ⚠️ {layer} ({required}): 있음 (하지만 딕셔너리가 아님: {type(layer_data).__name__})")
-                                else:
-                                    missing_layers.append(layer)
-                                    st.write(f"  ❌ {layer} ({required}): 없음")
-                            
-                            # 원인 분석
-                            st.write("**원인 분석:**")
-                            if not present_layers:
-                                st.error("  - 교정된 데이터에 레이어가 전혀 없습니다.")
-                                st.write("  - 가능한 원인:")
-                                st.write("    1. AI가 레이어 구조로 교정하지 않았을 수 있습니다.")
-                                st.write("    2. JSON 파싱이 잘못되었을 수 있습니다.")
-                                st.write("    3. AI 응답 형식이 예상과 다를 수 있습니다.")
-                            elif len(present_layers) < 2:
-                                st.warning(f"  - 필수 레이어가 부족합니다. (현재: {present_layers}, 필요: meta_layer, user_view_layer)")
-                                st.write("  - 가능한 원인:")
-                                st.write("    1. AI가 일부 레이어만 생성했을 수 있습니다.")
-                                st.write("    2. JSON 파싱 중 일부 데이터가 손실되었을 수 있습니다.")
-                            else:
-                                st.info(f"  - 일부 레이어는 있지만 필수 레이어가 누락되었습니다.")
-                            
-                            # AI 응답 원본 확인
-                            st.write("**AI 응답 원본 확인:**")
-                            if "ai_response" in debug_info:
-                                ai_response = debug_info.get("ai_response", "")
-                                st.code(ai_response[:2000] + "..." if len(ai_response) > 2000 else ai_response)
-                            
-                            # 교정된 데이터 전체 확인
-                            st.write("**교정된 데이터 전체:**")
-                            st.json(corrected_data)
-                        else:
-                            st.error(f"❌ 교정된 데이터가 딕셔너리가 아닙니다: {type(corrected_data)}")
-                            st.write(f"**데이터 값**: {str(corrected_data)[:500]}")
-                    
-                    # 요약
-                    if isinstance(corrected_data, dict):
-                        missing_layers = []
-                        if "meta_layer" not in corrected_data:
-                            missing_layers.append("meta_layer")
-                        if "user_view_layer" not in corrected_data:
-                            missing_layers.append("user_view_layer")
-                        st.warning(f"⚠️ 교정된 데이터가 레이어 구조가 아닙니다. 누락된 레이어: {missing_layers}")
-                        save_error = f"레이어 구조 불일치: 누락된 레이어 {missing_layers}"
-                    else:
-                        st.error(f"⚠️ 교정된 데이터가 딕셔너리가 아닙니다: {type(corrected_data)}")
-                        save_error = f"데이터 타입 오류: {type(corrected_data)}"
-                    save_success = False
-                
-                # 저장 정보를 디버깅 정보에 추가
-                if "correction_debug_info" in st.session_state and st.session_state.correction_debug_info:
-                    latest_debug = st.session_state.correction_debug_info[-1]
-                    latest_debug["mapped_data"] = mapped_data
-                    latest_debug["save_success"] = save_success
-                    latest_debug["save_error"] = save_error
-                    latest_debug["target_table"] = target_table
-                
-                if save_success:
-                    # 저장 성공 시 question_status 테이블의 review_done 상태를 True로 업데이트
-                    try:
-                        update_success = st.session_state.db.update_question_status(
-                            question_id=current_question["id"],
-                            updates={"review_done": True}
-                        )
-                        if update_success:
-                            progress["success"] += 1
-                            progress["results"].append({
-                                "question_id": current_question["id"],
-                                "status": "success",
-                                "message": f"교정 및 {target_table} 테이블 저장 완료, 상태 업데이트 완료"
-                            })
-                        else:
-                            progress["success"] += 1
-                            progress["results"].append({
-                                "question_id": current_question["id"],
-                                "status": "partial_success",
-                                "message": f"교정 및 {target_table} 테이블 저장 완료, 상태 업데이트 실패"
-                            })
-                    except Exception as update_error:
-                        progress["success"] += 1
-                        progress["results"].append({
-                            "question_id": current_question["id"],
-                            "status": "partial_success",
-                            "message": f"교정 및 {target_table} 테이블 저장 완료, 상태 업데이트 오류: {str(update_error)}"
-                        })
-                else:
-                    progress["failed"] += 1
-                    progress["results"].append({
-                        "question_id": current_question["id"],
-                        "status": "failed",
-                        "message": f"{target_table} 테이블 저장 실패"
-                    })
-                
-                # 완료 카운트 증가
-                progress["completed"] += 1
-                
-                # 다음 문제 처리 또는 완료
-                if progress["completed"] < progress["total"]:
-                    st.rerun()  # 다음 문제 처리
-                else:
-                    # 모든 처리 완료
-                    st.session_state.auto_review_batch_processing = False
-                    st.rerun()
-                    
-            except Exception as e:
-                progress["failed"] += 1
-                progress["results"].append({
-                    "question_id": current_question["id"],
-                    "status": "error",
-                    "message": f"처리 중 오류 발생: {str(e)}"
+    st.markdown("### ⏸️ 끝나지 않은 교정 배치")
+    st.caption(f"배치 {batch['id']} · 전체 {batch['total']}개 중 성공 {batch['success']}개, "
+               f"실패 {batch['failed']}개, 남은 문제 {batch['remaining']}개 · 최근 실행 {batch['updated_at'][:19]}")
+    active = get_active_corrector(batch["id"])
+    col1, col2, col3 = st.columns([1, 1, 1])
+    with col1:
+        if active is not None:
+            if st.button("📊 진행 상황 보기", key="auto_review_batch_attach"):
+                st.session_state.auto_review_corrector = active
+                st.session_state.auto_review_questions = store.pending_specs(batch["id"])
+                st.session_state.auto_review_batch_processing = True
+                st.rerun()
+        elif st.button(f"▶️ 남은 {batch['remaining']}개 이어서 교정", type="primary", key="auto_review_batch_resume"):
+            reset_batch_state(st)
+            st.session_state.auto_review_questions = store.pending_specs(batch["id"])
+            st.session_state.auto_review_batch_id = batch["id"]
+            st.session_state.auto_review_batch_processing = True
+            st.rerun()
+    with col2:
+        st.download_button("📄 처리 내역 내보내기 (CSV)", data=store.export(batch["id"]),
+                           file_name=f"{batch['id']}.csv", mime="text/csv", key="auto_review_batch_export")
+    with col3:
+        if active is None and st.button("🗑️ 배치 기록 삭제", key="auto_review_batch_delete"):
+            store.delete_batch(batch["id"])
+            st.rerun()
+    st.markdown("---")
+
+def render_batch_progress(st, corrector):
+    """배치 교정 진행률 표시 (fragment로 주기적 갱신, 끝나면 전체 rerun)"""
+    report = corrector.report()
+    if report["finished"]:
+        st.rerun()
+    
+    total = report["total"] or 1
+    st.progress(min(1.0, report["completed"] / total))
+    st.caption(f"진행률: {report['completed']}/{report['total']} (성공: {report['success']}, 실패: {report['failed']}) - "
+               f"경과시간: {report['elapsed']}초 · 동시 교정 {corrector.concurrency}개")
+    stage_text = " → ".join(f"{name} {stats['processed']}" for name, stats in report["stages"].items())
+    st.caption(f"단계별 처리: {stage_text}")
+    
+    if report["details"]:
+        last = report["details"][-1]
+        st.info(f"🔄 최근 완료: {str(last.get('question_title') or last['question_id'])[:100]}")
+    
+    if st.button("⏹️ 교정 중지", key="auto_review_batch_cancel"):
+        corrector.cancel()
+        st.warning("⏹️ 중지 요청됨 - 진행 중인 교정 요청이 끝나면 중지됩니다.")
+
+def render_batch_report(st, corrector):
+    """배치 교정 결과 보고서 표시"""
+    report = corrector.report()
+    st.session_state.auto_review_batch_processing = False
+    
+    # 파싱/저장 실패 문제는 디버깅 정보에 한 번만 추가
+    if not st.session_state.get("auto_review_debug_recorded"):
+        st.session_state.auto_review_debug_recorded = True
+        debug_info = st.session_state.setdefault("correction_debug_info", [])
+        for detail in report["details"]:
+            if detail["status"] == "failed":
+                debug_info.append({
+                    "question_id": detail["question_id"],
+                    "question_title": detail["question_title"] or "제목 없음",
+                    "ai_response": detail.get("ai_response", ""),
+                    "status": f"{detail['stage']} 단계 실패",
+                    "save_success": False,
+                    "save_error": detail["message"],
+                    "target_table": STRUCTURED_TABLE,
+                    "timestamp": datetime.now().isoformat(),
                 })
-                progress["completed"] += 1
-                
-                if progress["completed"] < progress["total"]:
-                    st.rerun()  # 다음 문제 처리
-                else:
-                    st.session_state.auto_review_batch_processing = False
-                    st.rerun()
     
+    if report["cancelled"]:
+        st.warning(f"⏹️ 교정이 중지되었습니다. (미처리 {report['cancelled']}개)")
     else:
-        # 모든 처리 완료
-        st.session_state.auto_review_batch_processing = False
-        elapsed_time = datetime.now() - progress["start_time"]
-        
         st.success(f"✅ 모든 문제 자동 처리 완료!")
-        st.info(f"📊 처리 결과: 성공 {progress['success']}개, 실패 {progress['failed']}개")
-        st.info(f"⏱️ 총 소요시간: {elapsed_time}")
-        
-        # 결과 상세 표시
-        if progress["results"]:
-            with st.expander("📋 처리 결과 상세"):
-                for i, result in enumerate(progress["results"], 1):
-                    status_emoji = {
-                        "success": "✅",
-                        "partial_success": "⚠️",
-                        "failed": "❌",
-                        "error": "💥"
-                    }.get(result["status"], "❓")
-                    
-                    st.write(f"{i}. {status_emoji} {result['question_id']}: {result['message']}")
-        
-        # 초기화 버튼
-        if st.button("🔄 새로 시작", key="auto_review_batch_reset_v3"):
-            # 배치 처리 상태 초기화
-            if "auto_review_batch_progress" in st.session_state:
-                del st.session_state.auto_review_batch_progress
-            if "auto_review_batch_processing" in st.session_state:
-                del st.session_state.auto_review_batch_processing
-            if "auto_review_questions" in st.session_state:
-                del st.session_state.auto_review_questions
-            st.rerun()
\ No newline at end of file
+    st.info(f"📊 처리 결과: 성공 {report['success']}개, 부분 성공 {report['partial_success']}개, 실패 {report['failed']}개 (재시도 {report['retries']}회)")
+    if report["skipped"]:
+        st.info(f"⏭️ 이전 실행에서 이미 교정된 {report['skipped']}개는 건너뛰었습니다.")
+    st.info(f"⏱️ 총 소요시간: {report['elapsed']}초 (동시 교정 {corrector.concurrency}개)")
+    
+    # 결과 상세 표시
+    if report["details"]:
+        with st.expander("📋 처리 결과 상세"):
+            for i, result in enumerate(report["details"], 1):
+                status_emoji = {
+                    "success": "✅",
+                    "partial_success": "⚠️",
+                    "failed": "❌",
+                    "cancelled": "⏹️",
+                    "skipped": "⏭️"
+                }.get(result["status"], "❓")
+                stage = f" [{result['stage']}]" if result["status"] == "failed" else ""
+                st.write(f"{i}. {status_emoji} {result['question_id']}{stage}: {result['message']} ({result['elapsed']}초)")
+        with st.expander("⚙️ 단계별 처리 통계"):
+            st.json(report["stages"])
+    if report["batch_id"]:
+        st.download_button("📄 처리 내역 내보내기 (CSV)", data=get_checkpoint_store().export(report["batch_id"]),
+                           file_name=f"{report['batch_id']}.csv", mime="text/csv", key="auto_review_report_export")
+    
+    # 초기화 버튼
+    if st.button("🔄 새로 시작", key="auto_review_batch_reset_v3"):
+        reset_batch_state(st)
+        if "auto_review_questions" in st.session_state:
+            del st.session_state.auto_review_questions
+        st.rerun()
@@ -8,39 +8,18 @@ import re
 from datetime import datetime
 from functools import lru_cache
 from src.constants import ASSESSMENT_AREAS, QUESTION_TYPES, VALID_DIFFICULTIES, DEFAULT_DIFFICULTY, DEFAULT_DOMAIN
+from src.services.bank_cache import editable_copy, get_bank_questions
 
 # 캐시 설정
-@st.cache_data(ttl=300)  # 5분 캐시
-def get_cached_review_questions(filters_hash):
-    """캐시된 검토 문제 목록 조회 - 새로운 테이블들에서 통합 조회"""
+def get_cached_review_questions():
+    """검토 문제 목록 조회 - 프로세스 공유 문제 은행의 읽기 전용 뷰 사용"""
     try:
-        # 객관식과 주관식 문제를 모두 조회하여 통합
-        multiple_choice_questions = st.session_state.db.get_multiple_choice_questions({})
-        subjective_questions = st.session_state.db.get_subjective_questions({})
-        
-        # 두 리스트를 통합하고 호환성을 위해 기존 형식으로 변환
-        all_questions = []
-        
-        # 객관식 문제 추가
-        for q in multiple_choice_questions:
-            q['type'] = 'multiple_choice'  # 타입 명시
-            all_questions.append(q)
-        
-        # 주관식 문제 추가
-        for q in subjective_questions:
-            q['type'] = 'subjective'  # 타입 명시
-            all_questions.append(q)
-        
-        return all_questions
+        return get_bank_questions(st.session_state.db)
     except Exception as e:
         st.error(f"문제 조회 실패: {e}")
         # 기존 방식으로 폴백
         return st.session_state.db.get_questions({})
 
-def get_filters_hash(filters):
-    """필터를 해시로 변환하여 캐시 키 생성"""
-    return hash(str(sorted(filters.items())))
-
 def render(st):
     st.header("🔍 문제 검토(JSON)")
     st.caption("생성된 문제의 JSON 형식을 검토하고 qlearn_problems 테이블에 저장합니다. (3단계까지만 수행)")
@@ -96,7 +75,7 @@ def render(st):
         
         # 캐시된 데이터 사용
         with st.spinner("검토 대기 문제를 조회하는 중..."):
-            all_questions = get_cached_review_questions(get_filters_hash(filters))
+            all_questions = get_cached_review_questions()
             
             # 클라이언트 측에서 필터링 (성능 개선)
             questions = []
@@ -113,7 +92,7 @@ def render(st):
                 if filters.get("type") and q.get("type") != filters["type"]:
                     continue
                 
-                questions.append(q)
+                questions.append(editable_copy(q))  # 공유 뷰는 읽기 전용이므로 세션용 깊은 복사본 사용
         
         st.session_state.review_questions = questions
         st.success(f"총 {len(questions)}개의 검토 대기 문제를 찾았습니다.")
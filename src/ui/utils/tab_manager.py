@@ -309,7 +309,7 @@ def force_tab_sync_from_content() -> None:
         7: ["selected_gemini_manual_review_problem", "gemini_manual_review_result"],
         6: ["selected_review_question", "mapped_review_data"],
         5: ["selected_review_question", "mapped_review_data"],
-        4: ["auto_generate_problems", "auto_generate_running"],
+        4: ["auto_generate_job_id"],
         3: ["dashboard_data", "dashboard_filters"],
         2: ["hitl_feedback", "hitl_problems"],
         1: ["bank_problems", "bank_filters"],
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+배치 체크포인트 테스트 (이어서 실행 / 완료된 배치 다시 실행)
+"""
+import json
+
+from src.services.batch_checkpoint import BATCH_CORRECTION, BATCH_DONE, CheckpointStore, batch_id_for
+from src.services.correction_pipeline import BatchCorrector
+
+CORRECTED = json.dumps({
+    "meta_layer": {"lang": "kr", "category": "life", "difficulty": "normal", "target_template_code": "t1"},
+    "user_view_layer": {"title": "교정된 문제"},
+})
+
+
+class _Prompt:
+    hash = "p1"
+
+
+class StubService:
+    """첫 실행에서는 fail_ids 문제의 교정이 실패하는 교정 서비스"""
+
+    def __init__(self, fail_ids=()):
+        self.fail_ids = set(fail_ids)
+        self.calls = []
+
+    def correction_prompt(self):
+        return _Prompt()
+
+    def correct_problem(self, payload, question_type, **kwargs):
+        question_id = json.loads(payload)["id"]
+        self.calls.append(question_id)
+        if question_id in self.fail_ids:
+            return "❌ 교정 실패"
+        return CORRECTED
+
+
+def _questions(*ids):
+    return [{"id": question_id, "question_type": "subjective", "title": question_id} for question_id in ids]
+
+
+def test_resume_skips_completed(tmp_path):
+    store = CheckpointStore(str(tmp_path / "checkpoints.db"))
+    questions = _questions("q1", "q2")
+
+    first = BatchCorrector(StubService(fail_ids={"q2"}), max_retries=0, checkpoint=store).run(questions)
+    assert (first["success"], first["failed"]) == (1, 1)
+
+    # 끝나지 않은 배치는 같은 id로 이어서 실행하고 성공한 문제는 건너뜀
+    service = StubService()
+    second = BatchCorrector(service, max_retries=0, checkpoint=store).run(questions)
+    assert second["batch_id"] == first["batch_id"]
+    assert (second["success"], second["skipped"]) == (1, 1)
+    assert service.calls == ["q2"]
+    assert store.get_batch(second["batch_id"])["status"] == BATCH_DONE
+
+
+def test_rerun_after_done_starts_new_batch(tmp_path):
+    store = CheckpointStore(str(tmp_path / "checkpoints.db"))
+    questions = _questions("q1", "q2")
+
+    first = BatchCorrector(StubService(), checkpoint=store).run(questions)
+    assert first["batch_id"] == batch_id_for(BATCH_CORRECTION, ["q1", "q2"])
+
+    # 이미 끝난 배치는 다시 쓰지 않고 새 배치로 모든 문제를 다시 교정
+    service = StubService()
+    second = BatchCorrector(service, checkpoint=store).run(questions)
+    assert second["batch_id"] != first["batch_id"]
+    assert (second["success"], second["skipped"]) == (2, 0)
+    assert sorted(service.calls) == ["q1", "q2"]
+
+
+def test_explicit_batch_id_resumes_done_batch(tmp_path):
+    store = CheckpointStore(str(tmp_path / "checkpoints.db"))
+    questions = _questions("q1")
+
+    first = BatchCorrector(StubService(), checkpoint=store).run(questions)
+
+    # 배치 id를 지정하면 끝난 배치라도 그 배치를 이어서 실행
+    service = StubService()
+    second = BatchCorrector(service, checkpoint=store, batch_id=first["batch_id"]).run(questions)
+    assert (second["batch_id"], second["skipped"]) == (first["batch_id"], 1)
+    assert service.calls == []
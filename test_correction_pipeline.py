@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+교정 배치 파이프라인 테스트 (스텁 교정 서비스/DB로 단계 흐름 확인)
+"""
+import json
+
+import pytest
+
+from src.services import correction_pipeline
+from src.services.batch_checkpoint import BATCH_DONE, CheckpointStore
+from src.services.correction_pipeline import (
+    RESULT_FAILED, RESULT_PARTIAL, RESULT_SUCCESS, BatchCorrector,
+)
+
+CORRECTED = json.dumps({
+    "meta_layer": {"lang": "kr", "category": "life", "difficulty": "normal", "target_template_code": "t1"},
+    "user_view_layer": {"title": "교정된 문제"},
+})
+
+
+class _Prompt:
+    hash = "p1"
+
+
+class StubService:
+    """responses의 응답을 순서대로 반환하는 교정 서비스 (다 쓰면 마지막 응답 반복)"""
+
+    def __init__(self, *responses):
+        self.responses = list(responses) or [CORRECTED]
+        self.refreshes = []
+
+    def correction_prompt(self):
+        return _Prompt()
+
+    def correct_problem(self, payload, question_type, refresh=False, **kwargs):
+        self.refreshes.append(refresh)
+        return self.responses[min(len(self.refreshes), len(self.responses)) - 1]
+
+
+class StubDB:
+    def __init__(self, save_error=None, status_ok=True):
+        self.save_error = save_error
+        self.status_ok = status_ok
+        self.saved = []
+        self.status_updates = []
+
+    def save_structured_problem(self, problem, context=None):
+        if self.save_error:
+            raise RuntimeError(self.save_error)
+        self.saved.append(problem)
+        return True
+
+    def update_question_statuses(self, updates):
+        self.status_updates.append(dict(updates))
+        return {question_id: self.status_ok for question_id in updates}
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(correction_pipeline, "backoff_delay", lambda *args, **kwargs: 0)
+
+
+def _question(question_id="q1"):
+    return {"id": question_id, "question_type": "subjective", "title": question_id}
+
+
+def test_success_saves_and_updates_status():
+    db = StubDB()
+    report = BatchCorrector(StubService(), db).run([_question()])
+    assert report["success"] == 1
+    assert report["details"][0]["prompt_hash"] == "p1"
+    assert db.saved[0]["target_template_code"] == "t1"
+    assert db.status_updates == [{"q1": {"review_done": True}}]
+
+
+def test_retry_refreshes_cache():
+    service = StubService("❌ 일시적 오류", CORRECTED)
+    report = BatchCorrector(service, max_retries=2).run([_question()])
+    assert report["success"] == 1
+    assert report["retries"] == 1
+    # 첫 시도는 응답 캐시 사용, 재시도는 캐시를 건너뜀
+    assert service.refreshes == [False, True]
+
+
+def test_extract_failure_is_not_retried():
+    service = StubService("교정 결과를 만들 수 없습니다")
+    db = StubDB()
+    report = BatchCorrector(service, db, max_retries=2).run([_question()])
+    detail = report["details"][0]
+    assert (report["failed"], detail["status"], detail["stage"]) == (1, RESULT_FAILED, "extract")
+    assert detail["ai_response"] == "교정 결과를 만들 수 없습니다"
+    assert service.refreshes == [False]
+    assert db.saved == [] and db.status_updates == []
+
+
+def test_save_failure_is_retried_then_failed():
+    db = StubDB(save_error="Edge error 500")
+    report = BatchCorrector(StubService(), db, max_retries=2).run([_question()])
+    detail = report["details"][0]
+    assert (detail["status"], detail["stage"], detail["retries"]) == (RESULT_FAILED, "save", 2)
+    assert "Edge error 500" in detail["message"]
+    assert db.status_updates == []
+
+
+def test_partial_resumes_at_status_stage(tmp_path):
+    store = CheckpointStore(str(tmp_path / "checkpoints.db"))
+    db = StubDB(status_ok=False)
+    first = BatchCorrector(StubService(), db, checkpoint=store).run([_question()])
+    assert first["details"][0]["status"] == RESULT_PARTIAL
+    assert len(db.saved) == 1
+
+    # 이어서 실행하면 교정/저장 없이 상태 업데이트만 다시 시도
+    db.status_ok = True
+    service = StubService()
+    second = BatchCorrector(service, db, checkpoint=store).run([_question()])
+    assert second["batch_id"] == first["batch_id"]
+    assert second["details"][0]["status"] == RESULT_SUCCESS
+    assert service.refreshes == []
+    assert len(db.saved) == 1
+    assert len(db.status_updates) == 2
+    assert store.get_batch(second["batch_id"])["status"] == BATCH_DONE
@@ -0,0 +1,31 @@
+#!/usr/bin/env python3
+"""
+extract_json_from_text 함수 테스트 (교정 응답에서 JSON 추출)
+"""
+
+from src.constants import DEFAULT_DIFFICULTY, DEFAULT_DOMAIN
+from src.services.correction_pipeline import extract_json_from_text
+
+
+def test_plain_json():
+    assert extract_json_from_text('{"a": 1}') == {"a": 1}
+
+
+def test_code_block():
+    text = '교정 결과입니다.\n```json\n{"meta_layer": {"lang": "kr"}}\n```'
+    assert extract_json_from_text(text) == {"meta_layer": {"lang": "kr"}}
+
+
+def test_placeholder_replacement():
+    # 프롬프트의 플레이스홀더가 그대로 남은 응답은 기본값으로 대체해서 파싱
+    text = 'result: {"difficulty": {difficulty}, "category": {category}, "time_limit": {time_limit}, "x": 1}'
+    assert extract_json_from_text(text) == {
+        "difficulty": DEFAULT_DIFFICULTY,
+        "category": DEFAULT_DOMAIN,
+        "time_limit": "5분",
+        "x": 1,
+    }
+
+
+def test_empty_text():
+    assert extract_json_from_text("") == {}